@@ -1,7 +1,7 @@
 """AI Agents for NOC operations."""
-from ai_service.agents.triager import triage_agent
+from ai_service.agents.triager import triage_agent, triage_agent_batch, async_triage_agent
 from ai_service.agents.triager_state import triage_agent_state
-from ai_service.agents.resolution_copilot import resolution_copilot_agent
+from ai_service.agents.resolution_copilot import resolution_copilot_agent, async_resolution_copilot_agent
 from ai_service.agents.resolution_copilot_state import resolution_agent_state
 from ai_service.agents.langgraph_wrapper import (
     create_triage_graph,
@@ -12,8 +12,11 @@ from ai_service.agents.langgraph_wrapper import (
 
 __all__ = [
     "triage_agent",
+    "triage_agent_batch",
+    "async_triage_agent",
     "triage_agent_state",
     "resolution_copilot_agent",
+    "async_resolution_copilot_agent",
     "resolution_agent_state",
     "create_triage_graph",
     "create_resolution_graph",
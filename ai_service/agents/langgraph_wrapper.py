@@ -16,8 +16,7 @@ Usage:
 from typing import Dict, Any, TypedDict, Annotated, Optional
 from langgraph.graph import StateGraph, END
 from ai_service.core import get_logger, get_retrieval_config, get_workflow_config
-from retrieval.hybrid_search import hybrid_search
-from ai_service.agents.triager import apply_retrieval_preferences, format_evidence_chunks
+from ai_service.agents.triager import apply_retrieval_preferences, format_evidence_chunks, retrieve_context
 from ai_service.llm_client import call_llm_for_triage, call_llm_for_resolution
 from ai_service.repositories import IncidentRepository
 from ai_service.policy import get_policy_from_config, get_resolution_policy
@@ -76,13 +75,14 @@ def create_triage_graph():
         fulltext_weight = retrieval_cfg.get("fulltext_weight", 0.3)
         
         # Retrieve context
-        context_chunks = hybrid_search(
+        context_chunks = retrieve_context(
             query_text=query_text,
             service=service_val,
             component=component_val,
             limit=retrieval_limit,
             vector_weight=vector_weight,
-            fulltext_weight=fulltext_weight
+            fulltext_weight=fulltext_weight,
+            retrieval_cfg=retrieval_cfg
         )
         
         # Apply retrieval preferences
@@ -277,13 +277,14 @@ def create_resolution_graph():
         fulltext_weight = resolution_retrieval_cfg.get("fulltext_weight", 0.3)
         
         # Retrieve context
-        context_chunks = hybrid_search(
+        context_chunks = retrieve_context(
             query_text=query_text,
             service=service_val,
             component=component_val,
             limit=retrieval_limit,
             vector_weight=vector_weight,
-            fulltext_weight=fulltext_weight
+            fulltext_weight=fulltext_weight,
+            retrieval_cfg=resolution_retrieval_cfg
         )
         
         # Apply retrieval preferences
@@ -1,7 +1,10 @@
 """Resolution Copilot Agent - Generates resolution steps for incidents."""
+import asyncio
 from datetime import datetime
 from typing import Dict, Any, Optional
-from ai_service.llm_client import call_llm_for_triage, call_llm_for_resolution
+from ai_service.llm_client import (
+    call_llm_for_triage, call_llm_for_resolution, async_call_llm_for_triage, async_call_llm_for_resolution
+)
 from ai_service.repositories import IncidentRepository
 from ai_service.core import IncidentNotFoundError
 from ai_service.policy import get_policy_from_config, get_resolution_policy
@@ -9,8 +12,10 @@ from ai_service.guardrails import validate_triage_output, validate_resolution_ou
 from ai_service.core import (
     get_retrieval_config, get_workflow_config, get_logger, ApprovalRequiredError
 )
-from retrieval.hybrid_search import hybrid_search
-from ai_service.agents.triager import format_evidence_chunks, apply_retrieval_preferences
+from ai_service.agents.triager import (
+    format_evidence_chunks, apply_retrieval_preferences, retrieve_context, async_retrieve_context,
+    append_influxdb_logs
+)
 
 logger = get_logger(__name__)
 
@@ -44,6 +49,67 @@ def resolution_copilot_agent(
     return _resolution_copilot_agent_internal(incident_id, alert)
 
 
+async def async_resolution_copilot_agent(
+    incident_id: Optional[str] = None,
+    alert: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Async Resolution Copilot Agent for async routes.
+    
+    Retrieval (triage-first and resolution) uses async_retrieve_context and both LLM
+    calls use the shared AsyncOpenAI client, so they run on the event loop. Incident
+    loading, approval checks, InfluxDB logs and storage go through synchronous
+    clients and run in a worker thread.
+    
+    Args:
+        incident_id: Optional incident ID to fetch existing incident
+        alert: Optional alert dictionary (used if incident_id not provided)
+    
+    Returns:
+        Same as resolution_copilot_agent()
+    """
+    logger.info(f"Starting resolution: incident_id={incident_id}")
+    evidence_warning = None
+    
+    repository = IncidentRepository()
+    if incident_id:
+        alert_dict, triage_output, existing_policy_band = await asyncio.to_thread(
+            _load_incident, repository, incident_id
+        )
+    else:
+        alert_dict = _alert_for_triage(alert)
+        triage_retrieval_cfg, search_args = _triage_search_args(alert_dict)
+        context_chunks = await async_retrieve_context(retrieval_cfg=triage_retrieval_cfg, **search_args)
+        if not context_chunks:
+            evidence_warning = await asyncio.to_thread(_triage_evidence_warning)
+        triage_output = await async_call_llm_for_triage(alert_dict, context_chunks)
+        incident_id, existing_policy_band = await asyncio.to_thread(
+            _store_triage, repository, alert_dict, triage_output
+        )
+    
+    triage_output, existing_policy_band = await asyncio.to_thread(
+        _check_approval, repository, incident_id, triage_output, existing_policy_band
+    )
+    
+    retrieval_config, search_args = _resolution_search_args(alert_dict)
+    context_chunks = await async_retrieve_context(retrieval_cfg=retrieval_config, **search_args)
+    context_chunks = apply_retrieval_preferences(context_chunks, retrieval_config)
+    context_chunks = await asyncio.to_thread(
+        append_influxdb_logs, context_chunks, search_args["query_text"],
+        search_args["service"], search_args["component"]
+    )
+    if not context_chunks:
+        await asyncio.to_thread(_raise_no_resolution_context)
+    logger.info(f"Context validation passed: {len(context_chunks)} chunks retrieved for resolution")
+    
+    resolution_output = await async_call_llm_for_resolution(alert_dict, triage_output, context_chunks)
+    
+    return await asyncio.to_thread(
+        _finish_resolution, repository, incident_id, triage_output, existing_policy_band,
+        resolution_output, context_chunks, retrieval_config, search_args, evidence_warning
+    )
+
+
 def _resolution_copilot_agent_internal(
     incident_id: Optional[str] = None,
     alert: Optional[Dict[str, Any]] = None
@@ -51,113 +117,176 @@ def _resolution_copilot_agent_internal(
     """Internal resolution copilot agent implementation (called by resolution_copilot_agent with metrics)."""
     logger.info(f"Starting resolution: incident_id={incident_id}")
     
-    # Initialize warning variables
+    # Only set in the triage-first path (no incident_id)
     evidence_warning = None
-    resolution_evidence_warning = None
     
     # Get incident
     repository = IncidentRepository()
     if incident_id:
-        try:
-            incident = repository.get_by_id(incident_id)
-        except IncidentNotFoundError as e:
-            logger.error(f"Incident not found: {incident_id}")
-            raise
-        alert_dict = incident["raw_alert"]
-        triage_output = incident["triage_output"]
-        existing_policy_band = incident.get("policy_band")
-        logger.debug(f"Using existing incident: {incident_id}, policy_band={existing_policy_band}")
-        # evidence_warning is not used in this path (only in triage-first path), but ensure it's None
-        evidence_warning = None
+        alert_dict, triage_output, existing_policy_band = _load_incident(repository, incident_id)
     else:
-        if not alert:
-            logger.error("Resolution called without incident_id or alert")
-            raise ValueError("Either incident_id or alert required")
-        alert_dict = alert.copy()
-        if isinstance(alert_dict.get("ts"), datetime):
-            alert_dict["ts"] = alert_dict["ts"].isoformat()
-        elif "ts" not in alert_dict:
-            alert_dict["ts"] = datetime.utcnow().isoformat()
-        
-        logger.info("Performing triage first (no incident_id provided)")
-        
-        # Get retrieval config for triage (when doing triage first)
-        retrieval_config_all = get_retrieval_config()
-        if retrieval_config_all is None:
-            retrieval_config_all = {}
-        triage_retrieval_cfg = retrieval_config_all.get("triage", {})
-        triage_limit = triage_retrieval_cfg.get("limit", 5)
-        triage_vector_weight = triage_retrieval_cfg.get("vector_weight", 0.7)
-        triage_fulltext_weight = triage_retrieval_cfg.get("fulltext_weight", 0.3)
+        alert_dict = _alert_for_triage(alert)
         
         # Perform triage first
-        query_text = f"{alert.get('title', '')} {alert.get('description', '')}"
-        labels = alert.get("labels", {}) or {}
-        context_chunks = hybrid_search(
-            query_text=query_text,
-            service=labels.get("service") if isinstance(labels, dict) else None,
-            component=labels.get("component") if isinstance(labels, dict) else None,
-            limit=triage_limit,
-            vector_weight=triage_vector_weight,
-            fulltext_weight=triage_fulltext_weight
-        )
+        triage_retrieval_cfg, search_args = _triage_search_args(alert_dict)
+        context_chunks = retrieve_context(retrieval_cfg=triage_retrieval_cfg, **search_args)
         
         # Check if we have evidence - if not, proceed with warning
-        # Note: evidence_warning already initialized at function start, but we reset it here for triage-first path
-        if len(context_chunks) == 0:
-            from db.connection import get_db_connection
-            try:
-                conn = get_db_connection()
-                cur = conn.cursor()
-                cur.execute("SELECT COUNT(*) as count FROM documents")
-                result = cur.fetchone()
-                doc_count = result["count"] if isinstance(result, dict) else result[0]
-                conn.close()
-                
-                if doc_count == 0:
-                    # No data in database at all
-                    evidence_warning = (
-                        "No historical data found in knowledge base. "
-                        "Resolution generated without context. "
-                        "Please ingest historical data (alerts, incidents, runbooks, logs) for better results. "
-                        "Use: python scripts/data/generate_fake_data.py --all --count 20"
-                    )
-                    logger.warning(evidence_warning)
-                else:
-                    # Data exists but no matching chunks found
-                    evidence_warning = (
-                        f"No matching evidence found for resolution. "
-                        f"Database has {doc_count} documents, but none match the context. "
-                        "Resolution generated without relevant historical evidence. "
-                        "Please ensure relevant historical data is ingested for better results."
-                    )
-                    logger.warning(evidence_warning)
-            except Exception as e:
-                # If we can't check the database, proceed with warning
-                evidence_warning = f"Cannot verify database state: {e}. Proceeding without evidence validation."
-                logger.warning(evidence_warning)
+        if not context_chunks:
+            evidence_warning = _triage_evidence_warning()
         
         triage_output = call_llm_for_triage(alert_dict, context_chunks)
+        incident_id, existing_policy_band = _store_triage(repository, alert_dict, triage_output)
+    
+    # Check policy handling and approval requirements (raises ApprovalRequiredError)
+    triage_output, existing_policy_band = _check_approval(
+        repository, incident_id, triage_output, existing_policy_band
+    )
+    
+    # Retrieve runbook context (prefer runbooks)
+    retrieval_config, search_args = _resolution_search_args(alert_dict)
+    context_chunks = retrieve_context(retrieval_cfg=retrieval_config, **search_args)
+    
+    # Apply retrieval preferences (prefer_types, max_per_type)
+    context_chunks = apply_retrieval_preferences(context_chunks, retrieval_config)
+    
+    # Optionally retrieve logs from InfluxDB if configured
+    context_chunks = append_influxdb_logs(
+        context_chunks, search_args["query_text"], search_args["service"], search_args["component"]
+    )
+    
+    logger.debug(f"Retrieved {len(context_chunks)} context chunks for resolution")
+    
+    # Check if we have evidence for resolution - STRICT VALIDATION: Require minimum context
+    # Resolution requires runbooks, so we need at least 1 chunk (preferably runbook)
+    if not context_chunks:
+        _raise_no_resolution_context()
+    
+    logger.info(f"Context validation passed: {len(context_chunks)} chunks retrieved for resolution")
+    
+    # Call LLM for resolution
+    resolution_output = call_llm_for_resolution(alert_dict, triage_output, context_chunks)
+    
+    return _finish_resolution(
+        repository, incident_id, triage_output, existing_policy_band,
+        resolution_output, context_chunks, retrieval_config, search_args, evidence_warning
+    )
+
+
+def _load_incident(repository: IncidentRepository, incident_id: str):
+    """Return (alert, triage_output, policy_band) of an existing incident."""
+    try:
+        incident = repository.get_by_id(incident_id)
+    except IncidentNotFoundError:
+        logger.error(f"Incident not found: {incident_id}")
+        raise
+    existing_policy_band = incident.get("policy_band")
+    logger.debug(f"Using existing incident: {incident_id}, policy_band={existing_policy_band}")
+    return incident["raw_alert"], incident["triage_output"], existing_policy_band
+
+
+def _alert_for_triage(alert: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Copy of the alert with an ISO timestamp, for the triage-first path."""
+    if not alert:
+        logger.error("Resolution called without incident_id or alert")
+        raise ValueError("Either incident_id or alert required")
+    alert_dict = alert.copy()
+    if isinstance(alert_dict.get("ts"), datetime):
+        alert_dict["ts"] = alert_dict["ts"].isoformat()
+    elif "ts" not in alert_dict:
+        alert_dict["ts"] = datetime.utcnow().isoformat()
+    
+    logger.info("Performing triage first (no incident_id provided)")
+    return alert_dict
+
+
+def _triage_search_args(alert_dict: Dict[str, Any]):
+    """Return (triage retrieval config, retrieve_context() arguments) for the triage-first path."""
+    triage_retrieval_cfg = (get_retrieval_config() or {}).get("triage", {})
+    labels = alert_dict.get("labels", {}) or {}
+    return triage_retrieval_cfg, {
+        "query_text": f"{alert_dict.get('title', '')} {alert_dict.get('description', '')}",
+        "service": labels.get("service") if isinstance(labels, dict) else None,
+        "component": labels.get("component") if isinstance(labels, dict) else None,
+        "limit": triage_retrieval_cfg.get("limit", 5),
+        "vector_weight": triage_retrieval_cfg.get("vector_weight", 0.7),
+        "fulltext_weight": triage_retrieval_cfg.get("fulltext_weight", 0.3),
+    }
+
+
+def _triage_evidence_warning() -> str:
+    """Warning for a triage-first resolution whose triage found no context."""
+    from db.connection import get_db_connection
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) as count FROM documents")
+        result = cur.fetchone()
+        doc_count = result["count"] if isinstance(result, dict) else result[0]
+        conn.close()
         
-        # Validate triage output
-        is_valid, validation_errors = validate_triage_output(triage_output)
-        if not is_valid:
-            logger.error(f"Triage validation failed during resolution: {validation_errors}")
-            raise ValueError(f"Triage output validation failed: {', '.join(validation_errors)}")
-        
-        # Run policy gate after triage
-        policy_decision = get_policy_from_config(triage_output)
-        existing_policy_band = policy_decision.get("policy_band", "REVIEW")
-        
-        incident_id = repository.create(
-            alert=alert_dict,
-            triage_output=triage_output,
-            policy_band=existing_policy_band,
-            policy_decision=policy_decision
-        )
-        logger.info(f"Created new incident: {incident_id}, policy_band={existing_policy_band}")
+        if doc_count == 0:
+            # No data in database at all
+            evidence_warning = (
+                "No historical data found in knowledge base. "
+                "Resolution generated without context. "
+                "Please ingest historical data (alerts, incidents, runbooks, logs) for better results. "
+                "Use: python scripts/data/generate_fake_data.py --all --count 20"
+            )
+        else:
+            # Data exists but no matching chunks found
+            evidence_warning = (
+                f"No matching evidence found for resolution. "
+                f"Database has {doc_count} documents, but none match the context. "
+                "Resolution generated without relevant historical evidence. "
+                "Please ensure relevant historical data is ingested for better results."
+            )
+    except Exception as e:
+        # If we can't check the database, proceed with warning
+        evidence_warning = f"Cannot verify database state: {e}. Proceeding without evidence validation."
+    logger.warning(evidence_warning)
+    return evidence_warning
+
+
+def _store_triage(repository: IncidentRepository, alert_dict: Dict[str, Any], triage_output: Dict[str, Any]):
+    """Validate the triage-first output, run the policy gate and create the incident.
+    
+    Returns:
+        (incident_id, policy_band)
+    """
+    # Validate triage output
+    is_valid, validation_errors = validate_triage_output(triage_output)
+    if not is_valid:
+        logger.error(f"Triage validation failed during resolution: {validation_errors}")
+        raise ValueError(f"Triage output validation failed: {', '.join(validation_errors)}")
+    
+    # Run policy gate after triage
+    policy_decision = get_policy_from_config(triage_output)
+    existing_policy_band = policy_decision.get("policy_band", "REVIEW")
     
-    # Check policy handling and approval requirements
+    incident_id = repository.create(
+        alert=alert_dict,
+        triage_output=triage_output,
+        policy_band=existing_policy_band,
+        policy_decision=policy_decision
+    )
+    logger.info(f"Created new incident: {incident_id}, policy_band={existing_policy_band}")
+    return incident_id, existing_policy_band
+
+
+def _check_approval(
+    repository: IncidentRepository,
+    incident_id: str,
+    triage_output: Dict[str, Any],
+    existing_policy_band: Optional[str]
+):
+    """
+    Resolve the incident's policy and raise ApprovalRequiredError unless it allows resolution.
+    
+    Returns:
+        (triage_output, policy_band), refreshed from the stored incident since feedback
+        may have edited them after triage
+    """
     workflow_cfg = get_workflow_config() or {}
     resolution_requires_approval = bool(workflow_cfg.get("resolution_requires_approval", False))
     
@@ -209,16 +338,16 @@ def _resolution_copilot_agent_internal(
         logger.info(error_msg)
         raise ApprovalRequiredError(error_msg)
     
-    # Get retrieval config for resolution
-    retrieval_config_all = get_retrieval_config()
-    if retrieval_config_all is None:
-        retrieval_config_all = {}
-    retrieval_config = retrieval_config_all.get("resolution", {})
+    return triage_output, existing_policy_band
+
+
+def _resolution_search_args(alert_dict: Dict[str, Any]):
+    """Return (resolution retrieval config, retrieve_context() arguments) for runbook-heavy retrieval."""
+    retrieval_config = (get_retrieval_config() or {}).get("resolution", {})
     retrieval_limit = retrieval_config.get("limit", 10)
     vector_weight = retrieval_config.get("vector_weight", 0.6)
     fulltext_weight = retrieval_config.get("fulltext_weight", 0.4)
     
-    # Retrieve runbook context (prefer runbooks)
     query_text = f"{alert_dict.get('title', '')} {alert_dict.get('description', '')} resolution steps runbook"
     labels = alert_dict.get("labels") or {}
     
@@ -226,95 +355,71 @@ def _resolution_copilot_agent_internal(
         f"Retrieving context for resolution: query='{query_text[:100]}...', "
         f"limit={retrieval_limit}, vector_weight={vector_weight}, fulltext_weight={fulltext_weight}"
     )
-    
-    # Retrieve context
-    context_chunks = hybrid_search(
-        query_text=query_text,
-        service=labels.get("service") if isinstance(labels, dict) else None,
-        component=labels.get("component") if isinstance(labels, dict) else None,
-        limit=retrieval_limit,
-        vector_weight=vector_weight,
-        fulltext_weight=fulltext_weight
-    )
-    
-    # Apply retrieval preferences (prefer_types, max_per_type)
-    context_chunks = apply_retrieval_preferences(context_chunks, retrieval_config)
-    
-    # Optionally retrieve logs from InfluxDB if configured
+    return retrieval_config, {
+        "query_text": query_text,
+        "service": labels.get("service") if isinstance(labels, dict) else None,
+        "component": labels.get("component") if isinstance(labels, dict) else None,
+        "limit": retrieval_limit,
+        "vector_weight": vector_weight,
+        "fulltext_weight": fulltext_weight,
+    }
+
+
+def _raise_no_resolution_context() -> None:
+    """Raise ValueError explaining why resolution has no context (checks how many documents are ingested)."""
+    from db.connection import get_db_connection
     try:
-        from retrieval.influxdb_client import get_influxdb_client
-        influxdb_client = get_influxdb_client()
-        if influxdb_client.is_configured():
-            logs = influxdb_client.get_logs_for_context(
-                query_text=query_text,
-                service=service_val,
-                component=component_val,
-                limit=5  # Small limit for logs
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) as count FROM documents")
+        result = cur.fetchone()
+        doc_count = result["count"] if isinstance(result, dict) else result[0]
+        conn.close()
+        
+        if doc_count == 0:
+            # No data in database at all - FAIL
+            error_msg = (
+                "Cannot generate resolution without context. "
+                "No historical data found in knowledge base. "
+                "Please ingest runbooks and historical incidents first. "
+                "Use: python scripts/data/ingest_runbooks.py and python scripts/data/ingest_servicenow_tickets.py"
             )
-            # Convert logs to chunk-like format for consistency
-            for log_content in logs:
-                if log_content:
-                    context_chunks.append({
-                        "chunk_id": f"influxdb_log_{len(context_chunks)}",
-                        "content": f"[Log Entry]\n{log_content}",
-                        "doc_type": "log",
-                        "source": "influxdb"
-                    })
-    except Exception as e:
-        logger.debug(f"InfluxDB log retrieval not available or failed: {str(e)}")
-    
-    logger.debug(f"Retrieved {len(context_chunks)} context chunks for resolution")
-    
-    # Check if we have evidence for resolution - STRICT VALIDATION: Require minimum context
-    # Resolution requires runbooks, so we need at least 1 chunk (preferably runbook)
-    MIN_REQUIRED_CHUNKS = 1  # Require at least 1 chunk for resolution
-    
-    if len(context_chunks) < MIN_REQUIRED_CHUNKS:
-        from db.connection import get_db_connection
-        try:
-            conn = get_db_connection()
-            cur = conn.cursor()
-            cur.execute("SELECT COUNT(*) as count FROM documents")
-            result = cur.fetchone()
-            doc_count = result["count"] if isinstance(result, dict) else result[0]
-            conn.close()
-            
-            if doc_count == 0:
-                # No data in database at all - FAIL
-                error_msg = (
-                    "Cannot generate resolution without context. "
-                    "No historical data found in knowledge base. "
-                    "Please ingest runbooks and historical incidents first. "
-                    "Use: python scripts/data/ingest_runbooks.py and python scripts/data/ingest_servicenow_tickets.py"
-                )
-                logger.error(error_msg)
-                raise ValueError(error_msg)
-            else:
-                # Data exists but no matching chunks found - FAIL
-                error_msg = (
-                    f"Cannot generate resolution without context. "
-                    f"Database has {doc_count} documents, but none match the resolution context. "
-                    "Resolution requires runbooks or similar historical incidents. "
-                    "This may be due to metadata mismatch (service/component filters). "
-                    "Please ensure relevant runbooks are ingested with matching metadata, "
-                    "or adjust the alert labels to match existing document metadata."
-                )
-                logger.error(error_msg)
-                raise ValueError(error_msg)
-        except ValueError:
-            # Re-raise ValueError (our validation errors)
-            raise
-        except Exception as e:
-            # If we can't check the database, fail safely
-            error_msg = f"Cannot verify database state: {e}. Cannot proceed without context validation."
             logger.error(error_msg)
             raise ValueError(error_msg)
-    
-    logger.info(f"Context validation passed: {len(context_chunks)} chunks retrieved for resolution")
-    
-    # Call LLM for resolution
-    resolution_output = call_llm_for_resolution(alert_dict, triage_output, context_chunks)
-    
+        else:
+            # Data exists but no matching chunks found - FAIL
+            error_msg = (
+                f"Cannot generate resolution without context. "
+                f"Database has {doc_count} documents, but none match the resolution context. "
+                "Resolution requires runbooks or similar historical incidents. "
+                "This may be due to metadata mismatch (service/component filters). "
+                "Please ensure relevant runbooks are ingested with matching metadata, "
+                "or adjust the alert labels to match existing document metadata."
+            )
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+    except ValueError:
+        # Re-raise ValueError (our validation errors)
+        raise
+    except Exception as e:
+        # If we can't check the database, fail safely
+        error_msg = f"Cannot verify database state: {e}. Cannot proceed without context validation."
+        logger.error(error_msg)
+        raise ValueError(error_msg)
+
+
+def _finish_resolution(
+    repository: IncidentRepository,
+    incident_id: str,
+    triage_output: Dict[str, Any],
+    existing_policy_band: Optional[str],
+    resolution_output: Dict[str, Any],
+    context_chunks: list,
+    retrieval_config: dict,
+    search_args: dict,
+    evidence_warning: Optional[str]
+) -> Dict[str, Any]:
+    """Enforce provenance, validate the LLM resolution and store it with its evidence."""
     # ENFORCE provenance: Must reference actual chunks from context
     # If LLM didn't provide provenance, auto-populate from context chunks
     if not resolution_output.get("provenance"):
@@ -375,10 +480,8 @@ def _resolution_copilot_agent_internal(
         raise ValueError(f"Resolution output validation failed: {', '.join(validation_errors)}")
     
     # Policy decision already exists from triage
-    if incident_id:
-        # Get existing policy decision from database
-        incident = repository.get_by_id(incident_id)
-        policy_decision = incident.get("policy_decision", {}) if incident else {}
+    incident = repository.get_by_id(incident_id)
+    policy_decision = incident.get("policy_decision", {}) if incident else {}
     
     if not policy_decision:
         # Fallback: compute policy from severity and risk level
@@ -391,12 +494,12 @@ def _resolution_copilot_agent_internal(
     # Format evidence chunks for storage
     resolution_evidence = format_evidence_chunks(
         context_chunks,
-        retrieval_method="hybrid_search",
+        retrieval_method=retrieval_config.get("method", "hybrid_search"),
         retrieval_params={
-            "query_text": query_text,
-            "service": labels.get("service") if isinstance(labels, dict) else None,
-            "component": labels.get("component") if isinstance(labels, dict) else None,
-            "limit": retrieval_limit
+            "query_text": search_args["query_text"],
+            "service": search_args["service"],
+            "component": search_args["component"],
+            "limit": search_args["limit"]
         }
     )
     
@@ -425,14 +528,8 @@ def _resolution_copilot_agent_internal(
         "evidence_chunks": resolution_evidence
     }
     
-    # Add warning if no evidence was found (for triage or resolution)
-    # Note: evidence_warning is only set in triage-first path (when incident_id not provided)
-    # resolution_evidence_warning is set in the normal resolution path (when incident_id is provided)
-    # Both are initialized to None at function start, so safe to check
-    if resolution_evidence_warning is not None:
-        result["warning"] = resolution_evidence_warning
-    elif evidence_warning is not None:
+    # Add warning if the triage-first path found no evidence
+    if evidence_warning is not None:
         result["warning"] = evidence_warning
     
     return result
-
@@ -2,9 +2,7 @@
 from datetime import datetime
 from typing import Dict, Any, Optional
 
-from retrieval.hybrid_search import hybrid_search
-
-from ai_service.agents.triager import format_evidence_chunks, apply_retrieval_preferences
+from ai_service.agents.triager import format_evidence_chunks, apply_retrieval_preferences, async_retrieve_context
 from ai_service.core import (
     get_logger,
     get_retrieval_config,
@@ -37,6 +35,9 @@ async def resolution_agent_state(
     if not incident_id:
         raise ValueError("State-based resolution requires an incident_id")
 
+    return await _resolution_agent_state_internal(incident_id, alert, use_state_bus)
+
+
 async def _resolution_agent_state_internal(
     incident_id: str,
     alert: Optional[Dict[str, Any]] = None,
@@ -102,6 +103,15 @@ async def _resolution_agent_state_internal(
     )
     labels = alert_dict.get("labels") or {}
 
+    context_chunks = await async_retrieve_context(
+        query_text=query_text,
+        service=labels.get("service") if isinstance(labels, dict) else None,
+        component=labels.get("component") if isinstance(labels, dict) else None,
+        limit=retrieval_limit,
+        vector_weight=vector_weight,
+        fulltext_weight=fulltext_weight,
+        retrieval_cfg=resolution_cfg
+    )
     context_chunks = apply_retrieval_preferences(context_chunks, resolution_cfg)
     state.context_chunks = context_chunks
     state.context_chunks_count = len(context_chunks)
@@ -1,14 +1,19 @@
 """Triager Agent - Analyzes and triages alerts."""
+import asyncio
 from datetime import datetime
-from typing import Dict, Any
-from ai_service.llm_client import call_llm_for_triage
+from typing import Dict, Any, List, Optional
+from ai_service.llm_client import call_llm_for_triage, async_call_llm_for_triage
 from ai_service.repositories import IncidentRepository
 from ai_service.policy import get_policy_from_config
 from ai_service.guardrails import validate_triage_output
 from ai_service.core import (
     get_retrieval_config, get_workflow_config, get_logger
 )
-from retrieval.hybrid_search import hybrid_search
+from retrieval.hybrid_search import (
+    hybrid_search, hybrid_search_many, mmr_search, mmr_rerank, async_hybrid_search, async_mmr_search
+)
+from retrieval.rerank import rerank_chunks
+from retrieval.neighbor_expansion import expand_neighbor_chunks, async_expand_neighbor_chunks
 
 logger = get_logger(__name__)
 
@@ -33,6 +38,7 @@ def format_evidence_chunks(context_chunks: list, retrieval_method: str = "hybrid
             "chunk_id": chunk.get("chunk_id"),
             "document_id": chunk.get("document_id"),
             "doc_title": chunk.get("doc_title"),
+            "chunk_indices": chunk.get("chunk_indices"),
             "content": chunk.get("content", "")[:500],
             "provenance": {
                 "source_type": source_type,
@@ -44,7 +50,8 @@ def format_evidence_chunks(context_chunks: list, retrieval_method: str = "hybrid
             "scores": {
                 "vector_score": chunk.get("vector_score"),
                 "fulltext_score": chunk.get("fulltext_score"),
-                "rrf_score": chunk.get("rrf_score")
+                "rrf_score": chunk.get("rrf_score"),
+                "rerank_score": chunk.get("rerank_score")
             }
         })
     if type_counts:
@@ -53,17 +60,174 @@ def format_evidence_chunks(context_chunks: list, retrieval_method: str = "hybrid
     return formatted
 
 
+def retrieve_context(
+    query_text: str,
+    service: Optional[str],
+    component: Optional[str],
+    limit: int,
+    vector_weight: float,
+    fulltext_weight: float,
+    retrieval_cfg: dict
+) -> list:
+    """
+    Retrieve context chunks with the retrieval method configured for an agent.
+    
+    `method` in the agent's section of config/retrieval.json selects "hybrid_search"
+    (default, RRF-ranked) or "mmr_search" (RRF candidates re-selected for diversity
+    using chunk embeddings, tuned by `mmr_diversity`). When `rerank` is enabled, a wider
+    candidate pool is fetched and reranked down to `rerank.top_n` chunks. When
+    `neighbor_expansion` is enabled, each hit is merged with its adjacent chunks. When
+    `two_stage` is enabled, only chunks of the top documents (by summary embedding)
+    are searched. `recency` (max age / half-life per doc_type) is applied in SQL, and
+    `doc_types` limits the search to those chunk partitions.
+    """
+    fetch_limit, top_n = rerank_limits(limit, retrieval_cfg)
+    if retrieval_cfg.get("method") == "mmr_search":
+        chunks = mmr_search(
+            query_text=query_text,
+            service=service,
+            component=component,
+            limit=fetch_limit,
+            diversity=retrieval_cfg.get("mmr_diversity", 0.5),
+            vector_weight=vector_weight,
+            fulltext_weight=fulltext_weight,
+            ef_search=retrieval_cfg.get("ef_search"),
+            probes=retrieval_cfg.get("probes"),
+            document_limit=two_stage_document_limit(retrieval_cfg),
+            recency=retrieval_cfg.get("recency"),
+            doc_types=retrieval_cfg.get("doc_types")
+        )
+    else:
+        chunks = hybrid_search(
+            query_text=query_text,
+            service=service,
+            component=component,
+            limit=fetch_limit,
+            vector_weight=vector_weight,
+            fulltext_weight=fulltext_weight,
+            ef_search=retrieval_cfg.get("ef_search"),
+            probes=retrieval_cfg.get("probes"),
+            document_limit=two_stage_document_limit(retrieval_cfg),
+            recency=retrieval_cfg.get("recency"),
+            doc_types=retrieval_cfg.get("doc_types")
+        )
+    if top_n is not None:
+        chunks = rerank_chunks(query_text, chunks, retrieval_cfg["rerank"], top_n)
+    return expand_neighbors(chunks, retrieval_cfg)
+
+
+async def async_retrieve_context(
+    query_text: str,
+    service: Optional[str],
+    component: Optional[str],
+    limit: int,
+    vector_weight: float,
+    fulltext_weight: float,
+    retrieval_cfg: dict
+) -> list:
+    """Async variant of retrieve_context() (async_hybrid_search / async_mmr_search)."""
+    fetch_limit, top_n = rerank_limits(limit, retrieval_cfg)
+    if retrieval_cfg.get("method") == "mmr_search":
+        chunks = await async_mmr_search(
+            query_text=query_text,
+            service=service,
+            component=component,
+            limit=fetch_limit,
+            diversity=retrieval_cfg.get("mmr_diversity", 0.5),
+            vector_weight=vector_weight,
+            fulltext_weight=fulltext_weight,
+            ef_search=retrieval_cfg.get("ef_search"),
+            probes=retrieval_cfg.get("probes"),
+            document_limit=two_stage_document_limit(retrieval_cfg),
+            recency=retrieval_cfg.get("recency"),
+            doc_types=retrieval_cfg.get("doc_types")
+        )
+    else:
+        chunks = await async_hybrid_search(
+            query_text=query_text,
+            service=service,
+            component=component,
+            limit=fetch_limit,
+            vector_weight=vector_weight,
+            fulltext_weight=fulltext_weight,
+            ef_search=retrieval_cfg.get("ef_search"),
+            probes=retrieval_cfg.get("probes"),
+            document_limit=two_stage_document_limit(retrieval_cfg),
+            recency=retrieval_cfg.get("recency"),
+            doc_types=retrieval_cfg.get("doc_types")
+        )
+    if top_n is not None:
+        # Cross-encoder scoring is CPU-bound; keep it off the event loop
+        chunks = await asyncio.to_thread(rerank_chunks, query_text, chunks, retrieval_cfg["rerank"], top_n)
+    expansion_cfg = retrieval_cfg.get("neighbor_expansion") or {}
+    if not expansion_cfg.get("enabled") or not chunks:
+        return chunks
+    try:
+        return await async_expand_neighbor_chunks(
+            chunks,
+            window=expansion_cfg.get("window", 1),
+            max_window_tokens=expansion_cfg.get("max_window_tokens", 800)
+        )
+    except Exception as e:
+        logger.warning(f"Neighbor chunk expansion failed, using unexpanded chunks: {e}")
+        return chunks
+
+
+def rerank_limits(limit: int, retrieval_cfg: dict):
+    """
+    Return (fetch_limit, top_n) for an agent's retrieval.
+    
+    Without an enabled `rerank` section this is (limit, None). With one, `rerank.candidates`
+    chunks are fetched and reranked down to `rerank.top_n` (never more than limit).
+    """
+    rerank_cfg = retrieval_cfg.get("rerank") or {}
+    if not rerank_cfg.get("enabled"):
+        return limit, None
+    fetch_limit = max(limit, rerank_cfg.get("candidates", limit * 3))
+    top_n = min(limit, rerank_cfg.get("top_n", limit))
+    return fetch_limit, top_n
+
+
+def two_stage_document_limit(retrieval_cfg: dict) -> Optional[int]:
+    """Top documents searched when `two_stage` is enabled (None = search all chunks)."""
+    two_stage_cfg = retrieval_cfg.get("two_stage") or {}
+    if not two_stage_cfg.get("enabled"):
+        return None
+    return two_stage_cfg.get("top_documents", 20)
+
+
+def expand_neighbors(chunks: list, retrieval_cfg: dict) -> list:
+    """
+    Merge each hit with its adjacent chunks when `neighbor_expansion` is enabled.
+    
+    Expansion is best-effort: on failure the unexpanded hits are returned.
+    """
+    expansion_cfg = retrieval_cfg.get("neighbor_expansion") or {}
+    if not expansion_cfg.get("enabled") or not chunks:
+        return chunks
+    try:
+        return expand_neighbor_chunks(
+            chunks,
+            window=expansion_cfg.get("window", 1),
+            max_window_tokens=expansion_cfg.get("max_window_tokens", 800)
+        )
+    except Exception as e:
+        logger.warning(f"Neighbor chunk expansion failed, using unexpanded chunks: {e}")
+        return chunks
+
+
 def apply_retrieval_preferences(context_chunks: list, retrieval_cfg: dict) -> list:
     """Apply retrieval preferences (prefer_types, max_per_type) to context chunks."""
     prefer_types = retrieval_cfg.get("prefer_types", [])
     max_per_type = retrieval_cfg.get("max_per_type", {})
     
     if prefer_types:
-        # Light re-ranking boost
+        # Light re-ranking boost (on the reranker's score when a rerank stage ran)
+        score_key = "rerank_score" if any("rerank_score" in ch for ch in context_chunks) else "rrf_score"
         for ch in context_chunks:
             if ch.get("doc_type") in prefer_types:
-                ch["rrf_score"] = (ch.get("rrf_score") or 0.0) + 0.05
-        context_chunks = sorted(context_chunks, key=lambda c: c.get("rrf_score") or 0.0, reverse=True)
+                ch[score_key] = (ch.get(score_key) or 0.0) + 0.05
+        context_chunks = sorted(context_chunks, key=lambda c: c.get(score_key) or 0.0, reverse=True)
     
     if max_per_type:
         taken = []
@@ -100,53 +264,174 @@ def triage_agent(alert: Dict[str, Any]) -> Dict[str, Any]:
     return _triage_agent_internal(alert)
 
 
-def _triage_agent_internal(alert: Dict[str, Any]) -> Dict[str, Any]:
-    """Internal triage agent implementation."""
-    # Convert alert timestamp if needed
-    if isinstance(alert.get("ts"), datetime):
-        alert["ts"] = alert["ts"].isoformat()
-    elif "ts" not in alert:
-        alert["ts"] = datetime.utcnow().isoformat()
+async def async_triage_agent(alert: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Async Triager Agent for async routes.
     
-    # Retrieve context
-    query_text = f"{alert.get('title', '')} {alert.get('description', '')}"
-    labels = alert.get("labels", {}) or {}
-    service_val = labels.get("service") if isinstance(labels, dict) else None
-    component_val = labels.get("component") if isinstance(labels, dict) else None
+    Retrieval (primary and runbook fallback) uses async_hybrid_search and the LLM call
+    uses the shared AsyncOpenAI client, so both run on the event loop. The remaining
+    blocking steps (InfluxDB logs, the document-count check and IncidentRepository
+    storage) go through synchronous clients and run in a worker thread.
     
+    Args:
+        alert: Alert dictionary with title, description, labels, etc.
+    
+    Returns:
+        Same as triage_agent()
+    """
+    _normalize_alert_ts(alert)
+    query_text, service_val, component_val = _build_triage_query(alert)
     logger.info(
         f"Starting triage: query_text='{query_text[:100]}...', "
         f"service={service_val}, component={component_val}"
     )
-    
-    # Get retrieval config for triage
     retrieval_cfg = (get_retrieval_config() or {}).get("triage", {})
-    retrieval_limit = retrieval_cfg.get("limit", 5)
-    vector_weight = retrieval_cfg.get("vector_weight", 0.7)
-    fulltext_weight = retrieval_cfg.get("fulltext_weight", 0.3)
+    search_args = _triage_search_args(query_text, retrieval_cfg)
     
-    # Retrieve context (primary pass: service/component filtered, all doc types, runbook-preferred via config)
-    context_chunks = hybrid_search(
-        query_text=query_text,
-        service=service_val,
-        component=component_val,
-        limit=retrieval_limit,
-        vector_weight=vector_weight,
-        fulltext_weight=fulltext_weight
+    context_chunks = await async_retrieve_context(service=service_val, component=component_val, **search_args)
+    context_chunks = apply_retrieval_preferences(context_chunks, retrieval_cfg)
+    context_chunks = await asyncio.to_thread(
+        append_influxdb_logs, context_chunks, query_text, service_val, component_val
     )
     
-    # Apply retrieval preferences (prefer_types, max_per_type)
-    context_chunks = apply_retrieval_preferences(context_chunks, retrieval_cfg)
+    fallback_used = False
+    if not context_chunks:
+        _log_fallback_start()
+        try:
+            fallback_chunks = await async_retrieve_context(
+                service=None, component=None, **_fallback_search_args(search_args)
+            )
+            context_chunks = _runbook_fallback_chunks(fallback_chunks, retrieval_cfg)
+            fallback_used = bool(context_chunks)
+        except Exception as e:
+            logger.warning(f"Runbook-focused fallback search failed: {e}")
     
-    # Optionally retrieve logs from InfluxDB if configured
+    if context_chunks:
+        evidence_warning = None
+        triage_output = await async_call_llm_for_triage(alert, context_chunks)
+    else:
+        evidence_warning = await asyncio.to_thread(_no_evidence_warning)
+        triage_output = None
+    
+    return await asyncio.to_thread(
+        _finish_triage, alert, context_chunks, triage_output, fallback_used, evidence_warning,
+        retrieval_cfg, query_text, service_val, component_val
+    )
+
+
+def triage_agent_batch(alerts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Triage a burst of alerts together.
+    
+    Primary retrieval for all alerts runs through hybrid_search_many(), so the burst
+    costs one embedding call and one database round trip instead of one per alert.
+    Each alert then goes through the normal triage flow with its prefetched context.
+    
+    Args:
+        alerts: List of alert dictionaries
+    
+    Returns:
+        List of per-alert results (same order as alerts). A failed alert yields
+        {"alert_id": ..., "error": ...} instead of aborting the whole batch.
+    """
+    if not alerts:
+        return []
+    
+    retrieval_cfg = (get_retrieval_config() or {}).get("triage", {})
+    fetch_limit, top_n = rerank_limits(retrieval_cfg.get("limit", 5), retrieval_cfg)
+    use_mmr = retrieval_cfg.get("method") == "mmr_search"
+    queries = []
+    for idx, alert in enumerate(alerts):
+        query_text, service_val, component_val = _build_triage_query(alert)
+        queries.append({
+            "key": idx,
+            "query_text": query_text,
+            "service": service_val,
+            "component": component_val,
+            # MMR needs a wider candidate pool to select from (same as mmr_search)
+            "limit": fetch_limit * 3 if use_mmr else fetch_limit,
+            "vector_weight": retrieval_cfg.get("vector_weight", 0.7),
+            "fulltext_weight": retrieval_cfg.get("fulltext_weight", 0.3),
+            "ef_search": retrieval_cfg.get("ef_search"),
+            "probes": retrieval_cfg.get("probes"),
+            "document_limit": two_stage_document_limit(retrieval_cfg),
+            "recency": retrieval_cfg.get("recency"),
+            "doc_types": retrieval_cfg.get("doc_types"),
+        })
+    
+    prefetched = hybrid_search_many(queries, include_embeddings=use_mmr)
+    if use_mmr:
+        diversity = retrieval_cfg.get("mmr_diversity", 0.5)
+        prefetched = {
+            key: mmr_rerank(chunks, limit=fetch_limit, diversity=diversity)
+            for key, chunks in prefetched.items()
+        }
+    if top_n is not None:
+        prefetched = {
+            key: rerank_chunks(queries[key]["query_text"], chunks, retrieval_cfg["rerank"], top_n)
+            for key, chunks in prefetched.items()
+        }
+    prefetched = {key: expand_neighbors(chunks, retrieval_cfg) for key, chunks in prefetched.items()}
+    logger.info(f"Batch triage: prefetched context for {len(alerts)} alerts in one round trip")
+    
+    results = []
+    for idx, alert in enumerate(alerts):
+        try:
+            results.append(_triage_agent_internal(alert, prefetched_chunks=prefetched.get(idx, [])))
+        except Exception as e:
+            logger.error(f"Batch triage failed for alert {alert.get('alert_id')}: {e}", exc_info=True)
+            results.append({"alert_id": alert.get("alert_id"), "error": str(e)})
+    return results
+
+
+def _build_triage_query(alert: Dict[str, Any]):
+    """Build (query_text, service, component) for triage retrieval from an alert."""
+    query_text = f"{alert.get('title', '')} {alert.get('description', '')}"
+    labels = alert.get("labels", {}) or {}
+    service_val = labels.get("service") if isinstance(labels, dict) else None
+    component_val = labels.get("component") if isinstance(labels, dict) else None
+    return query_text, service_val, component_val
+
+
+def _normalize_alert_ts(alert: Dict[str, Any]) -> None:
+    """Store the alert timestamp as an ISO string (now, when the alert has none)."""
+    if isinstance(alert.get("ts"), datetime):
+        alert["ts"] = alert["ts"].isoformat()
+    elif "ts" not in alert:
+        alert["ts"] = datetime.utcnow().isoformat()
+
+
+def _triage_search_args(query_text: str, retrieval_cfg: dict) -> dict:
+    """retrieve_context() arguments (other than service/component) for the primary triage search."""
+    return {
+        "query_text": query_text,
+        "limit": retrieval_cfg.get("limit", 5),
+        "vector_weight": retrieval_cfg.get("vector_weight", 0.7),
+        "fulltext_weight": retrieval_cfg.get("fulltext_weight", 0.3),
+        "retrieval_cfg": retrieval_cfg,
+    }
+
+
+def _fallback_search_args(search_args: dict) -> dict:
+    """Runbook fallback search arguments: same query, twice the limit."""
+    return {**search_args, "limit": search_args["limit"] * 2}
+
+
+def append_influxdb_logs(
+    context_chunks: list,
+    query_text: str,
+    service: Optional[str],
+    component: Optional[str]
+) -> list:
+    """Append recent InfluxDB log entries as chunk-like dicts when InfluxDB is configured."""
     try:
         from retrieval.influxdb_client import get_influxdb_client
         influxdb_client = get_influxdb_client()
         if influxdb_client.is_configured():
             logs = influxdb_client.get_logs_for_context(
                 query_text=query_text,
-                service=service_val,
-                component=component_val,
+                service=service,
+                component=component,
                 limit=5  # Small limit for logs
             )
             # Convert logs to chunk-like format for consistency
@@ -160,6 +445,107 @@ def _triage_agent_internal(alert: Dict[str, Any]) -> Dict[str, Any]:
                     })
     except Exception as e:
         logger.debug(f"InfluxDB log retrieval not available or failed: {str(e)}")
+    return context_chunks
+
+
+def _log_fallback_start() -> None:
+    logger.info(
+        "No context found in primary triage search; attempting runbook-focused fallback search "
+        "with relaxed service/component filters."
+    )
+
+
+def _runbook_fallback_chunks(fallback_chunks: list, retrieval_cfg: dict) -> list:
+    """
+    Keep only the runbook chunks of the relaxed fallback search.
+    
+    Incidents/logs are still useful, but runbooks are the primary source of resolution
+    steps. Returns an empty list when no runbook matched.
+    """
+    # Re-apply retrieval preferences (runbooks will be preferred if configured)
+    fallback_chunks = apply_retrieval_preferences(fallback_chunks, retrieval_cfg)
+    runbook_chunks = [
+        ch for ch in fallback_chunks
+        if (ch.get("doc_type") or (ch.get("metadata") or {}).get("doc_type")) == "runbook"
+    ]
+    if runbook_chunks:
+        logger.info(
+            f"Runbook-focused fallback search succeeded; using {len(runbook_chunks)} "
+            "runbook chunk(s) as context for triage."
+        )
+    else:
+        logger.info(
+            "Runbook-focused fallback search did not find any matching runbooks; "
+            "proceeding with empty context and generic REVIEW."
+        )
+    return runbook_chunks
+
+
+def _no_evidence_warning() -> str:
+    """Warning for a triage without context, based on how many documents are ingested."""
+    doc_count = None
+    try:
+        from db.connection import get_db_connection
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) as count FROM documents")
+        result = cur.fetchone()
+        doc_count = result["count"] if isinstance(result, dict) else result[0]
+        conn.close()
+    except Exception as e:
+        logger.warning(f"Could not check document count: {e}")
+
+    if doc_count is None:
+        return "No matching context found (could not verify database). Manual review required."
+    if doc_count == 0:
+        return (
+            "No historical data found in knowledge base. Please ingest runbooks/incidents/logs. "
+            "Proceeding with REVIEW and confidence=0.0."
+        )
+    return (
+        f"No matching evidence found. Database has {doc_count} documents, but none match the alert context. "
+        "Proceeding with REVIEW and confidence=0.0. Please align service/component metadata or ingest matching data."
+    )
+
+
+def _triage_agent_internal(
+    alert: Dict[str, Any],
+    prefetched_chunks: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """
+    Internal triage agent implementation.
+    
+    Args:
+        alert: Alert dictionary
+        prefetched_chunks: Primary-search context already retrieved by triage_agent_batch();
+            when None, the primary hybrid_search is issued here
+    """
+    # Convert alert timestamp if needed
+    _normalize_alert_ts(alert)
+    
+    # Retrieve context
+    query_text, service_val, component_val = _build_triage_query(alert)
+    
+    logger.info(
+        f"Starting triage: query_text='{query_text[:100]}...', "
+        f"service={service_val}, component={component_val}"
+    )
+    
+    # Get retrieval config for triage
+    retrieval_cfg = (get_retrieval_config() or {}).get("triage", {})
+    search_args = _triage_search_args(query_text, retrieval_cfg)
+    
+    # Retrieve context (primary pass: service/component filtered, all doc types, runbook-preferred via config)
+    if prefetched_chunks is not None:
+        context_chunks = list(prefetched_chunks)
+    else:
+        context_chunks = retrieve_context(service=service_val, component=component_val, **search_args)
+    
+    # Apply retrieval preferences (prefer_types, max_per_type)
+    context_chunks = apply_retrieval_preferences(context_chunks, retrieval_cfg)
+    
+    # Optionally retrieve logs from InfluxDB if configured
+    context_chunks = append_influxdb_logs(context_chunks, query_text, service_val, component_val)
     
     logger.debug(f"Retrieved {len(context_chunks)} context chunks for triage (primary search)")
     
@@ -167,81 +553,51 @@ def _triage_agent_internal(alert: Dict[str, Any]) -> Dict[str, Any]:
     # This ensures we still try to propose a resolution grounded in runbooks when possible.
     fallback_used = False
     if not context_chunks:
-        logger.info(
-            "No context found in primary triage search; attempting runbook-focused fallback search "
-            "with relaxed service/component filters."
-        )
+        _log_fallback_start()
         try:
             # Broaden search by dropping service/component filters, but keep query text the same.
-            fallback_chunks = hybrid_search(
-                query_text=query_text,
-                service=None,
-                component=None,
-                limit=retrieval_limit * 2,
-                vector_weight=vector_weight,
-                fulltext_weight=fulltext_weight
-            )
-            # Re-apply retrieval preferences (runbooks will be preferred if configured)
-            fallback_chunks = apply_retrieval_preferences(fallback_chunks, retrieval_cfg)
-            # Keep only runbook chunks for this fallback; incidents/logs are still useful but
-            # runbooks are the primary source of resolution steps.
-            runbook_chunks = [
-                ch for ch in fallback_chunks
-                if (ch.get("doc_type") or (ch.get("metadata") or {}).get("doc_type")) == "runbook"
-            ]
-            if runbook_chunks:
-                context_chunks = runbook_chunks
-                fallback_used = True
-                logger.info(
-                    f"Runbook-focused fallback search succeeded; using {len(context_chunks)} "
-                    "runbook chunk(s) as context for triage."
-                )
-            else:
-                logger.info(
-                    "Runbook-focused fallback search did not find any matching runbooks; "
-                    "proceeding with empty context and generic REVIEW."
-                )
+            fallback_chunks = retrieve_context(service=None, component=None, **_fallback_search_args(search_args))
+            context_chunks = _runbook_fallback_chunks(fallback_chunks, retrieval_cfg)
+            fallback_used = bool(context_chunks)
         except Exception as e:
             logger.warning(f"Runbook-focused fallback search failed: {e}")
     
     # Check if we have evidence - allow REVIEW fallback when missing
-    evidence_warning = None
-    MIN_REQUIRED_CHUNKS = 1
-    context_missing = len(context_chunks) < MIN_REQUIRED_CHUNKS
+    if context_chunks:
+        evidence_warning = None
+        # Call LLM for triage
+        logger.debug("Calling LLM for triage...")
+        triage_output = call_llm_for_triage(alert, context_chunks)
+    else:
+        evidence_warning = _no_evidence_warning()
+        triage_output = None
+    
+    return _finish_triage(
+        alert, context_chunks, triage_output, fallback_used, evidence_warning,
+        retrieval_cfg, query_text, service_val, component_val
+    )
 
-    doc_count = None
-    if context_missing:
-        try:
-            from db.connection import get_db_connection
-            conn = get_db_connection()
-            cur = conn.cursor()
-            cur.execute("SELECT COUNT(*) as count FROM documents")
-            result = cur.fetchone()
-            doc_count = result["count"] if isinstance(result, dict) else result[0]
-            conn.close()
-        except Exception as e:
-            logger.warning(f"Could not check document count: {e}")
-
-        if doc_count is None:
-            evidence_warning = "No matching context found (could not verify database). Manual review required."
-        elif doc_count == 0:
-            evidence_warning = (
-                "No historical data found in knowledge base. Please ingest runbooks/incidents/logs. "
-                "Proceeding with REVIEW and confidence=0.0."
-            )
-        else:
-            evidence_warning = (
-                f"No matching evidence found. Database has {doc_count} documents, but none match the alert context. "
-                "Proceeding with REVIEW and confidence=0.0. Please align service/component metadata or ingest matching data."
-            )
 
+def _finish_triage(
+    alert: Dict[str, Any],
+    context_chunks: list,
+    triage_output: Optional[Dict[str, Any]],
+    fallback_used: bool,
+    evidence_warning: Optional[str],
+    retrieval_cfg: dict,
+    query_text: str,
+    service_val: Optional[str],
+    component_val: Optional[str]
+) -> Dict[str, Any]:
+    """
+    Validate the LLM triage (or build the no-context REVIEW triage), apply the policy
+    gate and store the incident.
+    
+    triage_output is None when no context was found; the LLM is not called then.
+    """
     # If we have context (primary or runbook-fallback), go through normal LLM path
-    if not context_missing:
+    if triage_output is not None:
         logger.info(f"Context validation passed: {len(context_chunks)} chunks retrieved for triage")
-
-        # Call LLM for triage
-        logger.debug("Calling LLM for triage...")
-        triage_output = call_llm_for_triage(alert, context_chunks)
         logger.debug(
             f"LLM triage completed: severity={triage_output.get('severity')}, "
             f"confidence={triage_output.get('confidence')}"
@@ -281,7 +637,7 @@ def _triage_agent_internal(alert: Dict[str, Any]) -> Dict[str, Any]:
 
         triage_evidence = format_evidence_chunks(
             context_chunks,
-            retrieval_method="hybrid_search",
+            retrieval_method=retrieval_cfg.get("method", "hybrid_search"),
             retrieval_params={
                 "query_text": query_text,
                 "service": service_val,
@@ -324,7 +680,7 @@ def _triage_agent_internal(alert: Dict[str, Any]) -> Dict[str, Any]:
 
         triage_evidence = format_evidence_chunks(
             context_chunks,  # empty list
-            retrieval_method="hybrid_search",
+            retrieval_method=retrieval_cfg.get("method", "hybrid_search"),
             retrieval_params={
                 "query_text": query_text,
                 "service": service_val,
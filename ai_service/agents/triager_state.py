@@ -9,8 +9,7 @@ from ai_service.state import AgentState, AgentStep, PendingAction, get_state_bus
 from ai_service.core import (
     get_retrieval_config, get_workflow_config, get_logger
 )
-from retrieval.hybrid_search import hybrid_search
-from ai_service.agents.triager import format_evidence_chunks, apply_retrieval_preferences
+from ai_service.agents.triager import format_evidence_chunks, apply_retrieval_preferences, async_retrieve_context
 
 logger = get_logger(__name__)
 state_bus = get_state_bus()
@@ -83,6 +82,15 @@ async def _triage_agent_state_internal(
     fulltext_weight = retrieval_cfg.get("fulltext_weight", 0.3)
     
     # Retrieve context
+    context_chunks = await async_retrieve_context(
+        query_text=query_text,
+        service=service_val,
+        component=component_val,
+        limit=retrieval_limit,
+        vector_weight=vector_weight,
+        fulltext_weight=fulltext_weight,
+        retrieval_cfg=retrieval_cfg
+    )
     context_chunks = apply_retrieval_preferences(context_chunks, retrieval_cfg)
     
     # Update state: context retrieved
@@ -1,6 +1,6 @@
 """API v1 routes."""
 from fastapi import APIRouter
-from ai_service.api.v1 import triage, resolution, incidents, feedback, calibration, health, simulate, agents
+from ai_service.api.v1 import triage, resolution, incidents, feedback, calibration, health, simulate, agents, retrieval
 
 router = APIRouter(prefix="/api/v1", tags=["v1"])
 
@@ -13,6 +13,7 @@ router.include_router(feedback.router)
 router.include_router(calibration.router)
 router.include_router(simulate.router)
 router.include_router(agents.router)
+router.include_router(retrieval.router)
 
 __all__ = ["router"]
 
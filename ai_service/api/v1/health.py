@@ -110,3 +110,19 @@ def liveness_check():
     """
     return {"status": "alive", "service": "ai"}
 
+
+@router.get("/health/caches")
+def cache_stats():
+    """
+    Retrieval cache metrics.
+    Returns hit/miss/eviction counters for the query-embedding and search-result caches.
+    """
+    from retrieval.embedding_cache import get_query_embedding_cache
+    from retrieval.result_cache import get_search_result_cache
+
+    embedding_cache = get_query_embedding_cache()
+    result_cache = get_search_result_cache()
+    return {
+        "embedding_cache": embedding_cache.get_stats() if embedding_cache else {"enabled": False},
+        "result_cache": result_cache.get_stats() if result_cache else {"enabled": False},
+    }
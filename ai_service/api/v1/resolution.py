@@ -3,7 +3,7 @@ import os
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, Query
 from ai_service.models import Alert
-from ai_service.agents import resolution_copilot_agent
+from ai_service.agents import async_resolution_copilot_agent
 from ai_service.agents.resolution_copilot_state import resolution_agent_state
 from ai_service.core import get_logger, ValidationError, IncidentNotFoundError, ApprovalRequiredError
 from ai_service.api.error_utils import format_user_friendly_error
@@ -79,8 +79,8 @@ async def resolution(
                 use_state_bus=True,
             )
         else:
-            # Use synchronous agent (backward compatible)
-            result = resolution_copilot_agent(incident_id=incident_id, alert=alert_dict)
+            # Run the agent off the event loop so concurrent requests are not serialized
+            result = await async_resolution_copilot_agent(incident_id=incident_id, alert=alert_dict)
         
         logger.info(
             f"Resolution completed: incident_id={result['incident_id']}, "
@@ -0,0 +1,135 @@
+"""Retrieval debugging endpoints."""
+import time
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from ai_service.agents.triager import (
+    apply_retrieval_preferences, expand_neighbors, rerank_limits, two_stage_document_limit
+)
+from ai_service.core import get_logger, get_retrieval_config
+from ai_service.api.error_utils import format_user_friendly_error
+from retrieval.explain import explain_hybrid_search
+from retrieval.hybrid_search import mmr_rerank
+from retrieval.rerank import rerank_chunks
+
+logger = get_logger(__name__)
+router = APIRouter()
+
+
+class RetrievalExplainRequest(BaseModel):
+    """Retrieval explain request model."""
+    query_text: str
+    service: Optional[str] = None
+    component: Optional[str] = None
+    agent: str = "triage"    # config/retrieval.json section: "triage" or "resolution"
+    limit: Optional[int] = None    # default: the agent's configured limit
+    doc_types: Optional[List[str]] = None    # default: the agent's configured doc_types
+    analyze: bool = False    # capture EXPLAIN (ANALYZE, BUFFERS) plans
+
+
+def _timed(stages_ms: dict, name: str, func, *args, **kwargs):
+    stage_start = time.time()
+    result = func(*args, **kwargs)
+    stages_ms[name] = round((time.time() - stage_start) * 1000, 3)
+    return result
+
+
+@router.post("/retrieval/explain")
+def explain_retrieval(req: RetrievalExplainRequest):
+    """
+    Run an agent's retrieval pipeline with per-stage timings.
+
+    Uses the agent's section of config/retrieval.json (weights, ANN settings, two-stage,
+    recency, doc_types, MMR, rerank, neighbor expansion, preferences) like
+    retrieve_context() + apply_retrieval_preferences(), without the result cache.
+
+    **Request Body:**
+    - query_text: Search query (e.g. alert title + description)
+    - service, component (optional): Filters, as taken from alert labels
+    - agent (optional): "triage" (default) or "resolution"
+    - limit, doc_types (optional): Override the configured values
+    - analyze (optional): Include EXPLAIN (ANALYZE, BUFFERS) plan summaries
+
+    **Response:**
+    - results: Final ranked chunks (after every enabled stage)
+    - stages_ms: embedding, vector, fulltext, sql (hybrid_search statement), fusion_derived
+      (sql - vector - fulltext; not timed on its own),
+      then mmr / rerank / neighbor_expansion when enabled, preferences and total
+    - candidates: Chunks after each stage (vector, fulltext, fused, ..., final)
+    - service_index: Partial service index the search was routed to (or null)
+    - plans: Per-statement plan summaries (analyze only)
+    """
+    retrieval_config = get_retrieval_config() or {}
+    if req.agent not in ("triage", "resolution"):
+        raise HTTPException(status_code=400, detail=f"Unknown agent '{req.agent}' (expected triage or resolution)")
+    if not req.query_text.strip():
+        raise HTTPException(status_code=400, detail="query_text must not be empty")
+    retrieval_cfg = retrieval_config.get(req.agent, {})
+
+    try:
+        start_time = time.time()
+        limit = req.limit or retrieval_cfg.get("limit", 5)
+        fetch_limit, top_n = rerank_limits(limit, retrieval_cfg)
+        use_mmr = retrieval_cfg.get("method") == "mmr_search"
+
+        trace = explain_hybrid_search(
+            query_text=req.query_text,
+            service=req.service,
+            component=req.component,
+            # mmr_search fetches a wider candidate pool and re-selects from it
+            limit=fetch_limit * 3 if use_mmr else fetch_limit,
+            vector_weight=retrieval_cfg.get("vector_weight", 0.7),
+            fulltext_weight=retrieval_cfg.get("fulltext_weight", 0.3),
+            ef_search=retrieval_cfg.get("ef_search"),
+            probes=retrieval_cfg.get("probes"),
+            include_embeddings=use_mmr,
+            document_limit=two_stage_document_limit(retrieval_cfg),
+            recency=retrieval_cfg.get("recency"),
+            doc_types=req.doc_types if req.doc_types is not None else retrieval_cfg.get("doc_types"),
+            analyze=req.analyze
+        )
+        stages_ms = trace["stages_ms"]
+        candidates = trace["candidates"]
+        chunks = trace["results"]
+
+        if use_mmr:
+            chunks = _timed(
+                stages_ms, "mmr", mmr_rerank, chunks,
+                limit=fetch_limit, diversity=retrieval_cfg.get("mmr_diversity", 0.5)
+            )
+            candidates["mmr"] = len(chunks)
+        if top_n is not None:
+            chunks = _timed(stages_ms, "rerank", rerank_chunks, req.query_text, chunks, retrieval_cfg["rerank"], top_n)
+            candidates["rerank"] = len(chunks)
+        if (retrieval_cfg.get("neighbor_expansion") or {}).get("enabled"):
+            chunks = _timed(stages_ms, "neighbor_expansion", expand_neighbors, chunks, retrieval_cfg)
+            candidates["neighbor_expansion"] = len(chunks)
+        chunks = _timed(stages_ms, "preferences", apply_retrieval_preferences, chunks, retrieval_cfg)
+        candidates["final"] = len(chunks)
+        stages_ms.pop("total", None)
+        stages_ms["total"] = round((time.time() - start_time) * 1000, 3)
+
+        for chunk in chunks:
+            chunk.pop("embedding", None)
+
+        logger.info(
+            f"Retrieval explain: agent={req.agent}, results={len(chunks)}, "
+            f"total_ms={stages_ms['total']}, analyze={req.analyze}"
+        )
+        response = {
+            "agent": req.agent,
+            "results": chunks,
+            "stages_ms": stages_ms,
+            "candidates": candidates,
+            "service_index": trace["service_index"],
+        }
+        if req.analyze:
+            response["plans"] = trace["plans"]
+        return response
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        friendly_detail = format_user_friendly_error(e)
+        logger.error(f"Retrieval explain error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=friendly_detail)
@@ -1,9 +1,10 @@
 """Triage endpoints."""
 import os
 from datetime import datetime
+from typing import List
 from fastapi import APIRouter, HTTPException, Query
 from ai_service.models import Alert
-from ai_service.agents import triage_agent
+from ai_service.agents import async_triage_agent, triage_agent_batch
 from ai_service.agents.triager_state import triage_agent_state
 from ai_service.core import get_logger, ValidationError
 from ai_service.api.error_utils import format_user_friendly_error
@@ -64,8 +65,8 @@ async def triage(
             # Use state-based HITL workflow
             result = await triage_agent_state(alert_dict, use_state_bus=True)
         else:
-            # Use synchronous agent (backward compatible)
-            result = triage_agent(alert_dict)
+            # Retrieval runs on the event loop; blocking steps run in a worker thread
+            result = await async_triage_agent(alert_dict)
         
         logger.info(
             f"Triage completed: incident_id={result['incident_id']}, "
@@ -93,3 +94,43 @@ async def triage(
             detail=friendly_detail,
         )
 
+
+@router.post("/triage/batch")
+def triage_batch(alerts: List[Alert]):
+    """
+    Triage a burst of alerts together.
+    
+    Retrieval for all alerts is done in one embedding call and one database round trip
+    (hybrid_search_many); each alert is then triaged as in POST /triage.
+    
+    **Request Body:**
+    - List of Alert objects
+    
+    **Response:**
+    - results: Per-alert triage results in request order (failed alerts carry an `error` field)
+    """
+    logger.info(f"Batch triage request received: alerts={len(alerts)}")
+    
+    try:
+        alert_dicts = []
+        for alert in alerts:
+            alert_dict = alert.model_dump()
+            if alert.ts:
+                alert_dict["ts"] = alert.ts.isoformat() if isinstance(alert.ts, datetime) else alert.ts
+            else:
+                alert_dict["ts"] = datetime.utcnow().isoformat()
+            alert_dicts.append(alert_dict)
+        
+        results = triage_agent_batch(alert_dicts)
+        failed = sum(1 for result in results if "error" in result)
+        logger.info(f"Batch triage completed: alerts={len(results)}, failed={failed}")
+        
+        return {"results": results, "failed": failed}
+    
+    except Exception as e:
+        friendly_detail = format_user_friendly_error(e)
+        logger.error(f"Batch triage error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=friendly_detail,
+        )
@@ -0,0 +1,214 @@
+"""Token-budgeted packing of retrieved chunks into LLM prompt context.
+
+Chunks range from a few dozen to ~3000 tokens, so a fixed "top N chunks" gives prompts
+whose size (and cost/latency) swings with whatever was retrieved. pack_context() fills
+a per-agent token budget instead:
+
+1. Keep the caller's order: retrieval has already ranked the chunks and applied the
+   agent's preferences (prefer_types boosts, max_per_type), and chunks without scores
+   (e.g. InfluxDB logs) sit where the caller appended them. rank_by_score=True re-sorts
+   by score instead (rerank_score when a rerank stage ran, else rrf_score).
+2. Skip exact duplicates (same content_sha256) and near-duplicates of chunks already
+   packed (chunker overlap, neighbor windows that contain another hit).
+3. Add chunks while they fit; the first chunk that does not fit is truncated at a
+   sentence/line boundary if enough budget is left for it to be useful.
+
+Token counts come from the chunk's stored token_count when present and are otherwise
+counted once per distinct content.
+"""
+import re
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ai_service.core import get_logger
+
+logger = get_logger(__name__)
+
+# Prompt formatting added around each chunk ("Document: ...", ids, separators)
+DEFAULT_CHUNK_OVERHEAD_TOKENS = 20
+DEFAULT_DEDUPE_THRESHOLD = 0.8
+DEFAULT_MIN_TRUNCATED_TOKENS = 64
+TRUNCATION_MARKER = " [...]"
+
+_WORD_RE = re.compile(r"\w+")
+_BOUNDARY_RE = re.compile(r"(?<=[.!?])\s|\n")
+
+
+@lru_cache(maxsize=4096)
+def _count_tokens_cached(text: str) -> int:
+    from ingestion.embeddings import count_tokens
+    return count_tokens(text)
+
+
+def _chunk_tokens(chunk: Dict, counter: Callable[[str], int]) -> int:
+    stored = chunk.get("token_count")
+    if isinstance(stored, int) and stored >= 0:
+        return stored
+    return counter(chunk.get("content") or "")
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _containment(candidate: set, packed: set) -> float:
+    """Share of the candidate's shingles already present in a packed chunk."""
+    if not candidate:
+        return 1.0
+    return len(candidate & packed) / len(candidate)
+
+
+def _truncate_to_tokens(text: str, max_tokens: int, counter: Callable[[str], int]) -> str:
+    """Cut text to at most max_tokens, preferring the last sentence/line boundary."""
+    total = counter(text)
+    if total <= max_tokens:
+        return text
+    marker_tokens = counter(TRUNCATION_MARKER)
+    budget = max(1, max_tokens - marker_tokens)
+    cut = max(1, int(len(text) * budget / total))
+    candidate = text[:cut]
+    while cut > 1 and counter(candidate) > budget:
+        cut = int(cut * 0.9)
+        candidate = text[:cut]
+    # Back off to a boundary if one is in the last third of the kept text
+    boundaries = [m.start() for m in _BOUNDARY_RE.finditer(candidate)]
+    if boundaries and boundaries[-1] >= len(candidate) * 2 / 3:
+        candidate = candidate[:boundaries[-1]]
+    return candidate.rstrip() + TRUNCATION_MARKER
+
+
+def _score(chunk: Dict) -> float:
+    if chunk.get("rerank_score") is not None:
+        return chunk["rerank_score"]
+    return chunk.get("rrf_score") or 0.0
+
+
+def _source_type(chunk: Dict) -> str:
+    metadata = chunk.get("metadata") or {}
+    return chunk.get("doc_type") or metadata.get("doc_type") or chunk.get("source") or "unknown"
+
+
+def pack_context(
+    chunks: List[Dict],
+    max_tokens: int,
+    max_chunks: Optional[int] = None,
+    dedupe_threshold: float = DEFAULT_DEDUPE_THRESHOLD,
+    min_truncated_tokens: int = DEFAULT_MIN_TRUNCATED_TOKENS,
+    chunk_overhead_tokens: int = DEFAULT_CHUNK_OVERHEAD_TOKENS,
+    token_counter: Optional[Callable[[str], int]] = None,
+    rank_by_score: bool = False
+) -> Tuple[List[Dict], Dict]:
+    """
+    Select and trim chunks to fit a prompt token budget.
+
+    Args:
+        chunks: Retrieved context chunks
+        max_tokens: Token budget for all chunk text (including per-chunk overhead)
+        max_chunks: Optional cap on the number of chunks
+        dedupe_threshold: Skip a chunk when this share of its word 3-grams is already
+            in a packed chunk
+        min_truncated_tokens: Smallest useful truncated chunk; below this the chunk is skipped
+        chunk_overhead_tokens: Tokens added by prompt formatting around each chunk
+        token_counter: Token counting function (defaults to the embedding tokenizer, cached)
+        rank_by_score: Re-sort by rerank_score / rrf_score before packing instead of
+            packing in the given order
+
+    Returns:
+        (packed chunks in packing order, stats) where stats has tokens_used, budget,
+        chunks_in, chunks_packed, duplicates_skipped, truncated, over_budget_skipped
+        and tokens_by_source_type
+    """
+    counter = token_counter or _count_tokens_cached
+    ranked = sorted(chunks, key=_score, reverse=True) if rank_by_score else chunks
+
+    packed = []
+    packed_shingles = []
+    packed_digests = set()
+    tokens_used = 0
+    tokens_by_source_type: Dict[str, int] = {}
+    duplicates_skipped = 0
+    over_budget_skipped = 0
+    truncated = 0
+
+    for chunk in ranked:
+        if max_chunks is not None and len(packed) >= max_chunks:
+            break
+        content = chunk.get("content") or ""
+        if not content.strip():
+            continue
+
+        digest = chunk.get("content_sha256")
+        if digest and digest in packed_digests:
+            duplicates_skipped += 1
+            continue
+        shingles = _shingles(content)
+        if any(_containment(shingles, other) >= dedupe_threshold for other in packed_shingles):
+            duplicates_skipped += 1
+            continue
+
+        remaining = max_tokens - tokens_used - chunk_overhead_tokens
+        chunk_tokens = _chunk_tokens(chunk, counter)
+        if chunk_tokens > remaining:
+            if remaining < min_truncated_tokens:
+                over_budget_skipped += 1
+                continue
+            content = _truncate_to_tokens(content, remaining, counter)
+            chunk_tokens = counter(content)
+            chunk = dict(chunk, content=content, token_count=chunk_tokens, truncated=True)
+            truncated += 1
+
+        packed.append(chunk)
+        packed_shingles.append(shingles)
+        if digest:
+            packed_digests.add(digest)
+        used = chunk_tokens + chunk_overhead_tokens
+        tokens_used += used
+        source_type = _source_type(chunk)
+        tokens_by_source_type[source_type] = tokens_by_source_type.get(source_type, 0) + used
+
+    stats = {
+        "budget": max_tokens,
+        "tokens_used": tokens_used,
+        "chunks_in": len(chunks),
+        "chunks_packed": len(packed),
+        "duplicates_skipped": duplicates_skipped,
+        "over_budget_skipped": over_budget_skipped,
+        "truncated": truncated,
+        "tokens_by_source_type": tokens_by_source_type,
+    }
+    return packed, stats
+
+
+def pack_context_for_agent(chunks: List[Dict], agent_config: Dict, agent_type: str) -> List[Dict]:
+    """
+    Pack chunks with an agent's "context_budget" section from config/llm.json and log the stats.
+
+    Args:
+        chunks: Retrieved context chunks
+        agent_config: The agent's section of config/llm.json ("triage" / "resolution")
+        agent_type: Agent name for logging
+
+    Returns:
+        Packed chunks
+    """
+    budget_cfg = agent_config.get("context_budget") or {}
+    packed, stats = pack_context(
+        chunks,
+        max_tokens=budget_cfg.get("max_tokens", 3000),
+        max_chunks=budget_cfg.get("max_chunks"),
+        dedupe_threshold=budget_cfg.get("dedupe_threshold", DEFAULT_DEDUPE_THRESHOLD),
+        min_truncated_tokens=budget_cfg.get("min_truncated_tokens", DEFAULT_MIN_TRUNCATED_TOKENS),
+        chunk_overhead_tokens=budget_cfg.get("chunk_overhead_tokens", DEFAULT_CHUNK_OVERHEAD_TOKENS),
+        rank_by_score=bool(budget_cfg.get("rank_by_score", False)),
+    )
+    by_type = ", ".join(f"{t}={n}" for t, n in sorted(stats["tokens_by_source_type"].items()))
+    logger.info(
+        f"LLM {agent_type} context packed: {stats['chunks_packed']}/{stats['chunks_in']} chunks, "
+        f"{stats['tokens_used']}/{stats['budget']} tokens ({by_type or 'none'}), "
+        f"duplicates_skipped={stats['duplicates_skipped']}, truncated={stats['truncated']}, "
+        f"over_budget_skipped={stats['over_budget_skipped']}"
+    )
+    return packed
@@ -6,6 +6,9 @@ from ai_service.core.config_loader import (
     get_retrieval_config, get_workflow_config, get_llm_config,
     get_field_mappings_config, get_embeddings_config
 )
+from ai_service.core.clients import (
+    get_encoding, get_openai_client, get_async_openai_client, close_clients
+)
 from ai_service.core.exceptions import (
     NOCAgentError, ValidationError, TriageValidationError,
     ResolutionValidationError, IncidentNotFoundError,
@@ -19,6 +22,7 @@ __all__ = [
     "get_policy_config", "get_guardrail_config",
     "get_retrieval_config", "get_workflow_config", "get_llm_config",
     "get_field_mappings_config", "get_embeddings_config",
+    "get_encoding", "get_openai_client", "get_async_openai_client", "close_clients",
     "NOCAgentError", "ValidationError", "TriageValidationError",
     "ResolutionValidationError", "IncidentNotFoundError",
     "LLMError", "RetrievalError", "PolicyError", "DatabaseError", "ConfigurationError",
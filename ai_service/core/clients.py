@@ -0,0 +1,103 @@
+"""Process-wide API clients and tokenizer encodings.
+
+Creating an OpenAI client per call builds a new HTTP connection pool each time, so
+every LLM/embedding request paid a fresh TCP + TLS handshake. The clients here are
+created lazily on first use, once per process, and shared by the LLM and embedding
+code paths; their httpx pools keep connections alive between requests. Pool limits
+come from the "http_client" section of config/llm.json.
+
+Tokenizer encodings (tiktoken) are likewise loaded once and reused.
+"""
+import os
+import threading
+from functools import lru_cache
+from typing import Dict, Optional
+
+import httpx
+import tiktoken
+from openai import OpenAI, AsyncOpenAI
+
+from ai_service.core.logger import get_logger
+from ai_service.core.config_loader import get_llm_config
+
+logger = get_logger(__name__)
+
+DEFAULT_ENCODING = "cl100k_base"  # Used by OpenAI embedding models and gpt-4o-mini token budgets
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 10
+DEFAULT_KEEPALIVE_EXPIRY = 60.0  # seconds
+DEFAULT_TIMEOUT = 60.0  # seconds
+
+_lock = threading.Lock()
+_openai_client: Optional[OpenAI] = None
+_async_openai_client: Optional[AsyncOpenAI] = None
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name: str = DEFAULT_ENCODING) -> tiktoken.Encoding:
+    """Get a tiktoken encoding (loaded once per process)."""
+    return tiktoken.get_encoding(name)
+
+
+def _http_client_settings() -> Dict:
+    """Pool limits and timeout from config/llm.json "http_client"."""
+    http_cfg = (get_llm_config() or {}).get("http_client", {})
+    return {
+        "limits": httpx.Limits(
+            max_connections=http_cfg.get("max_connections", DEFAULT_MAX_CONNECTIONS),
+            max_keepalive_connections=http_cfg.get("max_keepalive_connections", DEFAULT_MAX_KEEPALIVE_CONNECTIONS),
+            keepalive_expiry=http_cfg.get("keepalive_expiry", DEFAULT_KEEPALIVE_EXPIRY),
+        ),
+        "timeout": httpx.Timeout(http_cfg.get("timeout", DEFAULT_TIMEOUT)),
+    }
+
+
+def _api_key() -> str:
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not set in environment")
+    return api_key
+
+
+def get_openai_client() -> OpenAI:
+    """Get the shared OpenAI client (keep-alive connection pool, created on first use)."""
+    global _openai_client
+    if _openai_client is None:
+        with _lock:
+            if _openai_client is None:
+                settings = _http_client_settings()
+                _openai_client = OpenAI(
+                    api_key=_api_key(),
+                    timeout=settings["timeout"],
+                    http_client=httpx.Client(**settings),
+                )
+                logger.info(f"Created shared OpenAI client ({settings['limits']})")
+    return _openai_client
+
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """Get the shared AsyncOpenAI client (keep-alive connection pool, created on first use)."""
+    global _async_openai_client
+    if _async_openai_client is None:
+        with _lock:
+            if _async_openai_client is None:
+                settings = _http_client_settings()
+                _async_openai_client = AsyncOpenAI(
+                    api_key=_api_key(),
+                    timeout=settings["timeout"],
+                    http_client=httpx.AsyncClient(**settings),
+                )
+                logger.info(f"Created shared AsyncOpenAI client ({settings['limits']})")
+    return _async_openai_client
+
+
+async def close_clients() -> None:
+    """Close the shared clients and their connection pools (service shutdown)."""
+    global _openai_client, _async_openai_client
+    with _lock:
+        client, async_client = _openai_client, _async_openai_client
+        _openai_client = _async_openai_client = None
+    if client is not None:
+        client.close()
+    if async_client is not None:
+        await async_client.close()
@@ -1,14 +1,14 @@
 """LLM client for OpenAI with retry logic."""
-import os
+import asyncio
 import json
 import time
 import random
-from openai import OpenAI
 from openai import RateLimitError, APIError, APIConnectionError, APITimeoutError
 from dotenv import load_dotenv
 from ai_service.core import (
-    get_llm_config, get_logger
+    get_llm_config, get_logger, get_openai_client, get_async_openai_client
 )
+from ai_service.context_packer import pack_context_for_agent
 from ai_service.prompts import (
     TRIAGE_USER_PROMPT_TEMPLATE,
     TRIAGE_SYSTEM_PROMPT_DEFAULT,
@@ -28,11 +28,8 @@ RETRY_EXPONENTIAL_BASE = 2.0
 
 
 def get_llm_client():
-    """Get OpenAI client."""
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY not set in environment")
-    return OpenAI(api_key=api_key)
+    """Get the shared OpenAI client (one connection pool per process)."""
+    return get_openai_client()
 
 
 def _should_retry(error: Exception) -> bool:
@@ -61,6 +58,29 @@ def _should_retry(error: Exception) -> bool:
     return False
 
 
+def _retry_delay(error: Exception, attempt: int, agent_type: str) -> float:
+    """Exponential backoff with jitter before retrying a failed LLM call (logs the retry)."""
+    # For rate limits, use longer initial delay
+    if isinstance(error, RateLimitError):
+        base_delay = INITIAL_RETRY_DELAY * 2  # Start with 2s for rate limits
+    else:
+        base_delay = INITIAL_RETRY_DELAY
+    
+    delay = min(
+        base_delay * (RETRY_EXPONENTIAL_BASE ** attempt),
+        MAX_RETRY_DELAY
+    )
+    jitter = random.uniform(0, delay * 0.1)  # Add up to 10% jitter
+    total_delay = delay + jitter
+    
+    error_type = type(error).__name__
+    logger.warning(
+        f"LLM {agent_type} error ({error_type}, attempt {attempt + 1}/{MAX_RETRIES}): {str(error)}. "
+        f"Retrying in {total_delay:.2f}s..."
+    )
+    return total_delay
+
+
 def _call_llm_with_retry(client, request_params, agent_type: str, model: str):
     """
     Call LLM API with exponential backoff retry logic.
@@ -97,46 +117,57 @@ def _call_llm_with_retry(client, request_params, agent_type: str, model: str):
                 )
                 raise
             
-            # Calculate exponential backoff with jitter
-            # For rate limits, use longer initial delay
-            if isinstance(e, RateLimitError):
-                base_delay = INITIAL_RETRY_DELAY * 2  # Start with 2s for rate limits
-            else:
-                base_delay = INITIAL_RETRY_DELAY
-            
-            delay = min(
-                base_delay * (RETRY_EXPONENTIAL_BASE ** attempt),
-                MAX_RETRY_DELAY
-            )
-            jitter = random.uniform(0, delay * 0.1)  # Add up to 10% jitter
-            total_delay = delay + jitter
-            
-            error_type = type(e).__name__
-            logger.warning(
-                f"LLM {agent_type} error ({error_type}, attempt {attempt + 1}/{MAX_RETRIES}): {str(e)}. "
-                f"Retrying in {total_delay:.2f}s..."
-            )
-            time.sleep(total_delay)
+            time.sleep(_retry_delay(e, attempt, agent_type))
     
     # Should never reach here, but just in case
     if last_error:
         raise last_error
 
 
-def call_llm_for_triage(alert: dict, context_chunks: list, model: str = None) -> dict:
-    """
-    Call LLM to triage an alert.
+async def _async_call_llm_with_retry(client, request_params, agent_type: str, model: str):
+    """Async variant of _call_llm_with_retry() (AsyncOpenAI client, non-blocking backoff)."""
+    last_error = None
     
-    Args:
-        alert: Alert dictionary
-        context_chunks: Retrieved context chunks
-        model: Optional OpenAI model to use (overrides config if provided)
+    for attempt in range(MAX_RETRIES):
+        try:
+            request_params_with_timeout = {**request_params, "timeout": 60.0}
+            return await client.chat.completions.create(**request_params_with_timeout)
+            
+        except Exception as e:
+            last_error = e
+            
+            if not _should_retry(e) or attempt == MAX_RETRIES - 1:
+                logger.error(
+                    f"LLM {agent_type} error (attempt {attempt + 1}/{MAX_RETRIES}): {str(e)}",
+                    exc_info=True
+                )
+                raise
+            
+            await asyncio.sleep(_retry_delay(e, attempt, agent_type))
     
-    Returns:
-        Triage output as dictionary
-    """
-    client = get_llm_client()
+    if last_error:
+        raise last_error
+
+
+def _parse_llm_response(response, agent_type: str) -> dict:
+    """Log token usage and parse the JSON body of a chat completion."""
+    # Extract token usage if available
+    usage = response.usage
+    if usage:
+        prompt_tokens = usage.prompt_tokens or 0
+        completion_tokens = usage.completion_tokens or 0
+        logger.debug(
+            f"LLM {agent_type} tokens: prompt={prompt_tokens}, completion={completion_tokens}"
+        )
     
+    result_text = response.choices[0].message.content
+    result = json.loads(result_text)
+    logger.debug(f"LLM {agent_type} response parsed successfully")
+    return result
+
+
+def _build_triage_request(alert: dict, context_chunks: list, model: str = None):
+    """Build (request_params, model) for a triage chat completion."""
     # Get LLM config (with defaults)
     llm_config = get_llm_config()
     triage_config = llm_config.get("triage", {})
@@ -150,10 +181,11 @@ def call_llm_for_triage(alert: dict, context_chunks: list, model: str = None) ->
     
     logger.debug(f"Calling LLM for triage: model={model}, temperature={temperature}, chunks={len(context_chunks)}")
     
-    # Build context from chunks
+    # Build context from chunks (best-ranked chunks that fit the configured token budget)
+    packed_chunks = pack_context_for_agent(context_chunks, triage_config, "triage")
     context_text = "\n\n---\n\n".join([
         f"Document: {chunk.get('doc_title', 'Unknown')}\n{chunk['content']}"
-        for chunk in context_chunks[:5]  # Top 5 chunks
+        for chunk in packed_chunks
     ])
     
     # Build user prompt from template
@@ -183,49 +215,11 @@ def call_llm_for_triage(alert: dict, context_chunks: list, model: str = None) ->
     if max_tokens:
         request_params["max_tokens"] = max_tokens
     
-    # Call LLM with retry logic
-    try:
-        response = _call_llm_with_retry(client, request_params, "triage", model)
-        
-        # Extract token usage if available
-        usage = response.usage
-        if usage:
-            prompt_tokens = usage.prompt_tokens or 0
-            completion_tokens = usage.completion_tokens or 0
-            logger.debug(
-                f"LLM triage tokens: prompt={prompt_tokens}, completion={completion_tokens}"
-            )
-        
-        result_text = response.choices[0].message.content
-        result = json.loads(result_text)
-        logger.debug(f"LLM triage response parsed successfully")
-        return result
-        
-    except Exception as e:
-        logger.error(f"LLM triage failed after retries: {str(e)}", exc_info=True)
-        raise
+    return request_params, model
 
 
-def call_llm_for_resolution(
-    alert: dict,
-    triage_output: dict,
-    context_chunks: list,
-    model: str = None
-) -> dict:
-    """
-    Call LLM to generate resolution steps.
-    
-    Args:
-        alert: Alert dictionary
-        triage_output: Previous triage output
-        context_chunks: Retrieved context chunks (prefer runbooks)
-        model: Optional OpenAI model to use (overrides config if provided)
-    
-    Returns:
-        Resolution output as dictionary
-    """
-    client = get_llm_client()
-    
+def _build_resolution_request(alert: dict, triage_output: dict, context_chunks: list, model: str = None):
+    """Build (request_params, model) for a resolution chat completion."""
     # Get LLM config (with defaults)
     llm_config = get_llm_config()
     resolution_config = llm_config.get("resolution", {})
@@ -239,9 +233,9 @@ def call_llm_for_resolution(
     
     logger.debug(f"Calling LLM for resolution: model={model}, temperature={temperature}, chunks={len(context_chunks)}")
     
-    # Build context from chunks (prefer runbooks) with provenance info
+    # Build context from chunks (prefer runbooks) with provenance info, within the token budget
     context_parts = []
-    for chunk in context_chunks[:10]:  # Include more chunks for better context
+    for chunk in pack_context_for_agent(context_chunks, resolution_config, "resolution"):
         chunk_id = chunk.get('chunk_id', 'unknown')
         doc_id = chunk.get('document_id', 'unknown')
         doc_title = chunk.get('doc_title', 'Unknown')
@@ -281,27 +275,89 @@ def call_llm_for_resolution(
     if max_tokens:
         request_params["max_tokens"] = max_tokens
     
+    return request_params, model
+
+
+def call_llm_for_triage(alert: dict, context_chunks: list, model: str = None) -> dict:
+    """
+    Call LLM to triage an alert.
+    
+    Args:
+        alert: Alert dictionary
+        context_chunks: Retrieved context chunks
+        model: Optional OpenAI model to use (overrides config if provided)
+    
+    Returns:
+        Triage output as dictionary
+    """
+    client = get_llm_client()
+    request_params, model = _build_triage_request(alert, context_chunks, model)
+    
+    # Call LLM with retry logic
+    try:
+        response = _call_llm_with_retry(client, request_params, "triage", model)
+        return _parse_llm_response(response, "triage")
+    except Exception as e:
+        logger.error(f"LLM triage failed after retries: {str(e)}", exc_info=True)
+        raise
+
+
+async def async_call_llm_for_triage(alert: dict, context_chunks: list, model: str = None) -> dict:
+    """Async variant of call_llm_for_triage() (shared AsyncOpenAI client)."""
+    client = get_async_openai_client()
+    request_params, model = _build_triage_request(alert, context_chunks, model)
+    
+    try:
+        response = await _async_call_llm_with_retry(client, request_params, "triage", model)
+        return _parse_llm_response(response, "triage")
+    except Exception as e:
+        logger.error(f"LLM triage failed after retries: {str(e)}", exc_info=True)
+        raise
+
+
+def call_llm_for_resolution(
+    alert: dict,
+    triage_output: dict,
+    context_chunks: list,
+    model: str = None
+) -> dict:
+    """
+    Call LLM to generate resolution steps.
+    
+    Args:
+        alert: Alert dictionary
+        triage_output: Previous triage output
+        context_chunks: Retrieved context chunks (prefer runbooks)
+        model: Optional OpenAI model to use (overrides config if provided)
+    
+    Returns:
+        Resolution output as dictionary
+    """
+    client = get_llm_client()
+    request_params, model = _build_resolution_request(alert, triage_output, context_chunks, model)
+    
     # Call LLM with retry logic
     try:
         response = _call_llm_with_retry(client, request_params, "resolution", model)
-        
-        # Extract token usage if available
-        usage = response.usage
-        if usage:
-            prompt_tokens = usage.prompt_tokens or 0
-            completion_tokens = usage.completion_tokens or 0
-            logger.debug(
-                f"LLM resolution tokens: prompt={prompt_tokens}, completion={completion_tokens}"
-            )
-        
-        result_text = response.choices[0].message.content
-        result = json.loads(result_text)
-        logger.debug(f"LLM resolution response parsed successfully")
-        return result
-        
+        return _parse_llm_response(response, "resolution")
     except Exception as e:
         logger.error(f"LLM resolution failed after retries: {str(e)}", exc_info=True)
         raise
 
 
-
+async def async_call_llm_for_resolution(
+    alert: dict,
+    triage_output: dict,
+    context_chunks: list,
+    model: str = None
+) -> dict:
+    """Async variant of call_llm_for_resolution() (shared AsyncOpenAI client)."""
+    client = get_async_openai_client()
+    request_params, model = _build_resolution_request(alert, triage_output, context_chunks, model)
+    
+    try:
+        response = await _async_call_llm_with_retry(client, request_params, "resolution", model)
+        return _parse_llm_response(response, "resolution")
+    except Exception as e:
+        logger.error(f"LLM resolution failed after retries: {str(e)}", exc_info=True)
+        raise
@@ -4,10 +4,13 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
-from ai_service.core import setup_logging, get_logger
+from ai_service.core import setup_logging, get_logger, close_clients
 from ai_service.api.v1 import router as v1_router
 from ai_service.state import get_state_bus
-from db.connection import init_db_pool, close_db_pool
+from db.connection import (
+    init_db_pool, close_db_pool, init_async_db_pool, close_async_db_pool, get_db_connection
+)
+from ingestion.embedding_providers import verify_embedding_dimension
 
 load_dotenv()
 
@@ -36,6 +39,20 @@ app.add_middleware(
 )
 
 
+def check_embedding_dimension():
+    """Compare the embedding provider's dimension with chunks.embedding (raises on mismatch)."""
+    try:
+        conn = get_db_connection()
+    except Exception as e:
+        logger.warning(f"Embedding dimension check skipped (database unavailable): {e}")
+        return
+    try:
+        with conn.cursor() as cur:
+            verify_embedding_dimension(cur)
+    finally:
+        conn.close()
+
+
 # Startup / shutdown hooks
 @app.on_event("startup")
 async def startup():
@@ -44,6 +61,11 @@ async def startup():
     pool_min = int(os.getenv("DB_POOL_MIN", "2"))
     pool_max = int(os.getenv("DB_POOL_MAX", "10"))
     init_db_pool(min_size=pool_min, max_size=pool_max)
+    # Async pool for retrieval on the event loop (async_hybrid_search)
+    await init_async_db_pool(min_size=pool_min, max_size=pool_max)
+    
+    # Embedding model must fit the vector columns (a mismatch fails every search/ingest)
+    check_embedding_dimension()
     
     # Start state bus
     bus = get_state_bus()
@@ -58,8 +80,12 @@ async def shutdown():
     bus = get_state_bus()
     await bus.stop()
     
-    # Close database pool
+    # Close database pools
     close_db_pool()
+    await close_async_db_pool()
+    
+    # Close the shared OpenAI clients (keep-alive connections)
+    await close_clients()
     logger.info("AI service shutdown complete")
 
 
@@ -3,9 +3,9 @@ import os
 import time
 import psycopg
 from psycopg.rows import dict_row
-from psycopg_pool import ConnectionPool
+from psycopg_pool import ConnectionPool, AsyncConnectionPool
 from dotenv import load_dotenv
-from contextlib import contextmanager
+from contextlib import contextmanager, asynccontextmanager
 
 load_dotenv()
 
@@ -17,8 +17,9 @@ except ImportError:
     import logging
     logger = logging.getLogger(__name__)
 
-# Global connection pool
+# Global connection pools (sync for agents/ingestion, async for event-loop retrieval)
 _db_pool: ConnectionPool = None
+_async_db_pool: AsyncConnectionPool = None
 
 # Retry configuration (can be overridden via environment variables)
 DB_CONN_RETRIES = int(os.getenv("DB_CONN_RETRIES", "3"))
@@ -26,6 +27,35 @@ DB_CONN_RETRY_BASE_DELAY = float(os.getenv("DB_CONN_RETRY_BASE_DELAY", "1.0"))
 DB_CONN_RETRY_MAX_DELAY = float(os.getenv("DB_CONN_RETRY_MAX_DELAY", "5.0"))
 
 
+def _configure_connection(conn):
+    """
+    Register pgvector types on a new connection.
+    
+    With the adapter registered, query embeddings can be sent as binary `vector`
+    parameters (numpy float32 arrays) and `vector` columns load as numpy arrays.
+    Best effort: a database without the extension still gets a usable connection.
+    """
+    try:
+        from pgvector.psycopg import register_vector
+        register_vector(conn)
+    except Exception as e:
+        logger.warning(f"pgvector type registration skipped: {e}")
+    finally:
+        # Type lookup runs in a transaction; pool connections must be returned idle
+        conn.rollback()
+
+
+async def _configure_async_connection(conn):
+    """Async counterpart of _configure_connection()."""
+    try:
+        from pgvector.psycopg import register_vector_async
+        await register_vector_async(conn)
+    except Exception as e:
+        logger.warning(f"pgvector type registration skipped: {e}")
+    finally:
+        await conn.rollback()
+
+
 def init_db_pool(min_size: int = 2, max_size: int = 10, timeout: int = 30):
     """
     Initialize the database connection pool.
@@ -56,6 +86,7 @@ def init_db_pool(min_size: int = 2, max_size: int = 10, timeout: int = 30):
             min_size=min_size,
             max_size=max_size,
             kwargs={"row_factory": dict_row},
+            configure=_configure_connection,
             open=False,
             timeout=wait_timeout,  # Wait timeout for getting connection from pool
         )
@@ -78,6 +109,58 @@ def init_db_pool(min_size: int = 2, max_size: int = 10, timeout: int = 30):
         raise
 
 
+async def init_async_db_pool(min_size: int = 2, max_size: int = 10, timeout: int = 30):
+    """
+    Initialize the async database connection pool (used by async_hybrid_search).
+    
+    Must be called from a running event loop (e.g. the FastAPI startup hook).
+    
+    Args:
+        min_size: Minimum number of connections in pool (default: 2)
+        max_size: Maximum number of connections in pool (default: 10)
+        timeout: Connection timeout in seconds (default: 30)
+    """
+    global _async_db_pool
+    if _async_db_pool is not None:
+        logger.warning("Async database pool already initialized")
+        return
+    
+    host = os.getenv("POSTGRES_HOST", "localhost")
+    port = os.getenv("POSTGRES_PORT", "5432")
+    dbname = os.getenv("POSTGRES_DB", "nocdb")
+    user = os.getenv("POSTGRES_USER", "postgres")
+    password = os.getenv("POSTGRES_PASSWORD", "postgres")
+    
+    wait_timeout = int(os.getenv("DB_POOL_WAIT_TIMEOUT", "10"))
+    conninfo = f"host={host} port={port} dbname={dbname} user={user} password={password} connect_timeout={timeout}"
+    
+    try:
+        pool = AsyncConnectionPool(
+            conninfo,
+            min_size=min_size,
+            max_size=max_size,
+            kwargs={"row_factory": dict_row},
+            configure=_configure_async_connection,
+            open=False,
+            timeout=wait_timeout,
+        )
+        await pool.open()
+        _async_db_pool = pool
+        logger.info(f"Async database connection pool initialized: min={min_size}, max={max_size}, wait_timeout={wait_timeout}s")
+    except Exception as e:
+        logger.error(f"Failed to initialize async database pool: {e}", exc_info=True)
+        raise
+
+
+async def close_async_db_pool():
+    """Close the async database connection pool."""
+    global _async_db_pool
+    if _async_db_pool is not None:
+        await _async_db_pool.close()
+        _async_db_pool = None
+        logger.info("Async database connection pool closed")
+
+
 def close_db_pool():
     """Close the database connection pool."""
     global _db_pool
@@ -92,7 +175,7 @@ def _create_direct_connection():
     port = os.getenv("POSTGRES_PORT", "5432")
     dbname = os.getenv("POSTGRES_DB", "nocdb")
     logger.debug(f"Connecting to database directly: {host}:{port}/{dbname}")
-    return psycopg.connect(
+    conn = psycopg.connect(
         host=os.getenv("POSTGRES_HOST", "localhost"),
         port=os.getenv("POSTGRES_PORT", "5432"),
         dbname=os.getenv("POSTGRES_DB", "nocdb"),
@@ -100,6 +183,8 @@ def _create_direct_connection():
         password=os.getenv("POSTGRES_PASSWORD", "postgres"),
         row_factory=dict_row
     )
+    _configure_connection(conn)
+    return conn
 
 
 def get_db_connection():
@@ -209,6 +294,31 @@ def get_db_connection_context():
                     conn = None
 
 
+@asynccontextmanager
+async def get_async_db_connection_context():
+    """
+    Async context manager for database connections.
+    Uses the async pool when initialized, otherwise a direct async connection.
+    The transaction is committed on normal exit and rolled back on error.
+    """
+    if _async_db_pool is not None:
+        async with _async_db_pool.connection() as conn:
+            yield conn
+        return
+    
+    conn = await psycopg.AsyncConnection.connect(
+        host=os.getenv("POSTGRES_HOST", "localhost"),
+        port=os.getenv("POSTGRES_PORT", "5432"),
+        dbname=os.getenv("POSTGRES_DB", "nocdb"),
+        user=os.getenv("POSTGRES_USER", "postgres"),
+        password=os.getenv("POSTGRES_PASSWORD", "postgres"),
+        row_factory=dict_row
+    )
+    await _configure_async_connection(conn)
+    async with conn:
+        yield conn
+
+
 def get_db_cursor():
     """
     Get a database cursor.
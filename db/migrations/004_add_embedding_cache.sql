@@ -0,0 +1,15 @@
+-- Migration: Add embedding_cache table
+-- Shared tier of the query-embedding cache (retrieval/embedding_cache.py).
+-- Keyed by embedding model + sha256 of the cleaned text that was embedded.
+
+CREATE TABLE IF NOT EXISTS embedding_cache (
+  model TEXT NOT NULL,
+  text_sha256 TEXT NOT NULL,
+  embedding vector(1536) NOT NULL,
+  created_at TIMESTAMPTZ DEFAULT now(),
+  PRIMARY KEY (model, text_sha256)
+);
+
+CREATE INDEX IF NOT EXISTS embedding_cache_created_at_idx ON embedding_cache(created_at);
+
+COMMENT ON TABLE embedding_cache IS 'Embeddings keyed by (model, sha256 of cleaned text); shared across workers';
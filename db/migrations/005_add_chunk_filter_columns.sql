@@ -0,0 +1,28 @@
+-- Migration: Add pre-normalized service/component filter columns to chunks
+-- hybrid_search used LOWER(c.metadata->>'service') LIKE '%x%', which cannot use any index.
+-- service_norm/component_norm hold lower(trim(value)) and are filled at ingest
+-- (ingestion/db_ops.py::insert_document_and_chunks); trigram indexes serve the
+-- partial-match LIKE filters and btree indexes serve exact matches.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE chunks
+  ADD COLUMN IF NOT EXISTS service_norm TEXT,
+  ADD COLUMN IF NOT EXISTS component_norm TEXT;
+
+-- Backfill existing rows (only rows that have a value to normalize and were not filled yet)
+UPDATE chunks
+SET
+  service_norm = NULLIF(lower(btrim(metadata->>'service', E' \t\r\n')), ''),
+  component_norm = NULLIF(lower(btrim(metadata->>'component', E' \t\r\n')), '')
+WHERE service_norm IS NULL
+  AND component_norm IS NULL
+  AND (metadata->>'service' IS NOT NULL OR metadata->>'component' IS NOT NULL);
+
+CREATE INDEX IF NOT EXISTS chunks_service_norm_trgm_idx ON chunks USING GIN (service_norm gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS chunks_component_norm_trgm_idx ON chunks USING GIN (component_norm gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS chunks_service_norm_idx ON chunks(service_norm);
+CREATE INDEX IF NOT EXISTS chunks_component_norm_idx ON chunks(component_norm);
+
+COMMENT ON COLUMN chunks.service_norm IS 'lower(trim(service)) for indexed retrieval filters';
+COMMENT ON COLUMN chunks.component_norm IS 'lower(trim(component)) for indexed retrieval filters';
@@ -0,0 +1,15 @@
+-- Migration: Add corpus_version counter
+-- Single-row monotonic counter bumped whenever documents/chunks change.
+-- The hybrid_search result cache (retrieval/result_cache.py) keys entries on it,
+-- so any knowledge-base write invalidates cached results exactly.
+
+CREATE TABLE IF NOT EXISTS corpus_version (
+  id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+  version BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ DEFAULT now()
+);
+
+INSERT INTO corpus_version (id, version) VALUES (TRUE, 0)
+ON CONFLICT (id) DO NOTHING;
+
+COMMENT ON TABLE corpus_version IS 'Single-row counter bumped on every documents/chunks write; used for retrieval cache invalidation';
@@ -0,0 +1,37 @@
+-- Migration: Make chunks.tsv a stored generated column
+-- tsv used to be written by ingestion as to_tsvector('english', content); generating it
+-- in the table keeps it in sync with content on every INSERT/UPDATE and removes the
+-- second copy of each chunk from the INSERT parameters.
+-- The GIN index is rebuilt with fastupdate = off: chunks are written in ingest batches
+-- and read on every triage/resolution request, so searches should never have to scan
+-- an unmerged pending list.
+
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1
+    FROM information_schema.columns
+    WHERE table_name = 'chunks' AND column_name = 'tsv' AND is_generated = 'NEVER'
+  ) THEN
+    -- Dropping the column also drops chunks_tsv_idx; both are recreated below
+    ALTER TABLE chunks DROP COLUMN tsv;
+  END IF;
+END $$;
+
+ALTER TABLE chunks
+  ADD COLUMN IF NOT EXISTS tsv tsvector GENERATED ALWAYS AS (to_tsvector('english', content)) STORED;
+
+CREATE INDEX IF NOT EXISTS chunks_tsv_idx ON chunks USING GIN (tsv) WITH (fastupdate = off);
+
+-- Only for the original unpartitioned table: a partitioned chunks table (migration 011)
+-- creates its per-partition GIN indexes with fastupdate = off already
+DO $$
+BEGIN
+  IF (SELECT relkind FROM pg_class WHERE oid = 'chunks_tsv_idx'::regclass) = 'i' THEN
+    ALTER INDEX chunks_tsv_idx SET (fastupdate = off);
+    -- Merge anything left in the pending list from before fastupdate was turned off
+    PERFORM gin_clean_pending_list('chunks_tsv_idx'::regclass);
+  END IF;
+END $$;
+
+COMMENT ON COLUMN chunks.tsv IS 'to_tsvector(''english'', content), generated';
@@ -0,0 +1,5 @@
+-- Migration: Index chunks by position within their document
+-- Neighbor-chunk expansion (retrieval/neighbor_expansion.py) fetches
+-- chunk_index +/- n of the same document_id for every retrieved hit.
+
+CREATE INDEX IF NOT EXISTS chunks_document_chunk_idx ON chunks(document_id, chunk_index);
@@ -0,0 +1,20 @@
+-- Migration: Store token counts and content hashes on chunks
+-- insert_document_and_chunks already tokenizes every chunk to validate it against the
+-- embedding model limit; persisting the count (and a sha256 of the content) lets
+-- retrieval hand both to prompt packing, dedup and cost estimation without
+-- re-tokenizing on the request path.
+-- token_count needs the tokenizer, so existing rows are filled by
+-- scripts/db/backfill_chunk_stats.py; content_sha256 is backfilled here.
+
+ALTER TABLE chunks
+  ADD COLUMN IF NOT EXISTS token_count INT,
+  ADD COLUMN IF NOT EXISTS content_sha256 TEXT;
+
+UPDATE chunks
+SET content_sha256 = encode(sha256(convert_to(content, 'UTF8')), 'hex')
+WHERE content_sha256 IS NULL;
+
+CREATE INDEX IF NOT EXISTS chunks_content_sha256_idx ON chunks(content_sha256);
+
+COMMENT ON COLUMN chunks.token_count IS 'cl100k_base token count of content (chunk header included)';
+COMMENT ON COLUMN chunks.content_sha256 IS 'sha256 hex digest of content';
@@ -0,0 +1,16 @@
+-- Migration: Document-level summary embeddings for two-stage retrieval
+-- Chunk vectors carry a header prefix and a long body, so short alert queries match
+-- them poorly. Each document also gets one embedding of its title + derived summary
+-- (ingestion.chunker.build_document_summary); hybrid_search can rank documents on it
+-- first and restrict the chunk search to the top documents.
+-- Existing documents are filled by scripts/db/backfill_document_summaries.py.
+
+ALTER TABLE documents
+  ADD COLUMN IF NOT EXISTS summary TEXT,
+  ADD COLUMN IF NOT EXISTS summary_embedding vector(1536);
+
+CREATE INDEX IF NOT EXISTS documents_summary_embedding_idx
+  ON documents USING hnsw (summary_embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+
+COMMENT ON COLUMN documents.summary IS 'Title + derived summary (build_document_summary)';
+COMMENT ON COLUMN documents.summary_embedding IS 'Embedding of summary, searched before chunks in two-stage retrieval';
@@ -0,0 +1,28 @@
+-- Migration: Prepare chunks for list partitioning by doc_type
+-- Logs (/ingest/log) will far outnumber runbooks; with one chunks table and one vector
+-- index every runbook-only search pays for them. chunks becomes list-partitioned by
+-- doc_type (runbook / incident / alert / log / default) with per-partition vector and GIN
+-- indexes, and hybrid_search filters on chunks.doc_type so the planner prunes partitions.
+--
+-- Moving the rows is done online by scripts/db/partition_chunks.py (batched copy with a
+-- sync trigger, then a short rename swap), not here: this migration runs in a single
+-- transaction. It only adds and backfills the doc_type column so ingestion and retrieval
+-- work against the unpartitioned table until the script has run.
+
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS doc_type TEXT;
+
+-- No-op on the partitioned table (doc_type is NOT NULL there)
+UPDATE chunks c
+SET doc_type = d.doc_type
+FROM documents d
+WHERE c.document_id = d.id
+  AND c.doc_type IS NULL;
+
+COMMENT ON COLUMN chunks.doc_type IS 'Copy of documents.doc_type; partition key once chunks is partitioned';
+
+DO $$
+BEGIN
+  IF (SELECT relkind FROM pg_class WHERE oid = 'chunks'::regclass) <> 'p' THEN
+    RAISE NOTICE 'chunks is not partitioned yet; run scripts/db/partition_chunks.py to convert it online';
+  END IF;
+END $$;
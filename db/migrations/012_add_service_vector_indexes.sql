@@ -0,0 +1,22 @@
+-- Migration: Partial vector indexes for the busiest service filters
+-- A service-filtered vector search walks the global HNSW/IVFFlat index and discards
+-- rows of other services afterwards, so busy filtered queries can come back short.
+-- scripts/db/manage_service_indexes.py creates a partial index
+-- (WHERE service_norm LIKE '%<service>%') for the top services by observed filtered
+-- searches (service_filter_stats, flushed by retrieval.service_indexes) and records
+-- it in service_vector_indexes, which hybrid_search reads to route those searches.
+
+CREATE TABLE IF NOT EXISTS service_filter_stats (
+  service_pattern TEXT PRIMARY KEY,
+  query_count BIGINT NOT NULL DEFAULT 0,
+  last_queried_at TIMESTAMPTZ DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS service_vector_indexes (
+  service_pattern TEXT PRIMARY KEY,
+  index_name TEXT NOT NULL UNIQUE,
+  created_at TIMESTAMPTZ DEFAULT now()
+);
+
+COMMENT ON TABLE service_filter_stats IS 'Filtered hybrid searches per service LIKE pattern (input to manage_service_indexes.py)';
+COMMENT ON TABLE service_vector_indexes IS 'Partial chunks embedding indexes per service pattern; hybrid_search routes matching filters to them';
@@ -0,0 +1,14 @@
+-- Migration: Tell query-cache rows from ingestion-store rows in embedding_cache
+-- Query embeddings (retrieval/embedding_cache.py) only count as hits for
+-- shared_ttl_seconds and are pruned in bounded batches on write; embeddings of
+-- ingested texts (ingestion/embedding_store.py) never go stale and are kept.
+-- Rows written before this migration count as query rows: an ingested text whose
+-- row is pruned is embedded once more on its next re-ingest.
+
+ALTER TABLE embedding_cache ADD COLUMN IF NOT EXISTS tier TEXT NOT NULL DEFAULT 'query';
+
+-- Only expired query rows are ever looked up by age
+DROP INDEX IF EXISTS embedding_cache_created_at_idx;
+CREATE INDEX IF NOT EXISTS embedding_cache_query_created_at_idx ON embedding_cache(created_at) WHERE tier = 'query';
+
+COMMENT ON COLUMN embedding_cache.tier IS 'query: retrieval query cache (expires, pruned); store: ingested texts (kept)';
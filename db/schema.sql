@@ -1,6 +1,7 @@
 -- Enable required extensions
 CREATE EXTENSION IF NOT EXISTS vector;
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 -- documents: runbooks, past incident reports, SOPs
 CREATE TABLE IF NOT EXISTS documents (
@@ -12,18 +13,72 @@ CREATE TABLE IF NOT EXISTS documents (
   content TEXT,
   tags JSONB,
   last_reviewed_at TIMESTAMPTZ,
+  summary TEXT, -- title + derived summary (build_document_summary)
+  summary_embedding vector(1536), -- embedding of summary, searched first in two-stage retrieval
   created_at TIMESTAMPTZ DEFAULT now()
 );
 
--- chunks: RAG-ready pieces
+-- chunks: RAG-ready pieces, list-partitioned by doc_type so each type has its own
+-- vector/GIN indexes and doc_type-filtered searches only touch their partitions.
+-- Convert an existing unpartitioned table online with scripts/db/partition_chunks.py.
 CREATE TABLE IF NOT EXISTS chunks (
-  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  id UUID NOT NULL DEFAULT gen_random_uuid(),
   document_id UUID REFERENCES documents(id) ON DELETE CASCADE,
+  doc_type TEXT NOT NULL, -- partition key (copy of documents.doc_type)
   chunk_index INT,
   content TEXT NOT NULL,
   metadata JSONB,
+  service_norm TEXT, -- lower(trim(service)) for indexed retrieval filters
+  component_norm TEXT, -- lower(trim(component)) for indexed retrieval filters
   embedding vector(1536), -- OpenAI text-embedding-3-small uses 1536 dimensions
-  tsv tsvector,
+  tsv tsvector GENERATED ALWAYS AS (to_tsvector('english', content)) STORED,
+  token_count INT, -- cl100k_base token count of content (chunk header included)
+  content_sha256 TEXT, -- sha256 hex digest of content
+  created_at TIMESTAMPTZ DEFAULT now(),
+  PRIMARY KEY (id, doc_type)
+) PARTITION BY LIST (doc_type);
+
+-- Partitions (only when chunks is partitioned; an older unpartitioned table is left alone)
+DO $$
+BEGIN
+  IF (SELECT relkind FROM pg_class WHERE oid = 'chunks'::regclass) = 'p' THEN
+    CREATE TABLE IF NOT EXISTS chunks_runbook PARTITION OF chunks FOR VALUES IN ('runbook');
+    CREATE TABLE IF NOT EXISTS chunks_incident PARTITION OF chunks FOR VALUES IN ('incident');
+    CREATE TABLE IF NOT EXISTS chunks_alert PARTITION OF chunks FOR VALUES IN ('alert');
+    CREATE TABLE IF NOT EXISTS chunks_log PARTITION OF chunks FOR VALUES IN ('log');
+    CREATE TABLE IF NOT EXISTS chunks_other PARTITION OF chunks DEFAULT;
+  END IF;
+END $$;
+
+-- embedding_cache: embeddings keyed by model + sha256 of the cleaned text
+CREATE TABLE IF NOT EXISTS embedding_cache (
+  model TEXT NOT NULL,
+  text_sha256 TEXT NOT NULL,
+  embedding vector(1536) NOT NULL,
+  created_at TIMESTAMPTZ DEFAULT now(),
+  tier TEXT NOT NULL DEFAULT 'query',  -- query: query cache (expires, pruned); store: ingested texts (kept)
+  PRIMARY KEY (model, text_sha256)
+);
+
+-- corpus_version: single-row counter bumped on every documents/chunks write
+CREATE TABLE IF NOT EXISTS corpus_version (
+  id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+  version BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ DEFAULT now()
+);
+INSERT INTO corpus_version (id, version) VALUES (TRUE, 0) ON CONFLICT (id) DO NOTHING;
+
+-- service_filter_stats: filtered hybrid searches per service pattern (retrieval.service_indexes)
+CREATE TABLE IF NOT EXISTS service_filter_stats (
+  service_pattern TEXT PRIMARY KEY,
+  query_count BIGINT NOT NULL DEFAULT 0,
+  last_queried_at TIMESTAMPTZ DEFAULT now()
+);
+
+-- service_vector_indexes: partial embedding indexes managed by scripts/db/manage_service_indexes.py
+CREATE TABLE IF NOT EXISTS service_vector_indexes (
+  service_pattern TEXT PRIMARY KEY,
+  index_name TEXT NOT NULL UNIQUE,
   created_at TIMESTAMPTZ DEFAULT now()
 );
 
@@ -59,9 +114,22 @@ CREATE TABLE IF NOT EXISTS feedback (
 );
 
 -- Indexes
-CREATE INDEX IF NOT EXISTS chunks_tsv_idx ON chunks USING GIN (tsv);
-CREATE INDEX IF NOT EXISTS chunks_embedding_idx ON chunks USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
+-- fastupdate off: chunks are written in ingest batches and searched on every request,
+-- so reads should not pay for scanning an unmerged pending list
+CREATE INDEX IF NOT EXISTS chunks_tsv_idx ON chunks USING GIN (tsv) WITH (fastupdate = off);
+-- HNSW does not depend on the data present at build time (ivfflat built on an empty table
+-- has useless lists). Switch index type with scripts/db/rebuild_vector_index.py.
+-- On the partitioned table every index below is created per partition.
+CREATE INDEX IF NOT EXISTS chunks_embedding_idx ON chunks USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+CREATE INDEX IF NOT EXISTS documents_summary_embedding_idx ON documents USING hnsw (summary_embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
 CREATE INDEX IF NOT EXISTS chunks_document_id_idx ON chunks(document_id);
+CREATE INDEX IF NOT EXISTS chunks_document_chunk_idx ON chunks(document_id, chunk_index);
+CREATE INDEX IF NOT EXISTS chunks_content_sha256_idx ON chunks(content_sha256);
+CREATE INDEX IF NOT EXISTS chunks_service_norm_trgm_idx ON chunks USING GIN (service_norm gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS chunks_component_norm_trgm_idx ON chunks USING GIN (component_norm gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS chunks_service_norm_idx ON chunks(service_norm);
+CREATE INDEX IF NOT EXISTS chunks_component_norm_idx ON chunks(component_norm);
+CREATE INDEX IF NOT EXISTS embedding_cache_query_created_at_idx ON embedding_cache(created_at) WHERE tier = 'query';
 CREATE INDEX IF NOT EXISTS incidents_alert_id_idx ON incidents(alert_id);
 CREATE INDEX IF NOT EXISTS incidents_created_at_idx ON incidents(created_at);
 CREATE INDEX IF NOT EXISTS incidents_policy_band_idx ON incidents(policy_band);
@@ -2,6 +2,8 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional
 from db.connection import get_db_connection_context
+from ingestion.db_ops import normalize_filter_value, bump_corpus_version
+from ingestion.chunker import build_document_summary
 import logging
 
 logger = logging.getLogger(__name__)
@@ -166,6 +168,33 @@ def update_document(
             
             query = f"UPDATE documents SET {', '.join(updates)} WHERE id = %s"
             cur.execute(query, params)
+            
+            # The summary (and its embedding, used by two-stage search) derive from title + content
+            if title is not None or content is not None:
+                _refresh_document_summary(cur, document_id)
+            
+            # Keep chunk filter metadata (used by retrieval) in sync with the document
+            if service is not None:
+                cur.execute(
+                    """
+                    UPDATE chunks
+                    SET metadata = jsonb_set(COALESCE(metadata, '{}'::jsonb), '{service}', to_jsonb(%s::text)),
+                        service_norm = %s
+                    WHERE document_id = %s
+                    """,
+                    (service, normalize_filter_value(service), document_id)
+                )
+            if component is not None:
+                cur.execute(
+                    """
+                    UPDATE chunks
+                    SET metadata = jsonb_set(COALESCE(metadata, '{}'::jsonb), '{component}', to_jsonb(%s::text)),
+                        component_norm = %s
+                    WHERE document_id = %s
+                    """,
+                    (component, normalize_filter_value(component), document_id)
+                )
+            bump_corpus_version(cur)
             conn.commit()
             
             logger.info(f"Document updated: {document_id}")
@@ -183,6 +212,18 @@ def update_document(
         raise HTTPException(status_code=500, detail=f"Failed to update document: {str(e)}")
 
 
+def _refresh_document_summary(cur, document_id: str) -> None:
+    """Recompute documents.summary and re-embed summary_embedding from the updated title/content."""
+    from ingestion.embeddings import embed_text, format_vector
+    cur.execute("SELECT doc_type, title, content FROM documents WHERE id = %s", (document_id,))
+    row = cur.fetchone()
+    summary = build_document_summary(row["doc_type"], row["title"], row["content"])
+    cur.execute(
+        "UPDATE documents SET summary = %s, summary_embedding = %s::vector WHERE id = %s",
+        (summary, format_vector(embed_text(summary)), document_id)
+    )
+
+
 @router.delete("/documents/{document_id}")
 def delete_document(document_id: str):
     """
@@ -200,6 +241,7 @@ def delete_document(document_id: str):
                 raise HTTPException(status_code=404, detail="Document not found")
             
             cur.execute("DELETE FROM documents WHERE id = %s", (document_id,))
+            bump_corpus_version(cur)
             conn.commit()
             
             logger.info(f"Document deleted: {document_id}")
@@ -1,176 +1,241 @@
 """Text chunking utilities."""
-import tiktoken
 import re
-from typing import List
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from operator import sub
+from typing import Iterator, List, NamedTuple, Tuple
 
+# Shared tokenizer encoding (loaded once per process; tiktoken's own cache as fallback)
+try:
+    from ai_service.core import get_encoding
+except ImportError:
+    from tiktoken import get_encoding
 
-def chunk_text(
+
+# Default chunk size (tokens), as used for ingestion
+DEFAULT_CHUNK_MAX_TOKENS = 320
+
+# Cut points, strongest first: paragraph break, line break, sentence end. A match starts
+# at the newline (cut there) or at the sentence's final punctuation (cut just after it);
+# lastindex tells them apart. The leading character class lets re skip to candidates.
+_BOUNDARY_RE = re.compile(r"[\n.!?](?:(?<=\n)(?:[ \t]*(\n)|())\s*|(?<!\n)([ \t]+))")
+_PARAGRAPH, _LINE, _SENTENCE = 3, 2, 1
+_STRENGTH_BY_GROUP = {1: _PARAGRAPH, 2: _LINE, 3: _SENTENCE}
+
+# UTF-8 continuation bytes (0b10xxxxxx): every other byte starts a character
+_CONTINUATION_BYTES = bytes(range(0x80, 0xC0))
+
+
+class _TokenTable(dict):
+    """token id -> measure(token bytes), filled on first use of each token."""
+    
+    def __init__(self, encoding, measure):
+        super().__init__()
+        self._decode = encoding.decode_single_token_bytes
+        self._measure = measure
+    
+    def __missing__(self, token: int) -> int:
+        value = self[token] = self._measure(self._decode(token))
+        return value
+
+
+def _starts_chars(piece: bytes) -> int:
+    return len(piece.translate(None, _CONTINUATION_BYTES))
+
+
+def _starts_inside_char(piece: bytes) -> int:
+    return int(0x80 <= piece[0] < 0xC0)
+
+
+@lru_cache(maxsize=None)
+def _token_tables(encoding) -> Tuple[_TokenTable, _TokenTable]:
+    """Per encoding: characters each token starts, and 1 if it begins inside a character.
+    
+    Tokens are decoded once per process, so chunking never decodes per token.
+    """
+    return _TokenTable(encoding, _starts_chars), _TokenTable(encoding, _starts_inside_char)
+
+
+def _token_offsets(encoding, text: str, tokens: List[int]) -> List[int]:
+    """Character offset of each token in text, plus len(text) as a final sentinel.
+    
+    Same offsets as tiktoken's decode_with_offsets (a token starting inside a multi-byte
+    character maps to that character), as running character counts in one pass.
+    """
+    chars, continues = _token_tables(encoding)
+    offsets = list(accumulate(map(chars.__getitem__, tokens), initial=0))
+    if text.isascii():
+        return offsets
+    starts = list(map(sub, offsets, map(continues.__getitem__, tokens)))
+    starts.append(offsets[-1])
+    return starts
+
+
+def _boundary_tokens(text: str, offsets: List[int]) -> List[Tuple[int, int]]:
+    """(token index, strength) of every paragraph/line/sentence break, in text order."""
+    # First token starting at or after the break (BPE tokens carry leading whitespace;
+    # a token spanning the break, e.g. ".\n\n", stays with the preceding chunk)
+    return [
+        (bisect_left(offsets, match.start() + (match.lastindex == 3)), _STRENGTH_BY_GROUP[match.lastindex])
+        for match in _BOUNDARY_RE.finditer(text)
+    ]
+
+
+class ChunkRecord(NamedTuple):
+    """One chunk as stored: header + body text, its token count and the body's offsets."""
+    text: str          # add_chunk_header() header + chunk body (what is embedded and stored)
+    token_count: int   # tokens of text (header tokens + body tokens)
+    start: int         # character offset of the body in the chunked document
+    end: int           # character offset just past the body
+
+
+def _iter_spans(
+    text: str,
+    min_tokens: int,
+    max_tokens: int,
+    target_tokens: int,
+    overlap: int
+) -> Iterator[Tuple[int, int, int]]:
+    """(start char, end char, token count) of each chunk; see iter_chunks()."""
+    encoding = get_encoding("cl100k_base")  # Used by text-embedding-3-small
+    
+    # Safety limit: ensure chunks never exceed embedding model limit (8191 tokens)
+    # We use a conservative limit of 3000 tokens to account for headers and safety margin
+    safe_max = max(1, min(max_tokens, 3000))
+    min_tokens = max(1, min(min_tokens, safe_max))
+    target_tokens = max(min_tokens, min(target_tokens, safe_max))
+    overlap = max(0, min(overlap, min_tokens - 1))
+    
+    tokens = encoding.encode(text, disallowed_special=())
+    n_tokens = len(tokens)
+    if n_tokens == 0:
+        return
+    offsets = _token_offsets(encoding, text, tokens)
+    boundaries = _boundary_tokens(text, offsets)
+    
+    start = 0
+    next_boundary = 0
+    while start < n_tokens:
+        remaining = n_tokens - start
+        if remaining <= safe_max:
+            end = n_tokens
+        else:
+            target = start + target_tokens
+            lowest, highest = start + min_tokens, start + safe_max
+            if remaining < safe_max + min_tokens:
+                # Split the tail evenly instead of leaving an undersized last chunk
+                target = start + (remaining + overlap) // 2
+                highest = min(highest, max(lowest, n_tokens + overlap - min_tokens))
+            
+            while next_boundary < len(boundaries) and boundaries[next_boundary][0] < lowest:
+                next_boundary += 1
+            end, best = highest, None
+            idx = next_boundary
+            while idx < len(boundaries) and boundaries[idx][0] <= highest:
+                token_idx, strength = boundaries[idx]
+                rank = (strength, -abs(token_idx - target))
+                if best is None or rank > best:
+                    end, best = token_idx, rank
+                idx += 1
+        
+        # Whitespace at the edges is stripped with the text; whitespace-only tokens there
+        # are not counted (first/last: the tokens holding the stripped span's ends)
+        chunk_start, chunk_end = offsets[start], offsets[end]
+        span = text[chunk_start:chunk_end]
+        body = span.strip()
+        if body:
+            chunk_start += len(span) - len(span.lstrip())
+            chunk_end = chunk_start + len(body)
+            first = bisect_right(offsets, chunk_start, start, end) - 1
+            # Tokens splitting one multi-byte character share its offset
+            first = bisect_left(offsets, offsets[first], start, first)
+            last = bisect_left(offsets, chunk_end, first + 1, end)
+            yield chunk_start, chunk_end, last - first
+        if end >= n_tokens:
+            break
+        start = max(end - overlap, start + 1)
+
+
+def iter_chunks(
     text: str,
     min_tokens: int = 180,
     max_tokens: int = 320,
     target_tokens: int = 250,
     overlap: int = 30
-) -> List[str]:
+) -> Iterator[str]:
     """
-    Chunk text into token-sized pieces with overlap.
+    Yield token-sized chunks of text with an exact token overlap.
+    
+    The text is tokenized once; chunks are slices of the original text between token
+    offsets. Each chunk ends at the strongest break (paragraph, then line, then
+    sentence) between min_tokens and max_tokens, nearest to target_tokens, or at
+    max_tokens when there is none (one long line). The next chunk starts `overlap`
+    tokens before that end. The tail is split evenly when it would otherwise leave a
+    chunk shorter than min_tokens.
     
     Args:
         text: Text to chunk
-        min_tokens: Minimum tokens per chunk
+        min_tokens: Minimum tokens per chunk (only the sole chunk of a short text is smaller)
         max_tokens: Maximum tokens per chunk
         target_tokens: Target tokens per chunk
         overlap: Number of tokens to overlap between chunks
     
-    Returns:
-        List of text chunks
+    Yields:
+        Text chunks, in document order
     """
-    encoding = tiktoken.get_encoding("cl100k_base")  # Used by text-embedding-3-small
-    
-    # Safety limit: ensure chunks never exceed embedding model limit (8191 tokens)
-    # We use a conservative limit of 3000 tokens to account for headers and safety margin
-    SAFE_MAX_TOKENS = min(max_tokens, 3000)
+    for start, end, _ in _iter_spans(text, min_tokens, max_tokens, target_tokens, overlap):
+        yield text[start:end]
+
+
+def iter_chunk_records(
+    text: str,
+    header: str = "",
+    header_tokens: int = 0,
+    min_tokens: int = 180,
+    max_tokens: int = 320,
+    target_tokens: int = 250,
+    overlap: int = 30
+) -> Iterator[ChunkRecord]:
+    """
+    Chunk text and apply the chunk header in the same pass (see iter_chunks()).
     
-    # Split by paragraphs first
-    paragraphs = re.split(r'\n\s*\n', text.strip())
+    Token counts come from the chunker's single tokenization; nothing is re-encoded.
     
-    # If no paragraph breaks (e.g., large log file), split by single newlines
-    if len(paragraphs) == 1 and len(text) > 100000:  # Large single paragraph
-        paragraphs = text.split('\n')
+    Args:
+        text: Text to chunk
+        header: Header prepended to every chunk (add_chunk_header() with an empty chunk)
+        header_tokens: Token count of header (counted once by the caller)
+        min_tokens, max_tokens, target_tokens, overlap: As for iter_chunks(), body only
     
-    chunks = []
-    current_chunk = []
-    current_tokens = 0
+    Yields:
+        ChunkRecord per chunk, in document order
+    """
+    for start, end, token_count in _iter_spans(text, min_tokens, max_tokens, target_tokens, overlap):
+        yield ChunkRecord(header + text[start:end], header_tokens + token_count, start, end)
+
+
+def chunk_text(
+    text: str,
+    min_tokens: int = 180,
+    max_tokens: int = 320,
+    target_tokens: int = 250,
+    overlap: int = 30
+) -> List[str]:
+    """
+    Chunk text into token-sized pieces with overlap.
     
-    for para in paragraphs:
-        if not para.strip():
-            continue
-            
-        para_tokens = len(encoding.encode(para))
-        
-        # If paragraph itself is too large, split by sentences
-        if para_tokens > SAFE_MAX_TOKENS:
-            sentences = re.split(r'(?<=[.!?])\s+', para)
-            # If no sentence breaks (e.g., log lines), split by newlines
-            if len(sentences) == 1:
-                sentences = para.split('\n')
-            # If still too large, split by character chunks
-            if len(sentences) == 1 and para_tokens > SAFE_MAX_TOKENS:
-                # Split into character-based chunks as last resort
-                char_chunk_size = SAFE_MAX_TOKENS * 4  # Rough estimate: ~4 chars per token
-                sentences = [para[j:j+char_chunk_size] for j in range(0, len(para), char_chunk_size)]
-            
-            for sentence in sentences:
-                sent_tokens = len(encoding.encode(sentence))
-                
-                # If sentence itself is still too large, force split it
-                if sent_tokens > SAFE_MAX_TOKENS:
-                    # Force split by characters
-                    char_chunk_size = SAFE_MAX_TOKENS * 4
-                    for k in range(0, len(sentence), char_chunk_size):
-                        sub_chunk = sentence[k:k+char_chunk_size]
-                        sub_tokens = len(encoding.encode(sub_chunk))
-                        if current_tokens + sub_tokens > SAFE_MAX_TOKENS and current_chunk:
-                            chunk_text = ' '.join(current_chunk)
-                            chunks.append(chunk_text)
-                            current_chunk = [sub_chunk]
-                            current_tokens = sub_tokens
-                        else:
-                            current_chunk.append(sub_chunk)
-                            current_tokens += sub_tokens
-                    continue
-                
-                if current_tokens + sent_tokens > SAFE_MAX_TOKENS and current_chunk:
-                    # Save current chunk
-                    chunk_text = ' '.join(current_chunk)
-                    chunks.append(chunk_text)
-                    
-                    # Start new chunk with overlap
-                    if overlap > 0 and chunks:
-                        # Get last few sentences for overlap
-                        last_chunk = chunks[-1]
-                        last_sentences = re.split(r'(?<=[.!?])\s+', last_chunk)
-                        if not last_sentences:
-                            last_sentences = last_chunk.split('\n')[:2]
-                        overlap_text = ' '.join(last_sentences[-2:]) if len(last_sentences) >= 2 else last_sentences[-1]
-                        overlap_tokens = len(encoding.encode(overlap_text))
-                        if overlap_tokens <= overlap * 2:
-                            current_chunk = [overlap_text, sentence]
-                            current_tokens = overlap_tokens + sent_tokens
-                        else:
-                            current_chunk = [sentence]
-                            current_tokens = sent_tokens
-                    else:
-                        current_chunk = [sentence]
-                        current_tokens = sent_tokens
-                else:
-                    current_chunk.append(sentence)
-                    current_tokens += sent_tokens
-        else:
-            # Check if adding this paragraph would exceed safe max
-            if current_tokens + para_tokens > SAFE_MAX_TOKENS and current_chunk:
-                chunk_text = ' '.join(current_chunk)
-                chunks.append(chunk_text)
-                
-                # Start new chunk with overlap
-                if overlap > 0 and chunks:
-                    last_chunk = chunks[-1]
-                    last_sentences = re.split(r'(?<=[.!?])\s+', last_chunk)
-                    if not last_sentences:
-                        last_sentences = last_chunk.split('\n')[:1]
-                    overlap_text = ' '.join(last_sentences[-1:])
-                    overlap_tokens = len(encoding.encode(overlap_text))
-                    if overlap_tokens <= overlap * 2:
-                        current_chunk = [overlap_text, para]
-                        current_tokens = overlap_tokens + para_tokens
-                    else:
-                        current_chunk = [para]
-                        current_tokens = para_tokens
-                else:
-                    current_chunk = [para]
-                    current_tokens = para_tokens
-            else:
-                current_chunk.append(para)
-                current_tokens += para_tokens
-    
-    # Add final chunk if it meets minimum
-    if current_chunk:
-        chunk_text = ' '.join(current_chunk)
-        chunk_tokens = len(encoding.encode(chunk_text))
-        
-        # Safety check: if final chunk is too large, split it
-        if chunk_tokens > SAFE_MAX_TOKENS:
-            # Split the final chunk
-            char_chunk_size = SAFE_MAX_TOKENS * 4
-            for k in range(0, len(chunk_text), char_chunk_size):
-                sub_chunk = chunk_text[k:k+char_chunk_size]
-                sub_tokens = len(encoding.encode(sub_chunk))
-                if sub_tokens >= min_tokens:
-                    chunks.append(sub_chunk)
-                elif chunks:
-                    chunks[-1] = chunks[-1] + ' ' + sub_chunk
-        elif chunk_tokens >= min_tokens:
-            chunks.append(chunk_text)
-        # Note: min_tokens is now 180 (target: 180-320), but we still accept chunks >= 120 for edge cases
-        elif chunks:
-            # Merge with last chunk if too small
-            chunks[-1] = chunks[-1] + ' ' + chunk_text
-        else:
-            # If no chunks yet and this is too small, add it anyway (it's all we have)
-            chunks.append(chunk_text)
-    
-    # Final safety check: ensure no chunk exceeds safe limit
-    final_chunks = []
-    for chunk in chunks:
-        chunk_tokens = len(encoding.encode(chunk))
-        if chunk_tokens > SAFE_MAX_TOKENS:
-            # Force split oversized chunks
-            char_chunk_size = SAFE_MAX_TOKENS * 4
-            for k in range(0, len(chunk), char_chunk_size):
-                final_chunks.append(chunk[k:k+char_chunk_size])
-        else:
-            final_chunks.append(chunk)
+    Args:
+        text: Text to chunk
+        min_tokens: Minimum tokens per chunk
+        max_tokens: Maximum tokens per chunk
+        target_tokens: Target tokens per chunk
+        overlap: Number of tokens to overlap between chunks
     
-    return final_chunks
+    Returns:
+        List of text chunks (see iter_chunks())
+    """
+    return list(iter_chunks(text, min_tokens, max_tokens, target_tokens, overlap))
 
 
 def add_chunk_header(chunk: str, doc_type: str, service: str = None, component: str = None, title: str = None, last_reviewed_at: str = None) -> str:
@@ -196,4 +261,33 @@ def add_chunk_header(chunk: str, doc_type: str, service: str = None, component:
     return chunk
 
 
+# Incident paragraphs (normalize_incident / ServiceNow tickets) that say what went wrong
+SUMMARY_INCIDENT_PREFIXES = ("Description:", "Root Cause:")
+# Runbook sections appended by normalize_runbook; the summary stops before them
+SUMMARY_STOP_PREFIXES = ("Steps:", "Prerequisites:", "Rollback Procedures:")
+DEFAULT_SUMMARY_MAX_CHARS = 600
+
 
+def build_document_summary(doc_type: str, title: str, content: str, max_chars: int = DEFAULT_SUMMARY_MAX_CHARS) -> str:
+    """Derive the short text embedded as documents.summary_embedding.
+    
+    Title plus what the document is about: description and root cause for incidents
+    (ServiceNow tickets), the lead paragraphs before any steps for runbooks and other
+    documents. Short alert queries match this better than full chunks.
+    """
+    paragraphs = [p.strip() for p in (content or "").split("\n\n") if p.strip()]
+    selected = []
+    if doc_type == "incident":
+        selected = [p for p in paragraphs if p.startswith(SUMMARY_INCIDENT_PREFIXES)]
+    if not selected:
+        for paragraph in paragraphs:
+            if paragraph.startswith(SUMMARY_STOP_PREFIXES):
+                break
+            selected.append(paragraph)
+            if sum(len(p) for p in selected) >= max_chars:
+                break
+    
+    body = " ".join(" ".join(selected).split())
+    title = (title or "").strip()
+    summary = f"{title}\n{body}" if title and body else (title or body)
+    return summary[:max_chars].rstrip()
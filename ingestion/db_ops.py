@@ -1,16 +1,56 @@
 """Database operations for ingestion."""
+import hashlib
 import uuid
 import json
 from datetime import datetime
+from typing import Optional
 from db.connection import get_db_connection
 from ingestion.embeddings import embed_text
-from ingestion.chunker import chunk_text, add_chunk_header
+from ingestion.chunker import (
+    iter_chunk_records, add_chunk_header, build_document_summary, DEFAULT_CHUNK_MAX_TOKENS
+)
 
 
-def create_tsvector(text: str) -> str:
-    """Create tsvector from text for full-text search."""
-    # Simple tsvector creation - Postgres will handle the actual parsing
-    return text
+def normalize_filter_value(value) -> Optional[str]:
+    """Normalize a service/component value for the indexed chunk filter columns.
+
+    Must match the SQL backfill in db/migrations/005_add_chunk_filter_columns.sql:
+    lower(trim(value)), with empty strings stored as NULL.
+    """
+    if value is None:
+        return None
+    normalized = str(value).strip(" \t\r\n").lower()
+    return normalized or None
+
+
+def bump_corpus_version(cur) -> None:
+    """Increment the corpus version inside the caller's transaction.
+
+    Call this in every transaction that writes documents/chunks; cached retrieval
+    results keyed on an older version stop matching as soon as it commits.
+    """
+    cur.execute(
+        "UPDATE corpus_version SET version = version + 1, updated_at = now() WHERE id"
+    )
+
+
+def content_sha256(text: str) -> str:
+    """sha256 hex digest of chunk content (stored as chunks.content_sha256)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def get_corpus_version(cur) -> int:
+    """Return the current corpus version (see bump_corpus_version)."""
+    cur.execute("SELECT version FROM corpus_version WHERE id")
+    row = cur.fetchone()
+    return int(row["version"]) if row else 0
+
+
+async def get_corpus_version_async(cur) -> int:
+    """Async variant of get_corpus_version() for psycopg AsyncCursor."""
+    await cur.execute("SELECT version FROM corpus_version WHERE id")
+    row = await cur.fetchone()
+    return int(row["version"]) if row else 0
 
 
 def insert_document_and_chunks(
@@ -41,129 +81,115 @@ def insert_document_and_chunks(
     if not content_trimmed:
         raise ValueError("Content is empty after trimming whitespace")
     
-    # Validate content can be chunked (pre-check before database operations)
-    # This prevents storing documents that can't be processed
-    from ingestion.chunker import chunk_text
-    test_chunks = chunk_text(content_trimmed)
-    if not test_chunks or len(test_chunks) == 0:
+    # Format last_reviewed_at for header
+    last_reviewed_str = None
+    if last_reviewed_at:
+        if isinstance(last_reviewed_at, datetime):
+            last_reviewed_str = last_reviewed_at.strftime("%Y-%m-%d")
+        else:
+            last_reviewed_str = str(last_reviewed_at)
+    
+    # Chunk, apply headers and count tokens in one pass (before database operations)
+    # The header is the same for every chunk, so it is built and tokenized once
+    from ingestion.embeddings import count_tokens, EMBEDDING_MODEL_LIMITS, DEFAULT_MODEL
+    embedding_model = DEFAULT_MODEL
+    max_tokens = EMBEDDING_MODEL_LIMITS.get(embedding_model, 8191)
+    header = add_chunk_header("", doc_type, service, component, title, last_reviewed_str)
+    header_tokens = count_tokens(header, embedding_model) if header else 0
+    if header_tokens >= max_tokens - 100:
+        raise ValueError(
+            f"Chunk header is {header_tokens} tokens, leaving no room for content "
+            f"under the {max_tokens}-token embedding limit - shorten the title"
+        )
+    # Chunk bodies are shrunk (only ever for huge titles) so header + body stays under the limit
+    records = list(iter_chunk_records(
+        content_trimmed, header=header, header_tokens=header_tokens,
+        max_tokens=min(DEFAULT_CHUNK_MAX_TOKENS, max_tokens - header_tokens - 100)
+    ))
+    # Nothing is stored for content that cannot be processed
+    if not records:
         raise ValueError("Content produced no chunks after chunking - content may be too short or invalid")
     
     conn = get_db_connection()
     cur = conn.cursor()
     
     try:
-        # Insert document (only after all validations pass)
+        # Insert document (only after all validations pass); summary_embedding is set
+        # below, once it has been embedded together with the chunks
         doc_id = uuid.uuid4()
+        summary = build_document_summary(doc_type, title, content_trimmed)
         cur.execute(
             """
-            INSERT INTO documents (id, doc_type, service, component, title, content, tags, last_reviewed_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s::jsonb, %s)
+            INSERT INTO documents (id, doc_type, service, component, title, content, tags, last_reviewed_at, summary)
+            VALUES (%s, %s, %s, %s, %s, %s, %s::jsonb, %s, %s)
             """,
-            (doc_id, doc_type, service, component, title, content_trimmed, json.dumps(tags) if tags else None, last_reviewed_at)
+            (
+                doc_id, doc_type, service, component, title, content_trimmed,
+                json.dumps(tags) if tags else None, last_reviewed_at, summary
+            )
         )
         
-        # Chunk the content (already validated above, but re-chunk for consistency)
-        chunks = chunk_text(content_trimmed)
-        
-        # Validate chunks are not empty
-        empty_chunks = [i for i, chunk in enumerate(chunks) if not chunk or not chunk.strip()]
-        if empty_chunks:
-            raise ValueError(f"Found {len(empty_chunks)} empty chunk(s) at indices: {empty_chunks[:5]}")
-        
-        # Prepare chunks with headers for embedding
-        chunks_with_headers = []
-        from ingestion.embeddings import count_tokens, EMBEDDING_MODEL_LIMITS, DEFAULT_MODEL
-        embedding_model = DEFAULT_MODEL
-        max_tokens = EMBEDDING_MODEL_LIMITS.get(embedding_model, 8191)
-        
-        # Format last_reviewed_at for header
-        last_reviewed_str = None
-        if last_reviewed_at:
-            if isinstance(last_reviewed_at, datetime):
-                last_reviewed_str = last_reviewed_at.strftime("%Y-%m-%d")
-            else:
-                last_reviewed_str = str(last_reviewed_at)
-        
-        for chunk in chunks:
-            chunk_with_header = add_chunk_header(chunk, doc_type, service, component, title, last_reviewed_str)
-            # Validate token count after adding header
-            token_count = count_tokens(chunk_with_header, embedding_model)
-            
-            # If chunk with header exceeds limit, split the chunk further
-            if token_count > max_tokens:
-                # Split chunk by lines to stay under limit
-                import tiktoken
-                encoding = tiktoken.get_encoding("cl100k_base")
-                
-                # Calculate header token count once
-                header_only = add_chunk_header("", doc_type, service, component, title, last_reviewed_str)
-                header_tokens = count_tokens(header_only, embedding_model)
-                available_tokens = max_tokens - header_tokens - 100  # Safety margin
-                
-                # Try splitting by lines first
-                lines = chunk.split('\n')
-                current_subchunk = []
-                current_tokens = 0
-                
-                for line in lines:
-                    line_tokens = len(encoding.encode(line + '\n'))  # Include newline
-                    
-                    if current_tokens + line_tokens > available_tokens and current_subchunk:
-                        # Save current subchunk
-                        subchunk_text = '\n'.join(current_subchunk)
-                        chunks_with_headers.append(add_chunk_header(subchunk_text, doc_type, service, component, title, last_reviewed_str))
-                        current_subchunk = [line]
-                        current_tokens = line_tokens
-                    else:
-                        current_subchunk.append(line)
-                        current_tokens += line_tokens
-                
-                # Add final subchunk
-                if current_subchunk:
-                    subchunk_text = '\n'.join(current_subchunk)
-                    chunks_with_headers.append(add_chunk_header(subchunk_text, doc_type, service, component, title, last_reviewed_str))
-            else:
-                chunks_with_headers.append(chunk_with_header)
-        
-        # Validate we have chunks to embed before generating embeddings
-        if not chunks_with_headers or len(chunks_with_headers) == 0:
-            raise ValueError("No chunks with headers to embed - cannot proceed with embedding generation")
+        # Fail before embedding if the configured model does not fit chunks.embedding
+        from ingestion.embedding_providers import verify_embedding_dimension
+        verify_embedding_dimension(cur)
         
         # Generate embeddings in batches (much faster for large documents)
         # Use batch size of 50 for safety (OpenAI supports up to 2048, but we want to avoid rate limits)
+        # The document summary rides along as the last text of the same batch call
         from ingestion.embeddings import embed_texts_batch
-        batch_size = 50 if len(chunks_with_headers) > 10 else len(chunks_with_headers)
-        embeddings = embed_texts_batch(chunks_with_headers, model=embedding_model, batch_size=batch_size)
+        texts_to_embed = [record.text for record in records] + [summary]
+        batch_size = 50 if len(texts_to_embed) > 10 else len(texts_to_embed)
+        embeddings = embed_texts_batch(
+            texts_to_embed, model=embedding_model, batch_size=batch_size,
+            token_counts=[record.token_count for record in records] + [count_tokens(summary, embedding_model)]
+        )
         
         # Validate embeddings were generated successfully
-        if not embeddings or len(embeddings) != len(chunks_with_headers):
+        if not embeddings or len(embeddings) != len(texts_to_embed):
             raise ValueError(
-                f"Embedding generation failed: expected {len(chunks_with_headers)} embeddings, "
+                f"Embedding generation failed: expected {len(texts_to_embed)} embeddings, "
                 f"got {len(embeddings) if embeddings else 0}"
             )
+        summary_embedding = embeddings.pop()
+        cur.execute(
+            "UPDATE documents SET summary_embedding = %s::vector WHERE id = %s",
+            ('[' + ','.join(map(str, summary_embedding)) + ']', doc_id)
+        )
         
         # Insert chunks with embeddings
         metadata_dict = {"doc_type": doc_type, "service": service, "component": component, "title": title}
-        for idx, (chunk_with_header, embedding) in enumerate(zip(chunks_with_headers, embeddings)):
+        service_norm = normalize_filter_value(service)
+        component_norm = normalize_filter_value(component)
+        for idx, (record, embedding) in enumerate(zip(records, embeddings)):
+            # Chunk body position in documents.content
+            chunk_metadata = dict(metadata_dict, char_start=record.start, char_end=record.end)
             # Convert embedding to string format for pgvector: '[1,2,3,...]'
             embedding_str = '[' + ','.join(map(str, embedding)) + ']'
             
-            # Create tsvector (Postgres will parse it)
+            # tsv is a generated column (to_tsvector('english', content)); chunks is partitioned by doc_type
             cur.execute(
                 """
-                INSERT INTO chunks (document_id, chunk_index, content, metadata, embedding, tsv)
-                VALUES (%s, %s, %s, %s::jsonb, %s::vector, to_tsvector('english', %s))
+                INSERT INTO chunks (
+                    document_id, doc_type, chunk_index, content, metadata, service_norm, component_norm, embedding,
+                    token_count, content_sha256
+                )
+                VALUES (%s, %s, %s, %s, %s::jsonb, %s, %s, %s::vector, %s, %s)
                 """,
                 (
                     doc_id,
+                    doc_type,  # partition key
                     idx,
-                    chunk_with_header,
-                    json.dumps(metadata_dict),  # Convert dict to JSON string for JSONB
+                    record.text,
+                    json.dumps(chunk_metadata),  # Convert dict to JSON string for JSONB
+                    service_norm,
+                    component_norm,
                     embedding_str,  # pgvector string format
-                    create_tsvector(chunk_with_header)
+                    record.token_count,
+                    content_sha256(record.text)
                 )
             )
         
+        bump_corpus_version(cur)
         conn.commit()
         return str(doc_id)
     
@@ -0,0 +1,343 @@
+"""Concurrent, rate-limit-aware dispatch of embedding API batches.
+
+OpenAIEmbeddingProvider.embed() used to send batches one after another with no
+retry, so a single 429 failed the whole document ingest. EmbeddingDispatcher:
+
+- packs texts into batches by token count (max_batch_tokens) as well as item count,
+  keeping input order
+- sends up to `concurrency` batches at once on a shared thread pool; the limit is
+  process-wide, so concurrent ingest requests share one quota
+- adapts the limit to the provider's rate-limit headers: halves it on a 429, shrinks
+  it to what x-ratelimit-remaining-requests/-tokens still allow, and grows it by one
+  per successful batch while there is headroom (between min_concurrency and
+  max_concurrency)
+- retries rate limits, timeouts, connection errors and 5xx with exponential backoff
+  and full jitter, honouring Retry-After when the provider sends it
+"""
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from openai import RateLimitError, APIError, APIConnectionError, APITimeoutError
+
+# Import logging/config (use ai_service modules if available, fallback to defaults)
+try:
+    from ai_service.core import get_logger, get_embeddings_config
+except ImportError:
+    import logging
+
+    def get_logger(name):
+        return logging.getLogger(name)
+
+    def get_embeddings_config():
+        return {}
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_MIN_CONCURRENCY = 1
+DEFAULT_MAX_BATCH_TOKENS = 100000
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_INITIAL_RETRY_DELAY = 1.0  # seconds
+DEFAULT_MAX_RETRY_DELAY = 60.0  # seconds
+
+# Send function: (texts) -> (embeddings, response headers)
+SendFunc = Callable[[List[str]], Tuple[List[List[float]], Mapping[str, str]]]
+
+_DURATION_PART_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def pack_batches(token_counts: List[int], max_batch_tokens: int, max_batch_items: int) -> List[List[int]]:
+    """
+    Group consecutive text indices into batches bounded by tokens and items.
+
+    A text larger than max_batch_tokens gets a batch of its own.
+
+    Args:
+        token_counts: Token count per text
+        max_batch_tokens: Maximum summed tokens per batch
+        max_batch_items: Maximum texts per batch
+
+    Returns:
+        Lists of indices, in input order
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for idx, tokens in enumerate(token_counts):
+        if current and (current_tokens + tokens > max_batch_tokens or len(current) >= max_batch_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(idx)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def parse_reset_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse rate-limit durations such as "1s", "250ms", "6m0s" or "20" (seconds)."""
+    if not value:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    try:
+        value = headers.get(name)
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Rate limits, connection errors, timeouts and 5xx are retried; other errors are not."""
+    if isinstance(error, (RateLimitError, APIConnectionError, APITimeoutError)):
+        return True
+    status = getattr(error, "status_code", None)
+    return isinstance(error, APIError) and bool(status) and (500 <= status < 600 or status == 429)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Delay requested by the provider for a failed request (Retry-After headers)."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+    resets = [
+        parse_reset_seconds(headers.get(name))
+        for name in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+    ]
+    resets = [reset for reset in resets if reset is not None]
+    return resets[0] if resets else None
+
+
+class EmbeddingDispatcher:
+    """Bounded-concurrency embedding batch sender with adaptive limit and retries."""
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        min_concurrency: int = DEFAULT_MIN_CONCURRENCY,
+        max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        initial_retry_delay: float = DEFAULT_INITIAL_RETRY_DELAY,
+        max_retry_delay: float = DEFAULT_MAX_RETRY_DELAY,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            max_concurrency: Upper bound on batches in flight (thread pool size)
+            min_concurrency: Lower bound the adaptive limit never goes below
+            max_batch_tokens: Maximum summed tokens per request
+            max_retries: Attempts per batch before the error is raised
+            initial_retry_delay: Backoff base for the first retry
+            max_retry_delay: Backoff cap
+            sleep: Sleep function (tests)
+        """
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.min_concurrency = max(1, min(int(min_concurrency), self.max_concurrency))
+        self.max_batch_tokens = max(1, int(max_batch_tokens))
+        self.max_retries = max(1, int(max_retries))
+        self.initial_retry_delay = float(initial_retry_delay)
+        self.max_retry_delay = float(max_retry_delay)
+        self._sleep = sleep
+        self._limit = self.max_concurrency
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats = {
+            "batches": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "failures": 0,
+        }
+
+    @property
+    def concurrency(self) -> int:
+        """Current adaptive concurrency limit."""
+        return self._limit
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._cond:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrency, thread_name_prefix="embed-dispatch"
+                )
+            return self._executor
+
+    def _acquire(self) -> None:
+        with self._cond:
+            while self._in_flight >= self._limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def _release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def _set_limit(self, limit: int) -> None:
+        with self._cond:
+            new_limit = max(self.min_concurrency, min(self.max_concurrency, limit))
+            if new_limit != self._limit:
+                logger.info(f"Embedding dispatcher concurrency {self._limit} -> {new_limit}")
+                self._limit = new_limit
+                self._cond.notify_all()
+
+    def on_rate_limited(self) -> None:
+        """Multiplicative decrease after a 429."""
+        with self._cond:
+            self._stats["rate_limited"] += 1
+        self._set_limit(self._limit // 2)
+
+    def on_success(self, headers: Optional[Mapping[str, str]], batch_tokens: int) -> None:
+        """
+        Adapt the limit to the rate-limit headers of a successful response.
+
+        Shrinks to what the remaining request/token quota allows for the current
+        window, otherwise grows by one (additive increase).
+        """
+        headers = headers or {}
+        remaining_requests = _header_int(headers, "x-ratelimit-remaining-requests")
+        remaining_tokens = _header_int(headers, "x-ratelimit-remaining-tokens")
+        allowed = self.max_concurrency
+        if remaining_requests is not None:
+            allowed = min(allowed, remaining_requests)
+        if remaining_tokens is not None and batch_tokens > 0:
+            allowed = min(allowed, remaining_tokens // batch_tokens)
+        if allowed < self._limit:
+            self._set_limit(allowed)
+        elif self._limit < self.max_concurrency:
+            self._set_limit(self._limit + 1)
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, at least the provider's Retry-After."""
+        delay = min(self.initial_retry_delay * (2 ** attempt), self.max_retry_delay)
+        jittered = random.uniform(0, delay)
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            jittered = max(jittered, min(retry_after, self.max_retry_delay) + random.uniform(0, 0.1 * delay))
+        return jittered
+
+    def _send_with_retry(self, send: SendFunc, texts: List[str], batch_tokens: int) -> List[List[float]]:
+        for attempt in range(self.max_retries):
+            self._acquire()
+            try:
+                embeddings, headers = send(texts)
+            except Exception as e:
+                self._release()
+                if not _is_retryable(e) or attempt == self.max_retries - 1:
+                    with self._cond:
+                        self._stats["failures"] += 1
+                    logger.error(
+                        f"Embedding batch failed ({type(e).__name__}, attempt {attempt + 1}/{self.max_retries}, "
+                        f"{len(texts)} texts): {e}"
+                    )
+                    raise
+                if isinstance(e, RateLimitError) or getattr(e, "status_code", None) == 429:
+                    self.on_rate_limited()
+                delay = self._backoff(attempt, e)
+                with self._cond:
+                    self._stats["retries"] += 1
+                logger.warning(
+                    f"Embedding batch error ({type(e).__name__}, attempt {attempt + 1}/{self.max_retries}): {e}. "
+                    f"Retrying in {delay:.2f}s (concurrency {self._limit})..."
+                )
+                self._sleep(delay)
+                continue
+            self._release()
+            with self._cond:
+                self._stats["batches"] += 1
+            self.on_success(headers, batch_tokens)
+            return embeddings
+        raise RuntimeError("unreachable")
+
+    def dispatch(
+        self,
+        texts: List[str],
+        send: SendFunc,
+        token_counts: Optional[List[int]] = None,
+        max_batch_items: int = 100
+    ) -> List[List[float]]:
+        """
+        Embed texts in token-packed batches, several batches in flight at once.
+
+        Args:
+            texts: Cleaned texts
+            send: Sends one batch, returning (embeddings, response headers)
+            token_counts: Token count per text (packing falls back to item count without)
+            max_batch_items: Maximum texts per request
+
+        Returns:
+            Embedding vectors in the same order as texts
+
+        Raises:
+            Exception: The last error of a batch that exhausted its retries
+        """
+        if not texts:
+            return []
+        if token_counts is None or len(token_counts) != len(texts):
+            token_counts = [0] * len(texts)
+        batches = pack_batches(token_counts, self.max_batch_tokens, max(1, int(max_batch_items)))
+
+        def run(indices: List[int]) -> List[List[float]]:
+            batch_tokens = sum(token_counts[i] for i in indices)
+            return self._send_with_retry(send, [texts[i] for i in indices], batch_tokens)
+
+        if len(batches) == 1:
+            return run(batches[0])
+        embeddings: List[List[float]] = []
+        for batch_embeddings in self._get_executor().map(run, batches):
+            embeddings.extend(batch_embeddings)
+        return embeddings
+
+    def get_stats(self) -> Dict:
+        """Return batch/retry counters and the current concurrency limit."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["concurrency"] = self._limit
+            stats["in_flight"] = self._in_flight
+        return stats
+
+
+# Global dispatcher instance
+_embedding_dispatcher: Optional[EmbeddingDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_embedding_dispatcher() -> EmbeddingDispatcher:
+    """Get or create the process-wide embedding dispatcher (config/embeddings.json "dispatcher")."""
+    global _embedding_dispatcher
+    with _dispatcher_lock:
+        if _embedding_dispatcher is None:
+            dispatcher_cfg = (get_embeddings_config() or {}).get("dispatcher", {})
+            _embedding_dispatcher = EmbeddingDispatcher(
+                max_concurrency=dispatcher_cfg.get("max_concurrency", DEFAULT_MAX_CONCURRENCY),
+                min_concurrency=dispatcher_cfg.get("min_concurrency", DEFAULT_MIN_CONCURRENCY),
+                max_batch_tokens=dispatcher_cfg.get("max_batch_tokens", DEFAULT_MAX_BATCH_TOKENS),
+                max_retries=dispatcher_cfg.get("max_retries", DEFAULT_MAX_RETRIES),
+                initial_retry_delay=dispatcher_cfg.get("initial_retry_delay", DEFAULT_INITIAL_RETRY_DELAY),
+                max_retry_delay=dispatcher_cfg.get("max_retry_delay", DEFAULT_MAX_RETRY_DELAY),
+            )
+        return _embedding_dispatcher
@@ -0,0 +1,319 @@
+"""Embedding providers: OpenAI API or a local CPU model.
+
+ingestion.embeddings (embed_text / embed_text_async / embed_texts_batch) validates and
+cleans texts, then hands them to the provider selected in config/embeddings.json:
+
+- "openai" (default): OpenAI embeddings API; batches are packed by tokens and sent
+  concurrently with retries by ingestion.embedding_dispatcher.
+- "local": a sentence-transformers model on CPU (PyTorch or ONNX Runtime backend;
+  optional dependency). The model is loaded once per process; large batches are split
+  across a thread pool (both backends release the GIL during inference), and async
+  callers run inference on the same pool instead of the event loop. Queries embed in
+  milliseconds and ingestion needs no network access.
+
+Vectors are stored in vector(N) columns, so the provider's dimension must match the
+schema; verify_embedding_dimension() compares it with chunks.embedding before use.
+Switching provider/model needs a column migration and re-embedding the corpus (see
+scripts/db/migrate_embedding_dimension.sql), since vectors of different models are
+not comparable.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from openai import OpenAI, AsyncOpenAI
+
+from ingestion.embedding_dispatcher import get_embedding_dispatcher
+
+# Import logging/config/clients (use ai_service modules if available, fallback to defaults)
+try:
+    from ai_service.core import get_logger, get_embeddings_config, get_openai_client, get_async_openai_client
+except ImportError:
+    import logging
+
+    def get_logger(name):
+        return logging.getLogger(name)
+
+    def get_embeddings_config():
+        return {}
+
+    def _api_key():
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY not set in environment")
+        return api_key
+
+    @lru_cache(maxsize=None)
+    def get_openai_client():
+        return OpenAI(api_key=_api_key())
+
+    @lru_cache(maxsize=None)
+    def get_async_openai_client():
+        return AsyncOpenAI(api_key=_api_key())
+
+logger = get_logger(__name__)
+
+DEFAULT_OPENAI_MODEL = "text-embedding-3-small"
+DEFAULT_LOCAL_MODEL = "bge-m3"
+DEFAULT_LOCAL_MODEL_NAME = "BAAI/bge-m3"
+DEFAULT_LOCAL_BATCH_SIZE = 32
+DEFAULT_LOCAL_THREADS = 4
+
+# Known dimensions when config/embeddings.json has no "models" entry
+MODEL_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+    "bge-m3": 1024,
+}
+
+
+def get_embedding_client() -> OpenAI:
+    """Get the shared OpenAI client for embeddings (one connection pool per process)."""
+    return get_openai_client()
+
+
+def get_async_embedding_client() -> AsyncOpenAI:
+    """Get the shared AsyncOpenAI client for embeddings."""
+    return get_async_openai_client()
+
+
+class OpenAIEmbeddingProvider:
+    """OpenAI embeddings API (token-packed batches through the embedding dispatcher)."""
+
+    name = "openai"
+
+    def __init__(self, model: str = DEFAULT_OPENAI_MODEL, dimension: Optional[int] = None):
+        self.model = model
+        self.dimension = dimension or MODEL_DIMENSIONS.get(model)
+
+    def embed(
+        self,
+        texts: List[str],
+        batch_size: int = 100,
+        token_counts: Optional[List[int]] = None
+    ) -> List[List[float]]:
+        """
+        Embed cleaned texts (order preserved).
+
+        Batches hold at most batch_size texts and the dispatcher's max_batch_tokens;
+        several are in flight at once, with retries on rate limits and server errors.
+        """
+        # The dispatcher owns retries, backoff and concurrency: a 429 must reach it on the
+        # first attempt, not after the SDK's own retries
+        client = get_embedding_client().with_options(max_retries=0)
+
+        def send(batch: List[str]):
+            raw = client.embeddings.with_raw_response.create(model=self.model, input=batch)
+            response = raw.parse()
+            return [item.embedding for item in response.data], raw.headers
+
+        return get_embedding_dispatcher().dispatch(
+            texts, send, token_counts=token_counts, max_batch_items=batch_size
+        )
+
+    async def embed_async(self, texts: List[str]) -> List[List[float]]:
+        """Embed cleaned texts with the shared AsyncOpenAI client (one request)."""
+        response = await get_async_embedding_client().embeddings.create(model=self.model, input=texts)
+        return [item.embedding for item in response.data]
+
+
+class LocalEmbeddingProvider:
+    """sentence-transformers model on CPU, loaded once, batched over a thread pool."""
+
+    name = "local"
+
+    def __init__(
+        self,
+        model: str = DEFAULT_LOCAL_MODEL,
+        model_name: str = DEFAULT_LOCAL_MODEL_NAME,
+        dimension: Optional[int] = None,
+        backend: str = "torch",
+        batch_size: int = DEFAULT_LOCAL_BATCH_SIZE,
+        threads: int = DEFAULT_LOCAL_THREADS,
+        normalize: bool = True,
+        encoder=None
+    ):
+        """
+        Initialize the provider (the model itself is loaded on first use).
+
+        Args:
+            model: Model key used in cache keys and config ("bge-m3")
+            model_name: sentence-transformers / Hugging Face model id or local path
+            dimension: Output dimension (defaults to the model's reported dimension)
+            backend: "torch" or "onnx" (ONNX Runtime, needs sentence-transformers>=3.2)
+            batch_size: Texts per forward pass
+            threads: Worker threads running forward passes concurrently
+            normalize: L2-normalize outputs (cosine distance in pgvector)
+            encoder: Already-loaded model with encode() (tests, custom loaders)
+        """
+        self.model = model
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = max(1, int(batch_size))
+        self.threads = max(1, int(threads))
+        self.normalize = normalize
+        self._encoder = encoder
+        self._dimension = dimension
+        self._load_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _load(self):
+        with self._load_lock:
+            if self._encoder is None:
+                # Optional dependency: raises ImportError when sentence-transformers is not installed
+                from sentence_transformers import SentenceTransformer
+                kwargs = {"device": "cpu"}
+                if self.backend != "torch":
+                    kwargs["backend"] = self.backend
+                self._encoder = SentenceTransformer(self.model_name, **kwargs)
+                logger.info(f"Loaded local embedding model {self.model_name} (backend={self.backend})")
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="embed")
+        return self._encoder
+
+    @property
+    def dimension(self) -> Optional[int]:
+        if self._dimension is None:
+            self._dimension = int(self._load().get_sentence_embedding_dimension())
+        return self._dimension
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        vectors = self._load().encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=self.normalize,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return [vector.tolist() for vector in vectors]
+
+    def embed(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None,
+        token_counts: Optional[List[int]] = None
+    ) -> List[List[float]]:
+        """
+        Embed cleaned texts (order preserved).
+
+        Inputs larger than one forward pass are split into batch_size slices encoded
+        concurrently on the thread pool. batch_size and token_counts are accepted for
+        interface parity with the OpenAI provider and ignored (the configured batch
+        size applies).
+        """
+        if not texts:
+            return []
+        self._load()
+        if len(texts) <= self.batch_size or self.threads == 1:
+            return self._encode(texts)
+        slices = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        embeddings = []
+        for part in self._executor.map(self._encode, slices):
+            embeddings.extend(part)
+        return embeddings
+
+    async def embed_async(self, texts: List[str]) -> List[List[float]]:
+        """Run embed() on the provider's thread pool so inference never blocks the event loop."""
+        self._load()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._encode, texts)
+
+
+def create_embedding_provider(embeddings_cfg: Optional[Dict] = None):
+    """
+    Build the provider described by config/embeddings.json.
+
+    "provider": "local" (or the older "use_oss_alternative": true) selects the local
+    model named by "oss_model", configured in the "local" section; anything else uses
+    OpenAI with "model".
+    """
+    cfg = embeddings_cfg if embeddings_cfg is not None else (get_embeddings_config() or {})
+    models_cfg = cfg.get("models") or {}
+    provider = cfg.get("provider") or ("local" if cfg.get("use_oss_alternative") else "openai")
+    if provider == "local":
+        local_cfg = cfg.get("local") or {}
+        model = cfg.get("oss_model", DEFAULT_LOCAL_MODEL)
+        return LocalEmbeddingProvider(
+            model=model,
+            model_name=local_cfg.get("model_name", DEFAULT_LOCAL_MODEL_NAME),
+            dimension=(models_cfg.get(model) or {}).get("dimension") or MODEL_DIMENSIONS.get(model),
+            backend=local_cfg.get("backend", "torch"),
+            batch_size=local_cfg.get("batch_size", DEFAULT_LOCAL_BATCH_SIZE),
+            threads=local_cfg.get("threads", DEFAULT_LOCAL_THREADS),
+            normalize=local_cfg.get("normalize", True),
+        )
+    if provider != "openai":
+        logger.warning(f"Unknown embedding provider '{provider}'; using openai")
+    model = cfg.get("model", DEFAULT_OPENAI_MODEL)
+    return OpenAIEmbeddingProvider(model, dimension=(models_cfg.get(model) or {}).get("dimension"))
+
+
+# Providers are created once per process (the local model is expensive to load)
+_embedding_provider = None
+_openai_providers: Dict[str, OpenAIEmbeddingProvider] = {}
+
+
+def get_embedding_provider(model: Optional[str] = None):
+    """
+    Get the configured provider, or an OpenAI provider for an explicitly different model.
+
+    Args:
+        model: Model name requested by the caller (None = the configured model)
+    """
+    global _embedding_provider
+    if _embedding_provider is None:
+        _embedding_provider = create_embedding_provider()
+    if model is None or model == _embedding_provider.model:
+        return _embedding_provider
+    provider = _openai_providers.get(model)
+    if provider is None:
+        provider = _openai_providers[model] = OpenAIEmbeddingProvider(model)
+    return provider
+
+
+# Set once the chunks.embedding dimension has been checked in this process
+_verified_dimension: Optional[int] = None
+
+
+def get_vector_column_dimension(cur, table: str = "chunks", column: str = "embedding") -> Optional[int]:
+    """Declared dimension of a pgvector column (atttypmod), None when undeclared/missing."""
+    cur.execute(
+        """
+        SELECT a.atttypmod
+        FROM pg_attribute a
+        WHERE a.attrelid = to_regclass(%s) AND a.attname = %s AND NOT a.attisdropped
+        """,
+        (table, column)
+    )
+    row = cur.fetchone()
+    if row is None:
+        return None
+    typmod = row["atttypmod"] if isinstance(row, dict) else row[0]
+    return typmod if typmod and typmod > 0 else None
+
+
+def verify_embedding_dimension(cur, provider=None) -> None:
+    """
+    Check that the provider's vectors fit chunks.embedding (once per process).
+
+    Raises:
+        ValueError: When the dimensions differ (the inserts/searches would fail anyway,
+            with a less helpful pgvector error)
+    """
+    global _verified_dimension
+    provider = provider or get_embedding_provider()
+    if _verified_dimension is not None and _verified_dimension == provider.dimension:
+        return
+    column_dimension = get_vector_column_dimension(cur)
+    if column_dimension is not None and provider.dimension is not None and column_dimension != provider.dimension:
+        raise ValueError(
+            f"Embedding dimension mismatch: {provider.name} model '{provider.model}' produces "
+            f"{provider.dimension}-dimensional vectors but chunks.embedding is vector({column_dimension}). "
+            f"Migrate the embedding columns (see scripts/db/migrate_embedding_dimension.sql) and "
+            f"re-embed the corpus, or switch config/embeddings.json back."
+        )
+    _verified_dimension = provider.dimension
@@ -0,0 +1,167 @@
+"""Content-addressed embedding store for ingestion.
+
+Re-ingesting runbooks or tickets produces mostly the same chunk texts, and each of
+them used to be embedded again. embed_texts_batch() consults this store first:
+
+- Keys are (model, sha256 of the cleaned text), the same keys the query-embedding
+  cache uses, so both share the `embedding_cache` table
+- One bulk `SELECT ... WHERE text_sha256 = ANY(...)` per call finds stored vectors;
+  only the misses (deduplicated) are sent to the embedding provider
+- New vectors are written back with one `INSERT ... SELECT FROM unnest(...)`
+
+An embedding is a pure function of (model, text), so stored rows never go stale for
+ingestion: they are written with tier 'store', which the query cache's expiry and
+pruning (shared_ttl_seconds) leave alone. The
+store is best effort: when the table cannot be read or written, everything is
+embedded as before.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from db.connection import get_db_connection_context
+from ingestion.embeddings import format_vector, parse_vector
+
+# Import logging/config (use ai_service modules if available, fallback to defaults)
+try:
+    from ai_service.core import get_logger, get_embeddings_config
+except ImportError:
+    import logging
+
+    def get_logger(name):
+        return logging.getLogger(name)
+
+    def get_embeddings_config():
+        return {}
+
+logger = get_logger(__name__)
+
+LOOKUP_SQL = """
+    SELECT text_sha256, embedding
+    FROM embedding_cache
+    WHERE model = %(model)s AND text_sha256 = ANY(%(hashes)s)
+"""
+
+# tier 'store' rows are never pruned (a query-cache row for the same text is taken over)
+SAVE_SQL = """
+    INSERT INTO embedding_cache (model, text_sha256, embedding, tier)
+    SELECT %(model)s, s.text_sha256, s.embedding::vector, 'store'
+    FROM unnest(%(hashes)s::text[], %(embeddings)s::text[]) AS s(text_sha256, embedding)
+    ON CONFLICT (model, text_sha256)
+    DO UPDATE SET embedding = EXCLUDED.embedding, created_at = now(), tier = 'store'
+"""
+
+
+def text_sha256(cleaned_text: str) -> str:
+    """Content hash of an already cleaned text (see clean_text_for_embedding())."""
+    return hashlib.sha256(cleaned_text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """Bulk lookup/write of embeddings in the embedding_cache table, with counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "errors": 0,
+        }
+
+    def lookup(self, model: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """Stored embeddings for the given text hashes (missing ones are left out)."""
+        if not hashes:
+            return {}
+        try:
+            with get_db_connection_context() as conn:
+                cur = conn.cursor()
+                cur.execute(LOOKUP_SQL, {"model": model, "hashes": hashes})
+                rows = cur.fetchall()
+                cur.close()
+            return {row["text_sha256"]: parse_vector(row["embedding"]) for row in rows}
+        except Exception as e:
+            with self._lock:
+                self._stats["errors"] += 1
+            logger.warning(f"Embedding store lookup failed: {e}")
+            return {}
+
+    def save(self, model: str, embeddings: Dict[str, List[float]]) -> None:
+        """Store embeddings by text hash (best effort)."""
+        if not embeddings:
+            return
+        hashes = list(embeddings)
+        try:
+            with get_db_connection_context() as conn:
+                cur = conn.cursor()
+                cur.execute(SAVE_SQL, {
+                    "model": model,
+                    "hashes": hashes,
+                    "embeddings": [format_vector(embeddings[h]) for h in hashes],
+                })
+                conn.commit()
+                cur.close()
+        except Exception as e:
+            with self._lock:
+                self._stats["errors"] += 1
+            logger.warning(f"Embedding store write failed: {e}")
+
+    def embed(
+        self,
+        cleaned_texts: List[str],
+        model: str,
+        embed_missing: Callable[[List[str]], List[List[float]]]
+    ) -> List[List[float]]:
+        """
+        Embeddings for cleaned texts, calling embed_missing only for unseen texts.
+
+        Args:
+            cleaned_texts: Texts as sent to the embedding model
+            model: Embedding model name (part of the key)
+            embed_missing: Embeds a list of texts (order preserved)
+
+        Returns:
+            Embedding vectors in the same order as cleaned_texts
+        """
+        hashes = [text_sha256(text) for text in cleaned_texts]
+        found = self.lookup(model, list(dict.fromkeys(hashes)))
+
+        # Unseen texts, deduplicated by hash
+        missing: "OrderedDict[str, str]" = OrderedDict()
+        for text, digest in zip(cleaned_texts, hashes):
+            if digest not in found and digest not in missing:
+                missing[digest] = text
+
+        if missing:
+            new_embeddings = dict(zip(missing, embed_missing(list(missing.values()))))
+            self.save(model, new_embeddings)
+            found.update(new_embeddings)
+
+        with self._lock:
+            self._stats["hits"] += len(cleaned_texts) - len(missing)
+            self._stats["misses"] += len(missing)
+        logger.debug(f"Embedding store: {len(cleaned_texts) - len(missing)} hits, {len(missing)} embedded")
+        return [found[digest] for digest in hashes]
+
+    def get_stats(self) -> Dict:
+        """Return hit/miss/error counters."""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+# Global store instance
+_embedding_store: Optional[EmbeddingStore] = None
+
+
+def get_embedding_store() -> Optional[EmbeddingStore]:
+    """Get or create the embedding store (None if disabled in config)."""
+    global _embedding_store
+    if _embedding_store is None:
+        store_cfg = (get_embeddings_config() or {}).get("store", {})
+        if not store_cfg.get("enabled", True):
+            return None
+        _embedding_store = EmbeddingStore()
+    return _embedding_store
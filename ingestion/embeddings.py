@@ -1,25 +1,34 @@
-"""Embedding generation utilities."""
-import os
+"""Embedding generation utilities.
+
+Texts are validated and cleaned here, then embedded by the provider configured in
+config/embeddings.json (OpenAI API or a local CPU model; see ingestion.embedding_providers).
+"""
 import sys
 from pathlib import Path
-import tiktoken
-from typing import List
-from openai import OpenAI
+from typing import List, Optional
 from dotenv import load_dotenv
 
+from ingestion.embedding_providers import (  # noqa: F401 - clients re-exported for existing imports
+    get_embedding_client, get_async_embedding_client, get_embedding_provider
+)
+
 load_dotenv()
 
-# Try to load embeddings config, fallback to defaults
+# Model of the configured provider (also part of the embedding cache key), fallback to defaults
 try:
     # Add project root to path for config loading
     project_root = Path(__file__).parent.parent
     sys.path.insert(0, str(project_root))
-    from ai_service.core import get_embeddings_config
-    embeddings_config = get_embeddings_config()
-    DEFAULT_MODEL = embeddings_config.get("model", "text-embedding-3-small")
+    DEFAULT_MODEL = get_embedding_provider().model
 except Exception:
     DEFAULT_MODEL = "text-embedding-3-small"
 
+# Shared tokenizer encoding (loaded once per process; tiktoken's own cache as fallback)
+try:
+    from ai_service.core import get_encoding
+except ImportError:
+    from tiktoken import get_encoding
+
 # Token limits for embedding models
 EMBEDDING_MODEL_LIMITS = {
     "text-embedding-3-small": 8191,
@@ -32,16 +41,45 @@ def count_tokens(text: str, model: str = None) -> int:
     """Count tokens in text using the same encoding as the embedding model."""
     if model is None:
         model = DEFAULT_MODEL
-    encoding = tiktoken.get_encoding("cl100k_base")  # Used by OpenAI embedding models
+    encoding = get_encoding("cl100k_base")  # Used by OpenAI embedding models
     return len(encoding.encode(text))
 
 
-def get_embedding_client():
-    """Get OpenAI client for embeddings."""
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY not set in environment")
-    return OpenAI(api_key=api_key)
+def clean_text_for_embedding(text: str) -> str:
+    """Normalize text exactly as it is sent to the embedding model.
+
+    Cache keys are derived from this form, so it must stay in sync with
+    what embed_text() and embed_texts_batch() actually embed.
+    """
+    return text.replace("\n", " ").strip()
+
+
+def format_vector(embedding) -> str:
+    """Convert an embedding to pgvector's text format: '[1,2,3,...]'."""
+    return '[' + ','.join(map(str, embedding)) + ']'
+
+
+def parse_vector(value) -> List[float]:
+    """Convert a pgvector column value (text or array-like) to a list of floats."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return [float(x) for x in value.strip("[]").split(",") if x]
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return [float(x) for x in value]
+
+
+def _check_dimensions(provider, embeddings: List[List[float]]) -> List[List[float]]:
+    """Fail fast when the provider returns vectors of an unexpected size."""
+    expected = provider.dimension
+    if expected is not None:
+        for embedding in embeddings:
+            if len(embedding) != expected:
+                raise ValueError(
+                    f"Embedding model '{provider.model}' returned {len(embedding)} dimensions, expected {expected}"
+                )
+    return embeddings
 
 
 def embed_text(text: str, model: str = None) -> list:
@@ -50,7 +88,7 @@ def embed_text(text: str, model: str = None) -> list:
     
     Args:
         text: Text to embed
-        model: OpenAI embedding model name (defaults to config)
+        model: Embedding model name (defaults to config)
     
     Returns:
         List of floats (embedding vector)
@@ -60,10 +98,10 @@ def embed_text(text: str, model: str = None) -> list:
     """
     if model is None:
         model = DEFAULT_MODEL
-    client = get_embedding_client()
+    provider = get_embedding_provider(model)
     
     # Replace newlines with spaces for better embeddings
-    text = text.replace("\n", " ").strip()
+    text = clean_text_for_embedding(text)
     
     # Validate token count before API call
     max_tokens = EMBEDDING_MODEL_LIMITS.get(model, 8191)
@@ -76,26 +114,71 @@ def embed_text(text: str, model: str = None) -> list:
             f"Please chunk the text before embedding."
         )
     
-    response = client.embeddings.create(
-        model=model,
-        input=text
-    )
+    return _check_dimensions(provider, provider.embed([text]))[0]
+
+
+async def embed_text_async(text: str, model: str = None) -> list:
+    """
+    Generate embedding for text without blocking the event loop.
+    
+    Same validation and cleaning as embed_text(), using AsyncOpenAI (or the local
+    model's thread pool).
+    
+    Args:
+        text: Text to embed
+        model: Embedding model name (defaults to config)
+    
+    Returns:
+        List of floats (embedding vector)
     
-    return response.data[0].embedding
+    Raises:
+        ValueError: If text exceeds token limit
+    """
+    if model is None:
+        model = DEFAULT_MODEL
+    provider = get_embedding_provider(model)
+    
+    text = clean_text_for_embedding(text)
+    
+    max_tokens = EMBEDDING_MODEL_LIMITS.get(model, 8191)
+    token_count = count_tokens(text, model)
+    if token_count > max_tokens:
+        raise ValueError(
+            f"Text exceeds token limit: {token_count} tokens (max: {max_tokens}). "
+            f"Text length: {len(text)} characters. "
+            f"Please chunk the text before embedding."
+        )
+    
+    return _check_dimensions(provider, await provider.embed_async([text]))[0]
 
 
-def embed_texts_batch(texts: List[str], model: str = None, batch_size: int = 100) -> List[List[float]]:
+def embed_texts_batch(
+    texts: List[str],
+    model: str = None,
+    batch_size: int = 100,
+    token_counts: Optional[List[int]] = None,
+    use_store: bool = True
+) -> List[List[float]]:
     """
     Generate embeddings for multiple texts in batches.
     
     This is much more efficient than calling embed_text() multiple times.
     OpenAI supports up to 2048 texts per batch, but we use 100 as default
-    to avoid rate limits and stay within token limits.
+    to avoid rate limits and stay within token limits. OpenAI batches are also
+    capped by tokens and sent concurrently with retries (see
+    ingestion.embedding_dispatcher); the local provider batches by its own
+    configured batch size.
+    
+    Texts embedded before with the same model are read from the embedding
+    store (ingestion.embedding_store) in one query; only new texts reach the
+    provider.
     
     Args:
         texts: List of texts to embed
-        model: OpenAI embedding model name (defaults to config)
+        model: Embedding model name (defaults to config)
         batch_size: Number of texts to process per API call (default: 100)
+        token_counts: Token counts already computed for texts (skips re-tokenizing them)
+        use_store: Reuse/record embeddings in the embedding store (query paths have their own cache)
     
     Returns:
         List of embedding vectors (same order as input texts)
@@ -108,14 +191,17 @@ def embed_texts_batch(texts: List[str], model: str = None, batch_size: int = 100
     
     if model is None:
         model = DEFAULT_MODEL
-    client = get_embedding_client()
-    all_embeddings = []
+    provider = get_embedding_provider(model)
     max_tokens = EMBEDDING_MODEL_LIMITS.get(model, 8191)
     
     # Validate all texts before processing
     invalid_texts = []
+    if token_counts is not None and len(token_counts) != len(texts):
+        token_counts = None
+    if token_counts is None:
+        token_counts = [count_tokens(text, model) for text in texts]
     for idx, text in enumerate(texts):
-        token_count = count_tokens(text, model)
+        token_count = token_counts[idx]
         if token_count > max_tokens:
             invalid_texts.append((idx, token_count, len(text)))
     
@@ -128,24 +214,21 @@ def embed_texts_batch(texts: List[str], model: str = None, batch_size: int = 100
         error_msg += "Please ensure chunks are properly sized before embedding."
         raise ValueError(error_msg)
     
-    # Process texts in batches
-    for i in range(0, len(texts), batch_size):
-        batch = texts[i:i + batch_size]
-        
-        # Clean texts (replace newlines with spaces)
-        cleaned_batch = [text.replace("\n", " ").strip() for text in batch]
-        
-        # Generate embeddings for batch
-        response = client.embeddings.create(
-            model=model,
-            input=cleaned_batch  # List of texts (batch API)
-        )
-        
-        # Extract embeddings (maintain order)
-        batch_embeddings = [item.embedding for item in response.data]
-        all_embeddings.extend(batch_embeddings)
-    
-    return all_embeddings
+    # Clean texts (replace newlines with spaces); the provider batches and keeps order
+    cleaned = [clean_text_for_embedding(text) for text in texts]
+    # Token counts let the provider pack requests by tokens, not just by item count
+    tokens_by_text = dict(zip(cleaned, token_counts))
+
+    def embed_missing(missing: List[str]) -> List[List[float]]:
+        return _check_dimensions(provider, provider.embed(
+            missing, batch_size=batch_size, token_counts=[tokens_by_text[text] for text in missing]
+        ))
+
+    from ingestion.embedding_store import get_embedding_store
+    store = get_embedding_store() if use_store else None
+    if store is None:
+        return embed_missing(cleaned)
+    return store.embed(cleaned, model, embed_missing)
 
 
 
@@ -12,6 +12,7 @@ from ingestion.normalizers import (
     normalize_runbook, normalize_log, normalize_json_data
 )
 from ingestion.db_ops import insert_document_and_chunks
+from ingestion.embedding_store import get_embedding_store
 from ingestion.api import documents
 from dotenv import load_dotenv
 
@@ -65,7 +66,13 @@ app.add_middleware(
 def health_check():
     """Health check endpoint."""
     logger.debug("Health check requested")
-    return {"status": "healthy", "service": "ingestion", "version": "1.0.0"}
+    store = get_embedding_store()
+    return {
+        "status": "healthy",
+        "service": "ingestion",
+        "version": "1.0.0",
+        "embedding_store": store.get_stats() if store else {"enabled": False},
+    }
 
 
 # Include documents router
@@ -0,0 +1,379 @@
+"""Query-embedding cache for retrieval.
+
+Alert storms send the same `title + description` text to hybrid_search over and
+over. This cache sits in front of embed_text() so identical queries are embedded
+once:
+
+- Tier 1: in-process LRU with TTL eviction (per worker)
+- Tier 2 (optional): Postgres `embedding_cache` table shared by all workers
+
+Keys are (model name, sha256 of the cleaned query text). Shared-tier rows written
+here (tier 'query') expire after shared_ttl_seconds; writes delete expired ones in
+bounded batches, at most once per shared_prune_interval_seconds per process. Rows of
+the ingestion embedding store (tier 'store', same table) never expire.
+"""
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from db.connection import get_db_connection_context
+from ingestion.embeddings import (
+    embed_text, embed_text_async, embed_texts_batch, clean_text_for_embedding, format_vector,
+    parse_vector, DEFAULT_MODEL
+)
+
+# Import logging/config (use ai_service modules if available, fallback to defaults)
+try:
+    from ai_service.core import get_logger, get_retrieval_config
+except ImportError:
+    import logging
+
+    def get_logger(name):
+        return logging.getLogger(name)
+
+    def get_retrieval_config():
+        return {}
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 900
+DEFAULT_SHARED_TTL_SECONDS = 86400
+DEFAULT_SHARED_PRUNE_INTERVAL_SECONDS = 300
+DEFAULT_SHARED_PRUNE_BATCH_SIZE = 1000
+
+# Expired query-tier rows, oldest first; SKIP LOCKED so concurrent workers split the work
+PRUNE_SHARED_SQL = """
+    DELETE FROM embedding_cache
+    WHERE (model, text_sha256) IN (
+        SELECT model, text_sha256
+        FROM embedding_cache
+        WHERE tier = 'query' AND created_at < now() - make_interval(secs => %(ttl_seconds)s)
+        ORDER BY created_at
+        LIMIT %(batch_size)s
+        FOR UPDATE SKIP LOCKED
+    )
+"""
+
+
+def embedding_cache_key(text: str, model: str) -> Tuple[str, str]:
+    """Build the cache key for a text: (model, sha256 of the cleaned text)."""
+    cleaned = clean_text_for_embedding(text)
+    return model, hashlib.sha256(cleaned.encode("utf-8")).hexdigest()
+
+
+class QueryEmbeddingCache:
+    """Bounded, TTL-evicting LRU cache of query embeddings with hit/miss counters."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        shared_tier: bool = False,
+        shared_ttl_seconds: float = DEFAULT_SHARED_TTL_SECONDS,
+        shared_prune_interval_seconds: float = DEFAULT_SHARED_PRUNE_INTERVAL_SECONDS,
+        shared_prune_batch_size: int = DEFAULT_SHARED_PRUNE_BATCH_SIZE
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of embeddings kept in process memory
+            ttl_seconds: Time-to-live for in-process entries
+            shared_tier: Whether to read/write the Postgres `embedding_cache` table
+            shared_ttl_seconds: Maximum age of shared-tier rows that count as hits
+            shared_prune_interval_seconds: Minimum time between prunes of expired shared rows
+            shared_prune_batch_size: Maximum expired shared rows deleted per prune
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self.shared_tier = shared_tier
+        self.shared_ttl_seconds = float(shared_ttl_seconds)
+        self.shared_prune_interval_seconds = float(shared_prune_interval_seconds)
+        self.shared_prune_batch_size = max(1, int(shared_prune_batch_size))
+        self._pruned_at: Optional[float] = None
+
+        # Map of (model, text_sha256) -> (stored_at, embedding), oldest first
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "shared_hits": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "shared_pruned": 0,
+        }
+
+    def get_embedding(self, text: str, model: Optional[str] = None) -> List[float]:
+        """
+        Return the embedding for text, embedding it only on a cache miss.
+
+        Args:
+            text: Query text
+            model: Embedding model name (defaults to config)
+
+        Returns:
+            Embedding vector
+        """
+        model = model or DEFAULT_MODEL
+        key = embedding_cache_key(text, model)
+
+        embedding = self._get_local(key)
+        if embedding is not None:
+            return embedding
+
+        if self.shared_tier:
+            embedding = self._get_shared(key)
+            if embedding is not None:
+                with self._lock:
+                    self._stats["shared_hits"] += 1
+                self._put_local(key, embedding)
+                return embedding
+
+        with self._lock:
+            self._stats["misses"] += 1
+
+        embedding = embed_text(text, model=model)
+        self._put_local(key, embedding)
+        if self.shared_tier:
+            self._put_shared(key, embedding)
+        return embedding
+
+    async def get_embedding_async(self, text: str, model: Optional[str] = None) -> List[float]:
+        """
+        Async variant of get_embedding() for use on the event loop.
+
+        Misses are embedded with AsyncOpenAI; the (blocking) shared tier runs in a
+        worker thread so it never stalls the loop.
+        """
+        model = model or DEFAULT_MODEL
+        key = embedding_cache_key(text, model)
+
+        embedding = self._get_local(key)
+        if embedding is not None:
+            return embedding
+
+        if self.shared_tier:
+            embedding = await asyncio.to_thread(self._get_shared, key)
+            if embedding is not None:
+                with self._lock:
+                    self._stats["shared_hits"] += 1
+                self._put_local(key, embedding)
+                return embedding
+
+        with self._lock:
+            self._stats["misses"] += 1
+
+        embedding = await embed_text_async(text, model=model)
+        self._put_local(key, embedding)
+        if self.shared_tier:
+            await asyncio.to_thread(self._put_shared, key, embedding)
+        return embedding
+
+    def get_embeddings(self, texts: List[str], model: Optional[str] = None) -> List[List[float]]:
+        """
+        Return embeddings for several texts, embedding all misses in one batch call.
+
+        Args:
+            texts: Query texts
+            model: Embedding model name (defaults to config)
+
+        Returns:
+            Embedding vectors in the same order as texts
+        """
+        model = model or DEFAULT_MODEL
+        keys = [embedding_cache_key(text, model) for text in texts]
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+
+        # Texts that are still missing after both tiers, deduplicated by key
+        missing: "OrderedDict[Tuple[str, str], List[int]]" = OrderedDict()
+        for idx, key in enumerate(keys):
+            embedding = self._get_local(key)
+            if embedding is None and key not in missing and self.shared_tier:
+                embedding = self._get_shared(key)
+                if embedding is not None:
+                    with self._lock:
+                        self._stats["shared_hits"] += 1
+                    self._put_local(key, embedding)
+            if embedding is not None:
+                embeddings[idx] = embedding
+            else:
+                missing.setdefault(key, []).append(idx)
+
+        if missing:
+            with self._lock:
+                self._stats["misses"] += len(missing)
+            miss_texts = [texts[indices[0]] for indices in missing.values()]
+            miss_embeddings = embed_texts_batch(miss_texts, model=model, use_store=False)
+            for (key, indices), embedding in zip(missing.items(), miss_embeddings):
+                self._put_local(key, embedding)
+                if self.shared_tier:
+                    self._put_shared(key, embedding)
+                for idx in indices:
+                    embeddings[idx] = embedding
+
+        return embeddings
+
+    def _get_local(self, key: Tuple[str, str]) -> Optional[List[float]]:
+        """Look up key in the in-process tier, evicting it if expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, embedding = entry
+            if now - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return embedding
+
+    def _put_local(self, key: Tuple[str, str], embedding: List[float]) -> None:
+        """Store key in the in-process tier, evicting least recently used entries."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _get_shared(self, key: Tuple[str, str]) -> Optional[List[float]]:
+        """Look up key in the shared Postgres tier (best-effort)."""
+        model, text_sha256 = key
+        try:
+            with get_db_connection_context() as conn:
+                cur = conn.cursor()
+                cur.execute(
+                    """
+                    SELECT embedding
+                    FROM embedding_cache
+                    WHERE model = %s AND text_sha256 = %s
+                      AND (tier = 'store' OR created_at > now() - make_interval(secs => %s))
+                    """,
+                    (model, text_sha256, self.shared_ttl_seconds)
+                )
+                row = cur.fetchone()
+                cur.close()
+            return parse_vector(row["embedding"]) if row else None
+        except Exception as e:
+            logger.warning(f"Shared embedding cache lookup failed: {e}")
+            return None
+
+    def _put_shared(self, key: Tuple[str, str], embedding: List[float]) -> None:
+        """Store key in the shared Postgres tier (best-effort)."""
+        model, text_sha256 = key
+        try:
+            with get_db_connection_context() as conn:
+                cur = conn.cursor()
+                cur.execute(
+                    """
+                    INSERT INTO embedding_cache (model, text_sha256, embedding, tier)
+                    VALUES (%s, %s, %s::vector, 'query')
+                    ON CONFLICT (model, text_sha256)
+                    DO UPDATE SET embedding = EXCLUDED.embedding, created_at = now()
+                    """,
+                    (model, text_sha256, format_vector(embedding))
+                )
+                conn.commit()
+                if self._prune_due():
+                    self._prune_shared(conn, cur)
+                cur.close()
+        except Exception as e:
+            logger.warning(f"Shared embedding cache write failed: {e}")
+
+    def _prune_due(self) -> bool:
+        """Claim the next prune for this process if shared_prune_interval_seconds has passed."""
+        now = time.monotonic()
+        with self._lock:
+            if self._pruned_at is not None and now - self._pruned_at < self.shared_prune_interval_seconds:
+                return False
+            self._pruned_at = now
+            return True
+
+    def _prune_shared(self, conn, cur) -> None:
+        """Delete up to shared_prune_batch_size expired query rows (best-effort)."""
+        try:
+            cur.execute(
+                PRUNE_SHARED_SQL,
+                {"ttl_seconds": self.shared_ttl_seconds, "batch_size": self.shared_prune_batch_size}
+            )
+            deleted = cur.rowcount
+            conn.commit()
+        except Exception as e:
+            logger.warning(f"Shared embedding cache prune failed: {e}")
+            conn.rollback()
+            return
+        with self._lock:
+            self._stats["shared_pruned"] += max(deleted, 0)
+        if deleted:
+            logger.debug(f"Pruned {deleted} expired shared embedding cache row(s)")
+
+    def get_stats(self) -> Dict:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["shared_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["shared_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        """Drop all in-process entries and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            for name in self._stats:
+                self._stats[name] = 0
+
+
+# Global cache instance
+_query_embedding_cache: Optional[QueryEmbeddingCache] = None
+
+
+def get_query_embedding_cache() -> Optional[QueryEmbeddingCache]:
+    """Get or create the query-embedding cache (None if disabled in config)."""
+    global _query_embedding_cache
+    if _query_embedding_cache is None:
+        cache_cfg = (get_retrieval_config() or {}).get("embedding_cache", {})
+        if not cache_cfg.get("enabled", True):
+            return None
+        _query_embedding_cache = QueryEmbeddingCache(
+            max_entries=cache_cfg.get("max_entries", DEFAULT_MAX_ENTRIES),
+            ttl_seconds=cache_cfg.get("ttl_seconds", DEFAULT_TTL_SECONDS),
+            shared_tier=bool(cache_cfg.get("shared_tier", False)),
+            shared_ttl_seconds=cache_cfg.get("shared_ttl_seconds", DEFAULT_SHARED_TTL_SECONDS),
+            shared_prune_interval_seconds=cache_cfg.get(
+                "shared_prune_interval_seconds", DEFAULT_SHARED_PRUNE_INTERVAL_SECONDS
+            ),
+            shared_prune_batch_size=cache_cfg.get("shared_prune_batch_size", DEFAULT_SHARED_PRUNE_BATCH_SIZE),
+        )
+    return _query_embedding_cache
+
+
+def get_query_embedding(text: str, model: Optional[str] = None) -> List[float]:
+    """Embed a retrieval query, going through the cache when it is enabled."""
+    cache = get_query_embedding_cache()
+    if cache is None:
+        return embed_text(text, model=model)
+    return cache.get_embedding(text, model=model)
+
+
+async def get_query_embedding_async(text: str, model: Optional[str] = None) -> List[float]:
+    """Async variant of get_query_embedding() (AsyncOpenAI on cache misses)."""
+    cache = get_query_embedding_cache()
+    if cache is None:
+        return await embed_text_async(text, model=model)
+    return await cache.get_embedding_async(text, model=model)
+
+
+def get_query_embeddings(texts: List[str], model: Optional[str] = None) -> List[List[float]]:
+    """Embed several retrieval queries with one batch call for all cache misses."""
+    cache = get_query_embedding_cache()
+    if cache is None:
+        return embed_texts_batch(texts, model=model, use_store=False)
+    return cache.get_embeddings(texts, model=model)
@@ -0,0 +1,215 @@
+"""Explain/trace for hybrid_search: per-stage timings, candidate counts and query plans.
+
+hybrid_search runs vector search, full-text search and RRF fusion as one statement, so
+its log line only separates embedding time from SQL time. explain_hybrid_search()
+runs the same statement (bypassing the result cache) and additionally each candidate
+stage on its own:
+
+- embedding: query embedding (served by the embedding cache when warm)
+- vector / fulltext: the vector_results / fulltext_results CTE alone (candidate count
+  and time)
+- fusion_derived: not measured on its own (RRF needs both candidate sets); estimated as
+  sql - vector - fulltext, clamped at 0, so it also absorbs timing noise between runs
+
+With analyze=True, each statement is also run under EXPLAIN (ANALYZE, BUFFERS) and a
+plan summary is returned (planning/execution time, buffers, indexes used, node tree).
+Stages run one after another in one transaction, so later stages see warmer buffers;
+compare runs with each other rather than adding stage times up exactly.
+"""
+import time
+from typing import Any, Dict, List, Optional
+
+from db.connection import get_db_connection
+from retrieval.embedding_cache import get_query_embedding
+from retrieval.hybrid_search import (
+    _apply_index_settings,
+    _build_hybrid_search_query,
+    _row_to_chunk,
+)
+from retrieval.service_indexes import get_service_index_router
+
+# Import logging (use ai_service logger if available, fallback to standard logging)
+try:
+    from ai_service.core import get_logger
+except ImportError:
+    import logging
+
+    def get_logger(name):
+        return logging.getLogger(name)
+
+logger = get_logger(__name__)
+
+EXPLAIN_PREFIX = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) "
+DEFAULT_MAX_PLAN_NODES = 60
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def _derived_fusion_ms(stages_ms: Dict[str, float]) -> float:
+    """Fusion estimate: full statement time minus the two candidate stages, clamped at 0."""
+    return round(max(stages_ms["sql"] - stages_ms["vector"] - stages_ms["fulltext"], 0.0), 3)
+
+
+def summarize_plan(plan: Dict, max_nodes: int = DEFAULT_MAX_PLAN_NODES) -> Dict:
+    """
+    Condense one EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) result.
+
+    Args:
+        plan: The top-level plan object (first element of the JSON array)
+        max_nodes: Maximum plan nodes listed (depth-first)
+
+    Returns:
+        Dict with planning_ms, execution_ms, shared_hit_blocks, shared_read_blocks,
+        indexes (index names scanned, e.g. to confirm a partial service index is used)
+        and nodes (node type, relation/index/CTE, rows, loops, time per node)
+    """
+    nodes: List[Dict] = []
+    indexes: List[str] = []
+    total_nodes = 0
+
+    def walk(node: Dict, depth: int) -> None:
+        nonlocal total_nodes
+        total_nodes += 1
+        index_name = node.get("Index Name")
+        if index_name and index_name not in indexes:
+            indexes.append(index_name)
+        if len(nodes) < max_nodes:
+            entry = {
+                "depth": depth,
+                "node_type": node.get("Node Type"),
+                "actual_rows": node.get("Actual Rows"),
+                "loops": node.get("Actual Loops"),
+                "actual_total_ms": node.get("Actual Total Time"),
+            }
+            for key, name in (
+                ("relation", "Relation Name"),
+                ("index", "Index Name"),
+                ("subplan", "Subplan Name"),
+                ("cte", "CTE Name"),
+            ):
+                if node.get(name):
+                    entry[key] = node[name]
+            nodes.append(entry)
+        for child in node.get("Plans") or []:
+            walk(child, depth + 1)
+
+    root = plan.get("Plan") or {}
+    walk(root, 0)
+    return {
+        "planning_ms": plan.get("Planning Time"),
+        "execution_ms": plan.get("Execution Time"),
+        "shared_hit_blocks": root.get("Shared Hit Blocks"),
+        "shared_read_blocks": root.get("Shared Read Blocks"),
+        "indexes": indexes,
+        "nodes": nodes,
+        "truncated": total_nodes > len(nodes),
+    }
+
+
+def _explain(cur, query: str, params: Dict) -> Dict:
+    cur.execute(EXPLAIN_PREFIX + query, params)
+    row = cur.fetchone()
+    plan = row["QUERY PLAN"] if isinstance(row, dict) else row[0]
+    return summarize_plan(plan[0] if isinstance(plan, list) else plan)
+
+
+def explain_hybrid_search(
+    query_text: str,
+    service: Optional[str] = None,
+    component: Optional[str] = None,
+    limit: int = 5,
+    vector_weight: float = 0.7,
+    fulltext_weight: float = 0.3,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    include_embeddings: bool = False,
+    document_limit: Optional[int] = None,
+    recency: Optional[Dict] = None,
+    doc_types: Optional[List[str]] = None,
+    analyze: bool = False
+) -> Dict[str, Any]:
+    """
+    Run hybrid_search with per-stage timings (and optionally query plans).
+
+    Takes the same arguments as hybrid_search(); the result cache is not used.
+
+    Args:
+        analyze: Also capture EXPLAIN (ANALYZE, BUFFERS) for the vector stage, the
+            full-text stage and the full statement (runs each once more)
+
+    Returns:
+        Dict with results (chunks as returned by hybrid_search), stages_ms
+        (embedding, vector, fulltext, sql, fusion_derived, total), candidates
+        (vector, fulltext, fused), service_index (the routed service pattern or None)
+        and plans (stage -> summarize_plan(), only with analyze)
+    """
+    start_time = time.time()
+    service_val = service if service and str(service).strip() else None
+    component_val = component if component and str(component).strip() else None
+    stages_ms: Dict[str, float] = {}
+
+    embedding_start = time.time()
+    query_embedding = get_query_embedding(query_text)
+    stages_ms["embedding"] = _ms(time.time() - embedding_start)
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        router = get_service_index_router()
+        if router is not None:
+            router.refresh(cur)
+
+        def build(stage: Optional[str] = None):
+            return _build_hybrid_search_query(
+                query_text, query_embedding, service_val, component_val, limit,
+                vector_weight, fulltext_weight, include_embeddings=include_embeddings,
+                document_limit=document_limit, recency=recency, doc_types=doc_types,
+                service_router=router, stage=stage
+            )
+
+        query, exec_params = build()
+        stage_queries = {stage: build(stage)[0] for stage in ("vector", "fulltext")}
+
+        _apply_index_settings(cur, ef_search=ef_search, probes=probes)
+
+        candidates: Dict[str, int] = {}
+        for stage, stage_query in stage_queries.items():
+            stage_start = time.time()
+            cur.execute(stage_query, exec_params)
+            candidates[stage] = len(cur.fetchall())
+            stages_ms[stage] = _ms(time.time() - stage_start)
+
+        sql_start = time.time()
+        cur.execute(query, exec_params)
+        results = cur.fetchall()
+        stages_ms["sql"] = _ms(time.time() - sql_start)
+        stages_ms["fusion_derived"] = _derived_fusion_ms(stages_ms)
+        candidates["fused"] = len(results)
+
+        plans = {}
+        if analyze:
+            for stage, stage_query in stage_queries.items():
+                plans[stage] = _explain(cur, stage_query, exec_params)
+            plans["hybrid_search"] = _explain(cur, query, exec_params)
+        conn.rollback()
+    finally:
+        cur.close()
+        conn.close()
+
+    stages_ms["total"] = _ms(time.time() - start_time)
+    indexed_service = router.route(exec_params["service_pattern"]) if router is not None else None
+    logger.info(
+        f"HYBRID_SEARCH EXPLAIN: query='{query_text[:100]}', stages_ms={stages_ms}, "
+        f"candidates={candidates}, service_index={indexed_service}, analyze={analyze}"
+    )
+    trace = {
+        "results": [_row_to_chunk(row) for row in results],
+        "stages_ms": stages_ms,
+        "candidates": candidates,
+        "service_index": indexed_service,
+    }
+    if analyze:
+        trace["plans"] = plans
+    return trace
@@ -1,28 +1,59 @@
 """Hybrid search combining vector similarity and full-text search."""
+import json
 import os
 import time
-from typing import List, Dict, Optional
-from db.connection import get_db_connection
-from ingestion.embeddings import embed_text
+from functools import lru_cache
+from typing import Any, List, Dict, Optional, Tuple
 
-# Import logging (use ai_service logger if available, fallback to standard logging)
+import numpy as np
+
+from db.connection import get_db_connection, get_async_db_connection_context
+from ingestion.embeddings import parse_vector
+from ingestion.db_ops import normalize_filter_value, get_corpus_version, get_corpus_version_async
+from retrieval.embedding_cache import get_query_embedding, get_query_embedding_async, get_query_embeddings
+from retrieval.result_cache import get_search_result_cache, search_cache_key
+from retrieval.service_indexes import ServiceIndexRouter, get_service_index_router, service_predicate_sql
+
+# Import logging/config (use ai_service modules if available, fallback to defaults)
 try:
-    from ai_service.core import get_logger
+    from ai_service.core import get_logger, get_retrieval_config
 except ImportError:
     import logging
     def get_logger(name):
         return logging.getLogger(name)
 
+    def get_retrieval_config():
+        return {}
+
 logger = get_logger(__name__)
 
 
+def _prepare_statements_enabled() -> bool:
+    """Whether hybrid search statements are prepared server-side (config: hybrid_search.prepare_statements)."""
+    try:
+        return bool((get_retrieval_config() or {}).get("hybrid_search", {}).get("prepare_statements", True))
+    except Exception:
+        return True
+
+
+# prepare=True plans the RRF statement once per connection and reuses the plan on every call;
+# prepare=False never prepares (needed when connections are multiplexed by a transaction pooler).
+PREPARE_STATEMENTS = _prepare_statements_enabled()
+
+
 def hybrid_search(
     query_text: str,
     service: Optional[str] = None,
     component: Optional[str] = None,
     limit: int = 5,
     vector_weight: float = 0.7,
-    fulltext_weight: float = 0.3
+    fulltext_weight: float = 0.3,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    include_embeddings: bool = False,
+    document_limit: Optional[int] = None,
+    recency: Optional[Dict] = None,
+    doc_types: Optional[List[str]] = None
 ) -> List[Dict]:
     """
     Perform hybrid search using RRF (Reciprocal Rank Fusion).
@@ -34,6 +65,15 @@ def hybrid_search(
         limit: Number of results to return
         vector_weight: Weight for vector search (0-1)
         fulltext_weight: Weight for full-text search (0-1)
+        ef_search: HNSW candidate list size for this query (higher = better recall, slower)
+        probes: IVFFlat lists probed for this query (higher = better recall, slower)
+        include_embeddings: Also return each chunk's stored embedding (used by mmr_search)
+        document_limit: Two-stage search: rank documents by their summary embedding first
+            and only search chunks of the top document_limit documents (None = all chunks)
+        recency: Freshness settings (an agent's "recency" config section): max_age_days and
+            half_life_days per doc_type, and the decay weight. Applied in SQL before LIMIT
+        doc_types: Only search chunks of these document types; filters the chunks.doc_type
+            partition key, so other partitions are pruned (None = all types)
     
     Returns:
         List of chunks with scores
@@ -48,242 +88,926 @@ def hybrid_search(
     cur = conn.cursor()
     
     try:
-        # Generate query embedding
-        query_embedding = embed_text(query_text)
-        # Convert to pgvector string format
-        query_embedding_str = '[' + ','.join(map(str, query_embedding)) + ']'
+        # Every filtered search counts toward service_filter_stats, cache hits included:
+        # alert storms repeat the busiest services' queries
+        router = get_service_index_router()
+        if router is not None:
+            router.record(_like_pattern(service))
+        
+        # Repeated alerts reuse the previous result set; the key includes corpus_version,
+        # which every documents/chunks write bumps, so hits are never stale.
+        result_cache = get_search_result_cache()
+        cache_key = None
+        if result_cache is not None:
+            try:
+                cache_key = search_cache_key(
+                    query_text, service, component, limit, vector_weight, fulltext_weight,
+                    get_corpus_version(cur),
+                    ef_search=ef_search, probes=probes, include_embeddings=include_embeddings,
+                    document_limit=document_limit, recency=_recency_cache_key(recency),
+                    doc_types=_doc_types_key(doc_types)
+                )
+            except Exception as e:
+                logger.warning(f"Result cache skipped (corpus version unavailable): {e}")
+                conn.rollback()
+            else:
+                cached = result_cache.get(cache_key)
+                if cached is not None:
+                    logger.debug(
+                        f"Hybrid search served from result cache: {len(cached)} results "
+                        f"in {time.time() - start_time:.3f}s"
+                    )
+                    if router is not None:
+                        router.flush(cur)
+                    return cached
+        
+        # Generate query embedding (cached: alert storms repeat the same query text)
+        embedding_start = time.time()
+        query_embedding = get_query_embedding(query_text)
+        stage_timings = {"embedding": time.time() - embedding_start}
         
         # Normalize service and component (ensure None or non-empty strings)
         service_val = service if service and str(service).strip() else None
         component_val = component if component and str(component).strip() else None
         
-        # Build filter conditions with case-insensitive partial matching
-        # This allows matching "database" with "Database-SQL", "Database", etc.
-        filters = []
-        filter_params = []
-        
-        if service_val:
-            # Case-insensitive partial match: "database" matches "Database-SQL", "Database", etc.
-            filters.append("LOWER(c.metadata->>'service') LIKE LOWER(%s)")
-            filter_params.append(f"%{service_val}%")
-        
-        if component_val:
-            # Case-insensitive partial match: "sql-server" matches "sql-server", "SQL Server", etc.
-            filters.append("LOWER(c.metadata->>'component') LIKE LOWER(%s)")
-            filter_params.append(f"%{component_val}%")
-        
-        filter_clause = " AND " + " AND ".join(filters) if filters else ""
-        
-        # Hybrid search query using RRF
-        # Vector search: cosine similarity
-        # Full-text search: ts_rank
-        # RRF: 1/(k + rank) for each result set, then combine
-        
-        query = f"""
-        WITH vector_results AS (
-            SELECT 
-                c.id,
-                c.document_id,
-                c.chunk_index,
-                c.content,
-                c.metadata,
-                d.title as doc_title,
-                d.doc_type as doc_type,
-                1 - (c.embedding <=> %s::vector) as vector_score,
-                ROW_NUMBER() OVER (ORDER BY c.embedding <=> %s::vector) as vector_rank
-            FROM chunks c
-            JOIN documents d ON c.document_id = d.id
-            WHERE c.embedding IS NOT NULL
-            {filter_clause}
-            ORDER BY c.embedding <=> %s::vector
-            LIMIT %s
-        ),
-        fulltext_results AS (
-            SELECT 
-                c.id,
-                c.document_id,
-                c.chunk_index,
-                c.content,
-                c.metadata,
-                d.title as doc_title,
-                d.doc_type as doc_type,
-                ts_rank(c.tsv, plainto_tsquery('english', %s)) as fulltext_score,
-                ROW_NUMBER() OVER (ORDER BY ts_rank(c.tsv, plainto_tsquery('english', %s)) DESC) as fulltext_rank
-            FROM chunks c
-            JOIN documents d ON c.document_id = d.id
-            WHERE c.tsv @@ plainto_tsquery('english', %s)
-            {filter_clause}
-            ORDER BY ts_rank(c.tsv, plainto_tsquery('english', %s)) DESC
-            LIMIT %s
-        ),
-        combined_results AS (
-            SELECT 
-                COALESCE(v.id, f.id) as id,
-                COALESCE(v.document_id, f.document_id) as document_id,
-                COALESCE(v.chunk_index, f.chunk_index) as chunk_index,
-                COALESCE(v.content, f.content) as content,
-                COALESCE(v.metadata, f.metadata) as metadata,
-                COALESCE(v.doc_title, f.doc_title) as doc_title,
-                COALESCE(v.doc_type, f.doc_type) as doc_type,
-                COALESCE(v.vector_score, 0.0) as vector_score,
-                COALESCE(f.fulltext_score, 0.0) as fulltext_score,
-                COALESCE(v.vector_rank, 999) as vector_rank,
-                COALESCE(f.fulltext_rank, 999) as fulltext_rank,
-                -- RRF: 1/(k + rank) where k=60 is standard
-                (1.0 / (60.0 + COALESCE(v.vector_rank, 999))) * {vector_weight} +
-                (1.0 / (60.0 + COALESCE(f.fulltext_rank, 999))) * {fulltext_weight} as rrf_score
-            FROM vector_results v
-            FULL OUTER JOIN fulltext_results f ON v.id = f.id
-        )
-        SELECT 
-            id,
-            document_id,
-            chunk_index,
-            content,
-            metadata,
-            doc_title,
-            doc_type,
-            vector_score,
-            fulltext_score,
-            rrf_score
-        FROM combined_results
-        WHERE rrf_score > 0
-        ORDER BY rrf_score DESC
-        LIMIT %s
-        """
-        
-        # Build params list matching the query placeholders in order
-        # Query placeholders in order (when no filters):
-        # 1: embedding (vector_score)
-        # 2: embedding (vector_rank)  
-        # 3: embedding (ORDER BY)
-        # 4: limit (vector_results)
-        # 5: text (fulltext_score)
-        # 6: text (fulltext_rank)
-        # 7: text (WHERE)
-        # 8: text (ORDER BY)
-        # 9: limit (fulltext_results)
-        # 10: final limit
-        exec_params = []
-        
-        # Vector results params
-        exec_params.append(query_embedding_str)  # 1: vector_score embedding
-        exec_params.append(query_embedding_str)  # 2: vector_rank embedding
-        # Filters for vector_results (if any) - these come BEFORE ORDER BY
-        # Use filter_params which already have the LIKE patterns
-        for param in filter_params:
-            exec_params.append(param)
-        exec_params.append(query_embedding_str)  # 3: ORDER BY embedding
-        exec_params.append(limit * 2)  # 4: vector_results limit
-        
-        # Fulltext results params
-        exec_params.append(query_text)  # 5: fulltext_score text
-        exec_params.append(query_text)  # 6: fulltext_rank text
-        exec_params.append(query_text)  # 7: WHERE text
-        # Filters for fulltext_results (if any) - these come BEFORE ORDER BY
-        # Use same filter_params again (each filter appears twice in query)
-        for param in filter_params:
-            exec_params.append(param)
-        exec_params.append(query_text)  # 8: ORDER BY text
-        exec_params.append(limit * 2)  # 9: fulltext_results limit
-        
-        # Final
-        exec_params.append(limit)  # 10: final limit
-        
-        # CRITICAL: Verify we have exactly the right number of parameters
-        # Base: 10 params (no filters)
-        # Each filter adds 2 params (one in vector_results, one in fulltext_results)
-        expected_params = 10 + (2 * len(filter_params))
-        
-        if len(exec_params) != expected_params:
-            raise ValueError(
-                f"Parameter count mismatch: expected {expected_params} params "
-                f"but built {len(exec_params)} params. "
-                f"Service: {repr(service_val)}, Component: {repr(component_val)}"
-            )
-        
-        # Debug: verify parameter count and log BEFORE execute
-        placeholder_count = query.count('%s')
-        param_count = len(exec_params)
-        
-        # Log using standardized logger (DEBUG level for diagnostic info)
-        logger.debug(
-            f"HYBRID_SEARCH: placeholders={placeholder_count}, params={param_count}, "
-            f"service={repr(service_val)}, component={repr(component_val)}"
-        )
-        logger.debug(
-            f"HYBRID_SEARCH: param list length={len(exec_params)}, "
-            f"params={[type(p).__name__ for p in exec_params]}"
+        if router is not None:
+            router.refresh(cur)
+        query, exec_params = _build_hybrid_search_query(
+            query_text, query_embedding, service_val, component_val, limit,
+            vector_weight, fulltext_weight, include_embeddings=include_embeddings,
+            document_limit=document_limit, recency=recency, doc_types=doc_types,
+            service_router=router
         )
         
-        # Verify parameter count matches query placeholders
-        if param_count != placeholder_count:
-            error_msg = (
-                f"Parameter mismatch: query has {placeholder_count} placeholders "
-                f"but {param_count} parameters provided. "
-                f"Service: {repr(service_val)}, Component: {repr(component_val)}. "
-                f"Params: {[str(p)[:50] if isinstance(p, str) else str(p) for p in exec_params]}"
-            )
-            logger.error(f"HYBRID_SEARCH ERROR: {error_msg}")
-            raise ValueError(error_msg)
-        
+        sql_start = time.time()
         try:
-            cur.execute(query, exec_params)
+            _apply_index_settings(cur, ef_search=ef_search, probes=probes)
+            cur.execute(query, exec_params, prepare=PREPARE_STATEMENTS)
         except Exception as e:
             logger.error(f"HYBRID_SEARCH SQL ERROR: {e}")
-            logger.error(f"Query placeholders: {placeholder_count}, Params: {param_count}")
             logger.error(f"Service: {repr(service_val)}, Component: {repr(component_val)}")
             raise
         
         results = cur.fetchall()
+        stage_timings["sql"] = time.time() - sql_start
+        if router is not None:
+            router.flush(cur)
         
         duration = time.time() - start_time
         logger.debug(
             f"Hybrid search completed: found {len(results)} results in {duration:.3f}s"
         )
-
-        # Diagnostic: log top fused hits to verify RRF/MMR behavior
-        top_preview = []
-        for row in results[:3]:
-            top_preview.append(
-                {
-                    "doc_id": str(row["document_id"]),
-                    "doc_type": row["doc_type"],
-                    "vector_score": float(row["vector_score"]) if row["vector_score"] else 0.0,
-                    "fulltext_score": float(row["fulltext_score"]) if row["fulltext_score"] else 0.0,
-                    "rrf_score": float(row["rrf_score"]),
-                    "title": (row["doc_title"] or "")[:80],
-                }
-            )
-        logger.info(
-            "HYBRID_SEARCH TOP RESULTS: "
-            f"count={len(results)}, duration_sec={duration:.3f}, "
-            f"service={repr(service_val)}, component={repr(component_val)}, "
-            f"vector_weight={vector_weight}, fulltext_weight={fulltext_weight}, "
-            f"preview={top_preview}"
+        _log_top_results(
+            results, duration, service_val, component_val, vector_weight, fulltext_weight, stage_timings
         )
         
         # Convert to list of dicts
-        chunks = []
-        for row in results:
-            chunks.append({
-                "chunk_id": str(row["id"]),
-                "document_id": str(row["document_id"]),
-                "chunk_index": row["chunk_index"],
-                "content": row["content"],
-                "metadata": row["metadata"],
-                "doc_title": row["doc_title"],
+        chunks = [_row_to_chunk(row) for row in results]
+        if cache_key is not None:
+            result_cache.put(cache_key, chunks)
+        return chunks
+    
+    finally:
+        cur.close()
+        conn.close()
+
+
+async def async_hybrid_search(
+    query_text: str,
+    service: Optional[str] = None,
+    component: Optional[str] = None,
+    limit: int = 5,
+    vector_weight: float = 0.7,
+    fulltext_weight: float = 0.3,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    include_embeddings: bool = False,
+    document_limit: Optional[int] = None,
+    recency: Optional[Dict] = None,
+    doc_types: Optional[List[str]] = None
+) -> List[Dict]:
+    """
+    Async variant of hybrid_search() for use on the event loop.
+    
+    Runs the same SQL on psycopg's AsyncConnectionPool and embeds the query with
+    AsyncOpenAI, so concurrent requests on one worker no longer serialize on retrieval.
+    Shares the query-embedding and result caches with hybrid_search().
+    
+    Args:
+        Same as hybrid_search()
+    
+    Returns:
+        List of chunks with scores
+    """
+    start_time = time.time()
+    logger.debug(
+        f"Starting async hybrid search: query='{query_text[:100]}...', "
+        f"service={service}, component={component}, limit={limit}"
+    )
+    
+    async with get_async_db_connection_context() as conn:
+        async with conn.cursor() as cur:
+            router = get_service_index_router()
+            if router is not None:
+                router.record(_like_pattern(service))
+            
+            result_cache = get_search_result_cache()
+            cache_key = None
+            if result_cache is not None:
+                try:
+                    cache_key = search_cache_key(
+                        query_text, service, component, limit, vector_weight, fulltext_weight,
+                        await get_corpus_version_async(cur),
+                        ef_search=ef_search, probes=probes, include_embeddings=include_embeddings,
+                        document_limit=document_limit, recency=_recency_cache_key(recency),
+                        doc_types=_doc_types_key(doc_types)
+                    )
+                except Exception as e:
+                    logger.warning(f"Result cache skipped (corpus version unavailable): {e}")
+                    await conn.rollback()
+                else:
+                    cached = result_cache.get(cache_key)
+                    if cached is not None:
+                        logger.debug(
+                            f"Async hybrid search served from result cache: {len(cached)} results "
+                            f"in {time.time() - start_time:.3f}s"
+                        )
+                        if router is not None:
+                            await router.flush_async(cur)
+                        return cached
+            
+            embedding_start = time.time()
+            query_embedding = await get_query_embedding_async(query_text)
+            stage_timings = {"embedding": time.time() - embedding_start}
+            
+            service_val = service if service and str(service).strip() else None
+            component_val = component if component and str(component).strip() else None
+            
+            if router is not None:
+                await router.refresh_async(cur)
+            query, exec_params = _build_hybrid_search_query(
+                query_text, query_embedding, service_val, component_val, limit,
+                vector_weight, fulltext_weight, include_embeddings=include_embeddings,
+                document_limit=document_limit, recency=recency, doc_types=doc_types,
+                service_router=router
+            )
+            
+            sql_start = time.time()
+            try:
+                settings_sql = _index_settings_sql(ef_search, probes)
+                if settings_sql:
+                    await cur.execute(settings_sql)
+                await cur.execute(query, exec_params, prepare=PREPARE_STATEMENTS)
+            except Exception as e:
+                logger.error(f"ASYNC_HYBRID_SEARCH SQL ERROR: {e}")
+                logger.error(f"Service: {repr(service_val)}, Component: {repr(component_val)}")
+                raise
+            
+            results = await cur.fetchall()
+            stage_timings["sql"] = time.time() - sql_start
+            if router is not None:
+                await router.flush_async(cur)
+    
+    duration = time.time() - start_time
+    logger.debug(f"Async hybrid search completed: found {len(results)} results in {duration:.3f}s")
+    _log_top_results(
+        results, duration, service_val, component_val, vector_weight, fulltext_weight, stage_timings
+    )
+    
+    chunks = [_row_to_chunk(row) for row in results]
+    if cache_key is not None:
+        result_cache.put(cache_key, chunks)
+    return chunks
+
+
+# Freshness of a document: last review (incident time for tickets), else ingest time
+DOC_TIMESTAMP_SQL = "COALESCE(d.last_reviewed_at, d.created_at)"
+
+# Documents older than their doc_type's max age are excluded; doc types without one never expire
+MAX_AGE_FILTER_SQL = (
+    f"({DOC_TIMESTAMP_SQL} >= now() - "
+    "(%(max_age_days)s::jsonb ->> d.doc_type)::float8 * interval '1 day') IS NOT FALSE"
+)
+
+# Score multiplier (1 - w) + w * 0.5 ^ (age_days / half_life_days[doc_type]);
+# 1.0 for doc types without a half-life
+RECENCY_FACTOR_SQL = (
+    "(1.0 - %(recency_weight)s::float8) + %(recency_weight)s::float8 * COALESCE(power(0.5, "
+    f"GREATEST(EXTRACT(EPOCH FROM now() - {DOC_TIMESTAMP_SQL})::float8, 0.0) / 86400.0 / "
+    "(%(half_life_days)s::jsonb ->> d.doc_type)::float8), 1.0)"
+)
+
+
+@lru_cache(maxsize=None)
+def _hybrid_search_sql(
+    has_service: bool,
+    has_component: bool,
+    include_embeddings: bool,
+    two_stage: bool = False,
+    has_max_age: bool = False,
+    has_decay: bool = False,
+    has_doc_types: bool = False,
+    indexed_service: Optional[str] = None,
+    stage: Optional[str] = None
+) -> str:
+    """
+    Return the hybrid search SQL for one filter/column/stage/freshness combination.
+    
+    The text is constant per combination (at most 128 variants, a handful in practice), so
+    psycopg can keep one server-side prepared statement per variant per connection.
+    Everything that varies per call - the embedding, query text, filter patterns, limits,
+    RRF weights and freshness settings - is a named bind parameter; a name used several
+    times is sent once. The exception is indexed_service: a service pattern with a partial
+    vector index (retrieval.service_indexes) is written as a literal, so the planner can
+    match the index predicate; this adds one variant per indexed service.
+    
+    stage="vector" / "fulltext" returns a statement that runs only that candidate stage
+    and selects its ids (retrieval.explain times the stages separately).
+    """
+    # Case-insensitive partial matching on the pre-lowercased, trigram-indexed
+    # service_norm/component_norm columns: "database" matches "Database-SQL", "Database", etc.
+    filters = []
+    if indexed_service:
+        filters.append(service_predicate_sql(indexed_service, column="c.service_norm"))
+    elif has_service:
+        filters.append("c.service_norm LIKE %(service_pattern)s")
+    if has_component:
+        filters.append("c.component_norm LIKE %(component_pattern)s")
+    # chunks is list-partitioned by doc_type: filtering the partition key prunes the other
+    # partitions (at plan time, or at executor startup for a generic prepared plan)
+    if has_doc_types:
+        filters.append("c.doc_type = ANY(%(doc_types)s::text[])")
+    # Max age is applied before each LIMIT so expired documents do not take candidate slots
+    if has_max_age:
+        filters.append(MAX_AGE_FILTER_SQL)
+    filter_clause = " AND " + " AND ".join(filters) if filters else ""
+    
+    # Two-stage: rank documents by summary embedding (documents_summary_embedding_idx),
+    # then search only the chunks of the top %(document_limit)s documents
+    # (chunks_document_id_idx; exact distances over a small candidate set)
+    document_cte = ""
+    if two_stage:
+        document_filters = []
+        if has_service:
+            document_filters.append("lower(trim(d.service)) LIKE %(service_pattern)s")
+        if has_component:
+            document_filters.append("lower(trim(d.component)) LIKE %(component_pattern)s")
+        if has_doc_types:
+            document_filters.append("d.doc_type = ANY(%(doc_types)s::text[])")
+        if has_max_age:
+            document_filters.append(MAX_AGE_FILTER_SQL)
+        document_filter_clause = " AND " + " AND ".join(document_filters) if document_filters else ""
+        document_cte = f"""top_documents AS MATERIALIZED (
+        SELECT d.id
+        FROM documents d
+        WHERE d.summary_embedding IS NOT NULL
+        {document_filter_clause}
+        ORDER BY d.summary_embedding <=> %(query_vec)b
+        LIMIT %(document_limit)s
+    ),
+    """
+        filter_clause += " AND c.document_id IN (SELECT id FROM top_documents)"
+    
+    # Embeddings are 1536 floats per row; only ship them when the caller needs them
+    embedding_col = "c.embedding as embedding," if include_embeddings else ""
+    combined_embedding_col = "COALESCE(v.embedding, f.embedding) as embedding," if include_embeddings else ""
+    final_embedding_col = "embedding," if include_embeddings else ""
+    
+    # Recency decay scales the fused RRF score, so it reorders before the final LIMIT
+    recency_col = f"{RECENCY_FACTOR_SQL} as recency_factor," if has_decay else ""
+    combined_recency_col = "COALESCE(v.recency_factor, f.recency_factor) as recency_factor," if has_decay else ""
+    final_recency_col = "recency_factor," if has_decay else ""
+    recency_multiplier = " * COALESCE(v.recency_factor, f.recency_factor)" if has_decay else ""
+    
+    # Vector search: cosine similarity (query_vec is a binary pgvector parameter)
+    # Full-text search: tsquery parsed once (query_ts), ts_rank computed once per matching
+    # row and reused for ordering and ranking; c.tsv @@ query_ts is served by chunks_tsv_idx
+    # RRF: 1/(k + rank) for each result set, weighted, then combined
+    candidate_ctes = f"""{document_cte}vector_results AS (
+        SELECT 
+            c.id,
+            c.document_id,
+            c.chunk_index,
+            c.content,
+            c.metadata,
+            c.token_count,
+            c.content_sha256,
+            {embedding_col}
+            d.title as doc_title,
+            d.doc_type as doc_type,
+            {recency_col}
+            1 - (c.embedding <=> %(query_vec)b) as vector_score,
+            ROW_NUMBER() OVER (ORDER BY c.embedding <=> %(query_vec)b) as vector_rank
+        FROM chunks c
+        JOIN documents d ON c.document_id = d.id
+        WHERE c.embedding IS NOT NULL
+        {filter_clause}
+        ORDER BY c.embedding <=> %(query_vec)b
+        LIMIT %(match_limit)s
+    ),
+    query_ts AS MATERIALIZED (
+        SELECT plainto_tsquery('english', %(query_text)s) as query_ts
+    ),
+    fulltext_matches AS (
+        SELECT 
+            c.id,
+            c.document_id,
+            c.chunk_index,
+            c.content,
+            c.metadata,
+            c.token_count,
+            c.content_sha256,
+            {embedding_col}
+            d.title as doc_title,
+            d.doc_type as doc_type,
+            {recency_col}
+            ts_rank(c.tsv, q.query_ts) as fulltext_score
+        FROM query_ts q
+        CROSS JOIN chunks c
+        JOIN documents d ON c.document_id = d.id
+        WHERE c.tsv @@ q.query_ts
+        {filter_clause}
+        ORDER BY fulltext_score DESC
+        LIMIT %(match_limit)s
+    ),
+    fulltext_results AS (
+        SELECT 
+            *,
+            ROW_NUMBER() OVER (ORDER BY fulltext_score DESC) as fulltext_rank
+        FROM fulltext_matches
+    )"""
+    if stage is not None:
+        # One candidate stage on its own (unreferenced CTEs are not executed)
+        stage_cte = {"vector": "vector_results", "fulltext": "fulltext_results"}[stage]
+        return f"""
+    WITH {candidate_ctes}
+    SELECT id FROM {stage_cte}
+    """
+    return f"""
+    WITH {candidate_ctes},
+    combined_results AS (
+        SELECT 
+            COALESCE(v.id, f.id) as id,
+            COALESCE(v.document_id, f.document_id) as document_id,
+            COALESCE(v.chunk_index, f.chunk_index) as chunk_index,
+            COALESCE(v.content, f.content) as content,
+            COALESCE(v.metadata, f.metadata) as metadata,
+            COALESCE(v.token_count, f.token_count) as token_count,
+            COALESCE(v.content_sha256, f.content_sha256) as content_sha256,
+            {combined_embedding_col}
+            COALESCE(v.doc_title, f.doc_title) as doc_title,
+            COALESCE(v.doc_type, f.doc_type) as doc_type,
+            {combined_recency_col}
+            COALESCE(v.vector_score, 0.0) as vector_score,
+            COALESCE(f.fulltext_score, 0.0) as fulltext_score,
+            COALESCE(v.vector_rank, 999) as vector_rank,
+            COALESCE(f.fulltext_rank, 999) as fulltext_rank,
+            -- RRF: 1/(k + rank) where k=60 is standard
+            ((1.0 / (60.0 + COALESCE(v.vector_rank, 999)))::float8 * %(vector_weight)s::float8 +
+            (1.0 / (60.0 + COALESCE(f.fulltext_rank, 999)))::float8 * %(fulltext_weight)s::float8){recency_multiplier} as rrf_score
+        FROM vector_results v
+        FULL OUTER JOIN fulltext_results f ON v.id = f.id
+    )
+    SELECT 
+        id,
+        document_id,
+        chunk_index,
+        content,
+        metadata,
+        token_count,
+        content_sha256,
+        {final_embedding_col}
+        doc_title,
+        doc_type,
+        {final_recency_col}
+        vector_score,
+        fulltext_score,
+        rrf_score
+    FROM combined_results
+    WHERE rrf_score > 0
+    ORDER BY rrf_score DESC
+    LIMIT %(limit)s
+    """
+
+
+def _build_hybrid_search_query(
+    query_text: str,
+    query_embedding: List[float],
+    service: Optional[str],
+    component: Optional[str],
+    limit: int,
+    vector_weight: float,
+    fulltext_weight: float,
+    include_embeddings: bool = False,
+    document_limit: Optional[int] = None,
+    recency: Optional[Dict] = None,
+    doc_types: Optional[List[str]] = None,
+    service_router: Optional[ServiceIndexRouter] = None,
+    stage: Optional[str] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Build the hybrid search SQL and its named parameters.
+    
+    Shared by hybrid_search() and async_hybrid_search() so both run the same statement.
+    With a service_router, a service filter that has a partial vector index is routed to it.
+    stage selects a single candidate stage (see _hybrid_search_sql).
+    
+    Returns:
+        (query, exec_params)
+    """
+    service_pattern = _like_pattern(service)
+    component_pattern = _like_pattern(component)
+    two_stage = bool(document_limit)
+    max_age_days, half_life_days, recency_weight = _recency_settings(recency)
+    doc_types_list = list(_doc_types_key(doc_types) or [])
+    indexed_service = service_router.route(service_pattern) if service_router is not None else None
+    query = _hybrid_search_sql(
+        bool(service_pattern), bool(component_pattern), include_embeddings, two_stage,
+        bool(max_age_days), bool(half_life_days), bool(doc_types_list), indexed_service, stage
+    )
+    exec_params = {
+        # float32 ndarray is dumped by the pgvector adapter as a binary `vector` (6 KB vs ~20 KB of text)
+        "query_vec": np.asarray(query_embedding, dtype=np.float32),
+        "query_text": query_text,
+        "service_pattern": service_pattern,
+        "component_pattern": component_pattern,
+        "match_limit": limit * 2,
+        "limit": limit,
+        "vector_weight": float(vector_weight),
+        "fulltext_weight": float(fulltext_weight),
+        "document_limit": int(document_limit) if two_stage else None,
+        "max_age_days": json.dumps(max_age_days) if max_age_days else None,
+        "half_life_days": json.dumps(half_life_days) if half_life_days else None,
+        "recency_weight": recency_weight,
+        "doc_types": doc_types_list or None,
+    }
+    logger.debug(
+        f"HYBRID_SEARCH: service_pattern={repr(service_pattern)}, "
+        f"component_pattern={repr(component_pattern)}, include_embeddings={include_embeddings}, "
+        f"document_limit={exec_params['document_limit']}, indexed_service={indexed_service is not None}"
+    )
+    return query, exec_params
+
+
+def _recency_settings(recency: Optional[Dict]) -> Tuple[Dict[str, float], Dict[str, float], float]:
+    """
+    Parse an agent's "recency" config section into (max_age_days, half_life_days, weight).
+    
+    Both maps are keyed by doc_type; doc types that are missing (or set to null/0) never
+    expire / never decay. Empty maps when the section is missing or disabled.
+    """
+    if not recency or not recency.get("enabled", True):
+        return {}, {}, 0.0
+    max_age_days = {t: float(d) for t, d in (recency.get("max_age_days") or {}).items() if d}
+    half_life_days = {t: float(d) for t, d in (recency.get("half_life_days") or {}).items() if d}
+    weight = min(max(float(recency.get("weight", 1.0)), 0.0), 1.0)
+    return max_age_days, half_life_days, weight
+
+
+def _recency_cache_key(recency: Optional[Dict]) -> Optional[Tuple]:
+    """Hashable form of the recency settings for the result cache key."""
+    max_age_days, half_life_days, weight = _recency_settings(recency)
+    if not max_age_days and not half_life_days:
+        return None
+    return (tuple(sorted(max_age_days.items())), tuple(sorted(half_life_days.items())), weight)
+
+
+def _doc_types_key(doc_types: Optional[List[str]]) -> Optional[Tuple[str, ...]]:
+    """Sorted, de-duplicated doc types (None when not filtering)."""
+    if not doc_types:
+        return None
+    return tuple(sorted({str(t).strip() for t in doc_types if t and str(t).strip()})) or None
+
+
+def _log_top_results(
+    results: List[Dict],
+    duration: float,
+    service_val: Optional[str],
+    component_val: Optional[str],
+    vector_weight: float,
+    fulltext_weight: float,
+    stage_timings: Optional[Dict[str, float]] = None
+) -> None:
+    """Diagnostic: log top fused hits (and per-stage seconds) to verify RRF/MMR behavior."""
+    top_preview = []
+    for row in results[:3]:
+        top_preview.append(
+            {
+                "doc_id": str(row["document_id"]),
                 "doc_type": row["doc_type"],
                 "vector_score": float(row["vector_score"]) if row["vector_score"] else 0.0,
                 "fulltext_score": float(row["fulltext_score"]) if row["fulltext_score"] else 0.0,
-                "rrf_score": float(row["rrf_score"])
-            })
-        
-        return chunks
+                "rrf_score": float(row["rrf_score"]),
+                "title": (row["doc_title"] or "")[:80],
+            }
+        )
+    stages = ", ".join(f"{name}={sec:.3f}" for name, sec in (stage_timings or {}).items())
+    logger.info(
+        "HYBRID_SEARCH TOP RESULTS: "
+        f"count={len(results)}, duration_sec={duration:.3f}, "
+        f"stages_sec=[{stages}], "
+        f"service={repr(service_val)}, component={repr(component_val)}, "
+        f"vector_weight={vector_weight}, fulltext_weight={fulltext_weight}, "
+        f"preview={top_preview}"
+    )
+
+
+def _row_to_chunk(row: Dict) -> Dict:
+    """Convert a fused result row to the chunk dict returned by the search functions."""
+    chunk = {
+        "chunk_id": str(row["id"]),
+        "document_id": str(row["document_id"]),
+        "chunk_index": row["chunk_index"],
+        "content": row["content"],
+        "metadata": row["metadata"],
+        "token_count": row.get("token_count"),
+        "content_sha256": row.get("content_sha256"),
+        "doc_title": row["doc_title"],
+        "doc_type": row["doc_type"],
+        "vector_score": float(row["vector_score"]) if row["vector_score"] else 0.0,
+        "fulltext_score": float(row["fulltext_score"]) if row["fulltext_score"] else 0.0,
+        "rrf_score": float(row["rrf_score"])
+    }
+    if row.get("recency_factor") is not None:
+        chunk["recency_factor"] = float(row["recency_factor"])
+    if "embedding" in row:
+        chunk["embedding"] = parse_vector(row["embedding"]) if row["embedding"] is not None else None
+    return chunk
+
+
+def _index_settings_sql(ef_search: Optional[int] = None, probes: Optional[int] = None) -> Optional[str]:
+    """
+    Build the SET LOCAL statement for per-query ANN index parameters (None if nothing to set).
+    
+    SET LOCAL only lasts until the end of the current transaction, so the values
+    never leak to other requests sharing the pooled connection.
+    """
+    settings = []
+    if ef_search:
+        settings.append(f"SET LOCAL hnsw.ef_search = {int(ef_search)}")
+    if probes:
+        settings.append(f"SET LOCAL ivfflat.probes = {int(probes)}")
+    return "; ".join(settings) if settings else None
+
+
+def _apply_index_settings(cur, ef_search: Optional[int] = None, probes: Optional[int] = None) -> None:
+    """Apply per-query ANN index parameters on a sync cursor (see _index_settings_sql)."""
+    settings_sql = _index_settings_sql(ef_search, probes)
+    if settings_sql:
+        cur.execute(settings_sql)
+
+
+def _like_pattern(value: Optional[str]) -> Optional[str]:
+    """Build the partial-match pattern for a service/component filter on the *_norm columns."""
+    normalized = normalize_filter_value(value)
+    if not normalized:
+        return None
+    return f"%{normalized}%"
+
+
+def hybrid_search_many(
+    queries: List[Dict[str, Any]],
+    include_embeddings: bool = False
+) -> Dict[Any, List[Dict]]:
+    """
+    Perform hybrid search for several queries in one embedding call and one SQL round trip.
+    
+    Each query is first looked up in the result cache (same key as hybrid_search(), so the
+    two paths share entries). The misses are embedded with a single batch call and run
+    their vector/full-text/RRF pipelines inside one statement via unnest + LATERAL.
+    Results are equivalent to calling hybrid_search() once per query.
+    
+    Args:
+        queries: List of query dicts with keys:
+            - query_text (required)
+            - service, component: Optional filters
+            - limit: Number of results (default: 5)
+            - vector_weight, fulltext_weight: RRF weights (default: 0.7 / 0.3)
+            - ef_search, probes: Optional ANN index parameters (queries with different
+              values run as separate statements in the same round-trip loop)
+            - document_limit: Optional two-stage search (see hybrid_search)
+            - recency: Optional freshness settings (see hybrid_search)
+            - doc_types: Optional document types to search (see hybrid_search)
+            - key: Optional key for the result dict (default: position in the list)
+        include_embeddings: Also return each chunk's stored embedding (used by MMR)
     
+    Returns:
+        Dict mapping each query's key to its list of chunks with scores
+    """
+    if not queries:
+        return {}
+    
+    start_time = time.time()
+    keys = [q.get("key", idx) for idx, q in enumerate(queries)]
+    if len(set(keys)) != len(keys):
+        raise ValueError("hybrid_search_many: query keys must be unique")
+    
+    results: Dict[Any, List[Dict]] = {key: [] for key in keys}
+    cache_hits = 0
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        # Counted for the partial index selection; routing applies to single-query searches
+        # (the batch statement filters every query through the same bind-parameter arrays)
+        router = get_service_index_router()
+        if router is not None:
+            for q in queries:
+                router.record(_like_pattern(q.get("service")))
+        
+        result_cache = get_search_result_cache()
+        cache_keys: List[Optional[Tuple]] = [None] * len(queries)
+        pending = list(range(len(queries)))
+        if result_cache is not None:
+            try:
+                corpus_version = get_corpus_version(cur)
+            except Exception as e:
+                logger.warning(f"Result cache skipped (corpus version unavailable): {e}")
+                conn.rollback()
+            else:
+                pending = []
+                for idx, q in enumerate(queries):
+                    cache_keys[idx] = _many_query_cache_key(q, corpus_version, include_embeddings)
+                    cached = result_cache.get(cache_keys[idx])
+                    if cached is None:
+                        pending.append(idx)
+                    else:
+                        results[keys[idx]] = cached
+                        cache_hits += 1
+        
+        if pending:
+            embeddings = get_query_embeddings([queries[idx]["query_text"] for idx in pending])
+            # SET LOCAL is per transaction, so each distinct (ef_search, probes) gets its own statement
+            groups: Dict[Tuple, List[Tuple[int, List[float]]]] = {}
+            for idx, embedding in zip(pending, embeddings):
+                settings = (queries[idx].get("ef_search") or None, queries[idx].get("probes") or None)
+                groups.setdefault(settings, []).append((idx, embedding))
+            query = _hybrid_search_many_sql(include_embeddings)
+            for group_no, ((ef_search, probes), group) in enumerate(groups.items()):
+                try:
+                    if group_no:
+                        # End the previous group's transaction so its SET LOCAL values are dropped
+                        conn.rollback()
+                    _apply_index_settings(cur, ef_search=ef_search, probes=probes)
+                    cur.execute(query, _hybrid_search_many_params([(queries[idx], embedding) for idx, embedding in group]))
+                except Exception as e:
+                    logger.error(f"HYBRID_SEARCH_MANY SQL ERROR: {e} (queries={len(group)})")
+                    raise
+                for row in cur.fetchall():
+                    # query_idx comes from WITH ORDINALITY (1-based)
+                    idx = group[row["query_idx"] - 1][0]
+                    results[keys[idx]].append(_row_to_chunk(row))
+            if result_cache is not None:
+                for idx in pending:
+                    if cache_keys[idx] is not None:
+                        result_cache.put(cache_keys[idx], results[keys[idx]])
+        
+        if router is not None:
+            router.flush(cur)
     finally:
         cur.close()
         conn.close()
+    
+    duration = time.time() - start_time
+    logger.info(
+        f"HYBRID_SEARCH_MANY: queries={len(queries)}, cache_hits={cache_hits}, "
+        f"results={sum(len(chunks) for chunks in results.values())}, duration_sec={duration:.3f}"
+    )
+    return results
+
+
+def _many_query_cache_key(query: Dict[str, Any], corpus_version: int, include_embeddings: bool) -> Tuple:
+    """Result cache key of one hybrid_search_many() query (the key hybrid_search() uses)."""
+    return search_cache_key(
+        query["query_text"], query.get("service"), query.get("component"), int(query.get("limit", 5)),
+        float(query.get("vector_weight", 0.7)), float(query.get("fulltext_weight", 0.3)), corpus_version,
+        ef_search=query.get("ef_search"), probes=query.get("probes"), include_embeddings=include_embeddings,
+        document_limit=query.get("document_limit"), recency=_recency_cache_key(query.get("recency")),
+        doc_types=_doc_types_key(query.get("doc_types"))
+    )
+
+
+def _hybrid_search_many_params(group: List[Tuple[Dict[str, Any], List[float]]]) -> List[list]:
+    """Per-query bind arrays for _hybrid_search_many_sql(), from (query dict, embedding) pairs."""
+    queries = [q for q, _ in group]
+    final_limits = [int(q.get("limit", 5)) for q in queries]
+    recency_settings = [_recency_settings(q.get("recency")) for q in queries]
+    return [
+        # float32 ndarrays are dumped by the pgvector adapter as a binary vector[] (see hybrid_search)
+        [np.asarray(embedding, dtype=np.float32) for _, embedding in group],
+        [q["query_text"] for q in queries],
+        [_like_pattern(q.get("service")) for q in queries],
+        [_like_pattern(q.get("component")) for q in queries],
+        [limit * 2 for limit in final_limits],
+        final_limits,
+        [float(q.get("vector_weight", 0.7)) for q in queries],
+        [float(q.get("fulltext_weight", 0.3)) for q in queries],
+        [int(q["document_limit"]) if q.get("document_limit") else None for q in queries],
+        [json.dumps(m) if m else None for m, _, _ in recency_settings],
+        [json.dumps(h) if h else None for _, h, _ in recency_settings],
+        [w for _, _, w in recency_settings],
+        # unnest() flattens nested arrays, so each query's types travel as one comma-separated string
+        [",".join(_doc_types_key(q.get("doc_types")) or []) or None for q in queries],
+    ]
+
+
+@lru_cache(maxsize=None)
+def _hybrid_search_many_sql(include_embeddings: bool) -> str:
+    """
+    Return the batched hybrid search SQL (one vector/full-text/RRF pipeline per unnest row).
+    
+    Same pipeline as hybrid_search(), evaluated once per query row: vector top-N and
+    full-text top-N, FULL OUTER JOIN, RRF 1/(60 + rank). Two-stage queries resolve their
+    top documents once (document_ids) before the chunk search.
+    """
+    embedding_col = "c.embedding as embedding," if include_embeddings else ""
+    combined_embedding_col = "COALESCE(v.embedding, f.embedding) as embedding," if include_embeddings else ""
+    # RECENCY_FACTOR_SQL with the per-query settings (1.0 when a query has none)
+    recency_col = (
+        RECENCY_FACTOR_SQL
+        .replace("%(recency_weight)s::float8", "q.recency_weight")
+        .replace("%(half_life_days)s::jsonb", "q.half_life_days")
+        + " as recency_factor,"
+    )
+    
+    # ts_rank is computed once per matching row (fulltext_matches) and reused for the
+    # ordering, the LIMIT and the rank; query_vec arrives as a binary vector[]
+    return f"""
+    WITH queries AS (
+        SELECT
+            q.query_idx,
+            q.query_vec,
+            plainto_tsquery('english', q.query_text) AS query_ts,
+            q.service_pattern,
+            q.component_pattern,
+            q.match_limit,
+            q.final_limit,
+            q.vector_weight,
+            q.fulltext_weight,
+            q.max_age_days::jsonb AS max_age_days,
+            q.half_life_days::jsonb AS half_life_days,
+            q.recency_weight,
+            string_to_array(q.doc_types, ',') AS doc_types,
+            CASE WHEN q.document_limit IS NULL THEN NULL ELSE ARRAY(
+                SELECT d.id
+                FROM documents d
+                WHERE d.summary_embedding IS NOT NULL
+                  AND (q.service_pattern IS NULL OR lower(trim(d.service)) LIKE q.service_pattern)
+                  AND (q.component_pattern IS NULL OR lower(trim(d.component)) LIKE q.component_pattern)
+                  AND (q.doc_types IS NULL OR d.doc_type = ANY(string_to_array(q.doc_types, ',')))
+                  AND ({DOC_TIMESTAMP_SQL} >= now() - (q.max_age_days::jsonb ->> d.doc_type)::float8 * interval '1 day') IS NOT FALSE
+                ORDER BY d.summary_embedding <=> q.query_vec
+                LIMIT q.document_limit
+            ) END AS document_ids
+        FROM unnest(
+            %b::vector[], %s::text[], %s::text[], %s::text[],
+            %s::int[], %s::int[], %s::float8[], %s::float8[], %s::int[],
+            %s::text[], %s::text[], %s::float8[], %s::text[]
+        ) WITH ORDINALITY AS q(
+            query_vec, query_text, service_pattern, component_pattern,
+            match_limit, final_limit, vector_weight, fulltext_weight, document_limit,
+            max_age_days, half_life_days, recency_weight, doc_types, query_idx
+        )
+    )
+    SELECT q.query_idx, r.*
+    FROM queries q
+    CROSS JOIN LATERAL (
+        SELECT
+            COALESCE(v.id, f.id) as id,
+            COALESCE(v.document_id, f.document_id) as document_id,
+            COALESCE(v.chunk_index, f.chunk_index) as chunk_index,
+            COALESCE(v.content, f.content) as content,
+            COALESCE(v.metadata, f.metadata) as metadata,
+            COALESCE(v.token_count, f.token_count) as token_count,
+            COALESCE(v.content_sha256, f.content_sha256) as content_sha256,
+            {combined_embedding_col}
+            COALESCE(v.doc_title, f.doc_title) as doc_title,
+            COALESCE(v.doc_type, f.doc_type) as doc_type,
+            COALESCE(v.vector_score, 0.0) as vector_score,
+            COALESCE(f.fulltext_score, 0.0) as fulltext_score,
+            COALESCE(v.recency_factor, f.recency_factor) as recency_factor,
+            ((1.0 / (60.0 + COALESCE(v.vector_rank, 999))) * q.vector_weight +
+            (1.0 / (60.0 + COALESCE(f.fulltext_rank, 999))) * q.fulltext_weight)
+                * COALESCE(v.recency_factor, f.recency_factor) as rrf_score
+        FROM (
+            SELECT
+                c.id,
+                c.document_id,
+                c.chunk_index,
+                c.content,
+                c.metadata,
+                c.token_count,
+                c.content_sha256,
+                {embedding_col}
+                d.title as doc_title,
+                d.doc_type as doc_type,
+                {recency_col}
+                1 - (c.embedding <=> q.query_vec) as vector_score,
+                ROW_NUMBER() OVER (ORDER BY c.embedding <=> q.query_vec) as vector_rank
+            FROM chunks c
+            JOIN documents d ON c.document_id = d.id
+            WHERE c.embedding IS NOT NULL
+              AND (q.service_pattern IS NULL OR c.service_norm LIKE q.service_pattern)
+              AND (q.component_pattern IS NULL OR c.component_norm LIKE q.component_pattern)
+              AND (q.document_ids IS NULL OR c.document_id = ANY(q.document_ids))
+              AND (q.doc_types IS NULL OR c.doc_type = ANY(q.doc_types))
+              AND ({DOC_TIMESTAMP_SQL} >= now() - (q.max_age_days ->> d.doc_type)::float8 * interval '1 day') IS NOT FALSE
+            ORDER BY c.embedding <=> q.query_vec
+            LIMIT q.match_limit
+        ) v
+        FULL OUTER JOIN (
+            SELECT
+                fulltext_matches.*,
+                ROW_NUMBER() OVER (ORDER BY fulltext_matches.fulltext_score DESC) as fulltext_rank
+            FROM (
+                SELECT
+                    c.id,
+                    c.document_id,
+                    c.chunk_index,
+                    c.content,
+                    c.metadata,
+                    c.token_count,
+                    c.content_sha256,
+                    {embedding_col}
+                    d.title as doc_title,
+                    d.doc_type as doc_type,
+                    {recency_col}
+                    ts_rank(c.tsv, q.query_ts) as fulltext_score
+                FROM chunks c
+                JOIN documents d ON c.document_id = d.id
+                WHERE c.tsv @@ q.query_ts
+                  AND (q.service_pattern IS NULL OR c.service_norm LIKE q.service_pattern)
+                  AND (q.component_pattern IS NULL OR c.component_norm LIKE q.component_pattern)
+                  AND (q.document_ids IS NULL OR c.document_id = ANY(q.document_ids))
+                  AND (q.doc_types IS NULL OR c.doc_type = ANY(q.doc_types))
+                  AND ({DOC_TIMESTAMP_SQL} >= now() - (q.max_age_days ->> d.doc_type)::float8 * interval '1 day') IS NOT FALSE
+                ORDER BY fulltext_score DESC
+                LIMIT q.match_limit
+            ) fulltext_matches
+        ) f ON v.id = f.id
+        ORDER BY rrf_score DESC
+        LIMIT q.final_limit
+    ) r
+    ORDER BY q.query_idx, r.rrf_score DESC
+    """
+
+
+def mmr_rerank(
+    candidates: List[Dict],
+    limit: int = 5,
+    diversity: float = 0.5
+) -> List[Dict]:
+    """
+    Select a diverse subset of fused candidates with Maximal Marginal Relevance.
+    
+    Relevance is the candidate's RRF score scaled to [0, 1]; redundancy is the cosine
+    similarity between stored chunk embeddings. Similarities are computed once as a
+    single matrix product, and each candidate's max-similarity to the selected set is
+    updated incrementally, so selection is O(n * d + k * n) rather than O(k^2 * n).
+    
+    Args:
+        candidates: Chunks from hybrid_search(..., include_embeddings=True), best first
+        limit: Number of chunks to select
+        diversity: Diversity parameter (0-1, higher = more diverse)
+    
+    Returns:
+        Selected chunks in selection order (without the embedding field)
+    """
+    if not candidates or limit <= 0:
+        return []
+    
+    dim = next((len(c["embedding"]) for c in candidates if c.get("embedding")), 0)
+    vectors = np.zeros((len(candidates), dim), dtype=np.float32)
+    for idx, candidate in enumerate(candidates):
+        if candidate.get("embedding"):
+            vectors[idx] = candidate["embedding"]
+    # Normalize rows so the Gram matrix is cosine similarity; missing embeddings stay zero
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+    similarity = vectors @ vectors.T
+    
+    relevance = np.array([c.get("rrf_score") or 0.0 for c in candidates], dtype=np.float32)
+    if relevance.max() > 0:
+        relevance = relevance / relevance.max()
+    
+    lambda_relevance = 1.0 - diversity
+    max_sim = np.zeros(len(candidates), dtype=np.float32)
+    available = np.ones(len(candidates), dtype=bool)
+    selected: List[int] = []
+    
+    while len(selected) < min(limit, len(candidates)):
+        mmr_scores = lambda_relevance * relevance - diversity * max_sim
+        mmr_scores[~available] = -np.inf
+        best_idx = int(np.argmax(mmr_scores))
+        selected.append(best_idx)
+        available[best_idx] = False
+        np.maximum(max_sim, similarity[best_idx], out=max_sim)
+    
+    results = []
+    for idx in selected:
+        chunk = dict(candidates[idx])
+        chunk.pop("embedding", None)
+        results.append(chunk)
+    return results
 
 
 def mmr_search(
@@ -291,63 +1015,85 @@ def mmr_search(
     service: Optional[str] = None,
     component: Optional[str] = None,
     limit: int = 5,
-    diversity: float = 0.5
+    diversity: float = 0.5,
+    vector_weight: float = 0.7,
+    fulltext_weight: float = 0.3,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    candidate_multiplier: int = 3,
+    document_limit: Optional[int] = None,
+    recency: Optional[Dict] = None,
+    doc_types: Optional[List[str]] = None
 ) -> List[Dict]:
     """
     Maximal Marginal Relevance search for diverse results.
     
+    Fetches limit * candidate_multiplier fused candidates (with their stored embeddings)
+    from hybrid_search, then picks the final set with mmr_rerank().
+    
     Args:
         query_text: Search query
         service: Optional service filter
         component: Optional component filter
         limit: Number of results
         diversity: Diversity parameter (0-1, higher = more diverse)
+        vector_weight: Weight for vector search (0-1)
+        fulltext_weight: Weight for full-text search (0-1)
+        ef_search: HNSW candidate list size for the candidate query
+        probes: IVFFlat lists probed for the candidate query
+        candidate_multiplier: Candidate pool size as a multiple of limit
+        document_limit: Two-stage search over the top documents (see hybrid_search)
+        recency: Freshness settings (see hybrid_search)
+        doc_types: Document types to search (see hybrid_search)
     
     Returns:
         List of diverse chunks
     """
-    # Get initial results from hybrid search
-    candidates = hybrid_search(query_text, service, component, limit=limit * 3)
-    
-    if not candidates:
-        return []
-    
-    # Simple MMR: select first result, then iteratively add most relevant
-    # that is also diverse from already selected
-    selected = []
-    remaining = candidates.copy()
-    
-    # First result is always the top one
-    if remaining:
-        selected.append(remaining.pop(0))
-    
-    # For remaining slots, balance relevance and diversity
-    while len(selected) < limit and remaining:
-        best_idx = 0
-        best_score = -1
-        
-        for idx, candidate in enumerate(remaining):
-            # Relevance score (RRF score)
-            relevance = candidate["rrf_score"]
-            
-            # Diversity: max similarity to already selected
-            max_sim = 0.0
-            if selected:
-                # Simple heuristic: if same document, lower diversity
-                for sel in selected:
-                    if candidate["document_id"] == sel["document_id"]:
-                        max_sim = 0.8  # High similarity if same doc
-                    else:
-                        max_sim = max(max_sim, 0.3)  # Lower similarity if different doc
-            
-            # MMR score: lambda * relevance - (1 - lambda) * max_similarity
-            mmr_score = diversity * relevance - (1 - diversity) * max_sim
-            
-            if mmr_score > best_score:
-                best_score = mmr_score
-                best_idx = idx
-        
-        selected.append(remaining.pop(best_idx))
-    
-    return selected
+    candidates = hybrid_search(
+        query_text,
+        service,
+        component,
+        limit=limit * candidate_multiplier,
+        vector_weight=vector_weight,
+        fulltext_weight=fulltext_weight,
+        ef_search=ef_search,
+        probes=probes,
+        include_embeddings=True,
+        document_limit=document_limit,
+        recency=recency,
+        doc_types=doc_types
+    )
+    return mmr_rerank(candidates, limit=limit, diversity=diversity)
+
 
+async def async_mmr_search(
+    query_text: str,
+    service: Optional[str] = None,
+    component: Optional[str] = None,
+    limit: int = 5,
+    diversity: float = 0.5,
+    vector_weight: float = 0.7,
+    fulltext_weight: float = 0.3,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    candidate_multiplier: int = 3,
+    document_limit: Optional[int] = None,
+    recency: Optional[Dict] = None,
+    doc_types: Optional[List[str]] = None
+) -> List[Dict]:
+    """Async variant of mmr_search() built on async_hybrid_search()."""
+    candidates = await async_hybrid_search(
+        query_text,
+        service,
+        component,
+        limit=limit * candidate_multiplier,
+        vector_weight=vector_weight,
+        fulltext_weight=fulltext_weight,
+        ef_search=ef_search,
+        probes=probes,
+        include_embeddings=True,
+        document_limit=document_limit,
+        recency=recency,
+        doc_types=doc_types
+    )
+    return mmr_rerank(candidates, limit=limit, diversity=diversity)
@@ -0,0 +1,228 @@
+"""Neighbor-chunk expansion for retrieved chunks.
+
+Runbook steps often span chunk boundaries, so a single top hit can hand the LLM half a
+procedure. expand_neighbor_chunks() fetches the chunks around each hit
+(chunk_index +/- window, same document_id) in one indexed query and merges them into
+one deduplicated window per hit, bounded by a token budget.
+"""
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from db.connection import get_db_connection, get_async_db_connection_context
+
+# Import logging (use ai_service logger if available, fallback to standard logging)
+try:
+    from ai_service.core import get_logger
+except ImportError:
+    import logging
+
+    def get_logger(name):
+        return logging.getLogger(name)
+
+logger = get_logger(__name__)
+
+# Served by chunks_document_chunk_idx (document_id, chunk_index)
+NEIGHBOR_QUERY = """
+    SELECT c.id, c.document_id, c.chunk_index, c.content, c.token_count
+    FROM unnest(%(document_ids)s::uuid[], %(low)s::int[], %(high)s::int[]) AS w(document_id, low, high)
+    JOIN chunks c
+      ON c.document_id = w.document_id
+     AND c.chunk_index BETWEEN w.low AND w.high
+    ORDER BY c.document_id, c.chunk_index
+"""
+
+# Longest chunker overlap we try to remove when joining neighbors (30 tokens by default)
+MAX_OVERLAP_CHARS = 1500
+
+
+def _default_token_counter(text: str) -> int:
+    from ingestion.embeddings import count_tokens
+    return count_tokens(text)
+
+
+def _stored_or_counted(stored, text: str, count: Callable[[str], int]) -> int:
+    """Stored chunks.token_count when available (no re-tokenization), else count the text."""
+    if isinstance(stored, int) and stored >= 0:
+        return stored
+    return count(text)
+
+
+def _split_header(content: str) -> Tuple[str, str]:
+    """Split the add_chunk_header() header ("Type: ... | ...\\n\\n") from the chunk body."""
+    if content.startswith("Type: ") and "\n\n" in content:
+        header, body = content.split("\n\n", 1)
+        return header, body
+    return "", content
+
+
+def _strip_overlap(previous: str, following: str) -> str:
+    """Drop the prefix of `following` that repeats the end of `previous` (chunker overlap)."""
+    limit = min(len(previous), len(following), MAX_OVERLAP_CHARS)
+    for size in range(limit, 19, -1):
+        if previous.endswith(following[:size]):
+            return following[size:].lstrip()
+    return following
+
+
+def _build_neighbor_params(chunks: List[Dict], window: int) -> Optional[Dict]:
+    """One (document_id, low, high) range per hit; None when no hit has a position."""
+    document_ids, low, high = [], [], []
+    for chunk in chunks:
+        if chunk.get("document_id") is None or chunk.get("chunk_index") is None:
+            continue
+        document_ids.append(str(chunk["document_id"]))
+        low.append(max(0, int(chunk["chunk_index"]) - window))
+        high.append(int(chunk["chunk_index"]) + window)
+    if not document_ids:
+        return None
+    return {"document_ids": document_ids, "low": low, "high": high}
+
+
+def merge_neighbor_windows(
+    chunks: List[Dict],
+    neighbor_rows: List[Dict],
+    window: int,
+    max_window_tokens: int,
+    token_counter: Optional[Callable[[str], int]] = None
+) -> List[Dict]:
+    """
+    Merge each hit with its fetched neighbors.
+
+    Hits are processed in rank order. Each window grows outward from the hit (nearest
+    neighbors first, alternating before/after) while the bodies fit in max_window_tokens.
+    A chunk is used by at most one window, so a hit already covered by a higher-ranked
+    window is dropped and overlapping windows are not repeated.
+
+    Args:
+        chunks: Retrieved hits (rank order)
+        neighbor_rows: Rows from NEIGHBOR_QUERY (id, document_id, chunk_index, content, token_count)
+        window: Neighbors to consider on each side of a hit
+        max_window_tokens: Token budget per merged window
+        token_counter: Token counting function for chunks without a stored token_count
+            (defaults to the embedding model tokenizer)
+
+    Returns:
+        Chunks whose content is the merged window, with "chunk_indices" and
+        "neighbor_chunk_ids" describing what was merged. token_count is the sum of the
+        merged chunks' counts (an upper bound: repeated headers and overlap are removed)
+    """
+    count = token_counter or _default_token_counter
+    by_position = {
+        (str(row["document_id"]), int(row["chunk_index"])): row
+        for row in neighbor_rows
+    }
+    used = set()
+    expanded = []
+
+    for chunk in chunks:
+        document_id = chunk.get("document_id")
+        chunk_index = chunk.get("chunk_index")
+        if document_id is None or chunk_index is None:
+            # Not a stored chunk (e.g. InfluxDB log entries); pass through untouched
+            expanded.append(chunk)
+            continue
+        document_id = str(document_id)
+        position = (document_id, int(chunk_index))
+        if position in used:
+            continue
+
+        header, hit_body = _split_header(chunk.get("content") or "")
+        selected = {position[1]: hit_body}
+        used.add(position)
+        total_tokens = _stored_or_counted(chunk.get("token_count"), hit_body, count)
+
+        blocked = {-1: False, 1: False}
+        for distance in range(1, window + 1):
+            for direction in (-1, 1):
+                if blocked[direction]:
+                    continue
+                neighbor_pos = (document_id, position[1] + direction * distance)
+                row = by_position.get(neighbor_pos)
+                if row is None or neighbor_pos in used:
+                    # Keep windows contiguous: stop growing on this side
+                    blocked[direction] = True
+                    continue
+                _, body = _split_header(row["content"] or "")
+                body_tokens = _stored_or_counted(row.get("token_count"), body, count)
+                if total_tokens + body_tokens > max_window_tokens:
+                    blocked[direction] = True
+                    continue
+                selected[neighbor_pos[1]] = body
+                used.add(neighbor_pos)
+                total_tokens += body_tokens
+
+        indices = sorted(selected)
+        merged_body = selected[indices[0]]
+        for idx in indices[1:]:
+            merged_body = f"{merged_body}\n{_strip_overlap(merged_body, selected[idx])}"
+
+        merged = dict(chunk)
+        merged["content"] = f"{header}\n\n{merged_body}" if header else merged_body
+        merged["token_count"] = total_tokens
+        merged["content_sha256"] = None  # content changed; no longer matches the stored hash
+        merged["chunk_indices"] = indices
+        merged["neighbor_chunk_ids"] = [
+            str(by_position[(document_id, idx)]["id"]) for idx in indices if idx != position[1]
+        ]
+        expanded.append(merged)
+
+    return expanded
+
+
+def expand_neighbor_chunks(
+    chunks: List[Dict],
+    window: int = 1,
+    max_window_tokens: int = 800,
+    token_counter: Optional[Callable[[str], int]] = None
+) -> List[Dict]:
+    """
+    Expand each retrieved chunk with its neighbors (one query for all hits).
+
+    Args:
+        chunks: Retrieved hits from hybrid_search / mmr_search / rerank
+        window: Neighbors to fetch on each side of a hit (chunk_index +/- window)
+        max_window_tokens: Token budget per merged window
+        token_counter: Token counting function (defaults to the embedding model tokenizer)
+
+    Returns:
+        Merged windows in hit rank order (see merge_neighbor_windows)
+    """
+    params = _build_neighbor_params(chunks, window) if window > 0 else None
+    if params is None:
+        return chunks
+
+    start_time = time.time()
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(NEIGHBOR_QUERY, params)
+        rows = cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+
+    expanded = merge_neighbor_windows(chunks, rows, window, max_window_tokens, token_counter)
+    logger.debug(
+        f"Neighbor expansion: {len(chunks)} hits -> {len(expanded)} windows "
+        f"from {len(rows)} chunks in {time.time() - start_time:.3f}s"
+    )
+    return expanded
+
+
+async def async_expand_neighbor_chunks(
+    chunks: List[Dict],
+    window: int = 1,
+    max_window_tokens: int = 800,
+    token_counter: Optional[Callable[[str], int]] = None
+) -> List[Dict]:
+    """Async variant of expand_neighbor_chunks() on the async connection pool."""
+    params = _build_neighbor_params(chunks, window) if window > 0 else None
+    if params is None:
+        return chunks
+
+    async with get_async_db_connection_context() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(NEIGHBOR_QUERY, params)
+            rows = await cur.fetchall()
+
+    return merge_neighbor_windows(chunks, rows, window, max_window_tokens, token_counter)
@@ -0,0 +1,227 @@
+"""Second-stage reranking of fused hybrid_search candidates.
+
+hybrid_search ranks by RRF over vector and full-text ranks, which says little about how
+well a chunk actually answers the alert. A reranker rescores a wider candidate pool
+against the query so the agents can pass fewer, better chunks to the LLM.
+
+Rerankers:
+- "bm25f": lexical BM25F over the chunk title and content, scored for the whole
+  candidate set in one NumPy pass (no extra dependencies, sub-millisecond).
+- "cross_encoder": a local CPU cross-encoder (sentence-transformers, optional
+  dependency); falls back to bm25f when the package or model is unavailable.
+
+Configured per agent under "rerank" in config/retrieval.json.
+"""
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Import logging (use ai_service logger if available, fallback to standard logging)
+try:
+    from ai_service.core import get_logger
+except ImportError:
+    import logging
+
+    def get_logger(name):
+        return logging.getLogger(name)
+
+logger = get_logger(__name__)
+
+DEFAULT_FIELD_WEIGHTS = {"title": 2.0, "content": 1.0}
+DEFAULT_CROSS_ENCODER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "been", "by", "for", "from", "has", "have",
+    "in", "is", "it", "of", "on", "or", "the", "to", "was", "were", "with",
+}
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase alphanumeric tokens without stopwords."""
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in _STOPWORDS]
+
+
+def _chunk_fields(chunk: Dict) -> Dict[str, str]:
+    return {
+        "title": chunk.get("doc_title") or "",
+        "content": chunk.get("content") or "",
+    }
+
+
+class BM25FReranker:
+    """
+    BM25F over the candidate set.
+
+    Term frequencies are length-normalized per field, weighted and summed before
+    saturation (BM25F); IDF is taken over the candidates, which is what matters
+    for ordering them.
+    """
+
+    name = "bm25f"
+
+    def __init__(self, field_weights: Optional[Dict[str, float]] = None, k1: float = 1.2, b: float = 0.75):
+        self.field_weights = field_weights or DEFAULT_FIELD_WEIGHTS
+        self.k1 = k1
+        self.b = b
+
+    def score(self, query_text: str, chunks: List[Dict], deadline: Optional[float] = None) -> List[Optional[float]]:
+        """Score all chunks in one pass (cheap enough to ignore the deadline)."""
+        terms = sorted(set(tokenize(query_text)))
+        n = len(chunks)
+        if not terms or n == 0:
+            return [0.0] * n
+
+        term_index = {t: j for j, t in enumerate(terms)}
+        weighted_tf = np.zeros((n, len(terms)), dtype=np.float64)
+        present = np.zeros((n, len(terms)), dtype=bool)
+        fields = [_chunk_fields(chunk) for chunk in chunks]
+
+        for field, weight in self.field_weights.items():
+            token_lists = [tokenize(f.get(field)) for f in fields]
+            lengths = np.array([len(tokens) for tokens in token_lists], dtype=np.float64)
+            avg_length = lengths.mean() or 1.0
+            length_norm = 1.0 - self.b + self.b * lengths / avg_length
+
+            tf = np.zeros((n, len(terms)), dtype=np.float64)
+            for i, tokens in enumerate(token_lists):
+                for token, count in Counter(tokens).items():
+                    j = term_index.get(token)
+                    if j is not None:
+                        tf[i, j] = count
+            weighted_tf += weight * tf / length_norm[:, None]
+            present |= tf > 0
+
+        doc_freq = present.sum(axis=0)
+        idf = np.log(1.0 + (n - doc_freq + 0.5) / (doc_freq + 0.5))
+        scores = (idf * weighted_tf / (self.k1 + weighted_tf)).sum(axis=1)
+        return scores.tolist()
+
+
+class CrossEncoderReranker:
+    """Local CPU cross-encoder scoring (query, chunk) pairs in batches."""
+
+    name = "cross_encoder"
+
+    def __init__(self, model_name: str = DEFAULT_CROSS_ENCODER_MODEL, batch_size: int = 16, max_length: int = 512):
+        # Optional dependency: raises ImportError when sentence-transformers is not installed
+        from sentence_transformers import CrossEncoder
+        self.model = CrossEncoder(model_name, device="cpu", max_length=max_length)
+        self.batch_size = batch_size
+
+    def score(self, query_text: str, chunks: List[Dict], deadline: Optional[float] = None) -> List[Optional[float]]:
+        """
+        Score chunks batch by batch in their incoming (RRF) order.
+
+        Batches not started before the deadline are left unscored (None).
+        """
+        scores: List[Optional[float]] = [None] * len(chunks)
+        for start in range(0, len(chunks), self.batch_size):
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            batch = chunks[start:start + self.batch_size]
+            pairs = [
+                (query_text, f"{chunk.get('doc_title') or ''}\n{chunk.get('content') or ''}")
+                for chunk in batch
+            ]
+            batch_scores = self.model.predict(pairs, batch_size=self.batch_size)
+            for offset, value in enumerate(batch_scores):
+                scores[start + offset] = float(value)
+        return scores
+
+
+# Rerankers are created once per configuration (cross-encoder models are expensive to load)
+_rerankers: Dict[tuple, object] = {}
+
+
+def get_reranker(rerank_cfg: Dict):
+    """Get or create the reranker described by an agent's "rerank" config section."""
+    reranker_type = rerank_cfg.get("type", "bm25f")
+    field_weights = rerank_cfg.get("field_weights") or DEFAULT_FIELD_WEIGHTS
+    model_name = rerank_cfg.get("model", DEFAULT_CROSS_ENCODER_MODEL)
+    key = (reranker_type, model_name, tuple(sorted(field_weights.items())))
+
+    reranker = _rerankers.get(key)
+    if reranker is None:
+        if reranker_type == "cross_encoder":
+            try:
+                reranker = CrossEncoderReranker(model_name, batch_size=rerank_cfg.get("batch_size", 16))
+                logger.info(f"Loaded cross-encoder reranker: {model_name}")
+            except Exception as e:
+                logger.warning(f"Cross-encoder reranker unavailable ({e}); falling back to bm25f")
+                reranker = BM25FReranker(field_weights)
+        else:
+            if reranker_type != "bm25f":
+                logger.warning(f"Unknown reranker type '{reranker_type}'; using bm25f")
+            reranker = BM25FReranker(field_weights)
+        _rerankers[key] = reranker
+    return reranker
+
+
+def rerank_chunks(query_text: str, chunks: List[Dict], rerank_cfg: Dict, top_n: int) -> List[Dict]:
+    """
+    Rerank fused candidates and keep the best top_n.
+
+    The final order uses fusion_weight * normalized reranker score +
+    (1 - fusion_weight) * normalized RRF score, so RRF still breaks ties and covers
+    chunks with no lexical overlap. Chunks the reranker did not reach within
+    budget_ms keep their RRF order after the scored ones.
+
+    Args:
+        query_text: Retrieval query
+        chunks: Candidates in RRF order (from hybrid_search / mmr_search)
+        rerank_cfg: The agent's "rerank" config section
+        top_n: Number of chunks to return
+
+    Returns:
+        Up to top_n chunks, each with a "rerank_score"
+    """
+    if not chunks:
+        return []
+
+    budget_ms = rerank_cfg.get("budget_ms")
+    fusion_weight = float(rerank_cfg.get("fusion_weight", 0.7))
+    start = time.perf_counter()
+    deadline = start + budget_ms / 1000.0 if budget_ms else None
+
+    reranker = get_reranker(rerank_cfg)
+    try:
+        scores = reranker.score(query_text, chunks, deadline=deadline)
+    except Exception as e:
+        logger.warning(f"Reranking failed ({reranker.name}): {e}; keeping RRF order")
+        return chunks[:top_n]
+
+    scored_idx = [i for i, s in enumerate(scores) if s is not None]
+    if not scored_idx:
+        logger.warning(f"Reranker {reranker.name} scored no candidates within {budget_ms}ms; keeping RRF order")
+        return chunks[:top_n]
+
+    values = np.array([scores[i] for i in scored_idx], dtype=np.float64)
+    spread = values.max() - values.min()
+    # Identical scores carry no information; let RRF decide
+    rel = (values - values.min()) / spread if spread > 0 else np.zeros_like(values)
+    rrf = np.array([chunks[i].get("rrf_score") or 0.0 for i in scored_idx], dtype=np.float64)
+    rrf_rel = rrf / rrf.max() if rrf.max() > 0 else rrf
+    combined = fusion_weight * rel + (1.0 - fusion_weight) * rrf_rel
+
+    reranked = []
+    for pos in np.argsort(-combined, kind="stable"):
+        chunk = dict(chunks[scored_idx[pos]])
+        chunk["rerank_score"] = float(combined[pos])
+        reranked.append(chunk)
+    scored_set = set(scored_idx)
+    for i, chunk in enumerate(chunks):
+        if i not in scored_set:
+            reranked.append(dict(chunk, rerank_score=0.0))
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if budget_ms and elapsed_ms > budget_ms:
+        logger.warning(f"Reranking took {elapsed_ms:.1f}ms (budget {budget_ms}ms, reranker={reranker.name})")
+    logger.debug(
+        f"RERANK: reranker={reranker.name}, candidates={len(chunks)}, scored={len(scored_idx)}, "
+        f"kept={min(top_n, len(reranked))}, elapsed={elapsed_ms:.1f}ms"
+    )
+    return reranked[:top_n]
@@ -0,0 +1,184 @@
+"""Result cache for hybrid_search.
+
+Repeated alerts produce the same retrieval request within minutes. This cache
+returns the previous result set without re-embedding the query or re-running
+the search SQL.
+
+Keys are (normalized query, service, component, limit, weights, ANN settings,
+corpus_version). `corpus_version` is bumped in the same transaction as every
+documents/chunks write (ingestion.db_ops.bump_corpus_version), so a cached entry
+can never outlive the corpus it was computed from.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from ingestion.embeddings import clean_text_for_embedding
+from ingestion.db_ops import normalize_filter_value
+
+# Import logging/config (use ai_service modules if available, fallback to defaults)
+try:
+    from ai_service.core import get_logger, get_retrieval_config
+except ImportError:
+    import logging
+
+    def get_logger(name):
+        return logging.getLogger(name)
+
+    def get_retrieval_config():
+        return {}
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL_SECONDS = 300
+
+
+def _copy_chunk(chunk: Dict) -> Dict:
+    """Copy a chunk dict, including its nested metadata (embedding lists are read-only and shared)."""
+    copied = dict(chunk)
+    if copied.get("metadata") is not None:
+        copied["metadata"] = copy.deepcopy(copied["metadata"])
+    return copied
+
+
+def search_cache_key(
+    query_text: str,
+    service: Optional[str],
+    component: Optional[str],
+    limit: int,
+    vector_weight: float,
+    fulltext_weight: float,
+    corpus_version: int,
+    **options
+) -> Tuple[Hashable, ...]:
+    """
+    Build the cache key for a hybrid_search call.
+
+    Service/component use the same normalization as the chunk filter columns, so
+    "Database " and "database" share an entry. Extra keyword options (ef_search,
+    probes, include_embeddings, ...) are part of the key.
+    """
+    return (
+        clean_text_for_embedding(query_text),
+        normalize_filter_value(service),
+        normalize_filter_value(component),
+        int(limit),
+        round(float(vector_weight), 6),
+        round(float(fulltext_weight), 6),
+        tuple(sorted(options.items())),
+        int(corpus_version),
+    )
+
+
+class SearchResultCache:
+    """Bounded, TTL-evicting LRU cache of hybrid_search results with hit/miss counters."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of result sets kept in memory
+            ttl_seconds: Time-to-live for entries (safety net; corpus_version handles invalidation)
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+
+        # Map of key -> (stored_at, chunks), oldest first
+        self._entries: "OrderedDict[Tuple[Hashable, ...], Tuple[float, List[Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Newest corpus version seen; entries for older versions are dropped lazily
+        self._corpus_version: Optional[int] = None
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[List[Dict]]:
+        """
+        Return a copy of the cached chunks for key, or None on a miss.
+
+        Callers mutate chunk dicts (e.g. apply_retrieval_preferences boosts rrf_score)
+        and their metadata, so each hit returns fresh per-chunk dicts with their own
+        metadata.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._invalidate_older_versions(key[-1])
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            stored_at, chunks = entry
+            if now - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+        return [_copy_chunk(chunk) for chunk in chunks]
+
+    def put(self, key: Tuple[Hashable, ...], chunks: List[Dict]) -> None:
+        """Store a copy of chunks under key, evicting least recently used entries."""
+        with self._lock:
+            self._invalidate_older_versions(key[-1])
+            if self._corpus_version is not None and key[-1] < self._corpus_version:
+                # Computed against a corpus that has already changed
+                return
+            self._entries[key] = (time.monotonic(), [_copy_chunk(chunk) for chunk in chunks])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _invalidate_older_versions(self, corpus_version: int) -> None:
+        """Drop every entry computed against an older corpus (caller holds the lock)."""
+        if self._corpus_version is not None and corpus_version <= self._corpus_version:
+            return
+        if self._entries:
+            self._stats["invalidations"] += len(self._entries)
+            self._entries.clear()
+        self._corpus_version = corpus_version
+
+    def get_stats(self) -> Dict:
+        """Return hit/miss counters, current size and corpus version."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+            stats["corpus_version"] = self._corpus_version
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        """Drop all entries and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self._corpus_version = None
+            for name in self._stats:
+                self._stats[name] = 0
+
+
+# Global cache instance
+_search_result_cache: Optional[SearchResultCache] = None
+
+
+def get_search_result_cache() -> Optional[SearchResultCache]:
+    """Get or create the hybrid_search result cache (None if disabled in config)."""
+    global _search_result_cache
+    if _search_result_cache is None:
+        cache_cfg = (get_retrieval_config() or {}).get("result_cache", {})
+        if not cache_cfg.get("enabled", True):
+            return None
+        _search_result_cache = SearchResultCache(
+            max_entries=cache_cfg.get("max_entries", DEFAULT_MAX_ENTRIES),
+            ttl_seconds=cache_cfg.get("ttl_seconds", DEFAULT_TTL_SECONDS),
+        )
+    return _search_result_cache
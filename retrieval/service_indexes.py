@@ -0,0 +1,213 @@
+"""Routing of service-filtered searches to partial vector indexes.
+
+A service filter on a global ANN index is applied after the index scan: HNSW/IVFFlat
+return the nearest chunks of every service and the WHERE clause throws most of them
+away, so a busy service's filtered search can return fewer (and worse) candidates than
+its LIMIT. scripts/db/manage_service_indexes.py creates a partial index per busy
+service, with the exact predicate hybrid_search filters on:
+
+    CREATE INDEX ... ON chunks USING hnsw (embedding vector_cosine_ops)
+    WHERE service_norm LIKE '%database%'
+
+The planner only uses a partial index when it can prove the query's WHERE clause
+implies the index predicate, which it cannot do for a bind parameter in a generic
+prepared plan. For a routed service, hybrid_search therefore writes the pattern into
+the statement as a literal (one cached statement per indexed service).
+
+ServiceIndexRouter keeps the set of indexed patterns (service_vector_indexes, re-read
+every refresh_seconds) and counts filtered searches per pattern, flushed to
+service_filter_stats every stats_flush_seconds; the admin script picks the top
+services from those counts.
+"""
+import re
+import threading
+import time
+from typing import Dict, FrozenSet, Optional
+
+# Import logging/config (use ai_service modules if available, fallback to defaults)
+try:
+    from ai_service.core import get_logger, get_retrieval_config
+except ImportError:
+    import logging
+
+    def get_logger(name):
+        return logging.getLogger(name)
+
+    def get_retrieval_config():
+        return {}
+
+logger = get_logger(__name__)
+
+DEFAULT_REFRESH_SECONDS = 300
+DEFAULT_STATS_FLUSH_SECONDS = 60
+
+# Patterns written into SQL text (statement and index predicate) must be plain service
+# names: '%<name>%' with no quotes, backslashes or extra wildcards ('_' is LIKE's
+# single-character wildcard, so names containing it stay on the bind-parameter path)
+_ROUTABLE_PATTERN_RE = re.compile(r"^%[a-z0-9][a-z0-9 .:/-]*%$")
+
+REGISTRY_QUERY = "SELECT service_pattern FROM service_vector_indexes"
+
+FLUSH_STATS_SQL = """
+    INSERT INTO service_filter_stats (service_pattern, query_count, last_queried_at)
+    SELECT s.service_pattern, s.query_count, now()
+    FROM unnest(%(patterns)s::text[], %(counts)s::bigint[]) AS s(service_pattern, query_count)
+    ON CONFLICT (service_pattern) DO UPDATE
+    SET query_count = service_filter_stats.query_count + EXCLUDED.query_count,
+        last_queried_at = EXCLUDED.last_queried_at
+"""
+
+
+def is_routable_pattern(service_pattern: Optional[str]) -> bool:
+    """Whether a service LIKE pattern can be inlined as a literal (and indexed)."""
+    return bool(service_pattern) and bool(_ROUTABLE_PATTERN_RE.match(service_pattern))
+
+
+def service_predicate_sql(service_pattern: str, column: str = "service_norm") -> str:
+    """
+    The literal predicate shared by the partial index and the routed statement.
+
+    Returned with '%' doubled for use in a psycopg statement with bind parameters;
+    the admin script un-doubles it for DDL.
+    """
+    if not is_routable_pattern(service_pattern):
+        raise ValueError(f"Service pattern cannot be inlined: {service_pattern!r}")
+    return f"{column} LIKE '{service_pattern.replace('%', '%%')}'"
+
+
+class ServiceIndexRouter:
+    """Indexed service patterns (periodically refreshed) and per-pattern search counters."""
+
+    def __init__(
+        self,
+        refresh_seconds: float = DEFAULT_REFRESH_SECONDS,
+        stats_flush_seconds: float = DEFAULT_STATS_FLUSH_SECONDS
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            refresh_seconds: How often the indexed patterns are re-read from the database
+            stats_flush_seconds: How often search counters are written to service_filter_stats
+        """
+        self.refresh_seconds = float(refresh_seconds)
+        self.stats_flush_seconds = float(stats_flush_seconds)
+        self._lock = threading.Lock()
+        self._indexed: FrozenSet[str] = frozenset()
+        self._loaded_at: Optional[float] = None
+        self._counts: Dict[str, int] = {}
+        self._flushed_at = time.monotonic()
+
+    def route(self, service_pattern: Optional[str]) -> Optional[str]:
+        """The pattern to inline in the statement when it has a partial index, else None."""
+        if service_pattern and service_pattern in self._indexed and is_routable_pattern(service_pattern):
+            return service_pattern
+        return None
+
+    def record(self, service_pattern: Optional[str]) -> None:
+        """Count one filtered search for service_pattern."""
+        if not service_pattern:
+            return
+        with self._lock:
+            self._counts[service_pattern] = self._counts.get(service_pattern, 0) + 1
+
+    def refresh_due(self) -> bool:
+        """Whether the indexed pattern set is missing or older than refresh_seconds."""
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_seconds
+
+    def set_indexed(self, patterns) -> None:
+        """Replace the indexed pattern set (rows read with REGISTRY_QUERY)."""
+        with self._lock:
+            self._indexed = frozenset(p for p in patterns if p)
+            self._loaded_at = time.monotonic()
+
+    def take_pending_stats(self) -> Optional[Dict]:
+        """
+        FLUSH_STATS_SQL parameters when a flush is due (counters are reset), else None.
+
+        Counts taken by a flush that then fails are dropped; they only steer which
+        services get an index.
+        """
+        with self._lock:
+            if not self._counts or time.monotonic() - self._flushed_at < self.stats_flush_seconds:
+                return None
+            patterns = sorted(self._counts)
+            counts = [self._counts[p] for p in patterns]
+            self._counts = {}
+            self._flushed_at = time.monotonic()
+        return {"patterns": patterns, "counts": counts}
+
+    def refresh(self, cur) -> None:
+        """Re-read the indexed patterns on a sync cursor when due (best effort)."""
+        if not self.refresh_due():
+            return
+        try:
+            cur.execute(REGISTRY_QUERY)
+            self.set_indexed(row["service_pattern"] for row in cur.fetchall())
+        except Exception as e:
+            # Table missing before migration 012: route nothing until the next refresh
+            logger.warning(f"Service index registry unavailable: {e}")
+            cur.connection.rollback()
+            self.set_indexed(())
+
+    async def refresh_async(self, cur) -> None:
+        """Async counterpart of refresh()."""
+        if not self.refresh_due():
+            return
+        try:
+            await cur.execute(REGISTRY_QUERY)
+            self.set_indexed(row["service_pattern"] for row in await cur.fetchall())
+        except Exception as e:
+            logger.warning(f"Service index registry unavailable: {e}")
+            await cur.connection.rollback()
+            self.set_indexed(())
+
+    def flush(self, cur) -> None:
+        """Write pending search counters on a sync cursor when due, and commit (best effort)."""
+        params = self.take_pending_stats()
+        if params is None:
+            return
+        try:
+            cur.execute(FLUSH_STATS_SQL, params)
+            cur.connection.commit()
+        except Exception as e:
+            logger.warning(f"Service filter stats flush failed: {e}")
+            cur.connection.rollback()
+
+    async def flush_async(self, cur) -> None:
+        """Async counterpart of flush()."""
+        params = self.take_pending_stats()
+        if params is None:
+            return
+        try:
+            await cur.execute(FLUSH_STATS_SQL, params)
+            await cur.connection.commit()
+        except Exception as e:
+            logger.warning(f"Service filter stats flush failed: {e}")
+            await cur.connection.rollback()
+
+    def get_stats(self) -> Dict:
+        """Return the indexed patterns and not-yet-flushed counters."""
+        with self._lock:
+            return {
+                "indexed_patterns": sorted(self._indexed),
+                "pending_counts": dict(self._counts),
+            }
+
+
+# Global router instance
+_service_index_router: Optional[ServiceIndexRouter] = None
+
+
+def get_service_index_router() -> Optional[ServiceIndexRouter]:
+    """Get or create the service index router (None if disabled in config)."""
+    global _service_index_router
+    if _service_index_router is None:
+        router_cfg = (get_retrieval_config() or {}).get("service_indexes", {})
+        if not router_cfg.get("enabled", True):
+            return None
+        _service_index_router = ServiceIndexRouter(
+            refresh_seconds=router_cfg.get("refresh_seconds", DEFAULT_REFRESH_SECONDS),
+            stats_flush_seconds=router_cfg.get("stats_flush_seconds", DEFAULT_STATS_FLUSH_SECONDS),
+        )
+    return _service_index_router
@@ -36,6 +36,9 @@ def build_statements(targets: List[str]) -> List[str]:
         ordered.append("TRUNCATE TABLE chunks RESTART IDENTITY CASCADE;")
     if "documents" in targets:
         ordered.append("TRUNCATE TABLE documents RESTART IDENTITY CASCADE;")
+    if "chunks" in targets or "documents" in targets:
+        # Invalidate cached retrieval results (see retrieval/result_cache.py)
+        ordered.append("UPDATE corpus_version SET version = version + 1, updated_at = now() WHERE id;")
     if "feedback" in targets:
         ordered.append("TRUNCATE TABLE feedback RESTART IDENTITY CASCADE;")
     if "incidents" in targets:
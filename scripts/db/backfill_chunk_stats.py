@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Backfill chunks.token_count (and content_sha256) for chunks ingested before migration 009.
+
+New chunks get both columns from insert_document_and_chunks; this fills rows where
+token_count is NULL, in batches, so retrieval can return stored counts for the
+whole corpus.
+
+Usage examples:
+  python scripts/db/backfill_chunk_stats.py
+  python scripts/db/backfill_chunk_stats.py --batch-size 1000 --dry-run
+"""
+import sys
+import os
+import argparse
+
+# Add project root to path (go up 3 levels: scripts/db -> scripts -> project root)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from db.connection import get_db_connection  # noqa: E402
+from ingestion.embeddings import count_tokens  # noqa: E402
+from ingestion.db_ops import content_sha256, bump_corpus_version  # noqa: E402
+
+
+def backfill(batch_size: int, dry_run: bool) -> int:
+    """Fill token_count/content_sha256 for chunks missing a token count. Returns rows updated."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    updated = 0
+    last_id = None
+    try:
+        while True:
+            # Keyset pagination so dry runs (which update nothing) still advance
+            cur.execute(
+                """
+                SELECT id, content
+                FROM chunks
+                WHERE token_count IS NULL AND (%(last_id)s::uuid IS NULL OR id > %(last_id)s::uuid)
+                ORDER BY id
+                LIMIT %(batch_size)s
+                """,
+                {"last_id": last_id, "batch_size": batch_size}
+            )
+            rows = cur.fetchall()
+            if not rows:
+                break
+            params = [
+                (count_tokens(row["content"] or ""), content_sha256(row["content"] or ""), row["id"])
+                for row in rows
+            ]
+            if not dry_run:
+                cur.executemany(
+                    "UPDATE chunks SET token_count = %s, content_sha256 = %s WHERE id = %s",
+                    params
+                )
+                conn.commit()
+            updated += len(rows)
+            last_id = rows[-1]["id"]
+            print(f"  {'Would update' if dry_run else 'Updated'} {updated} chunk(s)...")
+        if updated and not dry_run:
+            # Cached retrieval results were built without the new columns
+            bump_corpus_version(cur)
+            conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill chunks.token_count and content_sha256")
+    parser.add_argument("--batch-size", type=int, default=500, help="Chunks per batch (default: 500)")
+    parser.add_argument("--dry-run", action="store_true", help="Count rows without updating them")
+    args = parser.parse_args()
+
+    updated = backfill(args.batch_size, args.dry_run)
+    print(f"\n Done: {updated} chunk(s) {'to backfill' if args.dry_run else 'backfilled'}")
+
+
+if __name__ == "__main__":
+    main()
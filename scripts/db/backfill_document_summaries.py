@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Backfill documents.summary and summary_embedding for documents ingested before migration 010.
+
+New documents get both columns from insert_document_and_chunks; two-stage retrieval
+(`two_stage` in config/retrieval.json) only sees documents that have a summary
+embedding, so run this before enabling it on an existing corpus.
+
+Usage examples:
+  python scripts/db/backfill_document_summaries.py
+  python scripts/db/backfill_document_summaries.py --batch-size 50 --dry-run
+"""
+import sys
+import os
+import argparse
+
+# Add project root to path (go up 3 levels: scripts/db -> scripts -> project root)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from db.connection import get_db_connection  # noqa: E402
+from ingestion.chunker import build_document_summary  # noqa: E402
+from ingestion.embeddings import embed_texts_batch  # noqa: E402
+from ingestion.db_ops import bump_corpus_version  # noqa: E402
+
+
+def backfill(batch_size: int, dry_run: bool) -> int:
+    """Summarize and embed documents missing a summary embedding. Returns documents updated."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    updated = 0
+    last_id = None
+    try:
+        while True:
+            # Keyset pagination so dry runs (which update nothing) still advance
+            cur.execute(
+                """
+                SELECT id, doc_type, title, content
+                FROM documents
+                WHERE summary_embedding IS NULL AND (%(last_id)s::uuid IS NULL OR id > %(last_id)s::uuid)
+                ORDER BY id
+                LIMIT %(batch_size)s
+                """,
+                {"last_id": last_id, "batch_size": batch_size}
+            )
+            rows = cur.fetchall()
+            if not rows:
+                break
+            summaries = [build_document_summary(row["doc_type"], row["title"], row["content"]) for row in rows]
+            if not dry_run:
+                # One embeddings call per batch
+                embeddings = embed_texts_batch(summaries, batch_size=len(summaries))
+                cur.executemany(
+                    "UPDATE documents SET summary = %s, summary_embedding = %s::vector WHERE id = %s",
+                    [
+                        (summary, '[' + ','.join(map(str, embedding)) + ']', row["id"])
+                        for row, summary, embedding in zip(rows, summaries, embeddings)
+                    ]
+                )
+                conn.commit()
+            updated += len(rows)
+            last_id = rows[-1]["id"]
+            print(f"  {'Would update' if dry_run else 'Updated'} {updated} document(s)...")
+        if updated and not dry_run:
+            # Two-stage results depend on the new embeddings
+            bump_corpus_version(cur)
+            conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill documents.summary and summary_embedding")
+    parser.add_argument("--batch-size", type=int, default=100, help="Documents per batch (default: 100)")
+    parser.add_argument("--dry-run", action="store_true", help="Count documents without embedding them")
+    args = parser.parse_args()
+
+    updated = backfill(args.batch_size, args.dry_run)
+    print(f"\n Done: {updated} document(s) {'to backfill' if args.dry_run else 'backfilled'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Create/drop partial vector indexes for the most frequently filtered services.
+
+Service-filtered vector searches lose recall on the global embedding index (the ANN
+scan returns nearest chunks of all services, the filter then discards most of them).
+This script reads the filtered-search counts hybrid_search flushes to
+service_filter_stats, keeps one partial index per top service:
+
+    CREATE INDEX CONCURRENTLY ... ON chunks USING hnsw (embedding vector_cosine_ops)
+    WHERE service_norm LIKE '%<service>%'
+
+and records it in service_vector_indexes, from which hybrid_search routes matching
+filters (retrieval.service_indexes). Services that fell out of the top K (or were not
+searched within --max-idle-days) lose their index. Run it periodically (e.g. nightly).
+
+On a partitioned chunks table (scripts/db/partition_chunks.py) each index is created
+ON ONLY chunks and built concurrently per partition, as in rebuild_vector_index.py.
+
+Usage examples:
+  python scripts/db/manage_service_indexes.py --dry-run
+  python scripts/db/manage_service_indexes.py --top-k 5 --min-queries 500
+"""
+import sys
+import os
+import re
+import hashlib
+import argparse
+from typing import Dict, List, Optional
+
+# Add project root to path (go up 3 levels: scripts/db -> scripts -> project root)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from db.connection import get_db_connection  # noqa: E402
+from retrieval.service_indexes import is_routable_pattern, service_predicate_sql  # noqa: E402
+from rebuild_vector_index import _index_method, auto_ivfflat_lists, list_partitions  # noqa: E402
+
+try:
+    from ai_service.core import get_retrieval_config
+except ImportError:
+    def get_retrieval_config():
+        return {}
+
+
+INDEX_PREFIX = "chunks_embedding_svc_"
+
+
+def index_name_for(service_pattern: str) -> str:
+    """Stable index name for a service pattern (readable slug + hash, under 63 chars)."""
+    slug = re.sub(r"[^a-z0-9]+", "_", service_pattern.strip("%")).strip("_")[:24]
+    digest = hashlib.sha1(service_pattern.encode("utf-8")).hexdigest()[:8]
+    return f"{INDEX_PREFIX}{slug}_{digest}"
+
+
+def _ddl_predicate(service_pattern: str) -> str:
+    # DDL is executed without parameters, so '%' must not be doubled
+    return service_predicate_sql(service_pattern).replace("%%", "%")
+
+
+def build_create_statements(
+    service_pattern: str,
+    index_type: str,
+    m: int,
+    ef_construction: int,
+    lists_by_table: Dict[str, Optional[int]],
+    partitioned: bool
+) -> List[str]:
+    """Statements that build the partial index for one service pattern."""
+    name = index_name_for(service_pattern)
+    predicate = _ddl_predicate(service_pattern)
+    if not partitioned:
+        method = _index_method(index_type, m, ef_construction, lists_by_table.get("chunks"))
+        return [
+            # A previous interrupted run leaves an INVALID index behind
+            f"DROP INDEX CONCURRENTLY IF EXISTS {name};",
+            f"CREATE INDEX CONCURRENTLY {name} ON chunks {method} WHERE {predicate};",
+        ]
+
+    parent_lists = max((lists or 0 for lists in lists_by_table.values()), default=0) or None
+    stmts = [
+        f"DROP INDEX IF EXISTS {name};",
+        f"CREATE INDEX {name} ON ONLY chunks "
+        f"{_index_method(index_type, m, ef_construction, parent_lists)} WHERE {predicate};",
+    ]
+    digest = name.rsplit("_", 1)[-1]
+    for partition, lists in lists_by_table.items():
+        partition_index = f"{partition}_svc_{digest}_idx"
+        stmts += [
+            f"DROP INDEX CONCURRENTLY IF EXISTS {partition_index};",
+            f"CREATE INDEX CONCURRENTLY {partition_index} ON {partition} "
+            f"{_index_method(index_type, m, ef_construction, lists)} WHERE {predicate};",
+            f"ALTER INDEX {name} ATTACH PARTITION {partition_index};",
+        ]
+    return stmts
+
+
+def build_drop_statements(index_name: str, partitioned: bool) -> List[str]:
+    """Statements that drop a partial index (and its partition indexes)."""
+    if partitioned:
+        # CONCURRENTLY is not supported on a partitioned index; the lock is brief
+        return [f"DROP INDEX IF EXISTS {index_name};"]
+    return [f"DROP INDEX CONCURRENTLY IF EXISTS {index_name};"]
+
+
+def select_services(cur, top_k: int, min_queries: int, max_idle_days: int) -> List[Dict]:
+    """Top service patterns by filtered-search count that can be indexed."""
+    cur.execute(
+        """
+        SELECT service_pattern, query_count
+        FROM service_filter_stats
+        WHERE query_count >= %(min_queries)s
+          AND last_queried_at >= now() - %(max_idle_days)s * interval '1 day'
+        ORDER BY query_count DESC, service_pattern
+        """,
+        {"min_queries": min_queries, "max_idle_days": max_idle_days}
+    )
+    rows = [row for row in cur.fetchall() if is_routable_pattern(row["service_pattern"])]
+    return rows[:top_k]
+
+
+def main():
+    retrieval_cfg = get_retrieval_config() or {}
+    service_cfg = retrieval_cfg.get("service_indexes", {})
+    index_cfg = retrieval_cfg.get("vector_index", {})
+    hnsw_cfg = index_cfg.get("hnsw", {})
+
+    parser = argparse.ArgumentParser(
+        description="Maintain partial chunks embedding indexes for the busiest service filters",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    parser.add_argument("--top-k", type=int, default=service_cfg.get("top_k", 10),
+                        help="Number of services to keep indexed")
+    parser.add_argument("--min-queries", type=int, default=service_cfg.get("min_queries", 100),
+                        help="Minimum filtered searches before a service is indexed")
+    parser.add_argument("--max-idle-days", type=int, default=service_cfg.get("max_idle_days", 30),
+                        help="Ignore services not searched within this many days")
+    parser.add_argument("--type", choices=["hnsw", "ivfflat"], default=index_cfg.get("type", "hnsw"),
+                        help="Index type (default: vector_index.type from config/retrieval.json)")
+    parser.add_argument("--dry-run", action="store_true", help="Show the plan and statements without executing")
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block
+    conn.autocommit = True
+    cur = conn.cursor()
+    try:
+        wanted = {row["service_pattern"]: row["query_count"] for row in select_services(
+            cur, args.top_k, args.min_queries, args.max_idle_days
+        )}
+        cur.execute("SELECT service_pattern, index_name FROM service_vector_indexes")
+        existing = {row["service_pattern"]: row["index_name"] for row in cur.fetchall()}
+        partitions = list_partitions(cur)
+
+        to_create = [pattern for pattern in wanted if pattern not in existing]
+        to_drop = [pattern for pattern in existing if pattern not in wanted]
+        print(f"Services to index: {len(wanted)} (create {len(to_create)}, keep {len(wanted) - len(to_create)}, drop {len(to_drop)})")
+        for pattern, count in wanted.items():
+            print(f"  {pattern}: {count} filtered searches{'' if pattern in existing else ' (new)'}")
+
+        for pattern in to_drop:
+            stmts = build_drop_statements(existing[pattern], bool(partitions))
+            print(f"\nDropping {existing[pattern]} ({pattern})")
+            if args.dry_run:
+                for s in stmts:
+                    print(f"  {s}")
+                continue
+            # Stop routing first; searches still see the index until it is dropped
+            cur.execute("DELETE FROM service_vector_indexes WHERE service_pattern = %s", (pattern,))
+            for s in stmts:
+                cur.execute(s)
+
+        for pattern in to_create:
+            lists_by_table = {}
+            for table in partitions or ["chunks"]:
+                lists = None
+                if args.type == "ivfflat":
+                    cur.execute(f"SELECT COUNT(*) AS count FROM {table} WHERE {_ddl_predicate(pattern)}")
+                    lists = auto_ivfflat_lists(cur.fetchone()["count"])
+                lists_by_table[table] = lists
+            stmts = build_create_statements(
+                pattern, args.type, hnsw_cfg.get("m", 16), hnsw_cfg.get("ef_construction", 64),
+                lists_by_table, bool(partitions)
+            )
+            print(f"\nCreating {index_name_for(pattern)} ({pattern})")
+            if args.dry_run:
+                for s in stmts:
+                    print(f"  {s}")
+                continue
+            for s in stmts:
+                print(f"Executing: {s}")
+                cur.execute(s)
+            # Route only once the index is built and valid
+            cur.execute(
+                """
+                INSERT INTO service_vector_indexes (service_pattern, index_name)
+                VALUES (%s, %s)
+                ON CONFLICT (service_pattern) DO UPDATE SET index_name = EXCLUDED.index_name, created_at = now()
+                """,
+                (pattern, index_name_for(pattern))
+            )
+
+        if args.dry_run:
+            print("\nDRY RUN - nothing was changed")
+        else:
+            print("\n Service indexes updated (hybrid_search picks them up within service_indexes.refresh_seconds)")
+    except Exception as e:
+        print(f"\n Service index maintenance failed: {type(e).__name__}: {e}")
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""Convert the chunks table to list partitioning by doc_type without downtime.
+
+Steps (each batch commits on its own, so ingestion and retrieval keep running):
+  1. Create chunks_partitioned (same columns, PRIMARY KEY (id, doc_type)) with one
+     partition per doc type plus a default partition; every index is created per
+     partition. A trigger on chunks mirrors INSERT/UPDATE/DELETE into it from now on.
+  2. Copy existing rows in keyset batches. Each batch locks its source rows FOR SHARE,
+     so a concurrent delete waits and is then mirrored by the trigger.
+  3. Check row counts and reconcile if needed, without locking chunks (the trigger
+     keeps the tables converged meanwhile).
+  4. Swap: one short transaction locks chunks (bounded by --lock-timeout, retried),
+     drops the trigger and renames chunks -> chunks_unpartitioned,
+     chunks_partitioned -> chunks, including index names.
+
+The old table is kept as chunks_unpartitioned until --drop-old is passed.
+
+Usage examples:
+  python scripts/db/partition_chunks.py --dry-run
+  python scripts/db/partition_chunks.py --batch-size 2000
+  python scripts/db/partition_chunks.py --drop-old
+"""
+import sys
+import os
+import time
+import argparse
+from typing import List
+
+import psycopg
+
+# Add project root to path (go up 3 levels: scripts/db -> scripts -> project root)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from db.connection import get_db_connection  # noqa: E402
+from ingestion.db_ops import bump_corpus_version  # noqa: E402
+
+try:
+    from ai_service.core import get_retrieval_config
+except ImportError:
+    def get_retrieval_config():
+        return {}
+
+
+NEW_TABLE = "chunks_partitioned"
+OLD_TABLE = "chunks_unpartitioned"
+
+# doc_type -> partition; anything else lands in the default partition
+PARTITIONS = {
+    "runbook": "chunks_runbook",
+    "incident": "chunks_incident",
+    "alert": "chunks_alert",
+    "log": "chunks_log",
+}
+DEFAULT_PARTITION = "chunks_other"
+
+# Swap lock: how long to wait for it, and how often to try
+DEFAULT_LOCK_TIMEOUT_MS = 5000
+DEFAULT_SWAP_ATTEMPTS = 5
+SWAP_RETRY_DELAY_SECONDS = 2
+
+# Copied columns (tsv is generated from content in the new table)
+COLUMNS = [
+    "id", "document_id", "doc_type", "chunk_index", "content", "metadata", "service_norm",
+    "component_norm", "embedding", "token_count", "content_sha256", "created_at",
+]
+
+COLUMN_LIST = ", ".join(COLUMNS)
+
+# doc_type for rows written before migration 011 filled it
+DOC_TYPE_SQL = "COALESCE({row}.doc_type, (SELECT d.doc_type FROM documents d WHERE d.id = {row}.document_id), 'unknown')"
+
+
+def _select_list(row: str) -> str:
+    """Copied column values of `row` (NEW in the trigger, c in the batch copy)."""
+    return ", ".join(DOC_TYPE_SQL.format(row=row) if col == "doc_type" else f"{row}.{col}" for col in COLUMNS)
+
+
+def build_create_statements(m: int, ef_construction: int) -> List[str]:
+    """DDL for the partitioned table, its partitions, indexes and the sync trigger."""
+    stmts = [
+        f"""
+        CREATE TABLE IF NOT EXISTS {NEW_TABLE} (
+          id UUID NOT NULL DEFAULT gen_random_uuid(),
+          document_id UUID,
+          doc_type TEXT NOT NULL,
+          chunk_index INT,
+          content TEXT NOT NULL,
+          metadata JSONB,
+          service_norm TEXT,
+          component_norm TEXT,
+          embedding vector(1536),
+          tsv tsvector GENERATED ALWAYS AS (to_tsvector('english', content)) STORED,
+          token_count INT,
+          content_sha256 TEXT,
+          created_at TIMESTAMPTZ DEFAULT now(),
+          CONSTRAINT chunks_pkey_new PRIMARY KEY (id, doc_type),
+          CONSTRAINT chunks_document_id_fkey FOREIGN KEY (document_id) REFERENCES documents(id) ON DELETE CASCADE
+        ) PARTITION BY LIST (doc_type)
+        """,
+    ]
+    for doc_type, partition in PARTITIONS.items():
+        stmts.append(f"CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {NEW_TABLE} FOR VALUES IN ('{doc_type}')")
+    stmts.append(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {NEW_TABLE} DEFAULT")
+
+    # Created on the empty table (instant) and maintained per partition during the copy
+    stmts += [
+        f"CREATE INDEX IF NOT EXISTS chunks_tsv_idx_new ON {NEW_TABLE} USING GIN (tsv) WITH (fastupdate = off)",
+        f"CREATE INDEX IF NOT EXISTS chunks_embedding_idx_new ON {NEW_TABLE} "
+        f"USING hnsw (embedding vector_cosine_ops) WITH (m = {int(m)}, ef_construction = {int(ef_construction)})",
+        f"CREATE INDEX IF NOT EXISTS chunks_document_id_idx_new ON {NEW_TABLE}(document_id)",
+        f"CREATE INDEX IF NOT EXISTS chunks_document_chunk_idx_new ON {NEW_TABLE}(document_id, chunk_index)",
+        f"CREATE INDEX IF NOT EXISTS chunks_content_sha256_idx_new ON {NEW_TABLE}(content_sha256)",
+        f"CREATE INDEX IF NOT EXISTS chunks_service_norm_trgm_idx_new ON {NEW_TABLE} USING GIN (service_norm gin_trgm_ops)",
+        f"CREATE INDEX IF NOT EXISTS chunks_component_norm_trgm_idx_new ON {NEW_TABLE} USING GIN (component_norm gin_trgm_ops)",
+        f"CREATE INDEX IF NOT EXISTS chunks_service_norm_idx_new ON {NEW_TABLE}(service_norm)",
+        f"CREATE INDEX IF NOT EXISTS chunks_component_norm_idx_new ON {NEW_TABLE}(component_norm)",
+    ]
+
+    stmts += [
+        f"""
+        CREATE OR REPLACE FUNCTION chunks_partition_sync() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+          IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            DELETE FROM {NEW_TABLE} WHERE id = OLD.id;
+          END IF;
+          IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO {NEW_TABLE} ({COLUMN_LIST})
+            VALUES ({_select_list("NEW")})
+            ON CONFLICT DO NOTHING;
+          END IF;
+          RETURN NULL;
+        END $$
+        """,
+        "DROP TRIGGER IF EXISTS chunks_partition_sync ON chunks",
+        "CREATE TRIGGER chunks_partition_sync AFTER INSERT OR UPDATE OR DELETE ON chunks "
+        "FOR EACH ROW EXECUTE FUNCTION chunks_partition_sync()",
+    ]
+    return stmts
+
+
+COPY_BATCH_SQL = f"""
+    INSERT INTO {NEW_TABLE} ({COLUMN_LIST})
+    SELECT {_select_list("c")}
+    FROM chunks c
+    WHERE c.id = ANY(%(ids)s::uuid[])
+    ON CONFLICT DO NOTHING
+"""
+
+RECONCILE_SQL = [
+    # Rows the trigger missed (only possible if it was dropped by hand)
+    f"""
+    INSERT INTO {NEW_TABLE} ({COLUMN_LIST})
+    SELECT {_select_list("c")}
+    FROM chunks c
+    WHERE NOT EXISTS (SELECT 1 FROM {NEW_TABLE} p WHERE p.id = c.id)
+    ON CONFLICT DO NOTHING
+    """,
+    f"DELETE FROM {NEW_TABLE} p WHERE NOT EXISTS (SELECT 1 FROM chunks c WHERE c.id = p.id)",
+]
+
+
+def is_partitioned(cur) -> bool:
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = 'chunks'::regclass")
+    return cur.fetchone()["relkind"] == "p"
+
+
+def copy_rows(conn, batch_size: int) -> int:
+    """Copy existing chunks into the partitioned table in keyset batches. Returns rows copied."""
+    cur = conn.cursor()
+    copied = 0
+    last_id = None
+    try:
+        while True:
+            # Lock the batch's source rows so concurrent deletes are mirrored after the copy
+            cur.execute(
+                """
+                SELECT id
+                FROM chunks
+                WHERE (%(last_id)s::uuid IS NULL OR id > %(last_id)s::uuid)
+                ORDER BY id
+                LIMIT %(batch_size)s
+                FOR SHARE
+                """,
+                {"last_id": last_id, "batch_size": batch_size}
+            )
+            ids = [row["id"] for row in cur.fetchall()]
+            if not ids:
+                conn.commit()
+                break
+            cur.execute(COPY_BATCH_SQL, {"ids": ids})
+            conn.commit()
+            copied += len(ids)
+            last_id = ids[-1]
+            print(f"  Copied {copied} chunk(s)...")
+    finally:
+        cur.close()
+    return copied
+
+
+def reconcile(conn) -> None:
+    """Check row counts and repair differences before the swap (no table lock needed).
+    
+    The sync trigger keeps both tables converged, so this only matters if it was
+    dropped by hand; the full scans run here rather than under the swap's lock.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute(f"SELECT (SELECT COUNT(*) FROM chunks) AS old_count, (SELECT COUNT(*) FROM {NEW_TABLE}) AS new_count")
+        counts = cur.fetchone()
+        if counts["old_count"] != counts["new_count"]:
+            print(f"  Row counts differ ({counts['old_count']} vs {counts['new_count']}); reconciling")
+            for stmt in RECONCILE_SQL:
+                cur.execute(stmt)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def swap_tables(conn, lock_timeout_ms: int, attempts: int) -> None:
+    """Rename the partitioned table into place in one short transaction.
+    
+    Waiting for the lock queues every later query on chunks behind it, so the wait is
+    capped by lock_timeout and retried rather than left to run behind a long query.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            _swap_tables_once(conn, lock_timeout_ms)
+            return
+        except psycopg.errors.LockNotAvailable:
+            if attempt == attempts:
+                raise
+            print(f"  Lock on chunks not acquired within {lock_timeout_ms}ms (attempt {attempt}/{attempts}); retrying")
+            time.sleep(SWAP_RETRY_DELAY_SECONDS)
+
+
+def _swap_tables_once(conn, lock_timeout_ms: int) -> None:
+    cur = conn.cursor()
+    try:
+        cur.execute(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}")
+        # Blocks writes and reads on chunks only for the trigger drop and the renames
+        cur.execute("LOCK TABLE chunks IN ACCESS EXCLUSIVE MODE")
+
+        cur.execute("DROP TRIGGER IF EXISTS chunks_partition_sync ON chunks")
+        cur.execute("DROP FUNCTION IF EXISTS chunks_partition_sync()")
+
+        cur.execute("SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = 'chunks'")
+        old_indexes = [row["indexname"] for row in cur.fetchall()]
+        cur.execute(f"SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = '{NEW_TABLE}'")
+        new_indexes = [row["indexname"] for row in cur.fetchall()]
+
+        cur.execute(f"ALTER TABLE chunks RENAME TO {OLD_TABLE}")
+        for name in old_indexes:
+            cur.execute(f"ALTER INDEX {name} RENAME TO {name}_unpartitioned")
+        cur.execute(f"ALTER TABLE {NEW_TABLE} RENAME TO chunks")
+        for name in new_indexes:
+            if name.endswith("_new"):
+                cur.execute(f"ALTER INDEX {name} RENAME TO {name[:-len('_new')]}")
+
+        # Cached retrieval results are still valid, but bump so nothing straddles the swap
+        bump_corpus_version(cur)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def main():
+    hnsw_cfg = ((get_retrieval_config() or {}).get("vector_index") or {}).get("hnsw", {})
+
+    parser = argparse.ArgumentParser(description="Convert chunks to a doc_type-partitioned table online")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Chunks copied per batch (default: 1000)")
+    parser.add_argument("--dry-run", action="store_true", help="Show the DDL and row counts without changing anything")
+    parser.add_argument("--lock-timeout", type=int, default=DEFAULT_LOCK_TIMEOUT_MS,
+                        help=f"Max wait (ms) for the swap's exclusive lock on chunks (default: {DEFAULT_LOCK_TIMEOUT_MS})")
+    parser.add_argument("--swap-attempts", type=int, default=DEFAULT_SWAP_ATTEMPTS,
+                        help=f"Swap attempts when the lock times out (default: {DEFAULT_SWAP_ATTEMPTS})")
+    parser.add_argument("--drop-old", action="store_true", help=f"Drop {OLD_TABLE} left by a previous conversion")
+    args = parser.parse_args()
+
+    create_stmts = build_create_statements(hnsw_cfg.get("m", 16), hnsw_cfg.get("ef_construction", 64))
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        if args.drop_old:
+            print(f"Dropping {OLD_TABLE}")
+            if not args.dry_run:
+                cur.execute(f"DROP TABLE IF EXISTS {OLD_TABLE}")
+                conn.commit()
+            return
+
+        if is_partitioned(cur):
+            print(" chunks is already partitioned; nothing to do")
+            return
+
+        if args.dry_run:
+            cur.execute("SELECT COALESCE(doc_type, 'NULL') AS doc_type, COUNT(*) AS count FROM chunks GROUP BY 1 ORDER BY 2 DESC")
+            print("\nDRY RUN - chunks per doc_type:")
+            for row in cur.fetchall():
+                print(f"  {row['doc_type']}: {row['count']}")
+            print("\nThe following statements would be executed before the batched copy:")
+            for s in create_stmts:
+                print(f"  {' '.join(s.split())};")
+            return
+
+        print(f"Creating {NEW_TABLE} and the sync trigger")
+        for s in create_stmts:
+            cur.execute(s)
+        conn.commit()
+
+        copied = copy_rows(conn, args.batch_size)
+        print(f"Copied {copied} chunk(s); checking row counts")
+        reconcile(conn)
+        print("Swapping tables")
+        swap_tables(conn, args.lock_timeout, max(1, args.swap_attempts))
+        cur.execute("ANALYZE chunks")
+        conn.commit()
+        print(f"\n chunks is now partitioned by doc_type; the old table is kept as {OLD_TABLE} (drop it with --drop-old)")
+    except Exception as e:
+        conn.rollback()
+        print(f"\n Partitioning failed: {type(e).__name__}: {e}")
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Rebuild the chunks embedding index (HNSW or IVFFlat) without blocking writes.
+
+The new index is built with CREATE INDEX CONCURRENTLY under a temporary name,
+then swapped in place of `chunks_embedding_idx`, so retrieval keeps working and
+ingestion is not blocked while the build runs.
+
+When chunks is partitioned by doc_type (scripts/db/partition_chunks.py), the new
+index is created ON ONLY the parent, built concurrently on each partition (IVFFlat
+lists are sized per partition) and attached, then swapped the same way.
+
+Usage examples:
+  # Show the statements for the index type configured in config/retrieval.json
+  python scripts/db/rebuild_vector_index.py --dry-run
+
+  # Switch an existing IVFFlat deployment to HNSW
+  python scripts/db/rebuild_vector_index.py --type hnsw
+
+  # Rebuild IVFFlat with lists sized for the current row count
+  python scripts/db/rebuild_vector_index.py --type ivfflat --lists auto
+"""
+import sys
+import os
+import math
+import argparse
+from typing import Dict, List, Optional
+
+# Add project root to path (go up 3 levels: scripts/db -> scripts -> project root)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from db.connection import get_db_connection  # noqa: E402
+
+try:
+    from ai_service.core import get_retrieval_config
+except ImportError:
+    def get_retrieval_config():
+        return {}
+
+
+INDEX_NAME = "chunks_embedding_idx"
+NEW_INDEX_NAME = "chunks_embedding_idx_new"
+
+
+def auto_ivfflat_lists(row_count: int) -> int:
+    """pgvector guidance: rows / 1000 up to 1M rows, sqrt(rows) above that."""
+    if row_count <= 1_000_000:
+        return max(10, row_count // 1000)
+    return int(math.sqrt(row_count))
+
+
+def _index_method(index_type: str, m: int, ef_construction: int, lists: Optional[int]) -> str:
+    if index_type == "hnsw":
+        return (
+            f"USING hnsw (embedding vector_cosine_ops) "
+            f"WITH (m = {int(m)}, ef_construction = {int(ef_construction)})"
+        )
+    return f"USING ivfflat (embedding vector_cosine_ops) WITH (lists = {int(lists)})"
+
+
+def build_statements(index_type: str, m: int, ef_construction: int, lists: Optional[int]) -> List[str]:
+    """Build the concurrent rebuild + swap statements."""
+    create = (
+        f"CREATE INDEX CONCURRENTLY {NEW_INDEX_NAME} ON chunks "
+        f"{_index_method(index_type, m, ef_construction, lists)};"
+    )
+    return [
+        # A previous interrupted run leaves an INVALID index behind
+        f"DROP INDEX CONCURRENTLY IF EXISTS {NEW_INDEX_NAME};",
+        create,
+        f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME};",
+        f"ALTER INDEX {NEW_INDEX_NAME} RENAME TO {INDEX_NAME};",
+    ]
+
+
+def build_partitioned_statements(
+    index_type: str,
+    m: int,
+    ef_construction: int,
+    lists_by_partition: Dict[str, Optional[int]]
+) -> List[str]:
+    """
+    Build the rebuild + swap statements for a partitioned chunks table.
+    
+    CONCURRENTLY is not supported on a partitioned table, so the parent index is created
+    ON ONLY chunks (invalid, no build) and becomes valid once every partition's index,
+    built concurrently, is attached. Only the final DROP/RENAME lock the table, briefly.
+    """
+    parent_lists = max((lists or 0 for lists in lists_by_partition.values()), default=0) or None
+    stmts = [
+        # Dropping a partitioned index also drops its attached partition indexes
+        f"DROP INDEX IF EXISTS {NEW_INDEX_NAME};",
+        f"CREATE INDEX {NEW_INDEX_NAME} ON ONLY chunks {_index_method(index_type, m, ef_construction, parent_lists)};",
+    ]
+    for partition, lists in lists_by_partition.items():
+        partition_index = f"{partition}_embedding_idx_new"
+        stmts += [
+            f"DROP INDEX CONCURRENTLY IF EXISTS {partition_index};",
+            f"CREATE INDEX CONCURRENTLY {partition_index} ON {partition} "
+            f"{_index_method(index_type, m, ef_construction, lists)};",
+            f"ALTER INDEX {NEW_INDEX_NAME} ATTACH PARTITION {partition_index};",
+        ]
+    stmts += [
+        f"DROP INDEX IF EXISTS {INDEX_NAME};",
+        f"ALTER INDEX {NEW_INDEX_NAME} RENAME TO {INDEX_NAME};",
+    ]
+    stmts += [
+        f"ALTER INDEX {partition}_embedding_idx_new RENAME TO {partition}_embedding_idx;"
+        for partition in lists_by_partition
+    ]
+    return stmts
+
+
+def list_partitions(cur) -> List[str]:
+    """Partitions of chunks (empty when chunks is not partitioned)."""
+    cur.execute(
+        """
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'chunks'::regclass
+        ORDER BY c.relname
+        """
+    )
+    return [row["relname"] for row in cur.fetchall()]
+
+
+def main():
+    index_cfg = (get_retrieval_config() or {}).get("vector_index", {})
+    hnsw_cfg = index_cfg.get("hnsw", {})
+    ivfflat_cfg = index_cfg.get("ivfflat", {})
+
+    parser = argparse.ArgumentParser(
+        description="Rebuild the chunks embedding index concurrently (HNSW or IVFFlat)",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    parser.add_argument("--type", choices=["hnsw", "ivfflat"], default=index_cfg.get("type", "hnsw"),
+                        help="Index type (default: vector_index.type from config/retrieval.json)")
+    parser.add_argument("--m", type=int, default=hnsw_cfg.get("m", 16),
+                        help="HNSW max connections per layer")
+    parser.add_argument("--ef-construction", type=int, default=hnsw_cfg.get("ef_construction", 64),
+                        help="HNSW candidate list size during build")
+    parser.add_argument("--lists", type=str, default=str(ivfflat_cfg.get("lists", "auto")),
+                        help="IVFFlat list count, or 'auto' to size from the row count")
+    parser.add_argument("--dry-run", action="store_true", help="Show statements without executing")
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block
+    conn.autocommit = True
+    cur = conn.cursor()
+    try:
+        partitions = list_partitions(cur)
+        lists_by_table = {}
+        for table in partitions or ["chunks"]:
+            lists = None
+            if args.type == "ivfflat":
+                if args.lists == "auto":
+                    cur.execute(f"SELECT COUNT(*) AS count FROM {table}")
+                    row_count = cur.fetchone()["count"]
+                    lists = auto_ivfflat_lists(row_count)
+                    print(f"Sizing IVFFlat for {row_count} chunks in {table}: lists = {lists}")
+                else:
+                    lists = int(args.lists)
+            lists_by_table[table] = lists
+
+        if partitions:
+            stmts = build_partitioned_statements(args.type, args.m, args.ef_construction, lists_by_table)
+        else:
+            stmts = build_statements(args.type, args.m, args.ef_construction, lists_by_table["chunks"])
+        if args.dry_run:
+            print("\nDRY RUN - The following statements would be executed:")
+            for s in stmts:
+                print(f"  {s}")
+            return
+
+        for s in stmts:
+            print(f"Executing: {s}")
+            cur.execute(s)
+        print(f"\n {INDEX_NAME} rebuilt as {args.type}.")
+    except Exception as e:
+        print(f"\n Index rebuild failed: {type(e).__name__}: {e}")
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
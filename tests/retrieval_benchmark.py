@@ -0,0 +1,467 @@
+"""Retrieval benchmark: recall@k, MRR and latency percentiles for hybrid_search / mmr_search.
+
+Loads a synthetic corpus (runbooks, ServiceNow-style incidents and logs built from the
+tests/alert_generator.py templates and the ingestion normalizers) into the configured
+Postgres/pgvector database, replays a labeled query set and reports quality and latency.
+
+Embeddings come from a deterministic hashing embedder, so the benchmark runs offline
+and two runs over the same seed produce the same rankings. Use a dedicated database
+(POSTGRES_DB=...) so existing documents do not dilute the results; the benchmark
+deletes the documents it inserted unless --keep is given.
+
+Usage:
+    python tests/retrieval_benchmark.py --output bench.json
+    python tests/retrieval_benchmark.py --compare bench.json --max-recall-drop 0.02
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Add project root to path (go up 2 levels: tests -> project root)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.alert_generator import ALERT_TEMPLATES, generate_alert  # noqa: E402
+from ingestion.models import IngestRunbook, IngestIncident, IngestLog  # noqa: E402
+from ingestion.normalizers import normalize_runbook, normalize_incident, normalize_log  # noqa: E402
+
+EMBEDDING_DIMENSIONS = 1536
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {"the", "a", "an", "is", "are", "for", "of", "on", "in", "to", "and", "has", "have", "been", "last", "with"}
+
+# Generic operational vocabulary for distractor documents
+_NOISE_WORDS = [
+    "deploy", "rollout", "restart", "pod", "node", "latency", "timeout", "retry", "queue",
+    "cache", "replica", "failover", "backup", "snapshot", "certificate", "dns", "proxy",
+    "throughput", "memory", "cpu", "disk", "volume", "index", "schema", "migration", "token",
+    "session", "quota", "throttle", "heartbeat", "cluster", "shard", "partition", "lock",
+]
+
+_STEP_TEMPLATES = [
+    "Check {component} metrics for {service} on the monitoring dashboard",
+    "Review recent deployments of {service}",
+    "Inspect {service} logs for errors around the alert time",
+    "Scale {service} {component} capacity if saturation persists",
+    "Restart the affected {service} instance after draining traffic",
+    "Escalate to the {service} on-call owner if the issue is not resolved in 30 minutes",
+]
+
+
+class FakeEmbedder:
+    """
+    Deterministic bag-of-words hashing embedder.
+
+    Each token is hashed to one dimension with a +/-1 sign and the vector is L2-normalized,
+    so texts sharing vocabulary get a high cosine similarity - enough signal for ranking
+    regressions without calling the embedding API.
+    """
+
+    def __init__(self, dimensions: int = EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float64)
+        for token in _TOKEN_RE.findall((text or "").lower()):
+            if token in _STOPWORDS:
+                continue
+            digest = hashlib.sha256(token.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "big") % self.dimensions
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[index] += sign
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed(text) for text in texts]
+
+
+def install_fake_embedder(embedder: FakeEmbedder) -> None:
+    """Route query embedding (sync, async and batch) through the fake embedder."""
+    from retrieval import embedding_cache
+
+    def embed_text(text, model=None):
+        return embedder.embed(text)
+
+    async def embed_text_async(text, model=None):
+        return embedder.embed(text)
+
+    def embed_texts_batch(texts, model=None, batch_size=100, use_store=True):
+        return embedder.embed_batch(texts)
+
+    embedding_cache.embed_text = embed_text
+    embedding_cache.embed_text_async = embed_text_async
+    embedding_cache.embed_texts_batch = embed_texts_batch
+
+
+def build_corpus(seed: int = 42, noise_docs: int = 200, queries_per_template: int = 3) -> Dict:
+    """
+    Build the synthetic corpus and labeled queries.
+
+    Every alert template yields one runbook, one historical incident and one log
+    (the relevant set for that template's queries) plus shared distractor documents.
+
+    Returns:
+        {"documents": [{"key", IngestDocument fields...}], "queries": [{"query_text", "service",
+        "component", "relevant": [doc keys]}]}
+    """
+    rng = random.Random(seed)
+    documents = []
+    queries = []
+    services = sorted({t["labels"]["service"] for t in ALERT_TEMPLATES})
+
+    for idx, template in enumerate(ALERT_TEMPLATES):
+        service = template["labels"]["service"]
+        component = template["labels"]["component"]
+        steps = [
+            step.format(service=service, component=component)
+            for step in rng.sample(_STEP_TEMPLATES, 4)
+        ]
+
+        runbook = normalize_runbook(IngestRunbook(
+            title=f"{template['title']} Runbook",
+            service=service,
+            component=component,
+            content=f"Runbook for {template['title']} alerts on {service}.\n\nSymptoms: {template['description']}",
+            steps=steps,
+            tags={"runbook_id": f"RB-BENCH-{idx:03d}"},
+        ))
+        incident = normalize_incident(IngestIncident(
+            incident_id=f"INC-BENCH-{idx:04d}",
+            title=template["title"],
+            description=template["description"],
+            severity=template["labels"].get("severity"),
+            category=template["category"],
+            root_cause=f"{component} saturation in {service} after a configuration change",
+            resolution_steps=steps[:2],
+            affected_services=[service],
+        ))
+        log = normalize_log(IngestLog(
+            content="\n".join(
+                f"ERROR {service} {component}: {template['description']} (attempt {n})" for n in range(1, 4)
+            ),
+            level="error",
+            service=service,
+            component=component,
+            message=template["title"],
+            log_format="plain",
+        ))
+
+        keys = []
+        for kind, doc in (("runbook", runbook), ("incident", incident), ("log", log)):
+            key = f"{idx}:{kind}"
+            keys.append(key)
+            documents.append({"key": key, **doc.model_dump()})
+
+        variants = [
+            f"{template['title']} {template['description']}",
+            template["title"],
+            template["description"],
+        ]
+        for n in range(queries_per_template):
+            alert = generate_alert(template)
+            queries.append({
+                "query_text": variants[n % len(variants)],
+                "service": alert["labels"].get("service"),
+                "component": alert["labels"].get("component"),
+                "relevant": keys,
+            })
+
+    for n in range(noise_docs):
+        service = rng.choice(services)
+        words = rng.sample(_NOISE_WORDS, 12)
+        documents.append({
+            "key": f"noise:{n}",
+            "doc_type": rng.choice(["runbook", "incident", "log"]),
+            "service": service,
+            "component": rng.choice(["compute", "api", "database", "storage"]),
+            "title": f"{service} {' '.join(words[:3])} notes",
+            "content": f"Operational notes for {service}: " + " ".join(words),
+            "tags": {"type": "benchmark_noise"},
+            "last_reviewed_at": None,
+        })
+
+    return {"documents": documents, "queries": queries}
+
+
+def load_corpus(documents: List[Dict], embedder: FakeEmbedder) -> Dict[str, str]:
+    """
+    Insert the corpus (one chunk per document) and return {doc key: document_id}.
+
+    Chunks are written directly rather than through insert_document_and_chunks() so the
+    load needs neither the embedding API nor the tiktoken encoding download.
+    """
+    from db.connection import get_db_connection
+    from ingestion.chunker import add_chunk_header, build_document_summary
+    from ingestion.db_ops import normalize_filter_value, bump_corpus_version
+    from ingestion.embeddings import format_vector
+
+    doc_ids = {}
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        for doc in documents:
+            metadata = {"doc_type": doc["doc_type"], "service": doc["service"], "component": doc["component"], "title": doc["title"]}
+            summary = build_document_summary(doc["doc_type"], doc["title"], doc["content"])
+            cur.execute(
+                """
+                INSERT INTO documents (doc_type, service, component, title, content, tags, summary, summary_embedding)
+                VALUES (%s, %s, %s, %s, %s, %s::jsonb, %s, %s::vector)
+                RETURNING id
+                """,
+                (
+                    doc["doc_type"], doc["service"], doc["component"], doc["title"], doc["content"],
+                    json.dumps(doc["tags"]), summary, format_vector(embedder.embed(summary))
+                )
+            )
+            doc_id = cur.fetchone()["id"]
+            chunk = add_chunk_header(doc["content"], doc["doc_type"], doc["service"], doc["component"], doc["title"])
+            cur.execute(
+                """
+                INSERT INTO chunks (document_id, doc_type, chunk_index, content, metadata, service_norm, component_norm, embedding)
+                VALUES (%s, %s, 0, %s, %s::jsonb, %s, %s, %s::vector)
+                """,
+                (
+                    doc_id,
+                    doc["doc_type"],
+                    chunk,
+                    json.dumps(metadata),
+                    normalize_filter_value(doc["service"]),
+                    normalize_filter_value(doc["component"]),
+                    format_vector(embedder.embed(chunk)),
+                )
+            )
+            doc_ids[doc["key"]] = str(doc_id)
+        bump_corpus_version(cur)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+    return doc_ids
+
+
+def delete_corpus(doc_ids: Dict[str, str]) -> None:
+    """Delete the benchmark documents (chunks cascade)."""
+    from db.connection import get_db_connection
+    from ingestion.db_ops import bump_corpus_version
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM documents WHERE id = ANY(%s::uuid[])", (list(doc_ids.values()),))
+        bump_corpus_version(cur)
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+
+
+def recall_at_k(retrieved: List[str], relevant: List[str], k: int) -> float:
+    """Fraction of the relevant documents found in the top k retrieved documents."""
+    if not relevant:
+        return 0.0
+    return len(set(retrieved[:k]) & set(relevant)) / len(relevant)
+
+
+def reciprocal_rank(retrieved: List[str], relevant: List[str]) -> float:
+    """1 / rank of the first relevant document (0 if none was retrieved)."""
+    relevant_set = set(relevant)
+    for rank, doc_id in enumerate(retrieved, 1):
+        if doc_id in relevant_set:
+            return 1.0 / rank
+    return 0.0
+
+
+def latency_percentiles(latencies_ms: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean latency in milliseconds."""
+    if not latencies_ms:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0}
+    values = np.asarray(latencies_ms, dtype=np.float64)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99), "mean": float(values.mean())}
+
+
+def _unique_document_ids(chunks: List[Dict]) -> List[str]:
+    seen = set()
+    ordered = []
+    for chunk in chunks:
+        doc_id = chunk.get("document_id")
+        if doc_id and doc_id not in seen:
+            seen.add(doc_id)
+            ordered.append(doc_id)
+    return ordered
+
+
+def run_method(
+    method: str,
+    queries: List[Dict],
+    doc_ids: Dict[str, str],
+    k: int,
+    repeat: int,
+    use_filters: bool,
+    document_limit: Optional[int] = None
+) -> Dict:
+    """Replay the query set through one retrieval method and aggregate the metrics."""
+    from retrieval.hybrid_search import hybrid_search, mmr_search
+    from retrieval.result_cache import get_search_result_cache
+    from retrieval.embedding_cache import get_query_embedding_cache
+
+    search = hybrid_search if method == "hybrid_search" else mmr_search
+    result_cache = get_search_result_cache()
+    embedding_cache = get_query_embedding_cache()
+
+    recalls = []
+    reciprocal_ranks = []
+    latencies_ms = []
+    for query in queries:
+        relevant = [doc_ids[key] for key in query["relevant"]]
+        for _ in range(repeat):
+            # Measure the database path, not the in-process caches
+            if result_cache is not None:
+                result_cache.clear()
+            if embedding_cache is not None:
+                embedding_cache.clear()
+            start = time.perf_counter()
+            chunks = search(
+                query["query_text"],
+                service=query["service"] if use_filters else None,
+                component=query["component"] if use_filters else None,
+                limit=k,
+                document_limit=document_limit,
+            )
+            latencies_ms.append((time.perf_counter() - start) * 1000)
+        retrieved = _unique_document_ids(chunks)
+        recalls.append(recall_at_k(retrieved, relevant, k))
+        reciprocal_ranks.append(reciprocal_rank(retrieved, relevant))
+
+    return {
+        f"recall_at_{k}": float(np.mean(recalls)) if recalls else 0.0,
+        "mrr": float(np.mean(reciprocal_ranks)) if reciprocal_ranks else 0.0,
+        "latency_ms": latency_percentiles(latencies_ms),
+        "queries": len(queries),
+        "executions": len(latencies_ms),
+    }
+
+
+def compare_reports(current: Dict, baseline: Dict, k: int, max_recall_drop: float) -> List[str]:
+    """Return regression messages (recall@k or MRR dropped by more than max_recall_drop)."""
+    regressions = []
+    recall_key = f"recall_at_{k}"
+    for method, result in current["results"].items():
+        base = baseline.get("results", {}).get(method)
+        if not base:
+            continue
+        for metric in (recall_key, "mrr"):
+            if metric in base and base[metric] - result[metric] > max_recall_drop:
+                regressions.append(f"{method} {metric}: {base[metric]:.3f} -> {result[metric]:.3f}")
+    return regressions
+
+
+def _print_report(report: Dict, k: int, baseline: Optional[Dict] = None) -> None:
+    recall_key = f"recall_at_{k}"
+    print(f"{'method':<15} {recall_key:>12} {'mrr':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    print("-" * 67)
+    for method, result in report["results"].items():
+        latency = result["latency_ms"]
+        print(
+            f"{method:<15} {result[recall_key]:>12.3f} {result['mrr']:>8.3f} "
+            f"{latency['p50']:>9.2f} {latency['p95']:>9.2f} {latency['p99']:>9.2f}"
+        )
+        base = (baseline or {}).get("results", {}).get(method)
+        if base:
+            base_latency = base["latency_ms"]
+            print(
+                f"{'  vs baseline':<15} {result[recall_key] - base.get(recall_key, 0.0):>+12.3f} "
+                f"{result['mrr'] - base.get('mrr', 0.0):>+8.3f} "
+                f"{latency['p50'] - base_latency['p50']:>+9.2f} {latency['p95'] - base_latency['p95']:>+9.2f} "
+                f"{latency['p99'] - base_latency['p99']:>+9.2f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hybrid_search / mmr_search on a synthetic corpus")
+    parser.add_argument("--k", type=int, default=5, help="Cutoff for recall@k and search limit (default: 5)")
+    parser.add_argument("--seed", type=int, default=42, help="Corpus/query seed (default: 42)")
+    parser.add_argument("--noise-docs", type=int, default=200, help="Distractor documents (default: 200)")
+    parser.add_argument("--queries-per-template", type=int, default=3, help="Queries per alert template (default: 3)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed executions per query (default: 5)")
+    parser.add_argument("--methods", nargs="+", default=["hybrid_search", "mmr_search"], choices=["hybrid_search", "mmr_search"])
+    parser.add_argument("--no-filters", action="store_true", help="Do not pass service/component filters")
+    parser.add_argument("--document-limit", type=int, help="Two-stage search over the top N documents by summary embedding")
+    parser.add_argument("--output", type=str, help="Write the JSON report to this path")
+    parser.add_argument("--compare", type=str, help="Baseline JSON report to compare against")
+    parser.add_argument("--max-recall-drop", type=float, default=0.02, help="Allowed recall/MRR drop vs baseline (default: 0.02)")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark documents in the database")
+    args = parser.parse_args()
+
+    # Seed the alert generator too so the query set is reproducible
+    random.seed(args.seed)
+    embedder = FakeEmbedder()
+    install_fake_embedder(embedder)
+
+    corpus = build_corpus(seed=args.seed, noise_docs=args.noise_docs, queries_per_template=args.queries_per_template)
+    print(f"Loading {len(corpus['documents'])} documents, {len(corpus['queries'])} queries")
+    doc_ids = load_corpus(corpus["documents"], embedder)
+
+    try:
+        results = {}
+        for method in args.methods:
+            results[method] = run_method(
+                method, corpus["queries"], doc_ids, args.k, args.repeat, not args.no_filters,
+                document_limit=args.document_limit
+            )
+    finally:
+        if not args.keep:
+            delete_corpus(doc_ids)
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "k": args.k,
+            "seed": args.seed,
+            "noise_docs": args.noise_docs,
+            "queries_per_template": args.queries_per_template,
+            "repeat": args.repeat,
+            "filters": not args.no_filters,
+            "document_limit": args.document_limit,
+        },
+        "corpus": {"documents": len(corpus["documents"]), "queries": len(corpus["queries"])},
+        "results": results,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+
+    _print_report(report, args.k, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+    if baseline:
+        regressions = compare_reports(report, baseline, args.k, args.max_recall_drop)
+        if regressions:
+            print("\nRegressions vs baseline:")
+            for message in regressions:
+                print(f"  {message}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
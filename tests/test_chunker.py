@@ -0,0 +1,217 @@
+import sys
+import os
+import re
+import time
+import types
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingestion import chunker  # noqa: E402
+from ingestion.chunker import add_chunk_header, chunk_text, iter_chunk_records, iter_chunks  # noqa: E402
+
+
+class WordEncoding:
+    """Stand-in for tiktoken: one token per word, leading whitespace attached (like BPE)."""
+
+    def __init__(self):
+        self.encode_calls = 0
+        self._ids = {}
+        self._pieces = []
+
+    def encode(self, text, disallowed_special=None):
+        self.encode_calls += 1
+        return [self._id(piece) for piece in re.findall(r"\s*\S+|\s+", text)]
+
+    def _id(self, piece):
+        if piece not in self._ids:
+            self._ids[piece] = len(self._pieces)
+            self._pieces.append(piece)
+        return self._ids[piece]
+
+    def decode_single_token_bytes(self, token):
+        return self._pieces[token].encode()
+
+
+@pytest.fixture
+def encoding(monkeypatch):
+    fake = WordEncoding()
+    monkeypatch.setattr(chunker, "get_encoding", lambda name: fake)
+    return fake
+
+
+def _words(text):
+    return text.split()
+
+
+def test_short_text_is_one_chunk(encoding):
+    assert chunk_text("  Restart the pod.\n\nCheck the logs.  ") == ["Restart the pod.\n\nCheck the logs."]
+    assert chunk_text(" \n ") == []
+
+
+def test_chunks_end_on_paragraphs_with_exact_overlap(encoding):
+    paragraphs = [" ".join(f"p{p}w{w}" for w in range(40)) + "." for p in range(12)]
+    text = "\n\n".join(paragraphs)
+
+    chunks = chunk_text(text, min_tokens=60, max_tokens=100, target_tokens=80, overlap=5)
+
+    assert encoding.encode_calls == 1
+    assert len(chunks) > 1
+    for previous, following in zip(chunks, chunks[1:]):
+        assert _words(previous)[-5:] == _words(following)[:5]
+    for chunk in chunks[:-1]:
+        assert 60 <= len(_words(chunk)) <= 100
+        assert chunk.endswith(".")
+    assert _words(chunks[-1])[-1] == _words(text)[-1]
+
+
+def test_long_line_is_cut_on_tokens_without_losing_text(encoding):
+    text = " ".join(f"tok{i}" for i in range(1000))
+
+    chunks = list(iter_chunks(text, min_tokens=150, max_tokens=300, target_tokens=250, overlap=20))
+
+    assert all(150 <= len(_words(chunk)) <= 300 for chunk in chunks)
+    rebuilt = _words(chunks[0])
+    for chunk in chunks[1:]:
+        rebuilt += _words(chunk)[20:]
+    assert rebuilt == _words(text)
+
+
+def test_tail_is_split_instead_of_undersized(encoding):
+    # 270 tokens: cutting at the 180-token target would leave a 100-token tail
+    lines = "\n".join(f"2024-01-01 ERROR worker {i} timed out" for i in range(45))
+
+    chunks = chunk_text(lines, min_tokens=120, max_tokens=200, target_tokens=180, overlap=10)
+
+    assert len(chunks) == 2
+    assert all(120 <= len(_words(chunk)) <= 200 for chunk in chunks)
+
+
+def test_iter_chunks_is_lazy(encoding):
+    assert isinstance(iter_chunks("a b c"), types.GeneratorType)
+    assert encoding.encode_calls == 0
+
+
+def test_chunk_records_carry_header_tokens_and_offsets(encoding):
+    text = "\n\n".join(" ".join(f"s{p}w{w}" for w in range(30)) + "." for p in range(6))
+    header = add_chunk_header("", "runbook", "database", None, "Disk full")
+
+    records = list(iter_chunk_records(
+        text, header=header, header_tokens=7, min_tokens=40, max_tokens=80, target_tokens=60, overlap=4
+    ))
+
+    assert encoding.encode_calls == 1
+    assert [record.text[len(header):] for record in records] == chunk_text(
+        text, min_tokens=40, max_tokens=80, target_tokens=60, overlap=4
+    )
+    for record in records:
+        assert record.text == header + text[record.start:record.end]
+        assert record.token_count == 7 + len(_words(text[record.start:record.end]))
+
+
+def _baseline_chunk_text(encoding, text, min_tokens=180, max_tokens=320, target_tokens=250, overlap=30):
+    """chunk_text before the single-pass chunker (per paragraph/sentence/chunk re-encoding)."""
+    safe_max = min(max_tokens, 3000)
+    paragraphs = re.split(r'\n\s*\n', text.strip())
+    if len(paragraphs) == 1 and len(text) > 100000:
+        paragraphs = text.split('\n')
+    chunks, current_chunk, current_tokens = [], [], 0
+    for para in paragraphs:
+        if not para.strip():
+            continue
+        para_tokens = len(encoding.encode(para))
+        if para_tokens > safe_max:
+            sentences = re.split(r'(?<=[.!?])\s+', para)
+            if len(sentences) == 1:
+                sentences = para.split('\n')
+            if len(sentences) == 1:
+                sentences = [para[j:j + safe_max * 4] for j in range(0, len(para), safe_max * 4)]
+            for sentence in sentences:
+                sent_tokens = len(encoding.encode(sentence))
+                if sent_tokens > safe_max:
+                    for k in range(0, len(sentence), safe_max * 4):
+                        sub_chunk = sentence[k:k + safe_max * 4]
+                        sub_tokens = len(encoding.encode(sub_chunk))
+                        if current_tokens + sub_tokens > safe_max and current_chunk:
+                            chunks.append(' '.join(current_chunk))
+                            current_chunk, current_tokens = [sub_chunk], sub_tokens
+                        else:
+                            current_chunk.append(sub_chunk)
+                            current_tokens += sub_tokens
+                    continue
+                if current_tokens + sent_tokens > safe_max and current_chunk:
+                    chunks.append(' '.join(current_chunk))
+                    last_sentences = re.split(r'(?<=[.!?])\s+', chunks[-1])
+                    overlap_text = ' '.join(last_sentences[-2:])
+                    overlap_tokens = len(encoding.encode(overlap_text))
+                    if overlap and overlap_tokens <= overlap * 2:
+                        current_chunk, current_tokens = [overlap_text, sentence], overlap_tokens + sent_tokens
+                    else:
+                        current_chunk, current_tokens = [sentence], sent_tokens
+                else:
+                    current_chunk.append(sentence)
+                    current_tokens += sent_tokens
+        elif current_tokens + para_tokens > safe_max and current_chunk:
+            chunks.append(' '.join(current_chunk))
+            overlap_text = re.split(r'(?<=[.!?])\s+', chunks[-1])[-1]
+            overlap_tokens = len(encoding.encode(overlap_text))
+            if overlap and overlap_tokens <= overlap * 2:
+                current_chunk, current_tokens = [overlap_text, para], overlap_tokens + para_tokens
+            else:
+                current_chunk, current_tokens = [para], para_tokens
+        else:
+            current_chunk.append(para)
+            current_tokens += para_tokens
+    if current_chunk:
+        chunk = ' '.join(current_chunk)
+        chunk_tokens = len(encoding.encode(chunk))
+        if chunk_tokens >= min_tokens or not chunks:
+            chunks.append(chunk)
+        else:
+            chunks[-1] = chunks[-1] + ' ' + chunk
+    # Final safety check re-encoded every chunk
+    return [chunk for chunk in chunks if len(encoding.encode(chunk)) <= safe_max]
+
+
+def _best_of(runs, fn, *args):
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+# cl100k_base's pre-tokenizer split; ranks are built from the sample text so no download is needed
+_CL100K_PATTERN = (
+    r"""(?i:'s|'t|'re|'ve|'m|'ll|'d)|[^\r\n\p{L}\p{N}]?\p{L}+|\p{N}{1,3}| ?[^\s\p{L}\p{N}]+[\r\n]*|"""
+    r"""\s*[\r\n]+|\s+(?!\S)|\s+"""
+)
+
+
+def _bpe_encoding(sample):
+    tiktoken = pytest.importorskip("tiktoken")
+    ranks = {bytes([i]): i for i in range(256)}
+    for word in set(re.findall(r" ?[A-Za-z]+| ?[^\sA-Za-z0-9]+|\d{1,3}", sample)):
+        piece = word.encode()
+        for end in range(2, len(piece) + 1):
+            ranks.setdefault(piece[:end], len(ranks))
+    return tiktoken.Encoding("chunker_test_bpe", pat_str=_CL100K_PATTERN, mergeable_ranks=ranks, special_tokens={})
+
+
+@pytest.mark.parametrize("text", [
+    "\n".join(f"2024-01-01T00:00:{i % 60:02d} ERROR worker-{i % 7} request {i} timed out after {i % 300}ms"
+               for i in range(8000)),
+    "\n\n".join(" ".join(f"Step {p}.{s} restart the pod and check the logs." for s in range(8)) for p in range(1500)),
+], ids=["log", "prose"])
+def test_single_pass_is_faster_than_baseline(monkeypatch, text):
+    bpe = _bpe_encoding(text)
+    monkeypatch.setattr(chunker, "get_encoding", lambda name: bpe)
+    assert chunk_text(text) == list(iter_chunks(text))  # also warms the per-token tables
+
+    baseline = _best_of(5, _baseline_chunk_text, bpe, text)
+    single_pass = _best_of(5, chunk_text, text)
+
+    assert single_pass * 1.25 < baseline, (single_pass, baseline)
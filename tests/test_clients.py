@@ -0,0 +1,56 @@
+import asyncio
+import sys
+import os
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_service.core import clients  # noqa: E402
+
+
+@pytest.fixture
+def fresh_clients(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(clients, "get_llm_config", lambda: {"http_client": {"max_connections": 7, "timeout": 5}})
+    monkeypatch.setattr(clients, "_openai_client", None)
+    monkeypatch.setattr(clients, "_async_openai_client", None)
+    yield
+    asyncio.run(clients.close_clients())
+
+
+def test_encoding_is_loaded_once(monkeypatch):
+    loads = []
+    monkeypatch.setattr(clients.tiktoken, "get_encoding", lambda name: loads.append(name) or object())
+    clients.get_encoding.cache_clear()
+    try:
+        assert clients.get_encoding("cl100k_base") is clients.get_encoding("cl100k_base")
+        assert loads == ["cl100k_base"]
+    finally:
+        clients.get_encoding.cache_clear()
+
+
+def test_openai_clients_are_shared_and_pooled(fresh_clients):
+    client = clients.get_openai_client()
+    assert clients.get_openai_client() is client
+    assert client.timeout.read == 5
+    assert clients.get_async_openai_client() is clients.get_async_openai_client()
+
+    from ai_service.llm_client import get_llm_client
+    from ingestion.embeddings import get_embedding_client
+    assert get_llm_client() is client
+    assert get_embedding_client() is client
+
+
+def test_close_clients_resets_registry(fresh_clients):
+    client = clients.get_openai_client()
+    asyncio.run(clients.close_clients())
+    assert clients.get_openai_client() is not client
+
+
+def test_missing_api_key_raises(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setattr(clients, "_openai_client", None)
+    with pytest.raises(ValueError, match="OPENAI_API_KEY"):
+        clients.get_openai_client()
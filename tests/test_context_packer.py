@@ -0,0 +1,103 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_service.context_packer import pack_context, TRUNCATION_MARKER  # noqa: E402
+
+
+def _word_count(text):
+    return len(text.split())
+
+
+def _chunk(chunk_id, content, rrf_score, doc_type="runbook", **extra):
+    return {"chunk_id": chunk_id, "content": content, "rrf_score": rrf_score, "doc_type": doc_type, **extra}
+
+
+def test_rank_by_score_packs_best_first_and_reports_source_types():
+    chunks = [
+        _chunk("low", "low ranked incident notes about something else entirely", 0.010, doc_type="incident"),
+        _chunk("high", "restart the database service and verify replication lag", 0.016),
+    ]
+
+    packed, stats = pack_context(
+        chunks, max_tokens=100, chunk_overhead_tokens=0, token_counter=_word_count, rank_by_score=True
+    )
+
+    assert [c["chunk_id"] for c in packed] == ["high", "low"]
+    assert stats["tokens_used"] == 16
+    assert stats["tokens_by_source_type"] == {"runbook": 8, "incident": 8}
+
+
+def test_near_duplicate_chunks_are_skipped():
+    base = "step one check disk usage step two rotate the log files step three verify free space"
+    chunks = [
+        _chunk("a", base, 0.016),
+        _chunk("a-overlap", base + " again", 0.015),
+        _chunk("b", "escalate to the storage team if usage stays above ninety percent", 0.014),
+    ]
+
+    packed, stats = pack_context(chunks, max_tokens=1000, token_counter=_word_count)
+
+    assert [c["chunk_id"] for c in packed] == ["a", "b"]
+    assert stats["duplicates_skipped"] == 1
+
+
+def test_last_chunk_is_truncated_at_sentence_boundary():
+    long_text = "First sentence here. " * 40
+    chunks = [
+        _chunk("short", "alpha beta gamma delta", 0.016),
+        _chunk("long", long_text.strip(), 0.015),
+    ]
+
+    packed, stats = pack_context(
+        chunks, max_tokens=50, min_truncated_tokens=10, chunk_overhead_tokens=0, token_counter=_word_count
+    )
+
+    assert [c["chunk_id"] for c in packed] == ["short", "long"]
+    assert packed[1]["truncated"] is True
+    assert packed[1]["content"].endswith("here." + TRUNCATION_MARKER)
+    assert stats["tokens_used"] <= 50
+    assert "truncated" not in chunks[1]
+
+
+def test_stored_token_count_is_used_and_max_chunks_respected():
+    calls = []
+
+    def counting(text):
+        calls.append(text)
+        return _word_count(text)
+
+    chunks = [_chunk(f"c{i}", f"unique content number {i} " + "x" * i, 0.02 - i * 0.001, token_count=5) for i in range(4)]
+
+    packed, _ = pack_context(chunks, max_tokens=1000, max_chunks=2, token_counter=counting)
+
+    assert len(packed) == 2
+    assert calls == []
+
+
+def test_exact_duplicates_are_skipped_by_content_hash():
+    chunks = [
+        _chunk("first", "check disk usage on the database host", 0.016, content_sha256="abc"),
+        _chunk("copy", "an unrelated rewording with no shared shingles", 0.015, content_sha256="abc"),
+        _chunk("other", "restart the web service and clear caches", 0.014, content_sha256="def"),
+    ]
+
+    packed, stats = pack_context(chunks, max_tokens=1000, token_counter=_word_count)
+
+    assert [c["chunk_id"] for c in packed] == ["first", "other"]
+    assert stats["duplicates_skipped"] == 1
+
+
+def test_caller_order_is_kept_by_default():
+    # Preference-ordered retrieval: boosted runbook first, then an incident, then an unscored log
+    chunks = [
+        _chunk("runbook", "follow the failover runbook for the primary database", 0.012),
+        _chunk("incident", "past incident where replication lag caused stale reads", 0.016, doc_type="incident"),
+        {"chunk_id": "log", "content": "[Log Entry] replication slot inactive", "doc_type": "log", "source": "influxdb"},
+    ]
+
+    packed, _ = pack_context(chunks, max_tokens=1000, token_counter=_word_count)
+
+    assert [c["chunk_id"] for c in packed] == ["runbook", "incident", "log"]
@@ -0,0 +1,104 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingestion.chunker import build_document_summary  # noqa: E402
+
+
+def test_incident_summary_uses_description_and_root_cause():
+    content = (
+        "Incident: Database disk full\n\n"
+        "Description: Disk usage on db01\nreached 98%\n\n"
+        "Root Cause: Log rotation disabled\n\n"
+        "Resolution Steps:\n  1. Re-enable logrotate"
+    )
+
+    summary = build_document_summary("incident", "Incident: Database disk full", content)
+
+    assert summary == (
+        "Incident: Database disk full\n"
+        "Description: Disk usage on db01 reached 98% Root Cause: Log rotation disabled"
+    )
+
+
+def test_runbook_summary_stops_before_steps_and_is_capped():
+    content = "Use this runbook when the disk fills up.\n\nSteps:\n1. Check df -h\n2. Rotate logs"
+
+    assert build_document_summary("runbook", "Disk Full", content) == (
+        "Disk Full\nUse this runbook when the disk fills up."
+    )
+    assert len(build_document_summary("runbook", "Disk Full", "word " * 500, max_chars=100)) <= 100
+
+
+def test_update_document_recomputes_summary_on_content_edit(monkeypatch):
+    from contextlib import contextmanager
+    from ingestion.api import documents
+
+    executed = []
+    row = {"doc_type": "runbook", "title": "Disk Full", "content": "Rotate logs when the disk fills up."}
+
+    class FakeCursor:
+        def execute(self, sql, params=None):
+            executed.append((" ".join(sql.split()), params))
+
+        def fetchone(self):
+            return row
+
+    class FakeConn:
+        committed = False
+
+        def cursor(self):
+            return FakeCursor()
+
+        def commit(self):
+            FakeConn.committed = True
+
+    @contextmanager
+    def fake_connection_context():
+        yield FakeConn()
+
+    monkeypatch.setattr(documents, "get_db_connection_context", fake_connection_context)
+    monkeypatch.setattr("ingestion.embeddings.embed_text", lambda text: [0.5, 0.25])
+
+    documents.update_document("doc-1", content=row["content"])
+
+    summary_updates = [params for sql, params in executed if sql.startswith("UPDATE documents SET summary =")]
+    assert summary_updates == [(build_document_summary("runbook", "Disk Full", row["content"]), "[0.5,0.25]", "doc-1")]
+    assert FakeConn.committed
+
+
+def test_update_document_keeps_summary_on_metadata_edit(monkeypatch):
+    from contextlib import contextmanager
+    from ingestion.api import documents
+
+    executed = []
+
+    class FakeCursor:
+        def execute(self, sql, params=None):
+            executed.append(" ".join(sql.split()))
+
+        def fetchone(self):
+            return {"id": "doc-1"}
+
+    class FakeConn:
+        def cursor(self):
+            return FakeCursor()
+
+        def commit(self):
+            pass
+
+    @contextmanager
+    def fake_connection_context():
+        yield FakeConn()
+
+    def unexpected_embed(text):
+        raise AssertionError("summary must not be re-embedded when title/content are unchanged")
+
+    monkeypatch.setattr(documents, "get_db_connection_context", fake_connection_context)
+    monkeypatch.setattr("ingestion.embeddings.embed_text", unexpected_embed)
+
+    documents.update_document("doc-1", service="billing")
+
+    assert not any(sql.startswith("UPDATE documents SET summary =") for sql in executed)
@@ -0,0 +1,129 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retrieval import embedding_cache  # noqa: E402
+from retrieval.embedding_cache import QueryEmbeddingCache, embedding_cache_key  # noqa: E402
+
+
+def _patch_embed(monkeypatch):
+    calls = []
+
+    def fake_embed_text(text: str, model: str = None):
+        calls.append((text, model))
+        return [float(len(text)), 1.0]
+
+    monkeypatch.setattr(embedding_cache, "embed_text", fake_embed_text)
+    return calls
+
+
+def test_repeated_query_is_embedded_once(monkeypatch):
+    calls = _patch_embed(monkeypatch)
+    cache = QueryEmbeddingCache(max_entries=10, ttl_seconds=60)
+
+    first = cache.get_embedding("High CPU on database\nCPU above 90%", model="m")
+    second = cache.get_embedding("High CPU on database CPU above 90%  ", model="m")
+
+    assert first == second
+    assert len(calls) == 1
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_key_is_scoped_by_model(monkeypatch):
+    calls = _patch_embed(monkeypatch)
+    cache = QueryEmbeddingCache(max_entries=10, ttl_seconds=60)
+
+    cache.get_embedding("disk full", model="model-a")
+    cache.get_embedding("disk full", model="model-b")
+
+    assert len(calls) == 2
+    assert embedding_cache_key("disk full", "model-a") != embedding_cache_key("disk full", "model-b")
+
+
+def test_least_recently_used_entry_is_evicted(monkeypatch):
+    calls = _patch_embed(monkeypatch)
+    cache = QueryEmbeddingCache(max_entries=2, ttl_seconds=60)
+
+    cache.get_embedding("a", model="m")
+    cache.get_embedding("b", model="m")
+    cache.get_embedding("a", model="m")  # refresh "a"
+    cache.get_embedding("c", model="m")  # evicts "b"
+    cache.get_embedding("a", model="m")
+    cache.get_embedding("b", model="m")
+
+    assert [text for text, _ in calls] == ["a", "b", "c", "b"]
+    assert cache.get_stats()["evictions"] == 2
+
+
+def test_expired_entry_is_re_embedded(monkeypatch):
+    calls = _patch_embed(monkeypatch)
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(embedding_cache.time, "monotonic", lambda: clock["now"])
+    cache = QueryEmbeddingCache(max_entries=10, ttl_seconds=30)
+
+    cache.get_embedding("latency spike", model="m")
+    clock["now"] += 31
+    cache.get_embedding("latency spike", model="m")
+
+    assert len(calls) == 2
+    assert cache.get_stats()["expirations"] == 1
+
+
+class FakeSharedConnection:
+    """embedding_cache table stand-in: records statements, shared-tier lookups miss."""
+
+    def __init__(self):
+        self.statements = []
+        self.rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, params=None):
+        self.statements.append((" ".join(query.split()), params))
+        self.rowcount = 3 if query.lstrip().startswith("DELETE") else 1
+
+    def fetchone(self):
+        return None
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_expired_shared_rows_are_pruned_once_per_interval(monkeypatch):
+    _patch_embed(monkeypatch)
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(embedding_cache.time, "monotonic", lambda: clock["now"])
+    db = FakeSharedConnection()
+    monkeypatch.setattr(embedding_cache, "get_db_connection_context", lambda: db)
+    cache = QueryEmbeddingCache(
+        max_entries=10, ttl_seconds=60, shared_tier=True, shared_ttl_seconds=3600,
+        shared_prune_interval_seconds=300, shared_prune_batch_size=50
+    )
+
+    cache.get_embedding("disk full", model="m")
+    cache.get_embedding("cpu high", model="m")
+    clock["now"] += 301
+    cache.get_embedding("oom killed", model="m")
+
+    prunes = [params for query, params in db.statements if query.startswith("DELETE FROM embedding_cache")]
+    assert prunes == [{"ttl_seconds": 3600.0, "batch_size": 50}] * 2
+    assert cache.get_stats()["shared_pruned"] == 6
+    assert all("tier = 'query'" in query for query, _ in db.statements if query.startswith("DELETE"))
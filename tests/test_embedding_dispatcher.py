@@ -0,0 +1,88 @@
+import sys
+import os
+
+import httpx
+import pytest
+from openai import RateLimitError, BadRequestError
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingestion.embedding_dispatcher import EmbeddingDispatcher, pack_batches, parse_reset_seconds  # noqa: E402
+
+
+def _api_error(error_class, status, headers=None):
+    response = httpx.Response(status, headers=headers or {}, request=httpx.Request("POST", "https://api.test/embeddings"))
+    return error_class(f"HTTP {status}", response=response, body=None)
+
+
+def test_batches_are_packed_by_tokens_and_items():
+    assert pack_batches([40, 40, 40, 10, 90, 200, 5], max_batch_tokens=100, max_batch_items=3) == [
+        [0, 1], [2, 3], [4], [5], [6]
+    ]
+    assert pack_batches([1] * 5, max_batch_tokens=100, max_batch_items=2) == [[0, 1], [2, 3], [4]]
+
+
+def test_reset_durations_are_parsed():
+    assert parse_reset_seconds("20") == 20.0
+    assert parse_reset_seconds("250ms") == 0.25
+    assert parse_reset_seconds("6m0s") == 360.0
+    assert parse_reset_seconds(None) is None
+
+
+def test_concurrent_batches_keep_input_order():
+    dispatcher = EmbeddingDispatcher(max_concurrency=3, max_batch_tokens=10)
+
+    def send(batch):
+        return [[float(text)] for text in batch], {}
+
+    texts = [str(i) for i in range(20)]
+    embeddings = dispatcher.dispatch(texts, send, token_counts=[4] * 20, max_batch_items=100)
+
+    assert embeddings == [[float(i)] for i in range(20)]
+    assert dispatcher.get_stats()["batches"] == 10
+
+
+def test_rate_limit_is_retried_and_halves_concurrency():
+    delays = []
+    dispatcher = EmbeddingDispatcher(max_concurrency=4, sleep=delays.append)
+    attempts = []
+
+    def send(batch):
+        attempts.append(list(batch))
+        if len(attempts) == 1:
+            raise _api_error(RateLimitError, 429, {"retry-after": "2"})
+        return [[1.0] for _ in batch], {}
+
+    assert dispatcher.dispatch(["a", "b"], send) == [[1.0], [1.0]]
+    assert len(attempts) == 2
+    assert delays and delays[0] >= 2.0
+    stats = dispatcher.get_stats()
+    assert stats["rate_limited"] == 1 and stats["retries"] == 1
+    # Halved to 2 by the 429, then one additive step after the successful retry
+    assert dispatcher.concurrency == 3
+
+
+def test_client_errors_are_not_retried():
+    dispatcher = EmbeddingDispatcher(sleep=lambda delay: None)
+    calls = []
+
+    def send(batch):
+        calls.append(batch)
+        raise _api_error(BadRequestError, 400)
+
+    with pytest.raises(BadRequestError):
+        dispatcher.dispatch(["a"], send)
+    assert len(calls) == 1
+
+
+def test_concurrency_follows_rate_limit_headers():
+    dispatcher = EmbeddingDispatcher(max_concurrency=8, min_concurrency=1)
+    dispatcher.on_success({"x-ratelimit-remaining-requests": "100", "x-ratelimit-remaining-tokens": "3000"}, 1000)
+    assert dispatcher.concurrency == 3
+
+    dispatcher.on_success({"x-ratelimit-remaining-requests": "100", "x-ratelimit-remaining-tokens": "900000"}, 1000)
+    assert dispatcher.concurrency == 4
+
+    dispatcher.on_success({"x-ratelimit-remaining-requests": "0"}, 1000)
+    assert dispatcher.concurrency == 1
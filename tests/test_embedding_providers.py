@@ -0,0 +1,150 @@
+import asyncio
+import sys
+import os
+
+import httpx
+import numpy as np
+import pytest
+from openai import RateLimitError
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ingestion.embedding_providers as providers  # noqa: E402
+from ingestion.embedding_dispatcher import EmbeddingDispatcher  # noqa: E402
+from ingestion.embedding_providers import (  # noqa: E402
+    LocalEmbeddingProvider, OpenAIEmbeddingProvider, create_embedding_provider, verify_embedding_dimension
+)
+
+
+class FakeEncoder:
+    """Stands in for a SentenceTransformer: text length and index encoded in the vector."""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_sentence_embedding_dimension(self):
+        return 2
+
+    def encode(self, texts, batch_size, normalize_embeddings, convert_to_numpy, show_progress_bar):
+        self.calls.append((list(texts), normalize_embeddings))
+        return np.array([[float(len(text)), 1.0] for text in texts])
+
+
+class FakeOpenAIClient:
+    """Embeddings endpoint that answers 429 to the first HTTP request, then succeeds.
+
+    With max_retries > 0 the 429 is retried inside the client, as the SDK does.
+    """
+
+    def __init__(self, max_retries=2, requests=None):
+        self.max_retries = max_retries
+        self.requests = [] if requests is None else requests
+        self.embeddings = self
+        self.with_raw_response = self
+        self.on_request = None
+
+    def with_options(self, max_retries):
+        client = FakeOpenAIClient(max_retries, self.requests)
+        client.on_request = self.on_request
+        return client
+
+    def create(self, model, input):
+        for _ in range(self.max_retries + 1):
+            self.requests.append(list(input))
+            if self.on_request:
+                self.on_request()
+            if len(self.requests) > 1:
+                return self
+            if self.max_retries == 0:
+                response = httpx.Response(429, request=httpx.Request("POST", "https://api.test/embeddings"))
+                raise RateLimitError("HTTP 429", response=response, body=None)
+
+    def parse(self):
+        return type("Response", (), {"data": [type("Item", (), {"embedding": [1.0]})() for _ in self.requests[-1]]})()
+
+    @property
+    def headers(self):
+        return {}
+
+
+class FakeCursor:
+    def __init__(self, typmod):
+        self.typmod = typmod
+        self.executed = 0
+
+    def execute(self, query, params=None):
+        self.executed += 1
+
+    def fetchone(self):
+        return {"atttypmod": self.typmod}
+
+
+def test_local_provider_keeps_order_across_thread_slices():
+    encoder = FakeEncoder()
+    provider = LocalEmbeddingProvider(batch_size=2, threads=3, normalize=False, encoder=encoder)
+    texts = ["a" * n for n in range(1, 8)]
+
+    embeddings = provider.embed(texts)
+
+    assert [vector[0] for vector in embeddings] == [float(n) for n in range(1, 8)]
+    assert len(encoder.calls) == 4
+    assert provider.dimension == 2
+
+
+def test_local_provider_async_runs_on_pool():
+    encoder = FakeEncoder()
+    provider = LocalEmbeddingProvider(normalize=True, encoder=encoder)
+
+    embeddings = asyncio.run(provider.embed_async(["abc"]))
+
+    assert embeddings == [[3.0, 1.0]]
+    assert encoder.calls == [(["abc"], True)]
+
+
+def test_provider_selected_from_config():
+    cfg = {
+        "model": "text-embedding-3-small",
+        "oss_model": "bge-m3",
+        "models": {"bge-m3": {"dimension": 1024}},
+        "local": {"model_name": "BAAI/bge-m3", "backend": "onnx", "threads": 2},
+    }
+    openai_provider = create_embedding_provider(cfg)
+    assert isinstance(openai_provider, OpenAIEmbeddingProvider)
+    assert openai_provider.dimension == 1536
+
+    local_provider = create_embedding_provider(dict(cfg, provider="local"))
+    assert isinstance(local_provider, LocalEmbeddingProvider)
+    assert (local_provider.model, local_provider.backend, local_provider.threads) == ("bge-m3", "onnx", 2)
+    assert local_provider.dimension == 1024
+    assert isinstance(create_embedding_provider(dict(cfg, use_oss_alternative=True)), LocalEmbeddingProvider)
+
+
+def test_dimension_mismatch_fails_fast(monkeypatch):
+    monkeypatch.setattr(providers, "_verified_dimension", None)
+    local_provider = LocalEmbeddingProvider(dimension=1024, encoder=FakeEncoder())
+    with pytest.raises(ValueError, match="vector\\(1536\\)"):
+        verify_embedding_dimension(FakeCursor(1536), local_provider)
+
+    cur = FakeCursor(1536)
+    openai_provider = OpenAIEmbeddingProvider("text-embedding-3-small")
+    verify_embedding_dimension(cur, openai_provider)
+    verify_embedding_dimension(cur, openai_provider)
+    assert cur.executed == 1
+
+
+def test_openai_rate_limit_reaches_dispatcher_on_first_attempt(monkeypatch):
+    dispatcher = EmbeddingDispatcher(max_concurrency=4, sleep=lambda delay: None)
+    client = FakeOpenAIClient()
+    limits = []
+    client.on_request = lambda: limits.append(dispatcher.concurrency)
+    monkeypatch.setattr(providers, "get_embedding_client", lambda: client)
+    monkeypatch.setattr(providers, "get_embedding_dispatcher", lambda: dispatcher)
+
+    embeddings = OpenAIEmbeddingProvider("text-embedding-3-small").embed(["a", "b"])
+
+    assert embeddings == [[1.0], [1.0]]
+    assert len(client.requests) == 2
+    # The SDK did not retry the 429 itself; the dispatcher halved its limit before the retry
+    assert limits == [4, 2]
+    assert dispatcher.get_stats()["rate_limited"] == 1
@@ -0,0 +1,55 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingestion.embedding_store import EmbeddingStore, text_sha256  # noqa: E402
+from retrieval.embedding_cache import embedding_cache_key  # noqa: E402
+
+
+class InMemoryStore(EmbeddingStore):
+    """EmbeddingStore with the embedding_cache table replaced by a dict."""
+
+    def __init__(self, rows=None):
+        super().__init__()
+        self.rows = dict(rows or {})
+        self.lookups = []
+
+    def lookup(self, model, hashes):
+        self.lookups.append(list(hashes))
+        return {h: self.rows[(model, h)] for h in hashes if (model, h) in self.rows}
+
+    def save(self, model, embeddings):
+        for h, embedding in embeddings.items():
+            self.rows[(model, h)] = embedding
+
+
+def test_hash_matches_query_cache_key():
+    assert embedding_cache_key("disk full\non node", "m") == ("m", text_sha256("disk full on node"))
+
+
+def test_only_unseen_texts_are_embedded_once():
+    store = InMemoryStore({("m", text_sha256("known")): [9.0]})
+    calls = []
+
+    def embed_missing(texts):
+        calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    embeddings = store.embed(["known", "new text", "known", "new text", "abc"], "m", embed_missing)
+
+    assert embeddings == [[9.0], [8.0], [9.0], [8.0], [3.0]]
+    assert calls == [["new text", "abc"]]
+    assert len(store.lookups) == 1 and len(store.lookups[0]) == 3
+
+    # Second ingest of the same texts: one lookup, no provider call
+    assert store.embed(["new text", "abc"], "m", embed_missing) == [[8.0], [3.0]]
+    assert len(calls) == 1
+    assert store.get_stats()["misses"] == 2
+
+
+def test_store_is_scoped_by_model():
+    store = InMemoryStore({("old-model", text_sha256("text")): [1.0]})
+    embeddings = store.embed(["text"], "new-model", lambda texts: [[2.0] for _ in texts])
+    assert embeddings == [[2.0]]
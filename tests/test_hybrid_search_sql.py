@@ -0,0 +1,200 @@
+import sys
+import os
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retrieval.hybrid_search import _build_hybrid_search_query, _recency_cache_key  # noqa: E402
+
+
+def test_sql_text_is_constant_across_values():
+    """Different queries, filters and weights must reuse one prepared statement."""
+    query_a, params_a = _build_hybrid_search_query(
+        "disk full", [0.1, 0.2], "Database", None, 5, 0.7, 0.3
+    )
+    query_b, params_b = _build_hybrid_search_query(
+        "cpu high", [0.3, 0.4], "network", None, 10, 0.6, 0.4
+    )
+
+    assert query_a is query_b
+    assert params_a["service_pattern"] == "%database%"
+    assert params_b["vector_weight"] == 0.6
+    assert params_b["match_limit"] == 20
+
+
+def test_weights_and_embedding_are_bind_parameters():
+    query, params = _build_hybrid_search_query(
+        "disk full", [0.1, 0.2], None, "sql-server", 5, 0.7, 0.3, include_embeddings=True
+    )
+
+    assert "%(vector_weight)s::float8" in query
+    assert "%(fulltext_weight)s::float8" in query
+    assert "%(query_vec)b" in query
+    assert "0.7" not in query
+    assert "service_norm" not in query
+    assert isinstance(params["query_vec"], np.ndarray)
+    assert params["query_vec"].dtype == np.float32
+
+
+def test_tsquery_is_parsed_once():
+    query, _ = _build_hybrid_search_query("disk full", [0.1, 0.2], None, None, 5, 0.7, 0.3)
+
+    assert query.count("plainto_tsquery") == 1
+    assert query.count("ts_rank") == 1
+
+
+def test_two_stage_restricts_chunks_to_top_documents():
+    query, params = _build_hybrid_search_query(
+        "disk full", [0.1, 0.2], "Database", None, 5, 0.7, 0.3, document_limit=20
+    )
+    single_stage, single_params = _build_hybrid_search_query("disk full", [0.1, 0.2], "Database", None, 5, 0.7, 0.3)
+
+    assert "top_documents AS MATERIALIZED" in query
+    assert "d.summary_embedding <=> %(query_vec)b" in query
+    assert query.count("c.document_id IN (SELECT id FROM top_documents)") == 2
+    assert "lower(trim(d.service)) LIKE %(service_pattern)s" in query
+    assert params["document_limit"] == 20
+    assert "top_documents" not in single_stage
+    assert single_params["document_limit"] is None
+
+
+def test_recency_settings_are_bound_and_applied_before_limit():
+    recency = {"weight": 0.5, "half_life_days": {"incident": 180}, "max_age_days": {"log": 30, "runbook": None}}
+    query, params = _build_hybrid_search_query("disk full", [0.1, 0.2], None, None, 5, 0.7, 0.3, recency=recency)
+    plain, plain_params = _build_hybrid_search_query("disk full", [0.1, 0.2], None, None, 5, 0.7, 0.3)
+
+    # Max age filters both candidate CTEs (before their LIMIT); decay scales the fused score
+    assert query.count("%(max_age_days)s::jsonb") == 2
+    assert "* COALESCE(v.recency_factor, f.recency_factor) as rrf_score" in query
+    assert params["max_age_days"] == '{"log": 30.0}'
+    assert params["half_life_days"] == '{"incident": 180.0}'
+    assert params["recency_weight"] == 0.5
+    assert "recency_factor" not in plain
+    assert plain_params["max_age_days"] is None
+
+
+def test_disabled_recency_has_no_cache_key():
+    assert _recency_cache_key({"enabled": False, "max_age_days": {"log": 30}}) is None
+    assert _recency_cache_key({"max_age_days": {"log": 30}}) == ((("log", 30.0),), (), 1.0)
+
+
+def test_doc_types_filter_the_partition_key():
+    query, params = _build_hybrid_search_query(
+        "disk full", [0.1, 0.2], None, None, 5, 0.7, 0.3, document_limit=10, doc_types=["runbook", "incident", "runbook"]
+    )
+
+    # Both candidate CTEs filter chunks.doc_type (partition pruning); the document stage filters too
+    assert query.count("c.doc_type = ANY(%(doc_types)s::text[])") == 2
+    assert "d.doc_type = ANY(%(doc_types)s::text[])" in query
+    assert params["doc_types"] == ["incident", "runbook"]
+
+
+def test_indexed_service_is_inlined_for_its_partial_index():
+    from retrieval.service_indexes import ServiceIndexRouter
+
+    router = ServiceIndexRouter()
+    router.set_indexed(["%database%"])
+    routed, params = _build_hybrid_search_query(
+        "disk full", [0.1, 0.2], "Database", None, 5, 0.7, 0.3, service_router=router
+    )
+    other, _ = _build_hybrid_search_query(
+        "disk full", [0.1, 0.2], "network", None, 5, 0.7, 0.3, service_router=router
+    )
+
+    # Literal predicate (same text as the index WHERE clause) in both candidate CTEs
+    assert routed.count("c.service_norm LIKE '%%database%%'") == 2
+    assert "%(service_pattern)s" not in routed
+    assert "c.service_norm LIKE %(service_pattern)s" in other
+    assert params["service_pattern"] == "%database%"
+
+
+def test_stage_statements_select_one_candidate_stage():
+    full, params = _build_hybrid_search_query("disk full", [0.1, 0.2], "Database", None, 5, 0.7, 0.3)
+    vector, vector_params = _build_hybrid_search_query(
+        "disk full", [0.1, 0.2], "Database", None, 5, 0.7, 0.3, stage="vector"
+    )
+    fulltext, _ = _build_hybrid_search_query(
+        "disk full", [0.1, 0.2], "Database", None, 5, 0.7, 0.3, stage="fulltext"
+    )
+
+    assert "combined_results" in full
+    assert vector.rstrip().endswith("SELECT id FROM vector_results")
+    assert fulltext.rstrip().endswith("SELECT id FROM fulltext_results")
+    assert "combined_results" not in vector and "combined_results" not in fulltext
+    # Same parameters, so explain runs the stages with the values of the real statement
+    assert vector_params.keys() == params.keys()
+
+
+def test_batch_sql_ranks_fulltext_once_and_binds_binary_vectors():
+    from retrieval.hybrid_search import _hybrid_search_many_params, _hybrid_search_many_sql
+
+    query = _hybrid_search_many_sql(False)
+    params = _hybrid_search_many_params([({"query_text": "disk full", "limit": 3}, [0.1, 0.2])])
+
+    assert query.count("ts_rank") == 1
+    assert "ORDER BY fulltext_score DESC" in query
+    assert "%b::vector[]" in query
+    assert params[0][0].dtype == np.float32
+    assert params[4:6] == [[6], [3]]
+
+
+class _FakeBatchCursor:
+    def __init__(self, executed):
+        self.executed = executed
+        self.connection = self
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchall(self):
+        return []
+
+    def cursor(self):
+        return self
+
+    def rollback(self):
+        self.executed.append(("ROLLBACK", None))
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_batch_search_uses_result_cache_and_per_query_index_settings(monkeypatch):
+    import retrieval.hybrid_search as hybrid_search_module
+
+    executed = []
+    embedded = []
+    stored = {}
+    hit_key = hybrid_search_module._many_query_cache_key({"query_text": "cached", "limit": 5}, 7, False)
+    cache = type("Cache", (), {
+        "get": lambda self, key: [{"chunk_id": "hit"}] if key == hit_key else None,
+        "put": lambda self, key, chunks: stored.__setitem__(key, chunks),
+    })()
+    monkeypatch.setattr(hybrid_search_module, "get_service_index_router", lambda: None)
+    monkeypatch.setattr(hybrid_search_module, "get_search_result_cache", lambda: cache)
+    monkeypatch.setattr(hybrid_search_module, "get_db_connection", lambda: _FakeBatchCursor(executed))
+    monkeypatch.setattr(hybrid_search_module, "get_corpus_version", lambda cur: 7)
+    monkeypatch.setattr(
+        hybrid_search_module, "get_query_embeddings",
+        lambda texts: embedded.extend(texts) or [[0.1, 0.2] for _ in texts]
+    )
+
+    results = hybrid_search_module.hybrid_search_many([
+        {"key": "a", "query_text": "cached", "limit": 5},
+        {"key": "b", "query_text": "disk full", "ef_search": 40},
+        {"key": "c", "query_text": "cpu high", "ef_search": 100},
+    ])
+
+    assert results == {"a": [{"chunk_id": "hit"}], "b": [], "c": []}
+    # Only the misses are embedded, and each ef_search runs in its own transaction
+    assert embedded == ["disk full", "cpu high"]
+    statements = [sql for sql, _ in executed]
+    assert statements[0] == "SET LOCAL hnsw.ef_search = 40"
+    assert statements[2] == "ROLLBACK"
+    assert statements[3] == "SET LOCAL hnsw.ef_search = 100"
+    assert len(stored) == 2
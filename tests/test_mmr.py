@@ -0,0 +1,70 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retrieval import hybrid_search as hybrid_search_module  # noqa: E402
+from retrieval.hybrid_search import mmr_rerank  # noqa: E402
+
+
+def _chunk(chunk_id, rrf_score, embedding):
+    return {
+        "chunk_id": chunk_id,
+        "document_id": f"doc-{chunk_id}",
+        "rrf_score": rrf_score,
+        "embedding": embedding,
+    }
+
+
+def test_near_duplicate_is_skipped_for_diverse_chunk():
+    candidates = [
+        _chunk("a", 0.016, [1.0, 0.0, 0.0]),
+        _chunk("a-copy", 0.015, [0.99, 0.01, 0.0]),
+        _chunk("b", 0.012, [0.0, 1.0, 0.0]),
+    ]
+
+    selected = mmr_rerank(candidates, limit=2, diversity=0.5)
+
+    assert [c["chunk_id"] for c in selected] == ["a", "b"]
+    assert all("embedding" not in c for c in selected)
+
+
+def test_zero_diversity_keeps_relevance_order():
+    candidates = [
+        _chunk("a", 0.016, [1.0, 0.0]),
+        _chunk("a-copy", 0.015, [1.0, 0.0]),
+        _chunk("b", 0.012, [0.0, 1.0]),
+    ]
+
+    selected = mmr_rerank(candidates, limit=3, diversity=0.0)
+
+    assert [c["chunk_id"] for c in selected] == ["a", "a-copy", "b"]
+
+
+def test_missing_embeddings_are_treated_as_dissimilar():
+    candidates = [
+        _chunk("a", 0.016, [1.0, 0.0]),
+        _chunk("a-copy", 0.015, [1.0, 0.0]),
+        _chunk("fulltext-only", 0.010, None),
+    ]
+
+    selected = mmr_rerank(candidates, limit=2, diversity=0.5)
+
+    assert [c["chunk_id"] for c in selected] == ["a", "fulltext-only"]
+
+
+def test_mmr_search_requests_embeddings_for_wider_pool(monkeypatch):
+    calls = []
+
+    def fake_hybrid_search(query_text, service=None, component=None, limit=5, **kwargs):
+        calls.append((limit, kwargs))
+        return [_chunk(str(i), 0.02 - i * 0.001, [1.0, float(i)]) for i in range(limit)]
+
+    monkeypatch.setattr(hybrid_search_module, "hybrid_search", fake_hybrid_search)
+
+    results = hybrid_search_module.mmr_search("disk full", limit=4)
+
+    assert len(results) == 4
+    assert calls[0][0] == 12
+    assert calls[0][1]["include_embeddings"] is True
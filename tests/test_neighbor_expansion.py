@@ -0,0 +1,93 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retrieval.neighbor_expansion import merge_neighbor_windows  # noqa: E402
+
+HEADER = "Type: runbook | Service: database | Title: Disk Space Low"
+
+
+def _word_count(text):
+    return len(text.split())
+
+
+def _row(index, body, document_id="doc-1"):
+    return {
+        "id": f"{document_id}-{index}",
+        "document_id": document_id,
+        "chunk_index": index,
+        "content": f"{HEADER}\n\n{body}",
+    }
+
+
+ROWS = [
+    _row(0, "Step 1: check disk usage with df -h."),
+    _row(1, "Step 2: find large files under /var/log. Step 3: rotate logs."),
+    _row(2, "Step 3: rotate logs. Step 4: confirm free space above 20%."),
+]
+
+
+def _hit(index, rrf_score=0.016):
+    row = ROWS[index]
+    return {
+        "chunk_id": row["id"],
+        "document_id": row["document_id"],
+        "chunk_index": index,
+        "content": row["content"],
+        "doc_type": "runbook",
+        "rrf_score": rrf_score,
+    }
+
+
+def test_hit_is_merged_with_neighbors_and_overlap_removed():
+    merged = merge_neighbor_windows([_hit(1)], ROWS, window=1, max_window_tokens=100, token_counter=_word_count)
+
+    assert len(merged) == 1
+    assert merged[0]["chunk_indices"] == [0, 1, 2]
+    assert merged[0]["neighbor_chunk_ids"] == ["doc-1-0", "doc-1-2"]
+    content = merged[0]["content"]
+    assert content.startswith(HEADER + "\n\n")
+    assert content.count(HEADER) == 1
+    assert content.count("Step 3: rotate logs.") == 1
+    assert "Step 4" in content
+
+
+def test_hit_covered_by_higher_ranked_window_is_dropped():
+    merged = merge_neighbor_windows([_hit(1), _hit(2)], ROWS, window=1, max_window_tokens=100, token_counter=_word_count)
+
+    assert [m["chunk_id"] for m in merged] == ["doc-1-1"]
+
+
+def test_token_budget_limits_window():
+    merged = merge_neighbor_windows([_hit(1)], ROWS, window=1, max_window_tokens=20, token_counter=_word_count)
+
+    # Hit (12 words) + previous neighbor (8 words) fits; the next neighbor would exceed the budget
+    assert merged[0]["chunk_indices"] == [0, 1]
+
+
+def test_chunks_without_position_pass_through():
+    log_entry = {"chunk_id": "influxdb_log_0", "content": "[Log Entry]\nerror", "doc_type": "log"}
+
+    merged = merge_neighbor_windows([log_entry], ROWS, window=1, max_window_tokens=100, token_counter=_word_count)
+
+    assert merged == [log_entry]
+
+
+def test_stored_token_counts_are_used_instead_of_counting():
+    calls = []
+
+    def counting(text):
+        calls.append(text)
+        return _word_count(text)
+
+    rows = [dict(row, token_count=5) for row in ROWS]
+    hit = dict(_hit(1), token_count=5)
+
+    merged = merge_neighbor_windows([hit], rows, window=1, max_window_tokens=15, token_counter=counting)
+
+    assert calls == []
+    assert merged[0]["chunk_indices"] == [0, 1, 2]
+    assert merged[0]["token_count"] == 15
+    assert merged[0]["content_sha256"] is None
@@ -0,0 +1,58 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retrieval.rerank import BM25FReranker, rerank_chunks  # noqa: E402
+
+
+def _chunk(chunk_id, title, content, rrf_score):
+    return {
+        "chunk_id": chunk_id,
+        "document_id": f"doc-{chunk_id}",
+        "doc_title": title,
+        "content": content,
+        "doc_type": "runbook",
+        "rrf_score": rrf_score,
+    }
+
+
+BM25F_CFG = {"enabled": True, "type": "bm25f", "fusion_weight": 0.7}
+
+
+def test_bm25f_prefers_chunk_matching_query_terms():
+    chunks = [
+        _chunk("generic", "Service restart guide", "Restart the service and check health endpoints.", 0.0164),
+        _chunk("disk", "Disk Space Low runbook", "Free disk space on the /var/log partition.", 0.0161),
+    ]
+
+    scores = BM25FReranker().score("Disk Space Low on /var/log partition", chunks)
+
+    assert scores[1] > scores[0]
+
+
+def test_rerank_keeps_top_n_and_promotes_lexical_match():
+    chunks = [
+        _chunk("generic", "Service restart guide", "Restart the service and check health endpoints.", 0.0164),
+        _chunk("cpu", "High CPU runbook", "Check CPU usage and scale compute.", 0.0163),
+        _chunk("disk", "Disk Space Low runbook", "Free disk space on the /var/log partition.", 0.0161),
+    ]
+
+    reranked = rerank_chunks("Disk Space Low on /var/log partition", chunks, BM25F_CFG, top_n=2)
+
+    assert [c["chunk_id"] for c in reranked][0] == "disk"
+    assert len(reranked) == 2
+    assert all("rerank_score" in c for c in reranked)
+    assert "rerank_score" not in chunks[2]
+
+
+def test_rerank_without_lexical_signal_keeps_rrf_order():
+    chunks = [
+        _chunk("a", "Alpha", "alpha text", 0.0164),
+        _chunk("b", "Beta", "beta text", 0.0150),
+    ]
+
+    reranked = rerank_chunks("unrelated query", chunks, BM25F_CFG, top_n=2)
+
+    assert [c["chunk_id"] for c in reranked] == ["a", "b"]
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import sys
+from typing import Any, Dict, List
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_service.agents.resolution_copilot import async_resolution_copilot_agent  # noqa: E402
+
+
+class DummyRepo:
+    """In-memory IncidentRepository holding one approved incident."""
+
+    def __init__(self):
+        self.incident = {
+            "incident_id": "inc-1",
+            "raw_alert": {
+                "alert_id": "alert-1",
+                "source": "prometheus",
+                "title": "High CPU",
+                "description": "CPU above 90%",
+                "labels": {"service": "database", "component": "cpu"},
+            },
+            "triage_output": {"severity": "high", "category": "database", "likely_cause": "Runaway query"},
+            "policy_band": "AUTO",
+            "policy_decision": {"policy_band": "AUTO", "can_auto_apply": True, "requires_approval": False},
+        }
+        self.resolutions = []
+
+    def get_by_id(self, incident_id: str) -> Dict[str, Any]:
+        assert incident_id == self.incident["incident_id"]
+        return self.incident
+
+    def update_resolution(self, **kwargs) -> None:
+        self.resolutions.append(kwargs)
+
+
+def test_async_resolution_uses_async_retrieval_and_llm(monkeypatch):
+    """Async resolution should retrieve and call the LLM asynchronously, never through the blocking calls."""
+    repo = DummyRepo()
+    monkeypatch.setattr("ai_service.agents.resolution_copilot.IncidentRepository", lambda: repo)
+
+    retrieval_calls = []
+
+    async def fake_async_retrieve_context(query_text: str, service=None, component=None, limit: int = 5,
+                                          **kwargs) -> List[Dict[str, Any]]:
+        retrieval_calls.append((service, component))
+        return [
+            {
+                "chunk_id": "rb-1",
+                "document_id": "doc-runbook-1",
+                "content": "Kill the runaway query.",
+                "doc_title": "Runbook - Database CPU",
+                "doc_type": "runbook",
+                "rrf_score": 0.9,
+            }
+        ]
+
+    async def fake_async_call_llm_for_resolution(alert, triage_output, chunks) -> Dict[str, Any]:
+        return {
+            "steps": ["Kill the runaway query."],
+            "risk_level": "low",
+            "estimated_time_minutes": 5,
+            "requires_approval": False,
+            "rollback_plan": {"steps": ["Nothing to roll back."]},
+            "provenance": [{"doc_id": "doc-runbook-1", "chunk_id": "rb-1"}],
+        }
+
+    def unexpected(*args, **kwargs):
+        raise AssertionError("blocking retrieval/LLM call used by async_resolution_copilot_agent")
+
+    monkeypatch.setattr("ai_service.agents.resolution_copilot.async_retrieve_context", fake_async_retrieve_context)
+    monkeypatch.setattr(
+        "ai_service.agents.resolution_copilot.async_call_llm_for_resolution", fake_async_call_llm_for_resolution
+    )
+    monkeypatch.setattr("ai_service.agents.resolution_copilot.retrieve_context", unexpected)
+    monkeypatch.setattr("ai_service.agents.resolution_copilot.call_llm_for_resolution", unexpected)
+    monkeypatch.setattr("ai_service.agents.resolution_copilot.validate_resolution_output",
+                        lambda output, context_chunks=None: (True, []))
+
+    result = asyncio.run(async_resolution_copilot_agent(incident_id="inc-1"))
+
+    assert retrieval_calls == [("database", "cpu")]
+    assert result["incident_id"] == "inc-1"
+    assert result["context_chunks_used"] == 1
+    assert result["resolution"]["provenance"] == [{"doc_id": "doc-runbook-1", "chunk_id": "rb-1"}]
+    assert len(repo.resolutions) == 1
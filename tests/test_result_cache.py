@@ -0,0 +1,82 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retrieval.result_cache import SearchResultCache, search_cache_key  # noqa: E402
+
+
+def _key(query="High CPU on database", version=1, **overrides):
+    params = {
+        "service": "Database",
+        "component": None,
+        "limit": 5,
+        "vector_weight": 0.7,
+        "fulltext_weight": 0.3,
+    }
+    params.update(overrides)
+    return search_cache_key(query, corpus_version=version, **params)
+
+
+def test_hit_returns_independent_copies():
+    cache = SearchResultCache(max_entries=10, ttl_seconds=60)
+    cache.put(_key(), [{"chunk_id": "c1", "rrf_score": 0.016}])
+
+    first = cache.get(_key(query="High CPU on database\n", service=" database "))
+    first[0]["rrf_score"] += 0.05  # apply_retrieval_preferences mutates chunks in place
+    second = cache.get(_key())
+
+    assert second == [{"chunk_id": "c1", "rrf_score": 0.016}]
+    assert cache.get_stats()["hits"] == 2
+
+
+def test_key_covers_filters_limit_and_weights():
+    cache = SearchResultCache(max_entries=10, ttl_seconds=60)
+    cache.put(_key(), [{"chunk_id": "c1"}])
+
+    assert cache.get(_key(component="sql-server")) is None
+    assert cache.get(_key(limit=10)) is None
+    assert cache.get(_key(vector_weight=0.6, fulltext_weight=0.4)) is None
+    assert cache.get(_key(ef_search=100)) is None
+
+
+def test_newer_corpus_version_invalidates_entries():
+    cache = SearchResultCache(max_entries=10, ttl_seconds=60)
+    cache.put(_key(version=1), [{"chunk_id": "c1"}])
+
+    assert cache.get(_key(version=2)) is None
+    # A result computed against the old corpus is not stored after the bump
+    cache.put(_key(version=1), [{"chunk_id": "stale"}])
+    assert cache.get(_key(version=1)) is None
+
+    stats = cache.get_stats()
+    assert stats["invalidations"] == 1
+    assert stats["size"] == 0
+    assert stats["corpus_version"] == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SearchResultCache(max_entries=2, ttl_seconds=60)
+    cache.put(_key("a"), [{"chunk_id": "a"}])
+    cache.put(_key("b"), [{"chunk_id": "b"}])
+    cache.get(_key("a"))
+    cache.put(_key("c"), [{"chunk_id": "c"}])
+
+    assert cache.get(_key("b")) is None
+    assert cache.get(_key("a")) is not None
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_metadata_is_not_shared_between_hits_or_with_the_caller():
+    cache = SearchResultCache(max_entries=10, ttl_seconds=60)
+    chunks = [{"chunk_id": "c1", "metadata": {"service": "database", "tags": {"team": "dba"}}}]
+    cache.put(_key(), chunks)
+    chunks[0]["metadata"]["tags"]["team"] = "changed-after-put"
+
+    first = cache.get(_key())
+    first[0]["metadata"]["service"] = "mutated"
+    first[0]["metadata"]["tags"]["team"] = "mutated"
+    second = cache.get(_key())
+
+    assert second[0]["metadata"] == {"service": "database", "tags": {"team": "dba"}}
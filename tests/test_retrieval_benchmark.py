@@ -0,0 +1,49 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.retrieval_benchmark import (  # noqa: E402
+    FakeEmbedder,
+    build_corpus,
+    compare_reports,
+    recall_at_k,
+    reciprocal_rank,
+)
+
+
+def _cosine(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+def test_fake_embedder_is_deterministic_and_lexical():
+    embedder = FakeEmbedder()
+
+    disk = embedder.embed("Disk usage is above 85% on /var/log partition")
+    assert disk == FakeEmbedder().embed("Disk usage is above 85% on /var/log partition")
+    assert len(disk) == 1536
+    assert _cosine(disk, embedder.embed("disk usage partition")) > _cosine(disk, embedder.embed("ssl certificate expiring"))
+
+
+def test_corpus_queries_are_labeled_with_existing_documents():
+    corpus = build_corpus(seed=7, noise_docs=10, queries_per_template=2)
+    keys = {doc["key"] for doc in corpus["documents"]}
+
+    assert corpus["queries"]
+    assert all(set(query["relevant"]) <= keys for query in corpus["queries"])
+    assert {doc["doc_type"] for doc in corpus["documents"]} >= {"runbook", "incident", "log"}
+
+
+def test_metrics_and_regression_check():
+    retrieved = ["x", "a", "y", "b"]
+
+    assert recall_at_k(retrieved, ["a", "b"], 2) == 0.5
+    assert recall_at_k(retrieved, ["a", "b"], 4) == 1.0
+    assert reciprocal_rank(retrieved, ["a", "b"]) == 0.5
+    assert reciprocal_rank(retrieved, ["z"]) == 0.0
+
+    baseline = {"results": {"hybrid_search": {"recall_at_5": 0.9, "mrr": 0.8}}}
+    current = {"results": {"hybrid_search": {"recall_at_5": 0.8, "mrr": 0.8}}}
+    assert compare_reports(current, baseline, 5, 0.02) == ["hybrid_search recall_at_5: 0.900 -> 0.800"]
+    assert compare_reports(baseline, baseline, 5, 0.02) == []
@@ -0,0 +1,173 @@
+import sys
+import os
+
+import pytest
+from fastapi import HTTPException
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retrieval.explain import summarize_plan  # noqa: E402
+
+
+PLAN = {
+    "Plan": {
+        "Node Type": "Limit",
+        "Actual Rows": 5,
+        "Actual Loops": 1,
+        "Actual Total Time": 4.2,
+        "Shared Hit Blocks": 120,
+        "Shared Read Blocks": 3,
+        "Plans": [
+            {
+                "Node Type": "Hash Join",
+                "Actual Rows": 10,
+                "Actual Loops": 1,
+                "Actual Total Time": 4.0,
+                "Plans": [
+                    {
+                        "Node Type": "Index Scan",
+                        "Relation Name": "chunks_runbook",
+                        "Index Name": "chunks_runbook_svc_30e47b29_idx",
+                        "Actual Rows": 10,
+                        "Actual Loops": 1,
+                        "Actual Total Time": 2.5,
+                    },
+                    {
+                        "Node Type": "Bitmap Index Scan",
+                        "Index Name": "chunks_runbook_tsv_idx",
+                        "Actual Rows": 7,
+                        "Actual Loops": 1,
+                        "Actual Total Time": 0.4,
+                    },
+                ],
+            }
+        ],
+    },
+    "Planning Time": 0.8,
+    "Execution Time": 4.5,
+}
+
+
+def test_summarize_plan_flattens_nodes_and_lists_indexes():
+    summary = summarize_plan(PLAN)
+
+    assert summary["planning_ms"] == 0.8
+    assert summary["execution_ms"] == 4.5
+    assert summary["shared_hit_blocks"] == 120
+    assert summary["indexes"] == ["chunks_runbook_svc_30e47b29_idx", "chunks_runbook_tsv_idx"]
+    assert [node["depth"] for node in summary["nodes"]] == [0, 1, 2, 2]
+    assert summary["nodes"][2]["relation"] == "chunks_runbook"
+    assert not summary["truncated"]
+
+
+def test_summarize_plan_caps_node_list():
+    summary = summarize_plan(PLAN, max_nodes=2)
+
+    assert len(summary["nodes"]) == 2
+    assert summary["truncated"]
+    # Indexes are collected from the whole tree
+    assert len(summary["indexes"]) == 2
+
+
+class _FakeExplainCursor:
+    """Answers the vector/fulltext stage statements with ids and the full statement with fused rows."""
+
+    def __init__(self, executed):
+        self.executed = executed
+        self._rows = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql)
+        statement = sql.rstrip()
+        if statement.endswith("SELECT id FROM vector_results"):
+            self._rows = [{"id": i} for i in range(4)]
+        elif statement.endswith("SELECT id FROM fulltext_results"):
+            self._rows = [{"id": i} for i in range(2)]
+        else:
+            self._rows = [{
+                "id": "c1", "document_id": "d1", "chunk_index": 0, "content": "Restart the pool",
+                "metadata": {}, "doc_title": "Runbook", "doc_type": "runbook",
+                "vector_score": 0.9, "fulltext_score": 0.2, "rrf_score": 0.03,
+            }]
+
+    def fetchall(self):
+        return self._rows
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_explain_hybrid_search_reports_each_stage(monkeypatch):
+    import retrieval.explain as explain_module
+
+    executed = []
+    monkeypatch.setattr(explain_module, "get_query_embedding", lambda text: [0.1, 0.2])
+    monkeypatch.setattr(explain_module, "get_db_connection", lambda: _FakeExplainCursor(executed))
+    monkeypatch.setattr(explain_module, "get_service_index_router", lambda: None)
+
+    trace = explain_module.explain_hybrid_search("pool exhausted", service="Database", limit=5, ef_search=40)
+
+    assert executed[0] == "SET LOCAL hnsw.ef_search = 40"
+    assert trace["candidates"] == {"vector": 4, "fulltext": 2, "fused": 1}
+    stages = trace["stages_ms"]
+    assert set(stages) == {"embedding", "vector", "fulltext", "sql", "fusion_derived", "total"}
+    # Fusion is not timed on its own: it is what the full statement took beyond the two stages
+    assert stages["fusion_derived"] == round(max(stages["sql"] - stages["vector"] - stages["fulltext"], 0.0), 3)
+    assert trace["results"][0]["chunk_id"] == "c1"
+    assert trace["service_index"] is None
+    assert "plans" not in trace
+
+
+def test_explain_endpoint_runs_the_agent_pipeline(monkeypatch):
+    import ai_service.api.v1.retrieval as retrieval_api
+
+    calls = []
+    retrieval_cfg = {
+        "limit": 3,
+        "rerank": {"enabled": False},
+        "doc_types": ["runbook", "incident"],
+        "prefer_types": ["runbook"],
+    }
+
+    def fake_explain_hybrid_search(**kwargs):
+        calls.append(kwargs)
+        return {
+            "results": [
+                {"chunk_id": "i1", "doc_type": "incident", "rrf_score": 0.04, "embedding": [0.1]},
+                {"chunk_id": "r1", "doc_type": "runbook", "rrf_score": 0.03, "embedding": [0.2]},
+            ],
+            "stages_ms": {"embedding": 1.0, "vector": 2.0, "fulltext": 1.0, "sql": 4.0,
+                          "fusion_derived": 1.0, "total": 5.0},
+            "candidates": {"vector": 6, "fulltext": 4, "fused": 2},
+            "service_index": None,
+        }
+
+    monkeypatch.setattr(retrieval_api, "get_retrieval_config", lambda: {"resolution": retrieval_cfg})
+    monkeypatch.setattr(retrieval_api, "explain_hybrid_search", fake_explain_hybrid_search)
+
+    response = retrieval_api.explain_retrieval(
+        retrieval_api.RetrievalExplainRequest(query_text="pool exhausted", service="database", agent="resolution")
+    )
+
+    assert calls[0]["limit"] == 3
+    assert calls[0]["doc_types"] == ["runbook", "incident"]
+    assert calls[0]["document_limit"] is None
+    # prefer_types boost puts the runbook first; embeddings are not returned
+    assert [chunk["chunk_id"] for chunk in response["results"]] == ["r1", "i1"]
+    assert all("embedding" not in chunk for chunk in response["results"])
+    assert list(response["stages_ms"]) == [
+        "embedding", "vector", "fulltext", "sql", "fusion_derived", "preferences", "total"
+    ]
+    assert response["candidates"]["final"] == 2
+    assert "plans" not in response
+
+    with pytest.raises(HTTPException) as excinfo:
+        retrieval_api.explain_retrieval(retrieval_api.RetrievalExplainRequest(query_text="x", agent="other"))
+    assert excinfo.value.status_code == 400
@@ -0,0 +1,75 @@
+import sys
+import os
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retrieval.service_indexes import ServiceIndexRouter, is_routable_pattern, service_predicate_sql  # noqa: E402
+
+
+def test_only_plain_service_patterns_are_routable():
+    assert is_routable_pattern("%database-sql%")
+    assert is_routable_pattern("%payments api%")
+    assert not is_routable_pattern("%o'brien%")
+    assert not is_routable_pattern("%data%base%")
+    assert not is_routable_pattern("%my_svc%")
+    assert not is_routable_pattern(None)
+    with pytest.raises(ValueError):
+        service_predicate_sql("%x'; drop table chunks; --%")
+
+
+def test_route_requires_an_indexed_pattern():
+    router = ServiceIndexRouter()
+    assert router.refresh_due()
+    router.set_indexed(["%database%"])
+
+    assert not router.refresh_due()
+    assert router.route("%database%") == "%database%"
+    assert router.route("%network%") is None
+    assert router.route(None) is None
+
+
+def test_pending_stats_are_aggregated_and_reset():
+    router = ServiceIndexRouter(stats_flush_seconds=0)
+    for pattern in ["%database%", "%network%", "%database%", None]:
+        router.record(pattern)
+
+    assert router.take_pending_stats() == {"patterns": ["%database%", "%network%"], "counts": [2, 1]}
+    assert router.take_pending_stats() is None
+
+
+def test_pending_stats_wait_for_the_flush_interval():
+    router = ServiceIndexRouter(stats_flush_seconds=3600)
+    router.record("%database%")
+    assert router.take_pending_stats() is None
+    assert router.get_stats()["pending_counts"] == {"%database%": 1}
+
+
+class _FakeConnection:
+    def cursor(self):
+        return self
+
+    def close(self):
+        pass
+
+    def commit(self):
+        pass
+
+
+def test_result_cache_hits_are_counted(monkeypatch):
+    import retrieval.hybrid_search as hybrid_search_module
+
+    router = ServiceIndexRouter(stats_flush_seconds=3600)
+    hits = [{"chunk_id": "c1"}]
+    cached = type("Cache", (), {"get": lambda self, key: hits})()
+    monkeypatch.setattr(hybrid_search_module, "get_service_index_router", lambda: router)
+    monkeypatch.setattr(hybrid_search_module, "get_search_result_cache", lambda: cached)
+    monkeypatch.setattr(hybrid_search_module, "get_db_connection", _FakeConnection)
+    monkeypatch.setattr(hybrid_search_module, "get_corpus_version", lambda cur: 7)
+
+    for _ in range(3):
+        assert hybrid_search_module.hybrid_search("disk full", service="Database ") == hits
+
+    assert router.get_stats()["pending_counts"] == {"%database%": 3}
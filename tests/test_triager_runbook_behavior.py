@@ -82,7 +82,7 @@ def test_triager_prefers_runbooks_when_available(monkeypatch, patch_repo):
     """When both incident and runbook chunks are available, runbooks should be present and preferred in context."""
 
     def fake_hybrid_search(query_text: str, service=None, component=None, limit: int = 5,
-                           vector_weight: float = 0.7, fulltext_weight: float = 0.3) -> List[Dict[str, Any]]:
+                           vector_weight: float = 0.7, fulltext_weight: float = 0.3, **kwargs) -> List[Dict[str, Any]]:
         return [
             {
                 "chunk_id": "rb-1",
@@ -151,7 +151,7 @@ def test_triager_runbook_fallback_used_when_primary_search_empty(monkeypatch, pa
     calls = {"primary": 0, "fallback": 0}
 
     def fake_hybrid_search(query_text: str, service=None, component=None, limit: int = 5,
-                           vector_weight: float = 0.7, fulltext_weight: float = 0.3) -> List[Dict[str, Any]]:
+                           vector_weight: float = 0.7, fulltext_weight: float = 0.3, **kwargs) -> List[Dict[str, Any]]:
         # Primary call: with service/component filters → no results
         if service is not None or component is not None:
             calls["primary"] += 1
@@ -214,7 +214,7 @@ def test_triager_generic_review_when_no_evidence_anywhere(monkeypatch, patch_rep
     """When neither primary nor fallback search returns chunks, triager should return generic REVIEW with confidence 0.0."""
 
     def fake_hybrid_search(query_text: str, service=None, component=None, limit: int = 5,
-                           vector_weight: float = 0.7, fulltext_weight: float = 0.3) -> List[Dict[str, Any]]:
+                           vector_weight: float = 0.7, fulltext_weight: float = 0.3, **kwargs) -> List[Dict[str, Any]]:
         return []
 
     monkeypatch.setattr("ai_service.agents.triager.hybrid_search", fake_hybrid_search)
@@ -238,3 +238,124 @@ def test_triager_generic_review_when_no_evidence_anywhere(monkeypatch, patch_rep
     assert result["context_chunks_used"] == 0
     assert result["evidence_chunks"]["chunks_used"] == 0
 
+
+def test_triage_batch_uses_single_prefetch_for_all_alerts(monkeypatch, patch_repo):
+    """Batch triage should retrieve context for every alert with one hybrid_search_many call."""
+    from ai_service.agents.triager import triage_agent_batch
+
+    batches = []
+
+    def fake_hybrid_search_many(queries: List[Dict[str, Any]], **kwargs) -> Dict[Any, List[Dict[str, Any]]]:
+        batches.append(queries)
+        return {
+            q["key"]: [
+                {
+                    "chunk_id": f"rb-{q['key']}",
+                    "document_id": f"doc-runbook-{q['key']}",
+                    "chunk_index": 0,
+                    "content": f"Runbook for {q['service']}",
+                    "metadata": {"doc_type": "runbook", "service": q["service"]},
+                    "doc_title": f"Runbook - {q['service']}",
+                    "doc_type": "runbook",
+                    "vector_score": 0.9,
+                    "fulltext_score": 0.5,
+                    "rrf_score": 0.9,
+                }
+            ]
+            for q in queries
+        }
+
+    def unexpected_hybrid_search(*args, **kwargs):
+        raise AssertionError("per-alert hybrid_search should not be called when context was prefetched")
+
+    monkeypatch.setattr("ai_service.agents.triager.hybrid_search_many", fake_hybrid_search_many)
+    monkeypatch.setattr("ai_service.agents.triager.hybrid_search", unexpected_hybrid_search)
+
+    def fake_call_llm(alert: Dict[str, Any], chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        assert chunks[0]["metadata"]["service"] == alert["labels"]["service"]
+        return {
+            "severity": "high",
+            "category": "database",
+            "summary": "Batch triage summary",
+            "likely_cause": "Test cause",
+            "routing": "SE DBA SQL",
+            "affected_services": [alert["labels"]["service"]],
+            "recommended_actions": ["Follow steps from runbook."],
+            "confidence": 0.8,
+        }
+
+    monkeypatch.setattr("ai_service.agents.triager.call_llm_for_triage", fake_call_llm)
+
+    alerts = [
+        _make_alert("High CPU", "CPU above 90%", service="database", component="cpu"),
+        _make_alert("Disk full", "Disk usage above 95%", service="storage", component="disk"),
+    ]
+
+    results = triage_agent_batch(alerts)
+
+    assert len(batches) == 1
+    assert len(batches[0]) == 2
+    assert [r["context_chunks_used"] for r in results] == [1, 1]
+    assert len(patch_repo.created) == 2
+
+
+def test_async_triage_agent_uses_async_retrieval(monkeypatch, patch_repo):
+    """Async triage should retrieve with async_hybrid_search and call the async LLM client, never the blocking ones."""
+    import asyncio
+    from ai_service.agents.triager import async_triage_agent, rerank_limits
+    from ai_service.core import get_retrieval_config
+
+    async_calls = []
+
+    async def fake_async_hybrid_search(query_text: str, service=None, component=None, limit: int = 5,
+                                       **kwargs) -> List[Dict[str, Any]]:
+        async_calls.append((query_text, service, component, limit))
+        return [
+            {
+                "chunk_id": "rb-1",
+                "document_id": "doc-runbook-1",
+                "chunk_index": 0,
+                "content": "Runbook for database CPU",
+                "metadata": {"doc_type": "runbook", "service": service},
+                "doc_title": "Runbook - Database CPU",
+                "doc_type": "runbook",
+                "vector_score": 0.9,
+                "fulltext_score": 0.5,
+                "rrf_score": 0.9,
+            }
+        ]
+
+    def unexpected_hybrid_search(*args, **kwargs):
+        raise AssertionError("blocking hybrid_search should not be called by async_triage_agent")
+
+    monkeypatch.setattr("ai_service.agents.triager.async_hybrid_search", fake_async_hybrid_search)
+    monkeypatch.setattr("ai_service.agents.triager.hybrid_search", unexpected_hybrid_search)
+
+    async def fake_async_call_llm(alert: Dict[str, Any], chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "severity": "high",
+            "category": "database",
+            "summary": "Async triage summary",
+            "likely_cause": "Test cause",
+            "routing": "SE DBA SQL",
+            "affected_services": ["database"],
+            "recommended_actions": ["Follow steps from runbook."],
+            "confidence": 0.8,
+        }
+
+    def unexpected_call_llm(*args, **kwargs):
+        raise AssertionError("blocking call_llm_for_triage should not be called by async_triage_agent")
+
+    monkeypatch.setattr("ai_service.agents.triager.async_call_llm_for_triage", fake_async_call_llm)
+    monkeypatch.setattr("ai_service.agents.triager.call_llm_for_triage", unexpected_call_llm)
+
+    alert = _make_alert("High CPU", "CPU above 90%", service="database", component="cpu")
+    result = asyncio.run(async_triage_agent(alert))
+
+    assert len(async_calls) == 1
+    # A rerank stage (if configured) widens the fetched candidate pool
+    triage_cfg = get_retrieval_config().get("triage", {})
+    expected_limit, _ = rerank_limits(triage_cfg.get("limit", 5), triage_cfg)
+    assert async_calls[0][1:] == ("database", "cpu", expected_limit)
+    assert result["context_chunks_used"] == 1
+    assert len(patch_repo.created) == 1